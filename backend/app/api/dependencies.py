@@ -1,16 +1,36 @@
 """Dependency injection for API routes."""
 
+import os
 from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
 
 from app.core.config import get_settings, Settings
+from app.core.constants import INGESTION_CHECKPOINT_DIR
 from app.services.embedding_service import EmbeddingService
+from app.services.embedding_providers import EmbeddingProvider, create_embedding_provider
+from app.services.resilience import CircuitBreaker
+from app.services.rate_limiter import EmbeddingScheduler
 from app.services.chunking_service import ChunkingService
-from app.services.vector_store import VectorStore
 from app.services.retrieval_service import RetrievalService
+from app.services.semantic_cache import SemanticCache
+from app.services.query_log import QueryLog
+from app.services.admission import AdmissionController, PRIORITY_INGEST
+from app.utils.dataset_reader import ColumnMapping, parse_columns
+from app.utils.memory import MemoryAccountant
+
+if TYPE_CHECKING:
+    from app.services.vector_store import VectorStore
+    from app.services.sharded_vector_store import ShardedVectorStore
+    from app.services.snapshot_vector_store import SnapshotVectorStore
 
 
 # Singletons
-_vector_store: VectorStore | None = None
+_vector_store: "VectorStore | ShardedVectorStore | SnapshotVectorStore | None" = None
+_embedding_service: EmbeddingService | None = None
+_semantic_cache: SemanticCache | None = None
+_admission_controller: AdmissionController | None = None
+_query_log: QueryLog | None = None
+_memory_accountant: MemoryAccountant | None = None
 
 
 @lru_cache()
@@ -19,14 +39,60 @@ def get_app_settings() -> Settings:
     return get_settings()
 
 
-def get_embedding_service() -> EmbeddingService:
-    """Create embedding service instance."""
+def _create_provider(name: str, base_url: Optional[str] = None) -> EmbeddingProvider:
+    """Create an embedding provider from settings."""
     settings = get_app_settings()
-    return EmbeddingService(
-        api_key=settings.openai_api_key
+    return create_embedding_provider(
+        provider=name,
+        api_key=settings.openai_api_key,
+        base_url=base_url or settings.openai_base_url,
+        timeout=settings.embedding_timeout_seconds,
+        persist_directory=settings.chroma_persist_directory,
+        local_dimensions=settings.local_embedding_dimensions,
+        local_num_features=settings.local_embedding_features,
+        local_fit_sample_size=settings.local_embedding_fit_sample,
+        local_min_fit_texts=settings.local_embedding_min_fit_texts
     )
 
 
+def get_embedding_service() -> EmbeddingService:
+    """
+    Get or create embedding service singleton.
+
+    Shared so latency statistics, hedge budget and circuit breaker state
+    persist across requests.
+    """
+    global _embedding_service
+    if _embedding_service is None:
+        settings = get_app_settings()
+        fallback = settings.embedding_fallback_provider
+        # Request/token quotas only apply to the remote provider
+        rate_limited = settings.embedding_provider == "openai"
+        _embedding_service = EmbeddingService(
+            provider=_create_provider(settings.embedding_provider),
+            fallback_provider=(
+                _create_provider(fallback, settings.embedding_fallback_base_url)
+                if fallback else None
+            ),
+            hedge_percentile=settings.embedding_hedge_percentile,
+            hedge_budget_ratio=settings.embedding_hedge_budget,
+            max_retries=settings.embedding_max_retries,
+            batch_max_retries=settings.embedding_batch_max_retries,
+            circuit_breaker=CircuitBreaker(
+                failure_threshold=settings.circuit_breaker_failure_threshold,
+                reset_timeout=settings.circuit_breaker_reset_seconds
+            ),
+            scheduler=EmbeddingScheduler(
+                requests_per_minute=settings.embedding_rpm_limit if rate_limited else None,
+                tokens_per_minute=settings.embedding_tpm_limit if rate_limited else None,
+                max_batch_size=settings.embedding_batch_size,
+                max_batch_tokens=settings.embedding_batch_max_tokens,
+                max_concurrency=settings.embedding_max_concurrent_batches
+            )
+        )
+    return _embedding_service
+
+
 def get_chunking_service() -> ChunkingService:
     """Create chunking service instance."""
     settings = get_app_settings()
@@ -36,18 +102,96 @@ def get_chunking_service() -> ChunkingService:
     )
 
 
-def get_vector_store() -> VectorStore:
-    """Get or create vector store singleton."""
+def get_vector_store() -> "VectorStore | ShardedVectorStore | SnapshotVectorStore":
+    """
+    Get or create vector store singleton.
+
+    Read-only workers serve the published snapshot; the writer opens
+    Chroma (sharded if configured). Only the store in use is imported, so
+    read-only workers never load chromadb.
+    """
     global _vector_store
     if _vector_store is None:
         settings = get_app_settings()
-        _vector_store = VectorStore(
+        if settings.serving_mode == "readonly":
+            from app.services.snapshot_vector_store import SnapshotVectorStore
+
+            _vector_store = SnapshotVectorStore(
+                snapshot_root=settings.get_snapshot_directory(),
+                name=settings.chroma_collection_name,
+                poll_interval=settings.snapshot_poll_seconds
+            )
+            return _vector_store
+
+        from app.services.sharded_vector_store import create_vector_store
+
+        _vector_store = create_vector_store(
             collection_name=settings.chroma_collection_name,
-            persist_directory=settings.chroma_persist_directory
+            persist_directory=settings.chroma_persist_directory,
+            num_shards=settings.vector_store_shards,
+            layout=settings.vector_store_shard_layout,
+            hnsw_construction_ef=settings.hnsw_construction_ef,
+            hnsw_search_ef=settings.hnsw_search_ef,
+            hnsw_m=settings.hnsw_m,
+            text_store=settings.chunk_text_store_enabled
         )
     return _vector_store
 
 
+def get_semantic_cache() -> SemanticCache | None:
+    """Get or create semantic cache singleton (None if disabled)."""
+    global _semantic_cache
+    settings = get_app_settings()
+    if not settings.semantic_cache_enabled:
+        return None
+    if _semantic_cache is None:
+        _semantic_cache = SemanticCache(
+            max_entries=settings.semantic_cache_max_entries,
+            max_distance=settings.semantic_cache_max_distance
+        )
+    return _semantic_cache
+
+
+def get_query_log() -> QueryLog | None:
+    """Get or create query log singleton (None if disabled)."""
+    global _query_log
+    settings = get_app_settings()
+    if not settings.query_log_enabled:
+        return None
+    if _query_log is None:
+        _query_log = QueryLog(
+            path=settings.get_query_log_path(),
+            max_bytes=settings.query_log_max_bytes
+        )
+    return _query_log
+
+
+def get_memory_accountant() -> MemoryAccountant:
+    """Get or create memory accountant singleton (shared by ingestion and diagnostics)."""
+    global _memory_accountant
+    if _memory_accountant is None:
+        _memory_accountant = MemoryAccountant()
+    return _memory_accountant
+
+
+def get_admission_controller() -> AdmissionController:
+    """
+    Get or create admission controller singleton.
+
+    Shared so the concurrency limit and queue apply across all requests.
+    """
+    global _admission_controller
+    if _admission_controller is None:
+        settings = get_app_settings()
+        _admission_controller = AdmissionController(
+            max_concurrency=settings.admission_max_concurrency,
+            max_queue=settings.admission_max_queue,
+            queue_timeout=settings.admission_queue_timeout_seconds,
+            class_limits={PRIORITY_INGEST: settings.admission_ingest_concurrency}
+        )
+    return _admission_controller
+
+
 def get_retrieval_service() -> RetrievalService:
     """Create retrieval service instance."""
     settings = get_app_settings()
@@ -56,5 +200,21 @@ def get_retrieval_service() -> RetrievalService:
         chunking_service=get_chunking_service(),
         vector_store=get_vector_store(),
         top_k=settings.top_k,
-        similarity_threshold=settings.similarity_threshold
+        similarity_threshold=settings.similarity_threshold,
+        semantic_cache=get_semantic_cache(),
+        ingestion_batch_size=settings.ingestion_batch_size,
+        checkpoint_directory=(
+            os.path.join(settings.chroma_persist_directory, INGESTION_CHECKPOINT_DIR)
+            if settings.ingestion_checkpoint_enabled else None
+        ),
+        deduplication_threshold=(
+            settings.deduplication_threshold if settings.deduplication_enabled else None
+        ),
+        query_log=get_query_log(),
+        memory=get_memory_accountant(),
+        tracemalloc_top_n=settings.ingest_tracemalloc_top_n,
+        column_mapping=ColumnMapping(
+            text=parse_columns(settings.ingest_text_columns),
+            metadata=parse_columns(settings.ingest_metadata_columns)
+        )
     )
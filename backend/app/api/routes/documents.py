@@ -0,0 +1,107 @@
+"""Document delete/update endpoints."""
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+
+from app.core.config import Settings
+from app.core.exceptions import ModelNotFittedError
+from app.models.schemas import (
+    DeleteRequest,
+    DeleteResponse,
+    DocumentUpdateRequest,
+    DocumentUpdateResponse,
+)
+from app.services.retrieval_service import RetrievalService
+from app.services.admission import AdmissionController, PRIORITY_INGEST
+from app.api.dependencies import get_admission_controller, get_app_settings, get_retrieval_service
+
+router = APIRouter()
+
+# Set by the store on every chunk; metadata must not override them
+RESERVED_METADATA_KEYS = {"document_id", "chunk_index"}
+
+
+async def _compact_if_needed(vector_store, deleted_ratio: float) -> None:
+    # Re-checked here: an earlier scheduled compaction may already have run
+    if vector_store.needs_compaction(deleted_ratio):
+        await vector_store.compact()
+
+
+def _schedule_compaction(
+    background_tasks: BackgroundTasks,
+    service: RetrievalService,
+    settings: Settings
+) -> bool:
+    """Rebuild the index after the response once enough entries are deleted."""
+    if not service.vector_store.needs_compaction(settings.compaction_deleted_ratio):
+        return False
+    background_tasks.add_task(_compact_if_needed, service.vector_store, settings.compaction_deleted_ratio)
+    return True
+
+
+@router.delete("/documents/{document_id}", response_model=DeleteResponse)
+async def delete_document(
+    document_id: str,
+    background_tasks: BackgroundTasks,
+    service: RetrievalService = Depends(get_retrieval_service),
+    settings: Settings = Depends(get_app_settings),
+    admission: AdmissionController = Depends(get_admission_controller)
+) -> DeleteResponse:
+    """Delete all chunks of a document."""
+    async with admission.admit(PRIORITY_INGEST):
+        deleted = await service.delete_documents(document_ids=[document_id])
+    if not deleted:
+        raise HTTPException(status_code=404, detail=f"Document not found: {document_id}")
+    return DeleteResponse(
+        deleted=deleted,
+        compaction_scheduled=_schedule_compaction(background_tasks, service, settings)
+    )
+
+
+@router.post("/documents/delete", response_model=DeleteResponse)
+async def delete_matching(
+    request: DeleteRequest,
+    background_tasks: BackgroundTasks,
+    service: RetrievalService = Depends(get_retrieval_service),
+    settings: Settings = Depends(get_app_settings),
+    admission: AdmissionController = Depends(get_admission_controller)
+) -> DeleteResponse:
+    """
+    Delete all chunks matching a metadata filter.
+
+    Uses Chroma's `where` syntax, e.g. `{"source_file": "reviews.csv"}`
+    or `{"row_index": {"$lt": 1000}}`.
+    """
+    async with admission.admit(PRIORITY_INGEST):
+        deleted = await service.delete_documents(where=request.where)
+    return DeleteResponse(
+        deleted=deleted,
+        compaction_scheduled=_schedule_compaction(background_tasks, service, settings)
+    )
+
+
+@router.put("/documents/{document_id}", response_model=DocumentUpdateResponse)
+async def replace_document(
+    document_id: str,
+    request: DocumentUpdateRequest,
+    background_tasks: BackgroundTasks,
+    service: RetrievalService = Depends(get_retrieval_service),
+    settings: Settings = Depends(get_app_settings),
+    admission: AdmissionController = Depends(get_admission_controller)
+) -> DocumentUpdateResponse:
+    """
+    Replace a document: its old chunks are deleted and the new text is
+    chunked and embedded. Only this document is re-embedded.
+    """
+    reserved = RESERVED_METADATA_KEYS & request.metadata.keys()
+    if reserved:
+        raise HTTPException(status_code=400, detail=f"Reserved metadata keys: {', '.join(sorted(reserved))}")
+
+    async with admission.admit(PRIORITY_INGEST):
+        try:
+            result = await service.replace_document(document_id, request.text, request.metadata)
+        except ModelNotFittedError as e:
+            raise HTTPException(status_code=409, detail=str(e)) from e
+    return DocumentUpdateResponse(
+        **result,
+        compaction_scheduled=_schedule_compaction(background_tasks, service, settings)
+    )
@@ -1,40 +1,96 @@
 """Ingestion endpoint."""
 
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, BackgroundTasks, UploadFile, File, Depends, HTTPException, Query, Response
 import os
 import tempfile
 
+from app.core.config import Settings
+from app.core.exceptions import DatasetError, ModelNotFittedError
 from app.models.schemas import IngestionResponse
 from app.services.retrieval_service import RetrievalService
-from app.api.dependencies import get_retrieval_service
+from app.services.admission import AdmissionController, PRIORITY_INGEST
+from app.api.dependencies import get_admission_controller, get_app_settings, get_retrieval_service
+from app.utils.dataset_reader import ColumnMapping, SUPPORTED_SUFFIXES, dataset_suffix, parse_columns
+from app.utils.timing import RequestTrace
 
 router = APIRouter()
 
+# Uploads are copied to disk in pieces of this size, never held whole
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
 
 @router.post("/ingest", response_model=IngestionResponse)
 async def ingest_dataset(
+    response: Response,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    service: RetrievalService = Depends(get_retrieval_service)
+    debug: bool = Query(default=False, description="Return a per-stage trace in the response"),
+    text_columns: Optional[str] = Query(
+        default=None, description="Comma-separated columns joined into the document text"
+    ),
+    metadata_columns: Optional[str] = Query(
+        default=None, description="Comma-separated columns stored as chunk metadata"
+    ),
+    service: RetrievalService = Depends(get_retrieval_service),
+    admission: AdmissionController = Depends(get_admission_controller),
+    settings: Settings = Depends(get_app_settings)
 ) -> IngestionResponse:
     """
     Ingest and process a dataset.
 
-    Accepts CSV files with text data.
+    Accepts CSV, JSON Lines (both optionally gzip-compressed), Parquet
+    and Arrow files, which are streamed in batches of rows. The text and
+    metadata columns default to INGEST_TEXT_COLUMNS and
+    INGEST_METADATA_COLUMNS. Stage durations are reported in the
+    Server-Timing header. Ingestion runs at low priority with a
+    limited number of slots, so it cannot starve queries. Afterwards the
+    hottest logged queries are re-cached in the background.
     """
     # Validate file type
-    if not file.filename.endswith('.csv'):
-        raise HTTPException(status_code=400, detail="Only CSV files are supported")
+    suffix = dataset_suffix(file.filename or "")
+    if suffix not in SUPPORTED_SUFFIXES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file type; supported: {', '.join(SUPPORTED_SUFFIXES)}"
+        )
+
+    column_mapping = None
+    if text_columns is not None or metadata_columns is not None:
+        column_mapping = ColumnMapping(
+            text=parse_columns(text_columns if text_columns is not None else settings.ingest_text_columns),
+            metadata=parse_columns(
+                metadata_columns if metadata_columns is not None else settings.ingest_metadata_columns
+            )
+        )
 
-    # Save uploaded file temporarily
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.csv') as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
+    trace = RequestTrace()
+
+    # Save uploaded file temporarily (the suffix tells the reader the format)
+    with trace.stage("upload"):
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+            while content := await file.read(UPLOAD_CHUNK_BYTES):
+                tmp.write(content)
+            tmp_path = tmp.name
 
     try:
         # Process the dataset
-        result = await service.ingest_dataset(tmp_path)
-        return IngestionResponse(**result)
+        async with admission.admit(PRIORITY_INGEST, trace=trace):
+            try:
+                result = await service.ingest_dataset(tmp_path, trace=trace, column_mapping=column_mapping)
+            except (DatasetError, ModelNotFittedError) as e:
+                raise HTTPException(status_code=400, detail=str(e)) from e
+        # Ingestion invalidated the cache; warm it again for hot queries
+        background_tasks.add_task(service.prewarm, settings.query_prewarm_top_n)
+
+        with trace.stage("serialize"):
+            ingestion_response = IngestionResponse(**result)
+        if debug:
+            ingestion_response.trace = trace.to_dict()
+
+        response.headers["Server-Timing"] = trace.server_timing_header()
+        return ingestion_response
 
     finally:
         # Clean up temp file
@@ -0,0 +1,60 @@
+"""Operational metrics endpoint."""
+
+from typing import Dict, Any, Optional
+
+from fastapi import APIRouter, Depends
+
+from app.services.admission import AdmissionController
+from app.services.query_log import QueryLog
+from app.services.semantic_cache import SemanticCache
+from app.utils.memory import MemoryAccountant, process_memory
+from app.api.dependencies import (
+    get_admission_controller,
+    get_query_log,
+    get_memory_accountant,
+    get_semantic_cache,
+    get_vector_store,
+)
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def metrics(
+    admission: AdmissionController = Depends(get_admission_controller),
+    query_log: Optional[QueryLog] = Depends(get_query_log)
+) -> Dict[str, Any]:
+    """
+    Load metrics for autoscaling.
+
+    Reports in-flight requests, queue depth and shed counts per
+    priority class, and the query log's backlog if it is enabled.
+    """
+    report = {"admission": admission.stats()}
+    if query_log is not None:
+        report["query_log"] = query_log.stats()
+    return report
+
+
+@router.get("/metrics/memory")
+async def memory_metrics(
+    accountant: MemoryAccountant = Depends(get_memory_accountant),
+    cache: Optional[SemanticCache] = Depends(get_semantic_cache),
+    vector_store=Depends(get_vector_store)
+) -> Dict[str, Any]:
+    """
+    Approximate memory per component.
+
+    Reports process RSS, in-flight ingestion buffers (documents, chunks,
+    embeddings, deduplication index) with their peaks during the latest
+    ingestion, the semantic cache size, the vector index size in memory
+    and on disk, and the latest tracemalloc report if tracing is enabled.
+    Component sizes are estimates; RSS is the ground truth.
+    """
+    return {
+        "process": process_memory(),
+        "ingestion": accountant.snapshot(),
+        "semantic_cache_bytes": cache.memory_bytes() if cache is not None else None,
+        "vector_store": vector_store.memory_usage(),
+        "allocations": accountant.allocations,
+    }
@@ -1,10 +1,12 @@
 """Retrieval endpoint."""
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 
 from app.models.schemas import QueryRequest, QueryResponse
 from app.services.retrieval_service import RetrievalService
-from app.api.dependencies import get_retrieval_service
+from app.services.admission import AdmissionController, PRIORITY_QUERY
+from app.api.dependencies import get_admission_controller, get_retrieval_service
+from app.utils.timing import RequestTrace
 
 router = APIRouter()
 
@@ -12,17 +14,33 @@ router = APIRouter()
 @router.post("/query", response_model=QueryResponse)
 async def query(
     request: QueryRequest,
-    service: RetrievalService = Depends(get_retrieval_service)
+    response: Response,
+    service: RetrievalService = Depends(get_retrieval_service),
+    admission: AdmissionController = Depends(get_admission_controller)
 ) -> QueryResponse:
     """
     Search for relevant text chunks.
 
-    Returns the top-k most similar chunks with similarity scores.
+    Returns the top-k most similar chunks with similarity scores. With
+    `include_neighbors`, each result also carries the chunks before and
+    after it in its document, fetched in one batched lookup.
+    Stage durations are reported in the Server-Timing header; set
+    `debug` to also get the full trace in the body. When the server is
+    saturated the request is rejected with 503 and a Retry-After header.
     """
-    results = await service.retrieve(request.query)
+    trace = RequestTrace()
+    async with admission.admit(PRIORITY_QUERY, trace=trace):
+        results = await service.retrieve(request.query, trace=trace, include_neighbors=request.include_neighbors)
 
-    return QueryResponse(
-        query=request.query,
-        results=results,
-        num_results=len(results)
-    )
+    with trace.stage("serialize"):
+        query_response = QueryResponse(
+            query=request.query,
+            results=results,
+            num_results=len(results)
+        )
+    # Taken after the stage, so the body reports the same stages as the header
+    if request.debug:
+        query_response.trace = trace.to_dict()
+
+    response.headers["Server-Timing"] = trace.server_timing_header()
+    return query_response
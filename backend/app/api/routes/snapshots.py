@@ -0,0 +1,33 @@
+"""Snapshot publishing endpoint (writer only)."""
+
+import asyncio
+
+from fastapi import APIRouter, Depends
+
+from app.core.config import Settings
+from app.models.schemas import SnapshotPublishResponse
+from app.services.admission import AdmissionController, PRIORITY_INGEST
+from app.services.snapshot import publish_snapshot
+from app.api.dependencies import get_admission_controller, get_app_settings, get_vector_store
+
+router = APIRouter()
+
+
+@router.post("/snapshots/publish", response_model=SnapshotPublishResponse)
+async def publish(
+    settings: Settings = Depends(get_app_settings),
+    admission: AdmissionController = Depends(get_admission_controller)
+) -> SnapshotPublishResponse:
+    """
+    Export the index and publish it to read-only workers.
+
+    Workers switch to the new snapshot within SNAPSHOT_POLL_SECONDS.
+    """
+    vector_store = get_vector_store()
+    async with admission.admit(PRIORITY_INGEST):
+        # Writes wait for the export, so it pages a consistent collection
+        async with vector_store.write_locked():
+            manifest = await asyncio.to_thread(
+                publish_snapshot, vector_store, settings.get_snapshot_directory()
+            )
+    return SnapshotPublishResponse(**manifest)
@@ -5,10 +5,13 @@ This module provides centralized configuration management with environment
 variable support and validation.
 """
 
-from typing import List
+import os
+from typing import List, Optional
 from pydantic import Field, validator
 from pydantic_settings import BaseSettings
 
+from app.core.constants import QUERY_LOG_FILE, SNAPSHOT_DIR
+
 
 class Settings(BaseSettings):
     """
@@ -18,9 +21,14 @@ class Settings(BaseSettings):
     """
 
     # OpenAI Configuration
-    openai_api_key: str = Field(
-        ...,
-        description="OpenAI API key for embedding generation"
+    openai_api_key: Optional[str] = Field(
+        default=None,
+        description="OpenAI API key for embedding generation (required for the openai provider)"
+    )
+
+    openai_base_url: Optional[str] = Field(
+        default=None,
+        description="Override the OpenAI API base URL (e.g. a local stand-in for load tests)"
     )
 
     # Vector Database Configuration
@@ -36,6 +44,93 @@ class Settings(BaseSettings):
         default="rag_documents",
         description="ChromaDB collection name"
     )
+    vector_store_shards: int = Field(
+        default=1,
+        ge=1,
+        le=256,
+        description="Number of shards (1 = a single collection); change with reshard.py"
+    )
+    hnsw_construction_ef: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="HNSW construction ef (None = Chroma default 100); applies to newly built indexes"
+    )
+    hnsw_search_ef: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="HNSW search ef (None = Chroma default 10); higher = better recall, slower queries; "
+                    "applies to newly built indexes"
+    )
+    hnsw_m: Optional[int] = Field(
+        default=None,
+        ge=2,
+        description="HNSW M, links per node (None = Chroma default 16); applies to newly built indexes"
+    )
+    vector_store_shard_layout: str = Field(
+        default="collections",
+        description="Shard placement: 'collections' in one directory or one 'directories' per shard"
+    )
+    chunk_text_store_enabled: bool = Field(
+        default=False,
+        description="Keep chunk texts in a compressed store beside the index; fetch them only for final results"
+    )
+    compaction_deleted_ratio: float = Field(
+        default=0.2,
+        gt=0.0,
+        le=1.0,
+        description="Rebuild the ANN index in the background once this fraction of entries is deleted"
+    )
+
+    # Serving Configuration
+    serving_mode: str = Field(
+        default="readwrite",
+        description="'readwrite' (single writer process) or 'readonly' (query-only workers "
+                    "serving the published snapshot; ingestion dependencies are never imported)"
+    )
+    snapshot_directory: Optional[str] = Field(
+        default=None,
+        description="Root of published snapshots (default: CHROMA_PERSIST_DIRECTORY/snapshots)"
+    )
+    snapshot_poll_seconds: float = Field(
+        default=1.0,
+        gt=0.0,
+        description="How often read-only workers check for a newly published snapshot"
+    )
+
+    # Ingestion Configuration
+    ingestion_batch_size: int = Field(
+        default=1000,
+        ge=1,
+        description="Rows chunked, embedded and stored per ingestion batch"
+    )
+    ingestion_checkpoint_enabled: bool = Field(
+        default=True,
+        description="Checkpoint /ingest progress so a failed upload can be resumed by re-uploading it"
+    )
+    ingest_text_columns: str = Field(
+        default="",
+        description="Comma-separated columns joined into the document text (empty = 'text' column, else the first)"
+    )
+    ingest_metadata_columns: str = Field(
+        default="",
+        description="Comma-separated columns stored as chunk metadata"
+    )
+    deduplication_enabled: bool = Field(
+        default=False,
+        description="Collapse exact and near-duplicate chunks onto one stored chunk before embedding"
+    )
+    deduplication_threshold: float = Field(
+        default=0.8,
+        gt=0.0,
+        le=1.0,
+        description="Minimum estimated Jaccard similarity of character shingles for a near duplicate"
+    )
+    ingest_tracemalloc_top_n: int = Field(
+        default=0,
+        ge=0,
+        le=1000,
+        description="Trace allocations during ingestion and report this many top sites (0 = off; slow)"
+    )
 
     # RAG Configuration
     chunk_size: int = Field(
@@ -63,6 +158,69 @@ class Settings(BaseSettings):
         description="Minimum cosine similarity score to accept results"
     )
 
+    # Semantic Cache Configuration
+    semantic_cache_enabled: bool = Field(
+        default=True,
+        description="Serve near-duplicate queries from a response cache"
+    )
+    semantic_cache_max_entries: int = Field(
+        default=1024,
+        ge=1,
+        le=100_000,
+        description="Maximum cached queries (least recently used are evicted)"
+    )
+    semantic_cache_max_distance: float = Field(
+        default=0.05,
+        ge=0.0,
+        le=1.0,
+        description="Maximum cosine distance between queries to reuse cached results"
+    )
+
+    # Query Log
+    query_log_enabled: bool = Field(
+        default=False,
+        description="Log served queries (normalized text, latency, result ids) off the request path"
+    )
+    query_log_path: Optional[str] = Field(
+        default=None,
+        description="Query log file (default: <chroma_persist_directory>/query_log.jsonl)"
+    )
+    query_log_max_bytes: int = Field(
+        default=64 * 1024 * 1024,
+        ge=1024,
+        description="Rotate the query log to <path>.1 beyond this size"
+    )
+    query_prewarm_top_n: int = Field(
+        default=100,
+        ge=0,
+        le=10_000,
+        description="Most frequent logged queries cached at startup and after ingestion (0 = off)"
+    )
+
+    # Admission Control
+    admission_max_concurrency: int = Field(
+        default=32,
+        ge=1,
+        le=1024,
+        description="Maximum requests processed at once (queries and ingestion)"
+    )
+    admission_max_queue: int = Field(
+        default=128,
+        ge=0,
+        le=100_000,
+        description="Maximum requests waiting for a slot; more are rejected with 503"
+    )
+    admission_queue_timeout_seconds: float = Field(
+        default=5.0,
+        gt=0.0,
+        description="Maximum time a request waits for a slot before it is rejected with 503"
+    )
+    admission_ingest_concurrency: int = Field(
+        default=2,
+        ge=1,
+        description="Maximum slots held by ingestion and document updates, so queries are never starved"
+    )
+
     # Cost Management
     budget_limit: float = Field(
         default=1.0,
@@ -81,6 +239,12 @@ class Settings(BaseSettings):
         le=65535,
         description="API port number"
     )
+    api_workers: int = Field(
+        default=1,
+        ge=1,
+        le=256,
+        description="Worker processes when serving_mode is 'readonly' (the writer always runs one)"
+    )
     cors_origins: str = Field(
         default="http://localhost:3000,http://localhost:5173",
         description="Allowed CORS origins (comma-separated)"
@@ -96,6 +260,144 @@ class Settings(BaseSettings):
         description="Dimensions of the embedding vectors"
     )
 
+    # Embedding Provider Configuration
+    embedding_provider: str = Field(
+        default="openai",
+        description="Embedding provider to use (openai, local)"
+    )
+    local_embedding_dimensions: int = Field(
+        default=256,
+        ge=8,
+        le=2048,
+        description="Dimensions of the local CPU embedding vectors"
+    )
+    local_embedding_features: int = Field(
+        default=2048,
+        ge=64,
+        le=8192,
+        description="Size of the hashed n-gram feature space of the local provider"
+    )
+    local_embedding_fit_sample: int = Field(
+        default=50_000,
+        ge=1,
+        description="Documents sampled from the first ingested dataset (and chunk texts kept) to fit the local provider"
+    )
+    local_embedding_min_fit_texts: int = Field(
+        default=1000,
+        ge=1,
+        description="Fewest chunk texts the local provider is fitted on"
+    )
+
+    # Embedding Resilience Configuration
+    embedding_timeout_seconds: float = Field(
+        default=30.0,
+        gt=0.0,
+        description="Timeout for a single embedding API call"
+    )
+    embedding_max_retries: int = Field(
+        default=2,
+        ge=0,
+        le=10,
+        description="Retries for transient embedding failures (jittered exponential backoff)"
+    )
+    embedding_hedge_percentile: float = Field(
+        default=0.95,
+        ge=0.0,
+        lt=1.0,
+        description="Latency percentile after which a query embedding is hedged (0 disables)"
+    )
+    embedding_hedge_budget: float = Field(
+        default=0.1,
+        ge=0.0,
+        le=1.0,
+        description="Maximum hedged requests as a fraction of query embedding requests"
+    )
+    circuit_breaker_failure_threshold: int = Field(
+        default=5,
+        ge=1,
+        description="Consecutive embedding failures before the circuit opens"
+    )
+    circuit_breaker_reset_seconds: float = Field(
+        default=30.0,
+        gt=0.0,
+        description="Seconds the circuit stays open before a trial request"
+    )
+    embedding_batch_max_retries: int = Field(
+        default=6,
+        ge=0,
+        le=20,
+        description="Retries per bulk embedding batch (rate limits and transient errors)"
+    )
+    embedding_rpm_limit: Optional[int] = Field(
+        default=3000,
+        ge=1,
+        description="Provider requests-per-minute limit for bulk embedding"
+    )
+    embedding_tpm_limit: Optional[int] = Field(
+        default=1_000_000,
+        ge=1,
+        description="Provider tokens-per-minute limit for bulk embedding"
+    )
+    embedding_batch_size: int = Field(
+        default=512,
+        ge=1,
+        le=2048,
+        description="Maximum texts per embedding request"
+    )
+    embedding_batch_max_tokens: int = Field(
+        default=100_000,
+        ge=1000,
+        description="Maximum estimated tokens per embedding request"
+    )
+    embedding_max_concurrent_batches: int = Field(
+        default=8,
+        ge=1,
+        le=64,
+        description="Maximum embedding batches in flight"
+    )
+    embedding_fallback_provider: Optional[str] = Field(
+        default=None,
+        description="Provider used while the circuit is open; must be the same "
+                    "provider as embedding_provider so vectors match the index"
+    )
+    embedding_fallback_base_url: Optional[str] = Field(
+        default=None,
+        description="Base URL of the fallback endpoint serving the same OpenAI model"
+    )
+
+    @validator("embedding_provider")
+    def validate_embedding_provider(cls, v, values):
+        """Ensure the embedding provider is supported and configured."""
+        if v not in ("openai", "local"):
+            raise ValueError("embedding_provider must be 'openai' or 'local'")
+        if v == "openai" and not values.get("openai_api_key"):
+            raise ValueError("openai_api_key is required for the openai embedding provider")
+        return v
+
+    @validator("embedding_fallback_provider")
+    def validate_embedding_fallback_provider(cls, v, values):
+        """Ensure the fallback embeds into the same vector space as the index."""
+        if v is not None and v != values.get("embedding_provider"):
+            raise ValueError(
+                "embedding_fallback_provider must match embedding_provider; "
+                "another model's vectors cannot be searched against the index"
+            )
+        return v
+
+    @validator("vector_store_shard_layout")
+    def validate_shard_layout(cls, v):
+        """Ensure the shard layout is supported."""
+        if v not in ("collections", "directories"):
+            raise ValueError("vector_store_shard_layout must be 'collections' or 'directories'")
+        return v
+
+    @validator("serving_mode")
+    def validate_serving_mode(cls, v):
+        """Ensure the serving mode is supported."""
+        if v not in ("readwrite", "readonly"):
+            raise ValueError("serving_mode must be 'readwrite' or 'readonly'")
+        return v
+
     @validator("chunk_overlap")
     def validate_chunk_overlap(cls, v, values):
         """Ensure chunk overlap is less than chunk size."""
@@ -103,6 +405,14 @@ class Settings(BaseSettings):
             raise ValueError("chunk_overlap must be less than chunk_size")
         return v
 
+    def get_snapshot_directory(self) -> str:
+        """Get the root directory of published snapshots."""
+        return self.snapshot_directory or os.path.join(self.chroma_persist_directory, SNAPSHOT_DIR)
+
+    def get_query_log_path(self) -> str:
+        """Get the query log file path."""
+        return self.query_log_path or os.path.join(self.chroma_persist_directory, QUERY_LOG_FILE)
+
     def get_cors_origins_list(self) -> List[str]:
         """Get CORS origins as a list."""
         return [origin.strip() for origin in self.cors_origins.split(",")]
@@ -4,6 +4,19 @@
 EMBEDDING_MODEL = "text-embedding-3-small"
 EMBEDDING_COST_PER_1M_TOKENS = 0.02
 
+# Local embeddings
+LOCAL_EMBEDDING_MODEL_FILE = "local_embedding_model.npz"
+
+# Ingestion
+INGESTION_CHECKPOINT_DIR = "ingestion_checkpoints"
+
+# Chunk texts kept outside the vector index
+CHUNK_TEXT_DIR = "chunk_text"
+
+# Serving
+SNAPSHOT_DIR = "snapshots"
+QUERY_LOG_FILE = "query_log.jsonl"
+
 # API
 API_VERSION = "1.0.0"
 API_TITLE = "RAG Retrieval System"
@@ -12,3 +25,8 @@ API_TITLE = "RAG Retrieval System"
 METADATA_CHUNK_ID = "chunk_id"
 METADATA_DOCUMENT_ID = "document_id"
 METADATA_CHUNK_INDEX = "chunk_index"
+METADATA_SOURCE_DOCUMENT_IDS = "source_document_ids"
+METADATA_DUPLICATE_COUNT = "duplicate_count"
+# Adjacency within a document; absent on its first/last chunk
+METADATA_PREV_CHUNK_ID = "prev_chunk_id"
+METADATA_NEXT_CHUNK_ID = "next_chunk_id"
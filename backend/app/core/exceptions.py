@@ -11,6 +11,16 @@ class EmbeddingError(RAGException):
     pass
 
 
+class ModelNotFittedError(EmbeddingError):
+    """The embedding provider must be fitted on a corpus first."""
+    pass
+
+
+class CircuitOpenError(EmbeddingError):
+    """Embedding provider is failing; calls are rejected until it recovers."""
+    pass
+
+
 class VectorStoreError(RAGException):
     """Error with vector database operations."""
     pass
@@ -23,4 +33,27 @@ class ChunkingError(RAGException):
 
 class BudgetExceededError(RAGException):
     """Budget limit exceeded."""
-    pass
\ No newline at end of file
+    pass
+
+
+class CheckpointError(RAGException):
+    """Error reading or writing an ingestion checkpoint."""
+    pass
+
+
+class DatasetError(RAGException):
+    """Dataset file cannot be read or lacks the mapped columns."""
+    pass
+
+
+class SnapshotError(RAGException):
+    """Error exporting or importing a vector index snapshot."""
+    pass
+
+
+class OverloadedError(RAGException):
+    """Server is at capacity; the request was shed and may be retried."""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
@@ -1,12 +1,24 @@
 """API request and response models."""
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from pydantic import BaseModel, Field
 
 
 class QueryRequest(BaseModel):
     """Request model for query endpoint."""
     query: str = Field(..., min_length=1, description="Search query")
+    debug: bool = Field(default=False, description="Return a per-stage trace in the response")
+    include_neighbors: bool = Field(
+        default=False,
+        description="Return each result with the chunks before and after it in its document"
+    )
+
+
+class NeighborChunk(BaseModel):
+    """Chunk adjacent to a retrieval result in its document."""
+    chunk_id: str
+    text: str
+    chunk_index: int
 
 
 class RetrievalResult(BaseModel):
@@ -16,6 +28,10 @@ class RetrievalResult(BaseModel):
     similarity_score: float
     chunk_index: int
     document_id: str
+    previous_chunk_id: Optional[str] = None
+    next_chunk_id: Optional[str] = None
+    previous_chunk: Optional[NeighborChunk] = None
+    next_chunk: Optional[NeighborChunk] = None
 
 
 class QueryResponse(BaseModel):
@@ -23,6 +39,7 @@ class QueryResponse(BaseModel):
     query: str
     results: List[RetrievalResult]
     num_results: int
+    trace: Optional[Dict[str, Any]] = None
 
 
 class IngestionResponse(BaseModel):
@@ -30,3 +47,44 @@ class IngestionResponse(BaseModel):
     num_documents: int
     num_chunks: int
     cost: float
+    resumed_batches: int = 0
+    duplicate_chunks: int = 0
+    trace: Optional[Dict[str, Any]] = None
+
+
+class DeleteRequest(BaseModel):
+    """Request model for deleting chunks by metadata."""
+    where: Dict[str, Any] = Field(
+        ...,
+        min_length=1,
+        description="Chroma metadata filter, e.g. {\"source_file\": \"reviews.csv\"}"
+    )
+
+
+class DeleteResponse(BaseModel):
+    """Response model for delete endpoints."""
+    deleted: int
+    compaction_scheduled: bool = False
+
+
+class DocumentUpdateRequest(BaseModel):
+    """Request model for replacing a document."""
+    text: str = Field(..., min_length=1, description="New document text")
+    metadata: Dict[str, Any] = Field(default_factory=dict, description="Metadata stored with every chunk")
+
+
+class DocumentUpdateResponse(BaseModel):
+    """Response model for document replacement."""
+    document_id: str
+    num_chunks: int
+    deleted: int
+    cost: float
+    compaction_scheduled: bool = False
+
+
+class SnapshotPublishResponse(BaseModel):
+    """Response model for snapshot publishing."""
+    path: str
+    count: int
+    dimensions: int
+    created_at: str
@@ -0,0 +1,191 @@
+"""Admission control and load shedding for API requests."""
+
+import asyncio
+import itertools
+import math
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, AsyncIterator
+
+from app.core.exceptions import OverloadedError
+from app.utils.timing import RequestTrace
+
+
+# Lower value = served first
+PRIORITY_QUERY = "query"
+PRIORITY_INGEST = "ingest"
+PRIORITIES = {PRIORITY_QUERY: 0, PRIORITY_INGEST: 1}
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    sequence: int
+    request_class: str = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class AdmissionController:
+    """
+    Concurrency limiter with a bounded, prioritized wait queue.
+
+    At most `max_concurrency` requests run at once. Further requests wait
+    in a queue of at most `max_queue` entries, served by priority (queries
+    before ingestion) and then arrival order; a request that finds the
+    queue full, or waits longer than `queue_timeout`, is shed with an
+    OverloadedError instead of piling up. A full queue sheds its newest
+    lowest-priority waiter to admit a higher-priority request, so queued
+    ingestion never crowds out queries. `class_limits` caps the slots a
+    class may hold, so long-running ingestion cannot occupy all of them.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 32,
+        max_queue: int = 128,
+        queue_timeout: float = 5.0,
+        class_limits: Optional[Dict[str, int]] = None
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.class_limits = class_limits or {}
+
+        self.active: Counter = Counter()
+        self.admitted: Counter = Counter()
+        self.rejected: Counter = Counter()
+        self.timed_out: Counter = Counter()
+        # Exponentially weighted mean service time per class (seconds)
+        self.service_time: Dict[str, float] = {}
+
+        self._waiters: List[_Waiter] = []
+        self._sequence = itertools.count()
+
+    def _has_slot(self, request_class: str) -> bool:
+        limit = self.class_limits.get(request_class, self.max_concurrency)
+        return sum(self.active.values()) < self.max_concurrency and self.active[request_class] < limit
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiters in priority order."""
+        for waiter in sorted(self._waiters):
+            if sum(self.active.values()) >= self.max_concurrency:
+                break
+            if self._has_slot(waiter.request_class):
+                self._waiters.remove(waiter)
+                self.active[waiter.request_class] += 1
+                waiter.future.set_result(None)
+
+    def retry_after(self, request_class: str = PRIORITY_QUERY) -> int:
+        """Seconds a shed client should wait: the time to drain the queue ahead of it."""
+        service_time = self.service_time.get(request_class, 1.0)
+        return max(1, math.ceil(service_time * (len(self._waiters) + 1) / self.max_concurrency))
+
+    def _shed(self, request_class: str, reason: str) -> OverloadedError:
+        return OverloadedError(
+            f"Server overloaded ({reason}), retry later",
+            retry_after=self.retry_after(request_class)
+        )
+
+    async def acquire(self, request_class: str = PRIORITY_QUERY) -> None:
+        """
+        Wait for a slot.
+
+        Raises:
+            OverloadedError: If the queue is full, the wait times out, or a
+                higher-priority request takes the place in the queue
+        """
+        priority = PRIORITIES[request_class]
+        # Only skip the queue if nobody of the same or higher priority is waiting
+        if self._has_slot(request_class) and not any(w.priority <= priority for w in self._waiters):
+            self.active[request_class] += 1
+            self.admitted[request_class] += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            # The newest waiter of the lowest priority makes room for a more urgent request
+            evicted = max(self._waiters, default=None)
+            if evicted is None or evicted.priority <= priority:
+                self.rejected[request_class] += 1
+                raise self._shed(request_class, "queue full")
+            self._waiters.remove(evicted)
+            self.rejected[evicted.request_class] += 1
+            evicted.future.set_exception(self._shed(evicted.request_class, "queue full"))
+
+        waiter = _Waiter(priority, next(self._sequence), request_class, asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait({waiter.future}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            # The client went away; give back a slot granted in the meantime
+            if waiter.future.done():
+                if waiter.future.exception() is None:
+                    self.release(request_class)
+            else:
+                self._waiters.remove(waiter)
+                waiter.future.cancel()
+            raise
+
+        if not waiter.future.done():
+            self._waiters.remove(waiter)
+            waiter.future.cancel()
+            self.timed_out[request_class] += 1
+            raise self._shed(request_class, "queue timeout")
+        # Raises the OverloadedError of a waiter evicted from a full queue
+        waiter.future.result()
+        self.admitted[request_class] += 1
+
+    def release(self, request_class: str = PRIORITY_QUERY, seconds: Optional[float] = None) -> None:
+        """Free a slot and record the request's service time."""
+        self.active[request_class] -= 1
+        if seconds is not None:
+            previous = self.service_time.get(request_class)
+            self.service_time[request_class] = seconds if previous is None else 0.8 * previous + 0.2 * seconds
+        self._dispatch()
+
+    @asynccontextmanager
+    async def admit(
+        self,
+        request_class: str = PRIORITY_QUERY,
+        trace: Optional[RequestTrace] = None
+    ) -> AsyncIterator[None]:
+        """
+        Run a block in an admitted slot.
+
+        Args:
+            request_class: "query" or "ingest"
+            trace: Optional request trace to record the "queue" stage
+
+        Raises:
+            OverloadedError: If the request is shed
+        """
+        trace = trace or RequestTrace()
+        with trace.stage("queue"):
+            await self.acquire(request_class)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(request_class, time.perf_counter() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, in-flight requests and shed counts per class."""
+        queued = Counter(waiter.request_class for waiter in self._waiters)
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": sum(self.active.values()),
+            "queue_depth": len(self._waiters),
+            "classes": {
+                request_class: {
+                    "in_flight": self.active[request_class],
+                    "queued": queued[request_class],
+                    "admitted": self.admitted[request_class],
+                    "shed_queue_full": self.rejected[request_class],
+                    "shed_timeout": self.timed_out[request_class],
+                    "mean_service_seconds": round(self.service_time.get(request_class, 0.0), 4),
+                }
+                for request_class in PRIORITIES
+            },
+        }
@@ -0,0 +1,90 @@
+"""Compressed key-value store for chunk texts and metadata."""
+
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from typing import Any, Dict, Iterable, List, Tuple
+
+# SQLite's default limit on bound parameters per statement is 999
+_MAX_PARAMETERS = 900
+
+# (text, metadata)
+Record = Tuple[str, Dict[str, Any]]
+
+
+def _encode(text: str, metadata: Dict[str, Any]) -> bytes:
+    return zlib.compress(json.dumps({"t": text, "m": metadata}, separators=(",", ":")).encode("utf-8"))
+
+
+def _decode(data: bytes) -> Record:
+    record = json.loads(zlib.decompress(data))
+    return record["t"], record["m"]
+
+
+class ChunkTextStore:
+    """
+    Chunk texts and metadata keyed by chunk id, zlib-compressed in SQLite.
+
+    Kept next to the vector index so the index holds only vectors and the
+    fields it filters on; results are hydrated from here in one batched
+    lookup after ranking. Safe to use from several threads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS chunks (id TEXT PRIMARY KEY, data BLOB NOT NULL)")
+        self._connection.commit()
+        self._lock = threading.Lock()
+
+    def put(self, records: Iterable[Tuple[str, str, Dict[str, Any]]]) -> None:
+        """Insert or replace (id, text, metadata) records."""
+        rows = [(chunk_id, _encode(text, metadata)) for chunk_id, text, metadata in records]
+        with self._lock, self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO chunks (id, data) VALUES (?, ?)", rows)
+
+    def get_many(self, ids: List[str]) -> Dict[str, Record]:
+        """
+        Look up records by id.
+
+        Returns:
+            Mapping of found ids to (text, metadata); unknown ids are left out
+        """
+        found: Dict[str, Record] = {}
+        with self._lock:
+            for start in range(0, len(ids), _MAX_PARAMETERS):
+                batch = ids[start:start + _MAX_PARAMETERS]
+                rows = self._connection.execute(
+                    f"SELECT id, data FROM chunks WHERE id IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                found.update((chunk_id, _decode(data)) for chunk_id, data in rows)
+        return found
+
+    def merge_metadata(self, updates: Dict[str, Dict[str, Any]]) -> None:
+        """Merge metadata into stored records (unknown ids are ignored)."""
+        existing = self.get_many(list(updates))
+        self.put(
+            (chunk_id, text, {**metadata, **updates[chunk_id]})
+            for chunk_id, (text, metadata) in existing.items()
+        )
+
+    def delete(self, ids: List[str]) -> None:
+        """Delete records by id."""
+        with self._lock, self._connection:
+            for start in range(0, len(ids), _MAX_PARAMETERS):
+                batch = ids[start:start + _MAX_PARAMETERS]
+                self._connection.execute(f"DELETE FROM chunks WHERE id IN ({','.join('?' * len(batch))})", batch)
+
+    def clear(self) -> None:
+        """Delete all records."""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM chunks")
+
+    def count(self) -> int:
+        """Number of stored records."""
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
@@ -3,6 +3,7 @@
 import re
 from typing import List
 from app.models.domain import Document, Chunk
+from app.core.constants import METADATA_PREV_CHUNK_ID, METADATA_NEXT_CHUNK_ID
 
 
 class ChunkingService:
@@ -33,9 +34,9 @@ class ChunkingService:
             if len(current_chunk) + len(sentence) > self.chunk_size and current_chunk:
                 chunks.append(current_chunk.strip())
 
-                # Start new chunk with overlap from previous chunk
-                overlap_text = current_chunk[-self.chunk_overlap:] if len(current_chunk) > self.chunk_overlap else current_chunk
-                current_chunk = overlap_text + " " + sentence
+                # Start new chunk with overlap from previous chunk ([-0:] would be all of it)
+                overlap_text = current_chunk[-self.chunk_overlap:] if self.chunk_overlap else ""
+                current_chunk = overlap_text + " " + sentence if overlap_text else sentence
             else:
                 current_chunk += " " + sentence if current_chunk else sentence
 
@@ -49,6 +50,9 @@ class ChunkingService:
         """
         Convert document into chunks.
 
+        Each chunk carries the document's metadata and the ids of the
+        chunks before and after it, so neighbors can be fetched by id.
+
         Args:
             document: Document to process
 
@@ -64,10 +68,15 @@ class ChunkingService:
                 document_id=document.document_id,
                 chunk_index=idx,
                 metadata={
+                    **document.metadata,
                     "source_file": document.metadata.get("source_file", ""),
                     "chunk_size": len(text),
                 }
             )
             chunks.append(chunk)
 
+        for previous, following in zip(chunks, chunks[1:]):
+            previous.metadata[METADATA_NEXT_CHUNK_ID] = following.chunk_id
+            following.metadata[METADATA_PREV_CHUNK_ID] = previous.chunk_id
+
         return chunks
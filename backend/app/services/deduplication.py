@@ -0,0 +1,239 @@
+"""Near-duplicate chunk detection with MinHash/LSH."""
+
+import hashlib
+import re
+from typing import BinaryIO, Collection, List, Dict, Tuple, Optional
+
+import numpy as np
+
+from app.core.constants import METADATA_DUPLICATE_COUNT, METADATA_SOURCE_DOCUMENT_IDS
+from app.models.domain import Chunk
+
+
+_NON_ALPHANUMERIC = re.compile(r"[^0-9a-z]+")
+# Multiplier of the polynomial shingle hash
+_SHINGLE_BASE = np.uint64(1_000_003)
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and reduce punctuation and whitespace to single spaces."""
+    return _NON_ALPHANUMERIC.sub(" ", text.lower()).strip()
+
+
+def shingle_hashes(text: str, shingle_size: int = 5) -> np.ndarray:
+    """
+    32-bit hashes of the character shingles of a normalized text.
+
+    Hashes are computed with NumPy over a sliding window of the UTF-8
+    bytes, so they are stable across processes (unlike hash()).
+    """
+    data = np.frombuffer(text.encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+    if len(data) < shingle_size:
+        data = np.pad(data, (0, shingle_size - len(data)))
+    windows = np.lib.stride_tricks.sliding_window_view(data, shingle_size)
+    powers = _SHINGLE_BASE ** np.arange(shingle_size - 1, -1, -1, dtype=np.uint64)
+    hashes = (windows * powers).sum(axis=1, dtype=np.uint64)
+    return np.unique((hashes ^ (hashes >> np.uint64(32))) & np.uint64(0xFFFFFFFF))
+
+
+class ChunkDeduplicator:
+    """
+    Collapse exact and near-duplicate chunks before they are embedded.
+
+    Exact duplicates (after normalizing case, punctuation and whitespace)
+    are found by a digest of the normalized text. Near duplicates are found
+    with MinHash signatures of character shingles, indexed with LSH bands;
+    band collisions are confirmed by the estimated Jaccard similarity.
+
+    The first chunk of a group is kept (the canonical chunk) and carries
+    the ids of all documents it stands for in `source_document_ids`
+    (comma-separated, as Chroma metadata values are scalars) and the
+    number of chunks it replaced in `duplicate_count`. State is kept
+    across calls, so one deduplicator covers a whole ingestion run, and
+    can be saved with the run's checkpoint so a resumed run keeps it.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        num_perm: int = 128,
+        band_rows: int = 4,
+        shingle_size: int = 5,
+        seed: int = 0
+    ):
+        if num_perm % band_rows:
+            raise ValueError("num_perm must be a multiple of band_rows")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.band_rows = band_rows
+        self.shingle_size = shingle_size
+        self.seed = seed
+        self.num_duplicates = 0
+
+        # Universal multiply-shift hashes: (a * x + b) >> 32 in 64-bit arithmetic
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+
+        # Canonical chunks, by index
+        self._chunk_ids: List[str] = []
+        self._document_ids: List[str] = []
+        self._sources: List[List[str]] = []
+        self._counts: List[int] = []
+        self._signatures: List[np.ndarray] = []
+
+        self._exact: Dict[bytes, int] = {}
+        self._bands: Dict[Tuple[int, bytes], List[int]] = {}
+        # Canonical chunks of earlier calls that gained duplicates
+        self._changed: set = set()
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of a text."""
+        hashes = shingle_hashes(normalize_text(text), self.shingle_size)
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) >> np.uint64(32)
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _find_similar(self, signature: np.ndarray) -> Optional[int]:
+        best, best_similarity = None, self.threshold
+        candidates = {
+            index
+            for band in range(self.num_perm // self.band_rows)
+            for index in self._bands.get(self._band_key(signature, band), ())
+        }
+        for index in candidates:
+            similarity = float(np.mean(self._signatures[index] == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = index, similarity
+        return best
+
+    def _band_key(self, signature: np.ndarray, band: int) -> Tuple[int, bytes]:
+        start = band * self.band_rows
+        return band, signature[start:start + self.band_rows].tobytes()
+
+    def _add_canonical(self, chunk: Chunk, digest: bytes, signature: np.ndarray) -> int:
+        index = len(self._chunk_ids)
+        self._chunk_ids.append(chunk.chunk_id)
+        self._document_ids.append(chunk.document_id)
+        self._sources.append([chunk.document_id])
+        self._counts.append(1)
+        self._signatures.append(signature)
+        self._exact[digest] = index
+        for band in range(self.num_perm // self.band_rows):
+            self._bands.setdefault(self._band_key(signature, band), []).append(index)
+        return index
+
+    def _source_metadata(self, index: int) -> Dict[str, object]:
+        return {
+            METADATA_SOURCE_DOCUMENT_IDS: ",".join(self._sources[index]),
+            METADATA_DUPLICATE_COUNT: self._counts[index],
+        }
+
+    def deduplicate(self, chunks: List[Chunk]) -> List[Chunk]:
+        """
+        Drop chunks that duplicate an earlier chunk.
+
+        Args:
+            chunks: Chunks in ingestion order
+
+        Returns:
+            The canonical chunks among `chunks`, with source metadata set
+        """
+        kept: Dict[int, Chunk] = {}
+        for chunk in chunks:
+            normalized = normalize_text(chunk.text)
+            digest = hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+            index = self._exact.get(digest)
+            if index is None:
+                signature = self.signature(chunk.text)
+                index = self._find_similar(signature)
+                if index is None:
+                    kept[self._add_canonical(chunk, digest, signature)] = chunk
+                    continue
+
+            self.num_duplicates += 1
+            self._counts[index] += 1
+            if chunk.document_id not in self._sources[index]:
+                self._sources[index].append(chunk.document_id)
+            if index not in kept:
+                self._changed.add(index)
+
+        for index, chunk in kept.items():
+            chunk.metadata.update(self._source_metadata(index))
+        return list(kept.values())
+
+    def memory_bytes(self) -> int:
+        """Approximate bytes held by the signature, digest and LSH band indexes."""
+        num_bands = self.num_perm // self.band_rows
+        # Signature array plus ids, source list and digest entry per canonical chunk
+        signatures = len(self._signatures) * (self.num_perm * 4 + 112 + 400)
+        # One key (tuple + bytes) per band bucket and one list slot per entry
+        buckets = len(self._bands) * (64 + 33 + self.band_rows * 4 + 56)
+        entries = len(self._signatures) * num_bands * 8
+        return signatures + buckets + entries
+
+    def pending_updates(self, skip: Collection[str] = ()) -> List[Chunk]:
+        """
+        Metadata updates for canonical chunks returned by earlier calls.
+
+        Args:
+            skip: Ids of chunks not stored yet; their updates stay pending
+
+        Returns:
+            Chunks with only id, document_id and the source metadata set,
+            for VectorStore.update_metadata
+        """
+        ready = sorted(index for index in self._changed if self._chunk_ids[index] not in skip)
+        self._changed.difference_update(ready)
+        return [
+            Chunk(
+                text="",
+                chunk_id=self._chunk_ids[index],
+                document_id=self._document_ids[index],
+                metadata=self._source_metadata(index)
+            )
+            for index in ready
+        ]
+
+    def _params(self) -> np.ndarray:
+        return np.asarray([self.num_perm, self.band_rows, self.shingle_size, self.seed], dtype=np.int64)
+
+    def save(self, file: BinaryIO) -> None:
+        """Write the index, source lists and pending updates as .npz."""
+        digests = np.zeros((len(self._chunk_ids), 16), dtype=np.uint8)
+        for digest, index in self._exact.items():
+            digests[index] = np.frombuffer(digest, dtype=np.uint8)
+        np.savez(
+            file,
+            params=self._params(),
+            signatures=np.asarray(self._signatures, dtype=np.uint32).reshape(-1, self.num_perm),
+            digests=digests,
+            chunk_ids=np.asarray(self._chunk_ids, dtype=str),
+            document_ids=np.asarray(self._document_ids, dtype=str),
+            sources=np.asarray([",".join(sources) for sources in self._sources], dtype=str),
+            counts=np.asarray(self._counts, dtype=np.int64),
+            changed=np.asarray(sorted(self._changed), dtype=np.int64),
+            num_duplicates=np.int64(self.num_duplicates),
+        )
+
+    def load(self, file: BinaryIO) -> None:
+        """
+        Replace the state with one written by save().
+
+        Raises:
+            ValueError: If it was saved with other MinHash parameters
+        """
+        with np.load(file) as data:
+            if not np.array_equal(data["params"], self._params()):
+                raise ValueError("Deduplication index was saved with other MinHash parameters")
+            self._chunk_ids, self._document_ids, self._signatures = [], [], []
+            self._sources, self._counts = [], []
+            self._exact, self._bands = {}, {}
+            for chunk_id, document_id, digest, signature in zip(
+                data["chunk_ids"], data["document_ids"], data["digests"], data["signatures"]
+            ):
+                chunk = Chunk(text="", chunk_id=str(chunk_id), document_id=str(document_id))
+                self._add_canonical(chunk, digest.tobytes(), signature)
+            self._sources = [str(sources).split(",") for sources in data["sources"]]
+            self._counts = [int(count) for count in data["counts"]]
+            self._changed = {int(index) for index in data["changed"]}
+            self.num_duplicates = int(data["num_duplicates"])
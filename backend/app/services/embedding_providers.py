@@ -0,0 +1,393 @@
+"""Pluggable embedding providers."""
+
+import asyncio
+import os
+import re
+import threading
+import zlib
+from typing import List, Optional, Iterable, Tuple
+
+import numpy as np
+import openai
+from openai import AsyncOpenAI
+
+from app.core.constants import EMBEDDING_MODEL, LOCAL_EMBEDDING_MODEL_FILE
+from app.core.exceptions import EmbeddingError, ModelNotFittedError
+from app.services.rate_limiter import RateLimitInfo
+from app.utils.sampling import reservoir_sample
+
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+class EmbeddingProvider:
+    """Base class for embedding backends used by EmbeddingService."""
+
+    name: str = "base"
+    # Output dimensions, or None where the model alone determines them
+    dimensions: Optional[int] = None
+    # Corpus sample a provider that needs fitting is fitted on
+    fit_sample_size: int = 0
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for a list of texts.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            One embedding vector per text
+        """
+        raise NotImplementedError
+
+    async def embed_with_limits(
+        self,
+        texts: List[str]
+    ) -> Tuple[List[List[float]], Optional[RateLimitInfo]]:
+        """
+        Generate embeddings and report the provider's rate-limit state.
+
+        Returns:
+            Embeddings and rate-limit info (None if the provider has no limits)
+        """
+        return await self.embed(texts), None
+
+    @property
+    def vector_space(self) -> str:
+        """Identifies the embedding space; vectors are only comparable within one."""
+        return self.name
+
+    @property
+    def needs_fit(self) -> bool:
+        """Whether the provider must be fitted on a corpus before embedding."""
+        return False
+
+    def fit_if_needed(self, texts: Iterable[str]) -> None:
+        """Fit provider state on a corpus. No-op for pretrained providers."""
+        return None
+
+    def is_transient(self, error: Exception) -> bool:
+        """Whether a failed call is worth retrying."""
+        return False
+
+    def rate_limit_info(self, error: Exception) -> Optional[RateLimitInfo]:
+        """Rate-limit info if the error is a rate-limit rejection, else None."""
+        return None
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """
+    Embeddings from the OpenAI API.
+
+    Uses the async client so concurrent and hedged calls don't block the
+    event loop. Client-side retries are disabled; EmbeddingService owns
+    retry, hedging and circuit-breaking decisions.
+    """
+
+    name = "openai"
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        model: str = EMBEDDING_MODEL,
+        timeout: float = 30.0
+    ):
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=timeout,
+            max_retries=0
+        )
+        self.model = model
+
+    @property
+    def vector_space(self) -> str:
+        """The model determines the space, whichever endpoint serves it."""
+        return f"{self.name}:{self.model}"
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings with a single API call."""
+        response = await self.client.embeddings.create(
+            model=self.model,
+            input=texts
+        )
+        return [item.embedding for item in response.data]
+
+    async def embed_with_limits(
+        self,
+        texts: List[str]
+    ) -> Tuple[List[List[float]], Optional[RateLimitInfo]]:
+        """Generate embeddings and parse x-ratelimit-* response headers."""
+        raw = await self.client.embeddings.with_raw_response.create(
+            model=self.model,
+            input=texts
+        )
+        response = raw.parse()
+        return (
+            [item.embedding for item in response.data],
+            RateLimitInfo.from_headers(raw.headers)
+        )
+
+    def is_transient(self, error: Exception) -> bool:
+        """Connection errors, timeouts, rate limits and 5xx are transient."""
+        return isinstance(error, (
+            openai.APIConnectionError,
+            openai.RateLimitError,
+            openai.InternalServerError,
+        ))
+
+    def rate_limit_info(self, error: Exception) -> Optional[RateLimitInfo]:
+        """Parse rate-limit headers from a 429 response."""
+        if isinstance(error, openai.RateLimitError):
+            return RateLimitInfo.from_headers(error.response.headers)
+        return None
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """
+    CPU-only embeddings from hashed character n-grams.
+
+    Texts are mapped to TF-IDF weighted hashed n-gram features and projected
+    onto the top principal components of a random sample of the first
+    ingested dataset. The fitted model (IDF weights, mean and projection)
+    is persisted as a .npz file, typically next to the vector index.
+    Fitting is CPU-bound and blocking; async callers run it in a thread.
+    Batches are embedded in a thread too.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        model_path: str,
+        dimensions: int = 256,
+        num_features: int = 2048,
+        ngram_range: tuple = (3, 5),
+        fit_sample_size: int = 50_000,
+        min_fit_texts: int = 1000
+    ):
+        self.model_path = model_path
+        self.dimensions = dimensions
+        self.num_features = num_features
+        self.ngram_range = ngram_range
+        # Texts a fit samples from the corpus, and the fewest it accepts
+        self.fit_sample_size = fit_sample_size
+        self.min_fit_texts = min_fit_texts
+
+        self.idf: Optional[np.ndarray] = None
+        self.mean: Optional[np.ndarray] = None
+        self.components: Optional[np.ndarray] = None
+        # Concurrent ingestions must not fit two different models
+        self._fit_lock = threading.Lock()
+
+        if os.path.exists(model_path):
+            self.load()
+
+    @property
+    def is_fitted(self) -> bool:
+        """Whether a projection has been fitted or loaded."""
+        return self.components is not None
+
+    @property
+    def needs_fit(self) -> bool:
+        """Whether no model has been fitted or loaded yet."""
+        return not self.is_fitted
+
+    @property
+    def vector_space(self) -> str:
+        """Each fitted model file defines its own projection."""
+        return f"{self.name}:{os.path.abspath(self.model_path)}"
+
+    def _hashed_counts(self, text: str) -> np.ndarray:
+        """Count hashed character n-grams of a single text."""
+        counts = np.zeros(self.num_features, dtype=np.float32)
+        normalized = _WHITESPACE_PATTERN.sub(" ", text.lower()).strip()
+        padded = f" {normalized} "
+        min_n, max_n = self.ngram_range
+        buckets = [
+            zlib.crc32(padded[i:i + n].encode("utf-8")) % self.num_features
+            for n in range(min_n, max_n + 1)
+            for i in range(len(padded) - n + 1)
+        ]
+        if buckets:
+            np.add.at(counts, buckets, 1.0)
+        return counts
+
+    def _features(self, texts: Iterable[str]) -> np.ndarray:
+        """Build the sublinear TF feature matrix for a batch of texts."""
+        matrix = np.stack([self._hashed_counts(text) for text in texts])
+        return np.log1p(matrix)
+
+    def _covariance_product(
+        self,
+        texts: List[str],
+        idf: np.ndarray,
+        mean: np.ndarray,
+        basis: np.ndarray,
+        batch_size: int
+    ) -> np.ndarray:
+        """Covariance of the weighted features times `basis`, one batch of texts at a time."""
+        product = np.zeros_like(basis)
+        for start in range(0, len(texts), batch_size):
+            weighted = self._features(texts[start:start + batch_size]) * idf
+            product += weighted.T @ (weighted @ basis)
+        return product / len(texts) - np.outer(mean, mean @ basis)
+
+    def fit(
+        self,
+        texts: List[str],
+        batch_size: int = 1024,
+        oversampling: int = 10,
+        power_iterations: int = 3,
+        seed: int = 0
+    ) -> None:
+        """
+        Fit IDF weights and the PCA projection on a corpus and persist them.
+
+        The top principal components are found by randomized subspace
+        iteration: the covariance is only ever multiplied with a
+        num_features x (dimensions + oversampling) basis, batch by batch,
+        so memory is bounded by that basis rather than by num_features²
+        or the corpus size. Each iteration is one pass over the corpus.
+
+        Args:
+            texts: Corpus texts
+            batch_size: Texts featurized at a time
+            oversampling: Extra basis vectors for accuracy
+            power_iterations: Passes refining the basis
+            seed: Seed of the random starting basis
+        """
+        if not texts:
+            raise EmbeddingError("Cannot fit local embedding model on an empty corpus")
+
+        n_docs = len(texts)
+        doc_freq = np.zeros(self.num_features, dtype=np.float64)
+        total = np.zeros(self.num_features, dtype=np.float64)
+        for start in range(0, n_docs, batch_size):
+            features = self._features(texts[start:start + batch_size])
+            doc_freq += (features > 0).sum(axis=0)
+            total += features.sum(axis=0)
+        idf = np.log((1 + n_docs) / (1 + doc_freq)) + 1
+        # IDF scales columns, so the weighted mean is the scaled raw mean
+        mean = total / n_docs * idf
+
+        width = min(self.dimensions + oversampling, self.num_features)
+        basis, _ = np.linalg.qr(np.random.default_rng(seed).standard_normal((self.num_features, width)))
+        for _ in range(max(power_iterations, 1) - 1):
+            basis, _ = np.linalg.qr(self._covariance_product(texts, idf, mean, basis, batch_size))
+        # Rayleigh-Ritz: eigenvectors of the covariance restricted to the basis
+        projected = basis.T @ self._covariance_product(texts, idf, mean, basis, batch_size)
+        eigenvalues, eigenvectors = np.linalg.eigh((projected + projected.T) / 2)
+        top = np.argsort(eigenvalues)[::-1][:self.dimensions]
+
+        self.idf = idf.astype(np.float32)
+        self.mean = mean.astype(np.float32)
+        self.components = (basis @ eigenvectors[:, top]).astype(np.float32)
+        self.save()
+
+    def fit_if_needed(self, texts: Iterable[str]) -> None:
+        """
+        Fit on a random sample of the corpus unless a model already exists.
+
+        `texts` is read once and at most `fit_sample_size` of them are
+        kept, so callers can stream the whole corpus. Refitting would
+        change the embedding space of vectors already stored, so an
+        existing model is always kept.
+
+        Raises:
+            ModelNotFittedError: If the corpus has fewer than `min_fit_texts` texts
+        """
+        with self._fit_lock:
+            if self.is_fitted:
+                return
+            sample = reservoir_sample(texts, self.fit_sample_size)
+            if len(sample) < self.min_fit_texts:
+                raise ModelNotFittedError(
+                    f"Local embedding model needs at least {self.min_fit_texts} texts to fit, "
+                    f"got {len(sample)}; ingest a larger dataset first"
+                )
+            self.fit(sample)
+
+    def save(self) -> None:
+        """Persist the fitted model."""
+        directory = os.path.dirname(self.model_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez(
+            self.model_path,
+            idf=self.idf,
+            mean=self.mean,
+            components=self.components,
+            ngram_range=np.array(self.ngram_range)
+        )
+
+    def load(self) -> None:
+        """Load a previously fitted model."""
+        with np.load(self.model_path) as data:
+            self.idf = data["idf"]
+            self.mean = data["mean"]
+            self.components = data["components"]
+            self.ngram_range = tuple(int(n) for n in data["ngram_range"])
+        self.num_features, self.dimensions = self.components.shape
+
+    def embed_sync(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into L2-normalized float32 vectors."""
+        if not self.is_fitted:
+            raise ModelNotFittedError(
+                "Local embedding model is not fitted; ingest a dataset first"
+            )
+        projected = (self._features(texts) * self.idf - self.mean) @ self.components
+        norms = np.linalg.norm(projected, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return projected / norms
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts locally on the CPU, batches in a worker thread."""
+        if len(texts) == 1:
+            # A single query embeds faster than a thread hand-off
+            return self.embed_sync(texts).tolist()
+        # Hashing and projecting a batch would stall queries on the event loop
+        return (await asyncio.to_thread(self.embed_sync, texts)).tolist()
+
+
+def create_embedding_provider(
+    provider: str,
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    timeout: float = 30.0,
+    persist_directory: str = "./chroma_db",
+    local_dimensions: int = 256,
+    local_num_features: int = 2048,
+    local_fit_sample_size: int = 50_000,
+    local_min_fit_texts: int = 1000
+) -> EmbeddingProvider:
+    """
+    Create an embedding provider by name.
+
+    Args:
+        provider: Provider name ("openai" or "local")
+        api_key: OpenAI API key (openai provider)
+        base_url: Optional OpenAI base URL (openai provider)
+        timeout: Request timeout in seconds (openai provider)
+        persist_directory: Vector index directory; the local model is stored here
+        local_dimensions: Output dimensions of the local provider
+        local_num_features: Hashed feature space size of the local provider
+        local_fit_sample_size: Texts the local provider is fitted on
+        local_min_fit_texts: Fewest texts the local provider is fitted on
+
+    Returns:
+        Embedding provider instance
+    """
+    if provider == "openai":
+        return OpenAIEmbeddingProvider(api_key=api_key, base_url=base_url, timeout=timeout)
+    if provider == "local":
+        return LocalEmbeddingProvider(
+            model_path=os.path.join(persist_directory, LOCAL_EMBEDDING_MODEL_FILE),
+            dimensions=local_dimensions,
+            num_features=local_num_features,
+            fit_sample_size=local_fit_sample_size,
+            min_fit_texts=local_min_fit_texts
+        )
+    raise ValueError(f"Unknown embedding provider: {provider}")
@@ -1,18 +1,199 @@
-"""OpenAI embedding service."""
+"""Embedding service."""
 
-from typing import List
-from openai import OpenAI
+import asyncio
+import random
+import time
+from typing import Iterable, List, Optional, Callable, Awaitable
 
-from app.core.constants import EMBEDDING_MODEL
-from app.core.exceptions import EmbeddingError
+from app.core.exceptions import EmbeddingError, CircuitOpenError
+from app.services.embedding_providers import EmbeddingProvider, OpenAIEmbeddingProvider
+from app.services.resilience import LatencyTracker, HedgeBudget, CircuitBreaker
+from app.services.rate_limiter import EmbeddingScheduler
 
 
 class EmbeddingService:
-    """Handles OpenAI embedding generation."""
+    """
+    Handles embedding generation through a pluggable provider.
+
+    Adds latency-aware resilience on top of the provider:
+    - single-text (query) embeddings are hedged: if the call hasn't returned
+      by the configured latency percentile, a second call is sent and the
+      first response wins, within a hedge budget
+    - transient failures are retried with jittered exponential backoff
+    - a circuit breaker fails fast while the provider is degraded, using
+      the fallback provider if one is configured
+    - bulk embeddings are split into batches paced by an RPM/TPM-aware
+      scheduler that adapts to the provider's rate-limit headers
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        provider: Optional[EmbeddingProvider] = None,
+        fallback_provider: Optional[EmbeddingProvider] = None,
+        hedge_percentile: float = 0.95,
+        hedge_budget_ratio: float = 0.1,
+        max_retries: int = 2,
+        batch_max_retries: int = 6,
+        retry_base_delay: float = 0.5,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        scheduler: Optional[EmbeddingScheduler] = None
+    ):
+        self.provider = provider or OpenAIEmbeddingProvider(api_key=api_key, base_url=base_url)
+        if fallback_provider is not None and fallback_provider.vector_space != self.provider.vector_space:
+            # Vectors from another model would be searched against the index
+            # as if they were comparable, returning meaningless results
+            raise EmbeddingError(
+                f"Fallback provider embeds into {fallback_provider.vector_space}, "
+                f"not {self.provider.vector_space}"
+            )
+        self.fallback_provider = fallback_provider
+        self.hedge_percentile = hedge_percentile
+        self.max_retries = max_retries
+        self.batch_max_retries = batch_max_retries
+        self.retry_base_delay = retry_base_delay
+        self.latency = LatencyTracker()
+        self.hedge_budget = HedgeBudget(ratio=hedge_budget_ratio)
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.scheduler = scheduler or EmbeddingScheduler()
+
+    def fit_if_needed(self, texts: Iterable[str]) -> None:
+        """
+        Fit the provider on a corpus if it needs training (local provider).
+
+        Args:
+            texts: Corpus texts, read once; the provider samples what it needs
+
+        Raises:
+            EmbeddingError: If fitting fails
+        """
+        try:
+            self.provider.fit_if_needed(texts)
+        except EmbeddingError:
+            raise
+        except Exception as e:
+            raise EmbeddingError(f"Failed to fit embedding provider: {str(e)}")
+
+    def _record_error(self, error: Exception, trial: bool) -> None:
+        """Update breaker state after a failed provider call."""
+        if self.provider.rate_limit_info(error) is not None:
+            # Rate limiting is paced by the scheduler, not a sign of degradation
+            if trial:
+                self.circuit_breaker.release_trial()
+            return
+        # Only provider degradation counts against the breaker, not bad input
+        if self.provider.is_transient(error):
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
+
+    async def _timed_call(self, texts: List[str], trial: bool = False) -> List[List[float]]:
+        """Call the provider once, updating latency and breaker state."""
+        start = time.monotonic()
+        try:
+            embeddings = await self.provider.embed(texts)
+        except asyncio.CancelledError:
+            # A cancelled call (lost hedge, client disconnect) says nothing
+            # about the provider, but must not keep holding the trial slot
+            if trial:
+                self.circuit_breaker.release_trial()
+            raise
+        except Exception as e:
+            self._record_error(e, trial)
+            raise
+        self.latency.record(time.monotonic() - start)
+        self.circuit_breaker.record_success()
+        return embeddings
+
+    async def _scheduled_call(self, texts: List[str], trial: bool = False) -> List[List[float]]:
+        """Send one batch once the scheduler grants quota for it."""
+        async with self.scheduler.slot(texts):
+            try:
+                embeddings, info = await self.provider.embed_with_limits(texts)
+            except asyncio.CancelledError:
+                if trial:
+                    self.circuit_breaker.release_trial()
+                raise
+            except Exception as e:
+                info = self.provider.rate_limit_info(e)
+                if info is not None:
+                    self.scheduler.on_rate_limited(info)
+                self._record_error(e, trial)
+                raise
+        self.scheduler.observe(info)
+        self.circuit_breaker.record_success()
+        return embeddings
+
+    async def _hedged_call(self, texts: List[str], trial: bool = False) -> List[List[float]]:
+        """
+        Call the provider, hedging with a second call if the first is slow.
 
-    def __init__(self, api_key: str):
-        self.client = OpenAI(api_key=api_key)
-        self.model = EMBEDDING_MODEL
+        Only a closed breaker is hedged: a half-open breaker allows a
+        single trial call, and an open one no calls at all.
+
+        Returns:
+            Embeddings from whichever call succeeds first
+        """
+        self.hedge_budget.earn()
+        hedge_delay = (
+            self.latency.percentile(self.hedge_percentile)
+            if self.hedge_percentile > 0 else None
+        )
+
+        primary = asyncio.ensure_future(self._timed_call(texts, trial))
+        if hedge_delay is None:
+            return await primary
+
+        done, _ = await asyncio.wait({primary}, timeout=hedge_delay)
+        if done:
+            return await primary
+        # The breaker may have tripped while the primary was waiting
+        if self.circuit_breaker.state != CircuitBreaker.CLOSED or not self.hedge_budget.try_spend():
+            return await primary
+
+        hedge = asyncio.ensure_future(self._timed_call(texts))
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    return task.result()
+                error = task.exception()
+        raise error
+
+    async def _call_with_resilience(
+        self,
+        texts: List[str],
+        call: Callable[[List[str], bool], Awaitable[List[List[float]]]],
+        max_retries: int
+    ) -> List[List[float]]:
+        """
+        Run a provider call behind the circuit breaker with retries.
+
+        Raises:
+            CircuitOpenError: If the breaker is open and no fallback exists
+        """
+        attempt = 0
+        while True:
+            if not self.circuit_breaker.allow_request():
+                if self.fallback_provider is not None:
+                    return await self.fallback_provider.embed(texts)
+                raise CircuitOpenError("Embedding provider unavailable (circuit open)")
+
+            # Past a half-open breaker, this call holds its single trial slot
+            trial = self.circuit_breaker.state == CircuitBreaker.HALF_OPEN
+            try:
+                return await call(texts, trial)
+            except Exception as e:
+                if attempt >= max_retries or not self.provider.is_transient(e):
+                    raise
+                delay = self.retry_base_delay * (2 ** attempt)
+                await asyncio.sleep(random.uniform(0, delay))
+                attempt += 1
 
     async def embed_text(self, text: str) -> List[float]:
         """
@@ -28,14 +209,13 @@ class EmbeddingService:
             EmbeddingError: If embedding generation fails
         """
         try:
-            # Generate embedding
-            response = self.client.embeddings.create(
-                model=self.model,
-                input=text
+            embeddings = await self._call_with_resilience(
+                [text], self._hedged_call, self.max_retries
             )
+            return embeddings[0]
 
-            return response.data[0].embedding
-
+        except EmbeddingError:
+            raise
         except Exception as e:
             raise EmbeddingError(f"Failed to generate embedding: {str(e)}")
 
@@ -43,6 +223,10 @@ class EmbeddingService:
         """
         Generate embeddings for multiple texts.
 
+        Texts are split into batches that run concurrently within the
+        configured rate limits. Batches are not hedged, since duplicating
+        them would double cost.
+
         Args:
             texts: List of texts to embed
 
@@ -52,14 +236,20 @@ class EmbeddingService:
         Raises:
             EmbeddingError: If embedding generation fails
         """
+        tasks = [
+            asyncio.ensure_future(self._call_with_resilience(
+                batch, self._scheduled_call, self.batch_max_retries
+            ))
+            for batch in self.scheduler.plan(texts)
+        ]
         try:
-            # Generate embeddings
-            response = self.client.embeddings.create(
-                model=self.model,
-                input=texts
-            )
-
-            return [item.embedding for item in response.data]
+            results = await asyncio.gather(*tasks)
+            return [embedding for batch in results for embedding in batch]
 
         except Exception as e:
+            # Don't keep paying for batches of a failed request
+            for task in tasks:
+                task.cancel()
+            if isinstance(e, EmbeddingError):
+                raise
             raise EmbeddingError(f"Failed to generate embeddings: {str(e)}")
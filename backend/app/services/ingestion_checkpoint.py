@@ -0,0 +1,250 @@
+"""Durable progress checkpoints for resumable ingestion runs."""
+
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from app.models.domain import Chunk
+from app.core.exceptions import CheckpointError
+from app.services.deduplication import ChunkDeduplicator
+
+
+STATUS_DEDUPLICATED = "deduplicated"
+STATUS_EMBEDDED = "embedded"
+STATUS_STORED = "stored"
+DEDUPLICATOR_FILE = "deduplicator.npz"
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    """Hex SHA-256 of a file's contents, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def run_key(file_hash: str, **params: Any) -> str:
+    """
+    Identify an ingestion run by its input and the parameters that shape it.
+
+    The same file ingested with a different chunk size, batch size,
+    collection or embedding model gets a different key, so its checkpoint
+    is never reused.
+    """
+    payload = json.dumps({"file": file_hash, **params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Write a file so readers see either the old or the new content."""
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class IngestionCheckpoint:
+    """
+    Manifest of which units (row batches or shards) of a run are done.
+
+    Each unit moves through two durable states: "embedded", where its
+    chunks and embeddings are saved next to the manifest, and "stored",
+    where they are in the vector store and the saved copy is deleted. The
+    manifest is rewritten atomically after the unit files, so a crash at
+    any point leaves a state from which the run can resume without
+    re-embedding finished work.
+
+    Runs that deduplicate also save the deduplication index, after the
+    units it covers. Runs that deduplicate units ahead of embedding them
+    first save those units as "deduplicated" (chunks without embeddings),
+    so the saved index never covers chunks that would be lost in a crash.
+    """
+
+    def __init__(self, directory: str, key: str):
+        self.key = key
+        self.path = Path(directory) / key
+        self.manifest_path = self.path / "manifest.json"
+        self.manifest: Dict[str, Any] = {"key": key, "units": {}}
+        if self.manifest_path.exists():
+            try:
+                self.manifest = json.loads(self.manifest_path.read_text())
+            except (OSError, ValueError) as e:
+                raise CheckpointError(f"Failed to read checkpoint {self.manifest_path}: {str(e)}")
+
+    @property
+    def units(self) -> Dict[str, Dict[str, Any]]:
+        """Unit id -> {"status", stats...}."""
+        return self.manifest["units"]
+
+    def exists(self) -> bool:
+        """Whether a previous run left progress behind."""
+        return bool(self.units)
+
+    def reset(self) -> None:
+        """Discard all progress."""
+        shutil.rmtree(self.path, ignore_errors=True)
+        self.manifest = {"key": self.key, "units": {}}
+
+    def complete(self) -> None:
+        """Remove the checkpoint after a successful run."""
+        self.reset()
+
+    def status(self, unit: str) -> Optional[str]:
+        """Status of a unit, or None if it has not been embedded."""
+        entry = self.units.get(unit)
+        return entry["status"] if entry else None
+
+    def _save_manifest(self) -> None:
+        self.manifest["updated_at"] = datetime.utcnow().isoformat()
+        write_atomic(self.manifest_path, json.dumps(self.manifest).encode("utf-8"))
+
+    def _unit_files(self, unit: str):
+        return self.path / f"{unit}.chunks.json", self.path / f"{unit}.embeddings.npy"
+
+    def _write_chunks(self, unit: str, chunks: List[Chunk]) -> None:
+        records = [
+            {
+                "chunk_id": chunk.chunk_id,
+                "text": chunk.text,
+                "document_id": chunk.document_id,
+                "chunk_index": chunk.chunk_index,
+                "metadata": chunk.metadata,
+            }
+            for chunk in chunks
+        ]
+        self.path.mkdir(parents=True, exist_ok=True)
+        write_atomic(self._unit_files(unit)[0], json.dumps(records).encode("utf-8"))
+
+    def save_deduplicated(self, unit: str, chunks: List[Chunk], stats: Dict[str, Any]) -> None:
+        """
+        Persist a unit's deduplicated chunks before they are embedded.
+
+        Raises:
+            CheckpointError: If writing fails
+        """
+        try:
+            self._write_chunks(unit, chunks)
+            self.units[unit] = {"status": STATUS_DEDUPLICATED, **stats}
+            self._save_manifest()
+        except OSError as e:
+            raise CheckpointError(f"Failed to save checkpoint for {unit}: {str(e)}")
+
+    def load_deduplicated(self, unit: str) -> List[Chunk]:
+        """
+        Load the chunks saved for a deduplicated unit.
+
+        Raises:
+            CheckpointError: If the unit file is missing or unreadable
+        """
+        try:
+            records = json.loads(self._unit_files(unit)[0].read_text())
+        except (OSError, ValueError) as e:
+            raise CheckpointError(f"Failed to load checkpoint for {unit}: {str(e)}")
+        return [Chunk(**record) for record in records]
+
+    def save_deduplicator(self, deduplicator: ChunkDeduplicator) -> None:
+        """
+        Persist the run's deduplication index.
+
+        Raises:
+            CheckpointError: If writing fails
+        """
+        path = self.path / DEDUPLICATOR_FILE
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            with open(path.with_name(path.name + ".tmp"), "wb") as f:
+                deduplicator.save(f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path.with_name(path.name + ".tmp"), path)
+        except OSError as e:
+            raise CheckpointError(f"Failed to save deduplication index: {str(e)}")
+
+    def load_deduplicator(self, deduplicator: ChunkDeduplicator) -> bool:
+        """
+        Restore the saved deduplication index into `deduplicator`.
+
+        Returns:
+            Whether an index was saved
+
+        Raises:
+            CheckpointError: If the saved index is unreadable
+        """
+        path = self.path / DEDUPLICATOR_FILE
+        if not path.exists():
+            return False
+        try:
+            with open(path, "rb") as f:
+                deduplicator.load(f)
+        except (OSError, ValueError) as e:
+            raise CheckpointError(f"Failed to load deduplication index: {str(e)}")
+        return True
+
+    def save_embedded(self, unit: str, chunks: List[Chunk], stats: Dict[str, Any]) -> None:
+        """
+        Persist a unit's embedded chunks before they are stored.
+
+        Args:
+            unit: Unit id
+            chunks: Chunks with embeddings
+            stats: Counts to report for the unit when the run finishes
+
+        Raises:
+            CheckpointError: If writing fails
+        """
+        embeddings_path = self._unit_files(unit)[1]
+        try:
+            self._write_chunks(unit, chunks)
+            with open(embeddings_path.with_name(embeddings_path.name + ".tmp"), "wb") as f:
+                np.save(f, np.asarray([chunk.embedding for chunk in chunks], dtype=np.float32))
+            os.replace(embeddings_path.with_name(embeddings_path.name + ".tmp"), embeddings_path)
+            self.units[unit] = {"status": STATUS_EMBEDDED, **stats}
+            self._save_manifest()
+        except OSError as e:
+            raise CheckpointError(f"Failed to save checkpoint for {unit}: {str(e)}")
+
+    def load_embedded(self, unit: str) -> List[Chunk]:
+        """
+        Load the chunks and embeddings saved for an embedded unit.
+
+        Raises:
+            CheckpointError: If the unit files are missing or unreadable
+        """
+        chunks_path, embeddings_path = self._unit_files(unit)
+        try:
+            records = json.loads(chunks_path.read_text())
+            embeddings = np.load(embeddings_path)
+        except (OSError, ValueError) as e:
+            raise CheckpointError(f"Failed to load checkpoint for {unit}: {str(e)}")
+        return [
+            Chunk(embedding=embedding.tolist(), **record)
+            for record, embedding in zip(records, embeddings)
+        ]
+
+    def mark_stored(self, unit: str) -> None:
+        """Record that a unit is in the vector store and drop its saved copy."""
+        self.units[unit]["status"] = STATUS_STORED
+        try:
+            self._save_manifest()
+        except OSError as e:
+            raise CheckpointError(f"Failed to update checkpoint for {unit}: {str(e)}")
+        for path in self._unit_files(unit):
+            path.unlink(missing_ok=True)
+
+    def totals(self) -> Dict[str, Any]:
+        """Sum the stats of all units."""
+        totals: Dict[str, Any] = {}
+        for entry in self.units.values():
+            for name, value in entry.items():
+                if name != "status":
+                    totals[name] = totals.get(name, 0) + value
+        return totals
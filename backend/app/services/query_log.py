@@ -0,0 +1,124 @@
+"""Asynchronously written log of served queries."""
+
+import asyncio
+import fcntl
+import json
+import os
+import time
+from collections import Counter, deque
+from typing import List, Optional, Dict, Any
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace, so trivially different queries match."""
+    return " ".join(query.lower().split())
+
+
+class QueryLog:
+    """
+    Append-only JSON Lines log of queries, written off the request path.
+
+    `record` only puts the entry on a bounded in-memory queue; a background
+    task drains it and appends each batch with a single O_APPEND write, so
+    several worker processes can share one file. When the queue is full,
+    entries are dropped (and counted) rather than slowing requests down.
+    The file is rotated to `<path>.1` once it exceeds `max_bytes`. Writes
+    hold an exclusive flock on `<path>.lock`, so only one worker rotates
+    and no worker's rotation replaces a file another one just rotated.
+    """
+
+    def __init__(self, path: str, max_queue: int = 10_000, max_bytes: int = 64 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.written = 0
+        self.dropped = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=max_queue)
+        self._writer: Optional[asyncio.Task] = None
+
+    def record(self, query: str, latency_ms: float, result_ids: List[str]) -> None:
+        """
+        Queue a served query for writing.
+
+        Args:
+            query: Normalized query text
+            latency_ms: Time to serve the query
+            result_ids: Chunk ids returned, best first
+        """
+        try:
+            self._queue.put_nowait({
+                "ts": round(time.time(), 3),
+                "query": query,
+                "latency_ms": round(latency_ms, 3),
+                "result_ids": result_ids,
+            })
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.get_running_loop().create_task(self._drain())
+
+    def _append(self, entries: List[Dict[str, Any]]) -> None:
+        """Append entries in one write, rotating the file first if it is too large."""
+        data = "".join(json.dumps(entry, separators=(",", ":")) + "\n" for entry in entries)
+        lock_fd = os.open(f"{self.path}.lock", os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            # Size check, rotation and append are one step across worker processes
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            try:
+                if os.path.getsize(self.path) >= self.max_bytes:
+                    os.replace(self.path, f"{self.path}.1")
+            except FileNotFoundError:
+                pass
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                os.write(fd, data.encode("utf-8"))
+            finally:
+                os.close(fd)
+        finally:
+            # Closing the descriptor releases the lock
+            os.close(lock_fd)
+
+    async def _drain(self) -> None:
+        while not self._queue.empty():
+            entries = [self._queue.get_nowait() for _ in range(self._queue.qsize())]
+            await asyncio.to_thread(self._append, entries)
+            self.written += len(entries)
+
+    async def flush(self) -> None:
+        """Wait until all queued entries are written."""
+        if self._writer is not None:
+            await self._writer
+        await self._drain()
+
+    def top_queries(self, n: int, window: int = 100_000) -> List[str]:
+        """
+        Most frequent queries among the latest logged entries.
+
+        Args:
+            n: Number of queries to return
+            window: Number of most recent entries to count
+
+        Returns:
+            Normalized query texts, most frequent first
+        """
+        recent: deque = deque(maxlen=window)
+        for path in (f"{self.path}.1", self.path):
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        recent.append(json.loads(line)["query"])
+                    except (ValueError, KeyError):
+                        continue  # a partially written line
+        return [query for query, _ in Counter(recent).most_common(n)]
+
+    def stats(self) -> Dict[str, Any]:
+        """Queued, written and dropped entry counts."""
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+        }
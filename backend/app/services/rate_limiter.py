@@ -0,0 +1,205 @@
+"""Rate-limit-aware scheduling for bulk embedding requests."""
+
+import asyncio
+import re
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import List, Optional, Mapping, AsyncIterator
+
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a rate-limit reset duration such as "1s", "6m0s" or "20ms".
+
+    Args:
+        value: Header value
+
+    Returns:
+        Duration in seconds, or None if missing or unparsable
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count (~4 characters per token, no tiktoken)."""
+    return len(text) // 4 + 1
+
+
+@dataclass
+class RateLimitInfo:
+    """Rate-limit state reported by the provider in response headers."""
+
+    remaining_requests: Optional[int] = None
+    remaining_tokens: Optional[int] = None
+    reset_requests: Optional[float] = None
+    reset_tokens: Optional[float] = None
+    retry_after: Optional[float] = None
+
+    @classmethod
+    def from_headers(cls, headers: Mapping[str, str]) -> "RateLimitInfo":
+        """Parse OpenAI-style x-ratelimit-* and retry-after headers."""
+        def as_int(name: str) -> Optional[int]:
+            value = headers.get(name)
+            return int(value) if value is not None and value.isdigit() else None
+
+        return cls(
+            remaining_requests=as_int("x-ratelimit-remaining-requests"),
+            remaining_tokens=as_int("x-ratelimit-remaining-tokens"),
+            reset_requests=parse_duration(headers.get("x-ratelimit-reset-requests")),
+            reset_tokens=parse_duration(headers.get("x-ratelimit-reset-tokens")),
+            retry_after=parse_duration(headers.get("retry-after")),
+        )
+
+
+class TokenBucket:
+    """
+    Async token bucket refilled continuously at a per-minute rate.
+
+    The bucket starts full, so an idle client may burst up to one minute of
+    quota; afterwards callers are admitted at the sustained rate.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float) -> None:
+        """Wait until `amount` tokens are available and take them."""
+        amount = min(amount, self.capacity)
+        # Check-and-take has no await in between, so it is atomic on the loop
+        while True:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return
+            await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def sync(self, remaining: Optional[int], reset_seconds: Optional[float]) -> None:
+        """
+        Align the bucket with the provider's view of remaining quota.
+
+        Args:
+            remaining: Remaining quota reported by the provider
+            reset_seconds: Seconds until the provider's quota fully resets
+        """
+        if remaining is None:
+            return
+        self._refill()
+        self.tokens = min(self.tokens, float(remaining))
+        if reset_seconds:
+            # Refill no faster than the provider will
+            self.rate = min(self.capacity / 60.0, max(self.capacity - remaining, 1) / reset_seconds)
+        else:
+            self.rate = self.capacity / 60.0
+
+
+class EmbeddingScheduler:
+    """
+    Plans and paces embedding batches within RPM/TPM limits.
+
+    Texts are split into batches bounded by count and estimated tokens.
+    Each batch takes a concurrency slot and its request/token quota before
+    it is sent, so as many batches are in flight as the quota allows. A
+    429 pauses all batches until the provider's retry-after elapses.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_batch_size: int = 512,
+        max_batch_tokens: int = 100_000,
+        max_concurrency: int = 8
+    ):
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_concurrency = max_concurrency
+        self.paused_until = 0.0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def plan(self, texts: List[str]) -> List[List[str]]:
+        """
+        Split texts into batches bounded by size and estimated tokens.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            Batches in input order
+        """
+        batches: List[List[str]] = []
+        current: List[str] = []
+        current_tokens = 0
+        for text in texts:
+            tokens = estimate_tokens(text)
+            if current and (len(current) >= self.max_batch_size
+                            or current_tokens + tokens > self.max_batch_tokens):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(text)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Concurrency semaphore bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    @asynccontextmanager
+    async def slot(self, texts: List[str]) -> AsyncIterator[None]:
+        """Hold a concurrency slot and the quota needed to send one batch."""
+        async with self._get_semaphore():
+            pause = self.paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            if self.request_bucket:
+                await self.request_bucket.acquire(1)
+            if self.token_bucket:
+                await self.token_bucket.acquire(sum(estimate_tokens(text) for text in texts))
+            yield
+
+    def observe(self, info: Optional[RateLimitInfo]) -> None:
+        """Adapt pacing to rate-limit headers from a response."""
+        if info is None:
+            return
+        if self.request_bucket:
+            self.request_bucket.sync(info.remaining_requests, info.reset_requests)
+        if self.token_bucket:
+            self.token_bucket.sync(info.remaining_tokens, info.reset_tokens)
+
+    def on_rate_limited(self, info: Optional[RateLimitInfo], default_pause: float = 1.0) -> None:
+        """Pause all batches after a 429 until the provider's window resets."""
+        self.observe(info)
+        pause = default_pause
+        if info is not None:
+            pause = info.retry_after or max(info.reset_requests or 0.0, info.reset_tokens or 0.0) or default_pause
+        self.paused_until = max(self.paused_until, time.monotonic() + pause)
@@ -0,0 +1,114 @@
+"""Latency tracking, hedging budget and circuit breaking for remote calls."""
+
+import time
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+
+class LatencyTracker:
+    """Rolling window of recent call latencies."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.samples: deque = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def record(self, seconds: float) -> None:
+        """Record the latency of a successful call."""
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        Latency at a percentile of the window.
+
+        Args:
+            q: Percentile in [0, 1]
+
+        Returns:
+            Latency in seconds, or None until enough samples are collected
+        """
+        if len(self.samples) < self.min_samples:
+            return None
+        return float(np.percentile(np.fromiter(self.samples, dtype=float), q * 100))
+
+
+class HedgeBudget:
+    """
+    Caps hedged requests to a fraction of primary requests.
+
+    Every primary request earns `ratio` tokens (up to `max_tokens`), and each
+    hedge spends one, so hedging adds at most `ratio` extra load even when the
+    provider is uniformly slow.
+    """
+
+    def __init__(self, ratio: float = 0.1, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = 0.0
+
+    def earn(self) -> None:
+        """Credit the budget for one primary request."""
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        """Spend one token for a hedge if available."""
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+class CircuitBreaker:
+    """
+    Fails fast after repeated failures.
+
+    Closed: calls pass through. After `failure_threshold` consecutive
+    failures the breaker opens and rejects calls for `reset_timeout`
+    seconds, then lets a single trial call through (half-open). A success
+    closes the breaker, a failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow_request(self) -> bool:
+        """Whether a call may be attempted now."""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+        if self._trial_in_flight:
+            return False
+        self._trial_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        """Record a successful call."""
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Give up a call slot without a verdict, so another call can be the trial."""
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Record a failed call."""
+        self.consecutive_failures += 1
+        self._trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
@@ -1,13 +1,37 @@
 """Main RAG retrieval service orchestrator."""
 
-from typing import List, Dict, Any
-import pandas as pd
+import asyncio
+import time
+from typing import Iterator, List, Dict, Any, Optional, TYPE_CHECKING
 
 from app.models.domain import Document, Chunk
-from app.models.schemas import RetrievalResult
+from app.models.schemas import NeighborChunk, RetrievalResult
+from app.core.constants import EMBEDDING_COST_PER_1M_TOKENS, METADATA_PREV_CHUNK_ID, METADATA_NEXT_CHUNK_ID
+from app.core.exceptions import ModelNotFittedError
 from app.services.embedding_service import EmbeddingService
 from app.services.chunking_service import ChunkingService
-from app.services.vector_store import VectorStore
+from app.services.semantic_cache import SemanticCache
+from app.services.query_log import QueryLog, normalize_query
+from app.services.deduplication import ChunkDeduplicator
+from app.services.ingestion_checkpoint import (
+    IngestionCheckpoint,
+    STATUS_EMBEDDED,
+    STATUS_STORED,
+    file_sha256,
+    run_key,
+)
+from app.utils.dataset_reader import ColumnMapping, read_record_batches
+from app.utils.memory import MemoryAccountant, chunk_bytes, document_bytes, trace_allocations
+from app.utils.sampling import reservoir_sample
+from app.utils.timing import RequestTrace
+
+if TYPE_CHECKING:
+    # chromadb is only loaded by servers that open the collection
+    from app.services.vector_store import VectorStore
+
+
+# Memory reported to the accountant while ingesting
+INGEST_COMPONENTS = ("ingest_documents", "ingest_chunks", "embedding_buffers", "deduplication_index")
 
 
 class RetrievalService:
@@ -17,92 +41,475 @@ class RetrievalService:
         self,
         embedding_service: EmbeddingService,
         chunking_service: ChunkingService,
-        vector_store: VectorStore,
+        vector_store: "VectorStore",
         top_k: int = 5,
-        similarity_threshold: float = 0.65
+        similarity_threshold: float = 0.65,
+        semantic_cache: Optional[SemanticCache] = None,
+        ingestion_batch_size: int = 1000,
+        checkpoint_directory: Optional[str] = None,
+        deduplication_threshold: Optional[float] = None,
+        query_log: Optional[QueryLog] = None,
+        memory: Optional[MemoryAccountant] = None,
+        tracemalloc_top_n: int = 0,
+        column_mapping: Optional[ColumnMapping] = None
     ):
         self.embedding_service = embedding_service
         self.chunking_service = chunking_service
         self.vector_store = vector_store
         self.top_k = top_k
         self.similarity_threshold = similarity_threshold
+        self.semantic_cache = semantic_cache
+        self.ingestion_batch_size = ingestion_batch_size
+        self.checkpoint_directory = checkpoint_directory
+        self.deduplication_threshold = deduplication_threshold
+        self.query_log = query_log
+        self.memory = memory
+        self.tracemalloc_top_n = tracemalloc_top_n
+        self.column_mapping = column_mapping or ColumnMapping()
 
-    async def ingest_dataset(self, file_path: str) -> Dict[str, Any]:
+    async def ingest_dataset(
+        self,
+        file_path: str,
+        trace: Optional[RequestTrace] = None,
+        column_mapping: Optional[ColumnMapping] = None
+    ) -> Dict[str, Any]:
         """
-        Ingest dataset: load → chunk → embed → store.
+        Ingest dataset: load → chunk → embed → store, one batch of rows at a time.
+
+        The file is streamed in batches of rows (CSV, JSON Lines, Parquet
+        or Arrow; CSV and JSON Lines may be gzip-compressed), so it is
+        never loaded whole. The column mapping picks the text and metadata
+        columns; only those columns are read.
+
+        With a checkpoint directory, each batch's embeddings are persisted
+        before they are stored, and progress is keyed by the file's hash.
+        Ingesting the same file again after a failure skips stored batches
+        and stores already-embedded ones without re-embedding them.
+
+        A provider that must be fitted first (local provider without a
+        model) is fitted on a random sample of the file's documents, read
+        in one extra pass, before anything is embedded.
+
+        With a deduplication threshold, exact and near-duplicate chunks are
+        collapsed onto one stored chunk before embedding.
+
+        With a memory accountant, the approximate size of the batch in
+        flight (documents, chunks, embeddings) and of the deduplication
+        index is reported as it changes; peaks are recorded in the trace.
+        With `tracemalloc_top_n`, the top allocation sites of the run are
+        recorded too (tracemalloc is process-wide, so allocations of
+        concurrent requests are included).
 
         Args:
-            file_path: Path to dataset file (CSV)
+            file_path: Path to dataset file
+            trace: Optional request trace to record stage timings
+            column_mapping: Text and metadata columns (default: the service's mapping)
 
         Returns:
             Ingestion statistics
+
+        Raises:
+            DatasetError: If the file cannot be parsed or lacks the text columns
+            ModelNotFittedError: If the provider needs fitting and the file is too small
         """
-        # Load dataset
-        df = pd.read_csv(file_path)
-
-        # Convert to documents (assuming a 'text' column exists)
-        documents = []
-        for idx, row in df.iterrows():
-            # Adjust this based on your dataset structure
-            text_content = str(row.get('text', row.iloc[0]))
-            doc = Document(
-                content=text_content,
-                metadata={"source_file": file_path, "row_index": idx}
-            )
-            documents.append(doc)
+        trace = trace or RequestTrace()
+        mapping = column_mapping or self.column_mapping
+        if not self.tracemalloc_top_n:
+            return await self._ingest_dataset(file_path, trace, mapping)
 
-        # Chunk all documents
-        all_chunks = []
-        for doc in documents:
-            chunks = self.chunking_service.process_document(doc)
-            all_chunks.extend(chunks)
+        with trace_allocations(self.tracemalloc_top_n) as allocations:
+            result = await self._ingest_dataset(file_path, trace, mapping)
+        trace.record("allocations", allocations)
+        if self.memory is not None:
+            self.memory.allocations = allocations
+        return result
 
-        # Generate embeddings
-        chunk_texts = [chunk.text for chunk in all_chunks]
-        embeddings = await self.embedding_service.embed_batch(chunk_texts)
+    async def _ingest_dataset(self, file_path: str, trace: RequestTrace, mapping: ColumnMapping) -> Dict[str, Any]:
+        if self.memory is not None:
+            self.memory.reset(*INGEST_COMPONENTS)
+
+        checkpoint = None
+        if self.checkpoint_directory:
+            with trace.stage("checkpoint"):
+                checkpoint = IngestionCheckpoint(
+                    self.checkpoint_directory,
+                    run_key(
+                        file_sha256(file_path),
+                        batch_size=self.ingestion_batch_size,
+                        chunk_size=self.chunking_service.chunk_size,
+                        chunk_overlap=self.chunking_service.chunk_overlap,
+                        collection=self.vector_store.name,
+                        embedding=self.embedding_service.provider.vector_space,
+                        dimensions=self.embedding_service.provider.dimensions,
+                        deduplication=self.deduplication_threshold,
+                        columns=[mapping.text, mapping.metadata]
+                    )
+                )
+
+        deduplicator = (
+            ChunkDeduplicator(threshold=self.deduplication_threshold)
+            if self.deduplication_threshold else None
+        )
+        if deduplicator and checkpoint:
+            # A resumed run keeps deduplicating against the batches already done
+            checkpoint.load_deduplicator(deduplicator)
+
+        if self.embedding_service.provider.needs_fit:
+            with trace.stage("fit"):
+                # Fitting is CPU-bound; keep it off the event loop
+                await asyncio.to_thread(self.embedding_service.fit_if_needed, self._fit_texts(file_path, mapping))
+
+        num_documents = 0
+        num_chunks = 0
+        embedded_chars = 0
+        resumed_batches = 0
+
+        # Batches are parsed lazily; CSV parsing loads pandas on first use,
+        # so query-only servers never import it
+        batches = read_record_batches(file_path, mapping.columns, self.ingestion_batch_size)
+        while True:
+            with trace.stage("load"):
+                batch = next(batches, None)
+            if batch is None:
+                break
+            offset, records = batch
+            if offset == 0:
+                mapping.validate(records)
+            unit = f"rows-{offset}"
+            status = checkpoint.status(unit) if checkpoint else None
+
+            if status == STATUS_STORED:
+                stats = checkpoint.units[unit]
+                num_documents += stats["documents"]
+                num_chunks += stats["chunks"]
+                resumed_batches += 1
+                continue
+
+            if status == STATUS_EMBEDDED:
+                with trace.stage("checkpoint"):
+                    all_chunks = checkpoint.load_embedded(unit)
+                num_documents += checkpoint.units[unit]["documents"]
+                resumed_batches += 1
+                if self.memory is not None:
+                    sizes = chunk_bytes(all_chunks)
+                    self.memory.set("ingest_chunks", sizes["objects"])
+                    self.memory.set("embedding_buffers", sizes["embeddings"])
+            else:
+                with trace.stage("load"):
+                    documents = []
+                    for i, record in enumerate(records):
+                        doc = mapping.to_document(record, offset + i, file_path)
+                        if doc is not None:
+                            documents.append(doc)
+
+                # Chunk all documents
+                with trace.stage("chunk"):
+                    all_chunks = []
+                    for doc in documents:
+                        chunks = self.chunking_service.process_document(doc)
+                        all_chunks.extend(chunks)
+
+                if deduplicator:
+                    with trace.stage("dedup"):
+                        all_chunks = deduplicator.deduplicate(all_chunks)
+                if self.memory is not None:
+                    self.memory.set("ingest_documents", document_bytes(documents))
+                    self.memory.set("ingest_chunks", chunk_bytes(all_chunks)["objects"])
+                    if deduplicator:
+                        self.memory.set("deduplication_index", deduplicator.memory_bytes())
+
+                # Generate embeddings
+                with trace.stage("embed"):
+                    chunk_texts = [chunk.text for chunk in all_chunks]
+                    embeddings = await self.embedding_service.embed_batch(chunk_texts) if chunk_texts else []
+
+                    # Assign embeddings to chunks
+                    for chunk, embedding in zip(all_chunks, embeddings):
+                        chunk.embedding = embedding
+                if self.memory is not None:
+                    self.memory.set("embedding_buffers", chunk_bytes(all_chunks)["embeddings"])
+
+                # Persist embeddings before storing, so they survive a failed store
+                if checkpoint:
+                    with trace.stage("checkpoint"):
+                        checkpoint.save_embedded(
+                            unit,
+                            all_chunks,
+                            {"documents": len(documents), "chunks": len(all_chunks)}
+                        )
+                        # Saved after the batch, so it never covers chunks a crash could lose
+                        if deduplicator:
+                            checkpoint.save_deduplicator(deduplicator)
+                num_documents += len(documents)
+                embedded_chars += sum(len(text) for text in chunk_texts)
+
+            # Store in vector database (re-adding an already stored chunk id is a no-op)
+            with trace.stage("store"):
+                await self.vector_store.add_chunks(all_chunks)
+            # Duplicates of chunks stored by earlier batches are recorded on them
+            if deduplicator:
+                with trace.stage("dedup"):
+                    await self.vector_store.update_metadata(deduplicator.pending_updates())
+            if checkpoint:
+                with trace.stage("checkpoint"):
+                    checkpoint.mark_stored(unit)
+            num_chunks += len(all_chunks)
+            if self.memory is not None:
+                self.memory.release("ingest_documents", "ingest_chunks", "embedding_buffers")
+
+        duplicate_chunks = deduplicator.num_duplicates if deduplicator else 0
+
+        if checkpoint:
+            checkpoint.complete()
+
+        trace.record("num_documents", num_documents)
+        trace.record("num_chunks", num_chunks)
+        trace.record("resumed_batches", resumed_batches)
+        trace.record("duplicate_chunks", duplicate_chunks)
+        if self.memory is not None:
+            self.memory.release("deduplication_index")
+            usage = self.memory.snapshot()
+            trace.record("memory_peak_bytes", {
+                component: usage[component]["peak_bytes"] for component in INGEST_COMPONENTS if component in usage
+            })
+
+        # Approximate token count (~4 characters per token, no tiktoken);
+        # batches embedded by an earlier, failed run cost nothing now
+        num_tokens = embedded_chars / 4
+
+        return {
+            "num_documents": num_documents,
+            "num_chunks": num_chunks,
+            "cost": num_tokens / 1_000_000 * EMBEDDING_COST_PER_1M_TOKENS,
+            "resumed_batches": resumed_batches,
+            "duplicate_chunks": duplicate_chunks
+        }
+
+    def _fit_texts(self, file_path: str, mapping: ColumnMapping) -> Iterator[str]:
+        """Chunk texts of a random sample of a dataset's documents, to fit the provider on."""
+        def documents() -> Iterator[Document]:
+            for offset, records in read_record_batches(file_path, mapping.columns, self.ingestion_batch_size):
+                if offset == 0:
+                    mapping.validate(records)
+                for i, record in enumerate(records):
+                    document = mapping.to_document(record, offset + i, file_path)
+                    if document is not None:
+                        yield document
+
+        for document in reservoir_sample(documents(), self.embedding_service.provider.fit_sample_size):
+            for chunk in self.chunking_service.process_document(document):
+                yield chunk.text
+
+    async def delete_documents(
+        self,
+        document_ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """
+        Delete all chunks of some documents, or all chunks matching a metadata filter.
+
+        Returns:
+            Number of chunks deleted or handed over to another document
+        """
+        return await self.vector_store.delete(document_ids=document_ids, where=where)
+
+    async def replace_document(
+        self,
+        document_id: str,
+        text: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Re-chunk and re-embed one document and replace its stored chunks.
+
+        Only this document is embedded; the rest of the index is untouched.
+
+        Args:
+            document_id: Document to replace (created if it does not exist)
+            text: New document text
+            metadata: Metadata stored with every chunk
+
+        Returns:
+            Update statistics
+
+        Raises:
+            ModelNotFittedError: If the provider has not been fitted on a dataset yet
+        """
+        if self.embedding_service.provider.needs_fit:
+            # Fitting on one document would fix the embedding space for good
+            raise ModelNotFittedError("Local embedding model is not fitted; ingest a dataset first")
+
+        document = Document(content=text, document_id=document_id, metadata=metadata or {})
+        chunks = self.chunking_service.process_document(document)
+        for chunk in chunks:
+            chunk.metadata.update(document.metadata)
 
-        # Assign embeddings to chunks
-        for chunk, embedding in zip(all_chunks, embeddings):
+        chunk_texts = [chunk.text for chunk in chunks]
+        embeddings = await self.embedding_service.embed_batch(chunk_texts)
+        for chunk, embedding in zip(chunks, embeddings):
             chunk.embedding = embedding
 
-        # Store in vector database
-        await self.vector_store.add_chunks(all_chunks)
+        deleted = await self.vector_store.replace_document(document_id, chunks)
 
+        num_tokens = sum(len(text) for text in chunk_texts) / 4
         return {
-            "num_documents": len(documents),
-            "num_chunks": len(all_chunks)
+            "document_id": document_id,
+            "num_chunks": len(chunks),
+            "deleted": deleted,
+            "cost": num_tokens / 1_000_000 * EMBEDDING_COST_PER_1M_TOKENS
         }
 
-    async def retrieve(self, query: str) -> List[RetrievalResult]:
+    async def retrieve(
+        self,
+        query: str,
+        trace: Optional[RequestTrace] = None,
+        include_neighbors: bool = False
+    ) -> List[RetrievalResult]:
         """
         Retrieve relevant chunks for a query.
 
         Args:
             query: Search query
+            trace: Optional request trace to record stage timings and counts
+            include_neighbors: Attach the chunks before and after each result
 
         Returns:
             List of retrieval results
         """
+        started = time.perf_counter()
+        trace = trace or RequestTrace()
+        results = await self._retrieve(query, trace)
+        if include_neighbors:
+            results = await self._attach_neighbors(results, trace)
+        if self.query_log is not None:
+            self.query_log.record(
+                normalize_query(query),
+                (time.perf_counter() - started) * 1000,
+                [result.chunk_id for result in results]
+            )
+        return results
+
+    async def _attach_neighbors(
+        self,
+        results: List[RetrievalResult],
+        trace: RequestTrace
+    ) -> List[RetrievalResult]:
+        """
+        Attach each result's preceding and following chunks.
+
+        Neighbor ids were stored with each chunk at ingestion, so all
+        neighbors are fetched in one batched lookup. Chunks ingested before
+        adjacency was recorded, and neighbors collapsed as duplicates, have
+        none. Cached results are copied, not modified.
+        """
+        neighbor_ids = list(dict.fromkeys(
+            chunk_id
+            for result in results
+            for chunk_id in (result.previous_chunk_id, result.next_chunk_id)
+            if chunk_id
+        ))
+        with trace.stage("neighbors"):
+            neighbors = await self.vector_store.get_chunks(neighbor_ids) if neighbor_ids else {}
+
+        def neighbor(chunk_id: Optional[str]) -> Optional[NeighborChunk]:
+            chunk = neighbors.get(chunk_id) if chunk_id else None
+            if chunk is None:
+                return None
+            return NeighborChunk(chunk_id=chunk.chunk_id, text=chunk.text, chunk_index=chunk.chunk_index)
+
+        trace.record("neighbors", len(neighbors))
+        return [
+            result.model_copy(update={
+                "previous_chunk": neighbor(result.previous_chunk_id),
+                "next_chunk": neighbor(result.next_chunk_id),
+            })
+            for result in results
+        ]
+
+    async def _retrieve(self, query: str, trace: RequestTrace) -> List[RetrievalResult]:
+        text = normalize_query(query)
+
+        # Repeated query texts (e.g. prewarmed hot queries) skip the embedding call
+        if self.semantic_cache is not None:
+            with trace.stage("cache"):
+                cached = self.semantic_cache.get_text(text, self.vector_store.version)
+            if cached is not None:
+                trace.record("cache", "hit_text")
+                return cached
+
         # Generate query embedding
-        query_embedding = await self.embedding_service.embed_text(query)
+        with trace.stage("embed"):
+            query_embedding = await self.embedding_service.embed_text(query)
+
+        # Near-duplicate queries are answered from the cache without a search
+        if self.semantic_cache is None:
+            trace.record("cache", "disabled")
+        else:
+            with trace.stage("cache"):
+                cached = self.semantic_cache.get(query_embedding, self.vector_store.version)
+            trace.record("cache", "miss" if cached is None else "hit")
+            if cached is not None:
+                return cached
 
-        # Search vector store
+        return await self._search(query_embedding, text, trace)
+
+    async def _search(
+        self,
+        query_embedding: List[float],
+        text: str,
+        trace: RequestTrace
+    ) -> List[RetrievalResult]:
+        """Search the vector store and cache the results under the query text."""
+        # A write landing during the search must not be cached as current
+        version = self.vector_store.version
+        # Search vector store (records "search" and "filter" stages)
         chunks_with_scores = await self.vector_store.search(
             query_embedding=query_embedding,
             top_k=self.top_k,
-            threshold=self.similarity_threshold
+            threshold=self.similarity_threshold,
+            trace=trace
         )
 
-        # Convert to API response format
+        # Convert to API response format (the route times serialization)
         results = [
             RetrievalResult(
                 chunk_id=chunk.chunk_id,
                 text=chunk.text,
                 similarity_score=score,
                 chunk_index=chunk.chunk_index,
-                document_id=chunk.document_id
+                document_id=chunk.document_id,
+                previous_chunk_id=chunk.metadata.get(METADATA_PREV_CHUNK_ID),
+                next_chunk_id=chunk.metadata.get(METADATA_NEXT_CHUNK_ID)
             )
             for chunk, score in chunks_with_scores
         ]
 
+        if self.semantic_cache is not None:
+            self.semantic_cache.put(query_embedding, results, version, text=text)
+
         return results
+
+    async def prewarm(self, top_n: int) -> int:
+        """
+        Precompute results for the most frequent logged queries.
+
+        The queries are embedded in one batch and searched, and the results
+        are cached under their text, so the first request for each is
+        served from memory. Does nothing without a query log or cache.
+
+        Args:
+            top_n: Number of most frequent queries to warm
+
+        Returns:
+            Number of queries warmed
+        """
+        if self.query_log is None or self.semantic_cache is None or top_n <= 0:
+            return 0
+        queries = await asyncio.to_thread(self.query_log.top_queries, top_n)
+        if not queries:
+            return 0
+
+        embeddings = await self.embedding_service.embed_batch(queries)
+        for text, embedding in zip(queries, embeddings):
+            await self._search(embedding, text, RequestTrace())
+        return len(queries)
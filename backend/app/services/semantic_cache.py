@@ -0,0 +1,169 @@
+"""Semantic response cache for near-duplicate queries."""
+
+import sys
+from collections import OrderedDict
+from typing import List, Optional, Dict, Any
+
+import numpy as np
+
+from app.models.schemas import RetrievalResult
+
+
+class SemanticCache:
+    """
+    Bounded LRU cache of query embeddings and their final results.
+
+    A lookup returns the results of the closest cached query if its cosine
+    distance is within `max_distance`. Entries are tagged with the vector
+    store version they were computed against, and the whole cache is
+    dropped as soon as a lookup sees a newer version.
+
+    Entries stored with their (normalized) query text can also be found
+    by exact text with `get_text`, which needs no query embedding.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_distance: float = 0.05):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.version: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+
+        self._matrix: Optional[np.ndarray] = None
+        self._results: List[Optional[List[RetrievalResult]]] = [None] * max_entries
+        self._texts: List[Optional[str]] = [None] * max_entries
+        self._slots_by_text: Dict[str, int] = {}
+        self._lru: "OrderedDict[int, None]" = OrderedDict()
+        self._free: List[int] = list(range(max_entries - 1, -1, -1))
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _sync_version(self, version: int) -> None:
+        """Drop all entries if the collection changed since they were cached."""
+        if self.version != version:
+            self.clear()
+            self.version = version
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._results = [None] * self.max_entries
+        self._texts = [None] * self.max_entries
+        self._slots_by_text.clear()
+        self._lru.clear()
+        self._free = list(range(self.max_entries - 1, -1, -1))
+
+    def get(self, embedding: List[float], version: int) -> Optional[List[RetrievalResult]]:
+        """
+        Find cached results for a near-duplicate query.
+
+        Args:
+            embedding: Query embedding
+            version: Current vector store version
+
+        Returns:
+            Cached results, or None on a miss
+        """
+        self._sync_version(version)
+        if not self._lru:
+            self.misses += 1
+            return None
+
+        slots = np.fromiter(self._lru.keys(), dtype=np.int64, count=len(self._lru))
+        similarities = self._matrix[slots] @ self._normalize(embedding)
+        best = int(np.argmax(similarities))
+        if 1.0 - float(similarities[best]) > self.max_distance:
+            self.misses += 1
+            return None
+
+        slot = int(slots[best])
+        self._lru.move_to_end(slot)
+        self.hits += 1
+        return list(self._results[slot])
+
+    def get_text(self, text: str, version: int) -> Optional[List[RetrievalResult]]:
+        """
+        Find cached results for exactly the same query text.
+
+        Args:
+            text: Normalized query text
+            version: Current vector store version
+
+        Returns:
+            Cached results, or None if the text is not cached
+        """
+        self._sync_version(version)
+        slot = self._slots_by_text.get(text)
+        if slot is None:
+            return None
+        self._lru.move_to_end(slot)
+        self.hits += 1
+        return list(self._results[slot])
+
+    def put(
+        self,
+        embedding: List[float],
+        results: List[RetrievalResult],
+        version: int,
+        text: Optional[str] = None
+    ) -> None:
+        """
+        Cache the results of a query, evicting the least recently used entry if full.
+
+        Results computed against an older version than the cache has
+        already seen are dropped.
+
+        Args:
+            embedding: Query embedding
+            results: Final results returned for the query
+            version: Vector store version the results were computed against
+            text: Optional normalized query text for exact-text lookups
+        """
+        if self.version is not None and version < self.version:
+            return
+        self._sync_version(version)
+        if self._matrix is None or self._matrix.shape[1] != len(embedding):
+            self._matrix = np.zeros((self.max_entries, len(embedding)), dtype=np.float32)
+            self.clear()
+
+        if self._free:
+            slot = self._free.pop()
+        else:
+            slot, _ = self._lru.popitem(last=False)
+
+        if self._texts[slot] is not None:
+            del self._slots_by_text[self._texts[slot]]
+        if text is not None and text in self._slots_by_text:
+            # Re-cached text: its old entry must not be found by text anymore
+            self._texts[self._slots_by_text[text]] = None
+
+        self._matrix[slot] = self._normalize(embedding)
+        self._results[slot] = list(results)
+        self._texts[slot] = text
+        if text is not None:
+            self._slots_by_text[text] = slot
+        self._lru[slot] = None
+
+    def memory_bytes(self) -> int:
+        """Approximate bytes held: the embedding matrix and the cached result texts."""
+        matrix = self._matrix.nbytes if self._matrix is not None else 0
+        return matrix + sum(
+            sys.getsizeof(result.text) + sys.getsizeof(result.chunk_id)
+            for slot in self._lru
+            for result in self._results[slot]
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache size and hit statistics."""
+        return {
+            "entries": len(self._lru),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
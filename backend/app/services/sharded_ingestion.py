@@ -0,0 +1,303 @@
+"""Sharded ingestion: worker processes chunk and embed, the calling process stores."""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Collection, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.exceptions import EmbeddingError
+from app.models.domain import Chunk, Document
+from app.services.chunking_service import ChunkingService
+from app.services.deduplication import ChunkDeduplicator
+from app.services.embedding_service import EmbeddingService
+from app.services.ingestion_checkpoint import (
+    IngestionCheckpoint,
+    STATUS_DEDUPLICATED,
+    STATUS_EMBEDDED,
+    STATUS_STORED,
+)
+from app.utils.memory import process_memory
+
+
+# (row index, row dictionary)
+Row = Tuple[int, Dict[str, Any]]
+# (record, row index, source file) -> document, or None to skip the row
+RecordToDocument = Callable[[Dict[str, Any], int, str], Optional[Document]]
+# Processes sharing the rate limits -> embedding service
+EmbeddingServiceFactory = Callable[[int], EmbeddingService]
+
+
+def chunk_rows(
+    rows: Iterable[Row],
+    source_file: str,
+    chunking_service: ChunkingService,
+    to_document: RecordToDocument
+) -> Tuple[int, List[Chunk]]:
+    """
+    Convert rows to documents and chunk them.
+
+    Returns:
+        (number of non-empty documents, chunks)
+    """
+    num_documents = 0
+    chunks: List[Chunk] = []
+    for row_index, record in rows:
+        doc = to_document(record, row_index, source_file)
+        if doc is not None:
+            num_documents += 1
+            chunks.extend(chunking_service.process_document(doc))
+    return num_documents, chunks
+
+
+async def store_duplicate_sources(
+    vector_store,
+    deduplicator: Optional[ChunkDeduplicator],
+    unstored_ids: Collection[str] = ()
+) -> None:
+    """Record duplicates of chunks stored by earlier batches on those chunks."""
+    if deduplicator is None:
+        return
+    await vector_store.update_metadata(deduplicator.pending_updates(skip=unstored_ids))
+
+
+# Per-process state of sharded ingestion workers
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_worker_embedding_service: Optional[EmbeddingService] = None
+_worker_chunking_service: Optional[ChunkingService] = None
+_worker_to_document: Optional[RecordToDocument] = None
+
+
+def _init_worker(
+    embedding_service_factory: EmbeddingServiceFactory,
+    chunking_service: ChunkingService,
+    to_document: RecordToDocument,
+    num_processes: int
+) -> None:
+    """Create the worker's event loop and services (and HTTP connection pool) once."""
+    global _worker_loop, _worker_embedding_service, _worker_chunking_service, _worker_to_document
+    _worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_worker_loop)
+    _worker_embedding_service = embedding_service_factory(num_processes)
+    _worker_chunking_service = chunking_service
+    _worker_to_document = to_document
+
+
+def _embed_chunks(
+    shard_id: int,
+    first_row: int,
+    num_rows: int,
+    num_documents: int,
+    chunks: List[Chunk],
+    started: Optional[float] = None
+) -> Dict[str, Any]:
+    """Embed one shard's chunks in a worker process."""
+    started = started or time.perf_counter()
+    texts = [chunk.text for chunk in chunks]
+    embeddings = _worker_loop.run_until_complete(
+        _worker_embedding_service.embed_batch(texts)
+    ) if texts else []
+    for chunk, embedding in zip(chunks, embeddings):
+        chunk.embedding = embedding
+
+    return {
+        "shard_id": shard_id,
+        "pid": os.getpid(),
+        "first_row": first_row,
+        "rows": num_rows,
+        "documents": num_documents,
+        "chunks": chunks,
+        "chars": sum(len(text) for text in texts),
+        "embed_seconds": time.perf_counter() - started,
+        "peak_rss_bytes": process_memory()["peak_rss_bytes"],
+    }
+
+
+def _embed_shard(shard_id: int, rows: List[Row], source_file: str) -> Dict[str, Any]:
+    """Chunk and embed one shard in a worker process."""
+    started = time.perf_counter()
+    num_documents, chunks = chunk_rows(rows, source_file, _worker_chunking_service, _worker_to_document)
+    return _embed_chunks(shard_id, rows[0][0], len(rows), num_documents, chunks, started)
+
+
+class ShardedIngestion:
+    """
+    Ingest shards of dataset rows with a pool of worker processes.
+
+    Workers chunk and embed, each with its own embedding service (and
+    connection pool); the calling process is the single writer to the
+    vector store and the checkpoint. At most two shards per worker are in
+    flight, so memory stays bounded by the shard size rather than the
+    dataset size. With deduplication, the calling process chunks and
+    deduplicates each shard (duplicates span shards) and workers only embed.
+
+    A local embedding model must be fitted before `run`; workers load it
+    from disk.
+    """
+
+    def __init__(
+        self,
+        vector_store,
+        checkpoint: IngestionCheckpoint,
+        embedding_service_factory: EmbeddingServiceFactory,
+        chunking_service: ChunkingService,
+        to_document: RecordToDocument,
+        source_file: str,
+        workers: int = 2,
+        deduplicator: Optional[ChunkDeduplicator] = None,
+        on_shard: Optional[Callable[[Dict[str, Any], List[Chunk]], None]] = None
+    ):
+        """
+        Initialize sharded ingestion.
+
+        Args:
+            vector_store: Store the chunks are written to
+            checkpoint: Progress of this run; stored shards are skipped
+            embedding_service_factory: Picklable function building a worker's
+                embedding service, given the number of processes sharing the rate limits
+            chunking_service: Chunking service (copied to each worker)
+            to_document: Picklable function converting a row to a document
+            source_file: Source file name recorded on documents
+            workers: Number of worker processes
+            deduplicator: Collapses duplicate chunks across shards, if given
+            on_shard: Called with each stored shard's result and chunks
+        """
+        self.vector_store = vector_store
+        self.checkpoint = checkpoint
+        self.embedding_service_factory = embedding_service_factory
+        self.chunking_service = chunking_service
+        self.to_document = to_document
+        self.source_file = source_file
+        self.workers = workers
+        self.deduplicator = deduplicator
+        self.on_shard = on_shard
+
+    async def run(self, shards: Iterator[Tuple[int, List[Row]]]) -> Dict[str, Any]:
+        """
+        Embed and store all shards.
+
+        Args:
+            shards: (shard id, rows) pairs; shard ids name checkpoint units
+
+        Returns:
+            Per-shard results, totals of shards skipped as already stored,
+            peak RSS per worker and the wall-clock time
+
+        Raises:
+            EmbeddingError: If a shard fails to chunk or embed
+        """
+        loop = asyncio.get_running_loop()
+        checkpoint = self.checkpoint
+        deduplicator = self.deduplicator
+        results: List[Dict[str, Any]] = []
+        skipped = {"rows": 0, "documents": 0, "chunks": 0, "chars": 0}
+        worker_peaks: Dict[int, int] = {}
+        # Canonical chunks sent for embedding and not stored yet
+        unstored_ids: set = set()
+        started = time.perf_counter()
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.embedding_service_factory, self.chunking_service, self.to_document, self.workers)
+        ) as pool:
+            pending = set()
+
+            def submit_next() -> None:
+                for shard_id, rows in shards:
+                    unit = f"shard-{shard_id}"
+                    status = checkpoint.status(unit)
+                    if status == STATUS_STORED:
+                        stats = checkpoint.units[unit]
+                        for name in skipped:
+                            skipped[name] += stats[name]
+                        continue
+                    if status == STATUS_EMBEDDED:
+                        # Embedded by the failed run: hand straight to the writer
+                        stats = checkpoint.units[unit]
+                        future = loop.create_future()
+                        future.set_result({
+                            "shard_id": shard_id,
+                            "pid": os.getpid(),
+                            "first_row": rows[0][0],
+                            "rows": stats["rows"],
+                            "documents": stats["documents"],
+                            "chunks": checkpoint.load_embedded(unit),
+                            "chars": stats["chars"],
+                            "embed_seconds": 0.0,
+                            "resumed": True,
+                        })
+                        pending.add(future)
+                    elif status == STATUS_DEDUPLICATED:
+                        # Deduplicated by the failed run: the saved index covers these chunks
+                        chunks = checkpoint.load_deduplicated(unit)
+                        unstored_ids.update(chunk.chunk_id for chunk in chunks)
+                        pending.add(loop.run_in_executor(
+                            pool, _embed_chunks, shard_id, rows[0][0], len(rows),
+                            checkpoint.units[unit]["documents"], chunks
+                        ))
+                    elif deduplicator:
+                        # Shards are deduplicated ahead of embedding, so they are saved
+                        # before the index that covers them
+                        num_documents, chunks = chunk_rows(
+                            rows, self.source_file, self.chunking_service, self.to_document
+                        )
+                        chunks = deduplicator.deduplicate(chunks)
+                        checkpoint.save_deduplicated(unit, chunks, {"rows": len(rows), "documents": num_documents})
+                        checkpoint.save_deduplicator(deduplicator)
+                        unstored_ids.update(chunk.chunk_id for chunk in chunks)
+                        pending.add(loop.run_in_executor(
+                            pool, _embed_chunks, shard_id, rows[0][0], len(rows), num_documents, chunks
+                        ))
+                    else:
+                        pending.add(loop.run_in_executor(pool, _embed_shard, shard_id, rows, self.source_file))
+                    return
+
+            for _ in range(2 * self.workers):
+                submit_next()
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        for other in pending:
+                            other.cancel()
+                        raise EmbeddingError(f"Shard failed to embed: {e}") from e
+                    chunks = result.pop("chunks")
+                    unit = f"shard-{result['shard_id']}"
+                    if "peak_rss_bytes" in result:
+                        worker_peaks[result["pid"]] = result["peak_rss_bytes"]
+                    if not result.get("resumed"):
+                        checkpoint.save_embedded(unit, chunks, {
+                            "rows": result["rows"],
+                            "documents": result["documents"],
+                            "chunks": len(chunks),
+                            "chars": result["chars"],
+                        })
+
+                    # Single writer: only this process touches the vector store
+                    store_started = time.perf_counter()
+                    if chunks:
+                        await self.vector_store.add_chunks(chunks)
+                    unstored_ids.difference_update(chunk.chunk_id for chunk in chunks)
+                    # Updates for chunks of shards still embedding wait for them
+                    await store_duplicate_sources(self.vector_store, deduplicator, unstored_ids)
+                    checkpoint.mark_stored(unit)
+                    result["store_seconds"] = time.perf_counter() - store_started
+                    result["num_chunks"] = len(chunks)
+                    results.append(result)
+                    if self.on_shard:
+                        self.on_shard(result, chunks)
+
+                    submit_next()
+
+        return {
+            "results": results,
+            "skipped": skipped,
+            "worker_peaks": worker_peaks,
+            "wall_seconds": time.perf_counter() - started,
+        }
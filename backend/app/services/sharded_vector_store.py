@@ -0,0 +1,374 @@
+"""Vector store sharded over several Chroma collections."""
+
+import asyncio
+import heapq
+import os
+import zlib
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator, List, Tuple, Optional, Dict, Any
+
+from app.models.domain import Chunk
+from app.core.exceptions import VectorStoreError
+from app.services.vector_store import VectorStore
+from app.utils.timing import RequestTrace
+
+
+SHARD_LAYOUTS = ("collections", "directories")
+
+
+def shard_for(document_id: str, num_shards: int) -> int:
+    """Stable shard index of a document (CRC32, same in every process)."""
+    return zlib.crc32(document_id.encode("utf-8")) % num_shards
+
+
+def create_shards(
+    collection_name: str,
+    persist_directory: str,
+    num_shards: int,
+    layout: str = "collections",
+    **store_options: Any
+) -> List[VectorStore]:
+    """
+    Open (or create) the shard stores.
+
+    Args:
+        collection_name: Base collection name
+        persist_directory: Chroma directory
+        num_shards: Number of shards
+        layout: "collections" for N collections in one directory, or
+            "directories" for one Chroma directory per shard
+        **store_options: VectorStore options (HNSW parameters)
+
+    Returns:
+        Shard stores in shard order
+    """
+    if layout not in SHARD_LAYOUTS:
+        raise ValueError(f"Unknown shard layout: {layout}")
+    if layout == "collections":
+        return [
+            VectorStore(f"{collection_name}_shard{i}", persist_directory, **store_options)
+            for i in range(num_shards)
+        ]
+    return [
+        VectorStore(collection_name, os.path.join(persist_directory, f"shard{i}"), **store_options)
+        for i in range(num_shards)
+    ]
+
+
+def create_vector_store(
+    collection_name: str,
+    persist_directory: str,
+    num_shards: int = 1,
+    layout: str = "collections",
+    **store_options: Any
+):
+    """A plain VectorStore for one shard, otherwise a ShardedVectorStore."""
+    if num_shards <= 1:
+        return VectorStore(collection_name, persist_directory, **store_options)
+    return ShardedVectorStore(
+        create_shards(collection_name, persist_directory, num_shards, layout, **store_options),
+        name=collection_name
+    )
+
+
+class ShardedVectorStore:
+    """
+    Scatter-gather store over N VectorStore shards.
+
+    Chunks are placed by a stable hash of their document_id, so all chunks
+    of a document live in one shard. Searches query every shard
+    concurrently in threads, merge the per-shard top-k with a heap and
+    apply the similarity threshold to the global top-k.
+    """
+
+    def __init__(self, shards: List[VectorStore], name: Optional[str] = None):
+        if not shards:
+            raise ValueError("At least one shard is required")
+        self.shards = shards
+        self.name = name or shards[0].name
+        # Incremented on every change so caches can detect stale results
+        self.version = 0
+
+    @asynccontextmanager
+    async def write_locked(self) -> AsyncIterator[None]:
+        """Hold the write lock of every shard, always taken in shard order."""
+        async with AsyncExitStack() as stack:
+            for shard in self.shards:
+                await stack.enter_async_context(shard._write_lock)
+            yield
+
+    def _group(self, chunks: List[Chunk]) -> Dict[int, List[Chunk]]:
+        groups: Dict[int, List[Chunk]] = {}
+        for chunk in chunks:
+            groups.setdefault(shard_for(chunk.document_id, len(self.shards)), []).append(chunk)
+        return groups
+
+    async def add_chunks(self, chunks: List[Chunk]) -> None:
+        """
+        Store chunks in their shards.
+
+        Raises:
+            VectorStoreError: If storage fails
+        """
+        await asyncio.gather(*(
+            self.shards[index].add_chunks(group)
+            for index, group in self._group(chunks).items()
+        ))
+        self.version += 1
+
+    async def update_metadata(self, chunks: List[Chunk]) -> None:
+        """
+        Merge metadata into stored chunks in their shards.
+
+        Raises:
+            VectorStoreError: If the update fails
+        """
+        await asyncio.gather(*(
+            self.shards[index].update_metadata(group)
+            for index, group in self._group(chunks).items()
+        ))
+        self.version += 1
+
+    async def search(
+        self,
+        query_embedding: List[float],
+        top_k: int,
+        threshold: float,
+        trace: Optional[RequestTrace] = None
+    ) -> List[Tuple[Chunk, float]]:
+        """
+        Search all shards and merge into a global top-k.
+
+        Args:
+            query_embedding: Query embedding vector
+            top_k: Number of results to return
+            threshold: Minimum similarity score
+            trace: Optional request trace to record search/merge/filter stages
+
+        Returns:
+            List of (Chunk, similarity_score) tuples, best first
+
+        Raises:
+            VectorStoreError: If search fails
+        """
+        trace = trace or RequestTrace()
+        try:
+            with trace.stage("search"):
+                per_shard = await asyncio.gather(*(
+                    asyncio.to_thread(shard.query_ids, query_embedding, top_k)
+                    for shard in self.shards
+                ))
+
+            with trace.stage("merge"):
+                candidates = heapq.nlargest(
+                    top_k,
+                    (
+                        (chunk_id, similarity, index)
+                        for index, results in enumerate(per_shard)
+                        for chunk_id, similarity in results
+                    ),
+                    key=lambda candidate: candidate[1]
+                )
+
+            # Apply threshold
+            with trace.stage("filter"):
+                kept = [candidate for candidate in candidates if candidate[1] >= threshold]
+
+            # Fetch only the final results, one batch per shard
+            with trace.stage("hydrate"):
+                by_shard: Dict[int, List[str]] = {}
+                for chunk_id, _, index in kept:
+                    by_shard.setdefault(index, []).append(chunk_id)
+                fetched = await asyncio.gather(*(
+                    asyncio.to_thread(self.shards[index].fetch_chunks, ids)
+                    for index, ids in by_shard.items()
+                ))
+                chunks = {chunk_id: chunk for found in fetched for chunk_id, chunk in found.items()}
+                chunks_with_scores = [
+                    (chunks[chunk_id], similarity) for chunk_id, similarity, _ in kept
+                    if chunk_id in chunks
+                ]
+
+            trace.record("shards", len(self.shards))
+            trace.record("candidates_before_threshold", len(candidates))
+            trace.record("candidates_after_threshold", len(chunks_with_scores))
+
+            return chunks_with_scores
+
+        except Exception as e:
+            raise VectorStoreError(f"Search failed: {str(e)}")
+
+    async def get_chunks(self, ids: List[str]) -> Dict[str, Chunk]:
+        """
+        Load stored chunks by id, with one batched lookup per shard in parallel.
+
+        All shards are asked, so chunks placed before a reshard are found too.
+
+        Raises:
+            VectorStoreError: If the lookup fails
+        """
+        if not ids:
+            return {}
+        try:
+            fetched = await asyncio.gather(*(
+                asyncio.to_thread(shard.fetch_chunks, ids) for shard in self.shards
+            ))
+        except Exception as e:
+            raise VectorStoreError(f"Failed to get chunks: {str(e)}")
+        return {chunk_id: chunk for found in fetched for chunk_id, chunk in found.items()}
+
+    async def delete(
+        self,
+        document_ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """
+        Delete matching chunks from every shard.
+
+        All shards are asked, so chunks placed before a reshard are found too.
+
+        Returns:
+            Number of chunks deleted or handed over to another document
+
+        Raises:
+            VectorStoreError: If deletion fails
+        """
+        deleted = sum(await asyncio.gather(*(
+            shard.delete(document_ids=document_ids, where=where) for shard in self.shards
+        )))
+        if deleted:
+            self.version += 1
+        return deleted
+
+    async def replace_document(self, document_id: str, chunks: List[Chunk]) -> int:
+        """
+        Replace all chunks of a document with new ones.
+
+        Returns:
+            Number of old chunks deleted or handed over to another document
+
+        Raises:
+            VectorStoreError: If the update fails
+        """
+        for chunk in chunks:
+            chunk.document_id = document_id
+        new_ids = {chunk.chunk_id for chunk in chunks}
+        target = self.shards[shard_for(document_id, len(self.shards))]
+        async with self.write_locked():
+            try:
+                # Old chunks are looked up in every shard (they may predate a
+                # reshard) and deleted only once the new ones are stored
+                old_ids = [
+                    [i for i in shard.matching_ids([document_id]) if i not in new_ids]
+                    for shard in self.shards
+                ]
+                target.store_chunks(chunks)
+                deleted = sum(
+                    shard.remove_documents([document_id], ids) for shard, ids in zip(self.shards, old_ids)
+                )
+            except Exception as e:
+                raise VectorStoreError(f"Failed to replace document: {str(e)}")
+        self.version += 1
+        return deleted
+
+    def needs_compaction(self, deleted_ratio: float) -> bool:
+        """Whether any shard has enough deletions to rebuild its index."""
+        return any(shard.needs_compaction(deleted_ratio) for shard in self.shards)
+
+    async def compact(self) -> None:
+        """
+        Rebuild the ANN index of every shard with deletions or stale HNSW
+        parameters, one at a time.
+
+        Raises:
+            VectorStoreError: If a rebuild fails
+        """
+        for shard in self.shards:
+            if shard.deleted_since_compaction or shard.stale_hnsw_params:
+                await shard.compact()
+        self.version += 1
+
+    def count(self) -> int:
+        """Get total number of chunks stored."""
+        return sum(shard.count() for shard in self.shards)
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Approximate index size summed over shards (shared directories counted once)."""
+        usages = [shard.memory_usage() for shard in self.shards]
+        disk = {os.path.abspath(shard.persist_directory): usage["disk_bytes"]
+                for shard, usage in zip(self.shards, usages)}
+        return {
+            "chunks": sum(usage["chunks"] for usage in usages),
+            "index_memory_bytes": sum(usage["index_memory_bytes"] for usage in usages),
+            "disk_bytes": sum(disk.values()),
+        }
+
+    def reset(self) -> None:
+        """Clear all data from every shard."""
+        for shard in self.shards:
+            shard.reset()
+        self.version += 1
+
+    def rebalance(self, shards: List[VectorStore], page_size: int = 5_000) -> int:
+        """
+        Move to a new set of shards, reusing the stored embeddings.
+
+        Chunks whose shard changes are copied with their embeddings,
+        texts and metadata to the new shard and deleted from the old one;
+        nothing is re-embedded. Shards are matched by directory and
+        collection name, so existing shards can be reopened as part of the
+        new list (e.g. the old N followed by the added ones).
+
+        Args:
+            shards: New shard stores in shard order
+            page_size: Chunks moved at a time
+
+        Returns:
+            Number of chunks moved
+
+        Raises:
+            VectorStoreError: If moving fails
+        """
+        def key(shard: VectorStore) -> Tuple[str, str]:
+            return os.path.abspath(shard.persist_directory), shard.name
+
+        moved = 0
+        new_index = {key(shard): index for index, shard in enumerate(shards)}
+        try:
+            for source in self.shards:
+                source_index = new_index.get(key(source))
+                offset = 0
+                while True:
+                    page = source.get_page(page_size, offset)
+                    if not page["ids"]:
+                        break
+
+                    # Group rows that belong elsewhere by their new shard
+                    moves: Dict[int, List[int]] = {}
+                    for row, metadata in enumerate(page["metadatas"]):
+                        target = shard_for(metadata["document_id"], len(shards))
+                        if target != source_index:
+                            moves.setdefault(target, []).append(row)
+
+                    for target, rows in moves.items():
+                        ids = [page["ids"][row] for row in rows]
+                        shards[target].add_records(
+                            ids,
+                            [page["embeddings"][row] for row in rows],
+                            [page["documents"][row] for row in rows],
+                            [page["metadatas"][row] for row in rows]
+                        )
+                        shards[target].version += 1
+                        source.delete_records(ids)
+                        source.version += 1
+                        moved += len(ids)
+
+                    # Deleted rows shift later rows back; only skip the kept ones
+                    offset += len(page["ids"]) - sum(len(rows) for rows in moves.values())
+
+        except Exception as e:
+            raise VectorStoreError(f"Failed to rebalance shards: {str(e)}")
+
+        self.shards = shards
+        self.version += 1
+        return moved
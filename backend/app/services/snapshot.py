@@ -0,0 +1,266 @@
+"""Binary snapshot export/import of the vector index."""
+
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional, Union, TYPE_CHECKING
+
+import numpy as np
+
+from app.core.exceptions import SnapshotError
+from app.services.ingestion_checkpoint import file_sha256, write_atomic
+from app.utils.dataset_reader import require_pyarrow
+
+if TYPE_CHECKING:
+    # Read-only servers load snapshots without importing chromadb
+    from app.services.sharded_vector_store import ShardedVectorStore
+    from app.services.vector_store import VectorStore
+
+
+SNAPSHOT_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+RECORDS_FILE = "records.arrow"
+# Name of the published snapshot in a snapshot root directory
+CURRENT_FILE = "CURRENT"
+
+
+def read_manifest(directory: str) -> Dict[str, Any]:
+    """
+    Read and validate a snapshot manifest.
+
+    Raises:
+        SnapshotError: If the manifest is missing or of an unsupported version
+    """
+    try:
+        manifest = json.loads((Path(directory) / MANIFEST_FILE).read_text())
+    except (OSError, ValueError) as e:
+        raise SnapshotError(f"Failed to read snapshot manifest in {directory}: {str(e)}")
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot format version: {manifest.get('format_version')}")
+    return manifest
+
+
+def verify_snapshot(directory: str, manifest: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Check every snapshot file against the checksums in the manifest.
+
+    Raises:
+        SnapshotError: If a file is missing or its checksum does not match
+    """
+    manifest = manifest or read_manifest(directory)
+    for name, expected in manifest["checksums"].items():
+        path = Path(directory) / name
+        if not path.exists():
+            raise SnapshotError(f"Snapshot file missing: {path}")
+        if file_sha256(str(path)) != expected:
+            raise SnapshotError(f"Checksum mismatch for {path}")
+
+
+def export_snapshot(
+    vector_store: Union["VectorStore", "ShardedVectorStore"],
+    directory: str,
+    page_size: int = 10_000
+) -> Dict[str, Any]:
+    """
+    Write the collection (all shards of a sharded store) to a versioned snapshot bundle.
+
+    The bundle holds a float32 embedding matrix (.npy), an Arrow IPC file
+    with ids, texts and JSON metadata in the same row order, and a
+    manifest with SHA-256 checksums. It is written to a temporary
+    directory and renamed into place, so a partial export is never
+    mistaken for a snapshot.
+
+    Args:
+        vector_store: Store to export
+        directory: Snapshot directory (must not exist)
+        page_size: Rows read from the collection at a time
+
+    Returns:
+        The snapshot manifest
+
+    Raises:
+        SnapshotError: If the export fails
+    """
+    pa = require_pyarrow()
+    import pyarrow.ipc as ipc
+
+    target = Path(directory)
+    if target.exists():
+        raise SnapshotError(f"Snapshot directory already exists: {target}")
+    target.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=f".{target.name}-", dir=target.parent))
+
+    try:
+        shards = getattr(vector_store, "shards", [vector_store])
+        counts = [shard.count() for shard in shards]
+        count = sum(counts)
+        schema = pa.schema([("id", pa.string()), ("text", pa.string()), ("metadata", pa.string())])
+        embeddings = None
+        dimensions = 0
+        row = 0
+
+        with ipc.new_file(str(staging / RECORDS_FILE), schema) as writer:
+            for shard, shard_count in zip(shards, counts):
+                for offset in range(0, shard_count, page_size):
+                    page = shard.get_page(min(page_size, shard_count - offset), offset)
+                    page_embeddings = np.asarray(page["embeddings"], dtype=np.float32)
+                    if embeddings is None:
+                        dimensions = page_embeddings.shape[1]
+                        embeddings = np.lib.format.open_memmap(
+                            str(staging / EMBEDDINGS_FILE), mode="w+", dtype=np.float32, shape=(count, dimensions)
+                        )
+                    embeddings[row:row + len(page_embeddings)] = page_embeddings
+                    row += len(page_embeddings)
+                    writer.write_batch(pa.record_batch([
+                        pa.array(page["ids"], pa.string()),
+                        pa.array(page["documents"], pa.string()),
+                        pa.array([json.dumps(metadata) for metadata in page["metadatas"]], pa.string()),
+                    ], schema=schema))
+
+        if embeddings is None:
+            np.save(str(staging / EMBEDDINGS_FILE), np.zeros((0, 0), dtype=np.float32))
+        else:
+            embeddings.flush()
+            del embeddings
+
+        manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "collection": vector_store.name,
+            "collection_metadata": shards[0].collection.metadata,
+            "count": count,
+            "dimensions": dimensions,
+            "created_at": datetime.utcnow().isoformat(),
+            "checksums": {
+                name: file_sha256(str(staging / name))
+                for name in (EMBEDDINGS_FILE, RECORDS_FILE)
+            },
+        }
+        (staging / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+        os.replace(staging, target)
+        return manifest
+
+    except SnapshotError:
+        raise
+    except Exception as e:
+        raise SnapshotError(f"Failed to export snapshot: {str(e)}")
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def import_snapshot(
+    vector_store: "VectorStore",
+    directory: str,
+    replace: bool = False,
+    verify: bool = True
+) -> Dict[str, Any]:
+    """
+    Bulk-load a snapshot bundle into the collection.
+
+    Rows go to Chroma in the largest batches it accepts, straight from the
+    memory-mapped embedding matrix and Arrow columns, with no per-chunk
+    objects or embedding calls.
+
+    Args:
+        vector_store: Store to load into
+        directory: Snapshot directory
+        replace: Clear the collection first; otherwise it must be empty
+        verify: Check file checksums before loading
+
+    Returns:
+        The snapshot manifest
+
+    Raises:
+        SnapshotError: If the snapshot is invalid or the load fails
+    """
+    pa = require_pyarrow()
+    import pyarrow.ipc as ipc
+
+    manifest = read_manifest(directory)
+    if verify:
+        verify_snapshot(directory, manifest)
+
+    if replace:
+        vector_store.reset()
+    elif vector_store.count():
+        raise SnapshotError(
+            f"Collection {vector_store.collection.name} is not empty; import with replace=True"
+        )
+
+    try:
+        embeddings = np.load(str(Path(directory) / EMBEDDINGS_FILE), mmap_mode="r")
+        batch_size = vector_store.client.max_batch_size
+        with pa.memory_map(str(Path(directory) / RECORDS_FILE), "r") as source:
+            table = ipc.open_file(source).read_all()
+            if table.num_rows != manifest["count"] or len(embeddings) != manifest["count"]:
+                raise SnapshotError("Snapshot row counts do not match the manifest")
+
+            for start in range(0, table.num_rows, batch_size):
+                rows = table.slice(start, batch_size)
+                vector_store.add_records(
+                    rows.column("id").to_pylist(),
+                    embeddings[start:start + batch_size].tolist(),
+                    rows.column("text").to_pylist(),
+                    [json.loads(metadata) for metadata in rows.column("metadata").to_pylist()]
+                )
+        vector_store.version += 1
+        return manifest
+
+    except SnapshotError:
+        raise
+    except Exception as e:
+        raise SnapshotError(f"Failed to import snapshot: {str(e)}")
+
+
+def current_snapshot(root: str) -> Optional[str]:
+    """Path of the snapshot published in a root directory, or None."""
+    try:
+        name = (Path(root) / CURRENT_FILE).read_text().strip()
+    except FileNotFoundError:
+        return None
+    return str(Path(root) / name) if name else None
+
+
+def publish_snapshot(
+    vector_store: Union["VectorStore", "ShardedVectorStore"],
+    root: str,
+    keep: int = 3
+) -> Dict[str, Any]:
+    """
+    Export a new snapshot and make it the current one.
+
+    The snapshot is written to a new directory under `root`, then the
+    CURRENT pointer is replaced atomically, so readers see either the old
+    or the new snapshot and never a partial one. Older snapshots beyond
+    `keep` are removed; readers that still map one keep their (unlinked)
+    files until they switch. The collection is paged by offset, so a
+    caller sharing the store with writers holds its `write_locked()`
+    around the call.
+
+    Args:
+        vector_store: Store to export (the single writer)
+        root: Snapshot root directory
+        keep: Published snapshots to retain, including the new one
+
+    Returns:
+        The snapshot manifest, with its "path"
+
+    Raises:
+        SnapshotError: If the export fails
+    """
+    name = datetime.utcnow().strftime("%Y%m%dT%H%M%S%fZ")
+    path = Path(root) / name
+    manifest = export_snapshot(vector_store, str(path))
+    write_atomic(Path(root) / CURRENT_FILE, name.encode("utf-8"))
+
+    published = sorted(
+        entry for entry in Path(root).iterdir()
+        if entry.is_dir() and (entry / MANIFEST_FILE).exists()
+    )
+    for old in published[:-max(keep, 1)]:
+        if old != path:
+            shutil.rmtree(old, ignore_errors=True)
+    return {**manifest, "path": str(path)}
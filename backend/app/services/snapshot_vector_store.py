@@ -0,0 +1,237 @@
+"""Read-only vector store serving a published snapshot from memory-mapped files."""
+
+import asyncio
+import json
+import threading
+import time
+from pathlib import Path
+from typing import List, Tuple, Optional, NamedTuple, Any, Dict
+
+import numpy as np
+
+from app.core.exceptions import SnapshotError, VectorStoreError
+from app.models.domain import Chunk
+from app.services.snapshot import EMBEDDINGS_FILE, RECORDS_FILE, current_snapshot, read_manifest
+from app.utils.dataset_reader import require_pyarrow
+from app.utils.memory import directory_bytes
+from app.utils.timing import RequestTrace
+
+
+class _LoadedSnapshot(NamedTuple):
+    path: str
+    embeddings: np.ndarray
+    inverse_norms: np.ndarray
+    records: Any  # pyarrow.Table backed by the memory map
+
+
+class SnapshotVectorStore:
+    """
+    Exact cosine search over the current published snapshot.
+
+    The embedding matrix and the Arrow records are memory-mapped read-only,
+    so every worker process serving the same snapshot shares one copy of
+    it in the OS page cache. Searches are a matrix-vector product over the
+    mapped matrix. The CURRENT pointer is re-read at most every
+    `poll_interval` seconds; a newly published snapshot is mapped and
+    swapped in, and `version` is bumped so caches drop stale results.
+    Reading `version` polls too, so a cache lookup keyed by it is never
+    answered from an older snapshot than the one published.
+    Searches, refreshes and id lookups run in a worker thread, so a large
+    matrix product or loading a new snapshot never blocks the event loop.
+    """
+
+    def __init__(self, snapshot_root: str, name: Optional[str] = None, poll_interval: float = 1.0):
+        self.snapshot_root = snapshot_root
+        self.name = name or Path(snapshot_root).name
+        self.poll_interval = poll_interval
+        # Incremented whenever a new snapshot is swapped in
+        self._version = 0
+
+        self._snapshot: Optional[_LoadedSnapshot] = None
+        # Chunk id -> row of the snapshot it was built for, built on first lookup by id
+        self._rows: Optional[Tuple[str, Dict[str, int]]] = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.refresh()
+
+    @staticmethod
+    def _load(path: str, block_size: int = 65_536) -> _LoadedSnapshot:
+        pa = require_pyarrow()
+        import pyarrow.ipc as ipc
+
+        manifest = read_manifest(path)
+        embeddings = np.load(str(Path(path) / EMBEDDINGS_FILE), mmap_mode="r")
+        records = ipc.open_file(pa.memory_map(str(Path(path) / RECORDS_FILE), "r")).read_all()
+        if len(embeddings) != manifest["count"] or records.num_rows != manifest["count"]:
+            raise SnapshotError(f"Snapshot row counts do not match the manifest: {path}")
+
+        # Norms are the only per-process copy (4 bytes per row)
+        inverse_norms = np.empty(len(embeddings), dtype=np.float32)
+        for start in range(0, len(embeddings), block_size):
+            norms = np.linalg.norm(embeddings[start:start + block_size], axis=1)
+            inverse_norms[start:start + block_size] = 1.0 / np.where(norms == 0, 1.0, norms)
+        return _LoadedSnapshot(path, embeddings, inverse_norms, records)
+
+    def refresh(self) -> bool:
+        """
+        Switch to the current published snapshot if it changed.
+
+        Returns:
+            True if a new snapshot was loaded
+
+        Raises:
+            SnapshotError: If the published snapshot cannot be loaded
+        """
+        with self._lock:
+            self._checked = time.monotonic()
+            path = current_snapshot(self.snapshot_root)
+            if path is None or (self._snapshot and self._snapshot.path == path):
+                return False
+            self._snapshot = self._load(path)
+            self._version += 1
+            return True
+
+    @property
+    def version(self) -> int:
+        """Version of the current published snapshot (polling for a new one first)."""
+        self._current()
+        return self._version
+
+    def _current(self) -> Optional[_LoadedSnapshot]:
+        if time.monotonic() - self._checked >= self.poll_interval:
+            try:
+                self.refresh()
+            except SnapshotError:
+                pass  # keep serving the snapshot already mapped
+        return self._snapshot
+
+    async def search(
+        self,
+        query_embedding: List[float],
+        top_k: int,
+        threshold: float,
+        trace: Optional[RequestTrace] = None
+    ) -> List[Tuple[Chunk, float]]:
+        """
+        Search for similar chunks.
+
+        Args:
+            query_embedding: Query embedding vector
+            top_k: Number of results to return
+            threshold: Minimum similarity score
+            trace: Optional request trace to record search/filter stages
+
+        Returns:
+            List of (Chunk, similarity_score) tuples
+
+        Raises:
+            VectorStoreError: If search fails
+        """
+        trace = trace or RequestTrace()
+        try:
+            snapshot = await asyncio.to_thread(self._current)
+            with trace.stage("search"):
+                candidates = await asyncio.to_thread(self.query_rows, snapshot, query_embedding, top_k)
+
+            # Apply threshold
+            with trace.stage("filter"):
+                kept = [(row, similarity) for row, similarity in candidates if similarity >= threshold]
+
+            # Only the final results are decoded from the records
+            with trace.stage("hydrate"):
+                chunks_with_scores = [
+                    (self._chunk(snapshot, row), similarity) for row, similarity in kept
+                ]
+
+            trace.record("candidates_before_threshold", len(candidates))
+            trace.record("candidates_after_threshold", len(chunks_with_scores))
+
+            return chunks_with_scores
+
+        except Exception as e:
+            raise VectorStoreError(f"Search failed: {str(e)}")
+
+    def _row_index(self, snapshot: _LoadedSnapshot) -> Dict[str, int]:
+        """Row of each chunk id in a snapshot (a per-process dict, built once per snapshot)."""
+        with self._lock:
+            if self._rows is None or self._rows[0] != snapshot.path:
+                ids = snapshot.records.column("id").to_pylist()
+                self._rows = (snapshot.path, {chunk_id: row for row, chunk_id in enumerate(ids)})
+            return self._rows[1]
+
+    async def get_chunks(self, ids: List[str]) -> Dict[str, Chunk]:
+        """
+        Load chunks of the current snapshot by id (e.g. a result's neighbors).
+
+        The first lookup builds an id-to-row index of the snapshot, so
+        later lookups decode only the requested rows.
+
+        Returns:
+            Chunks by id; unknown ids are left out
+
+        Raises:
+            VectorStoreError: If the lookup fails
+        """
+        try:
+            snapshot = await asyncio.to_thread(self._current)
+            if snapshot is None or not ids:
+                return {}
+            rows = await asyncio.to_thread(self._row_index, snapshot)
+            return {
+                chunk_id: self._chunk(snapshot, rows[chunk_id])
+                for chunk_id in ids if chunk_id in rows
+            }
+        except Exception as e:
+            raise VectorStoreError(f"Failed to get chunks: {str(e)}")
+
+    @staticmethod
+    def query_rows(
+        snapshot: Optional[_LoadedSnapshot],
+        query_embedding: List[float],
+        top_k: int
+    ) -> List[Tuple[int, float]]:
+        """Rows of the nearest chunks with their cosine similarity, best first, without a threshold."""
+        if snapshot is None or not len(snapshot.embeddings):
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query_norm = np.linalg.norm(query)
+        scores = (snapshot.embeddings @ query) * snapshot.inverse_norms / (query_norm or 1.0)
+
+        top_k = min(top_k, len(scores))
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top])]
+        return [(row, float(scores[row])) for row in top.tolist()]
+
+    @staticmethod
+    def _chunk(snapshot: _LoadedSnapshot, row: int) -> Chunk:
+        metadata = json.loads(snapshot.records.column("metadata")[row].as_py())
+        return Chunk(
+            chunk_id=snapshot.records.column("id")[row].as_py(),
+            text=snapshot.records.column("text")[row].as_py(),
+            document_id=metadata["document_id"],
+            chunk_index=metadata["chunk_index"],
+            metadata=metadata
+        )
+
+    def count(self) -> int:
+        """Get number of chunks in the current snapshot."""
+        snapshot = self._current()
+        return len(snapshot.embeddings) if snapshot else 0
+
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        Size of the current snapshot.
+
+        Mapped bytes are shared page cache, not private memory; only the
+        inverse norms are held per process.
+        """
+        snapshot = self._current()
+        if snapshot is None:
+            return {"chunks": 0, "index_memory_bytes": 0, "mapped_bytes": 0, "disk_bytes": 0}
+        return {
+            "chunks": len(snapshot.embeddings),
+            "index_memory_bytes": snapshot.inverse_norms.nbytes,
+            "mapped_bytes": snapshot.embeddings.nbytes + snapshot.records.nbytes,
+            "disk_bytes": directory_bytes(snapshot.path),
+        }
@@ -1,24 +1,111 @@
 """Vector database operations using ChromaDB."""
 
-from typing import List, Tuple
+import asyncio
+import os
+import warnings
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Tuple, Optional, Dict, Any
 import chromadb
 from chromadb.config import Settings as ChromaSettings
 
 from app.models.domain import Chunk
+from app.core.constants import (
+    CHUNK_TEXT_DIR,
+    METADATA_DOCUMENT_ID,
+    METADATA_DUPLICATE_COUNT,
+    METADATA_SOURCE_DOCUMENT_IDS,
+)
 from app.core.exceptions import VectorStoreError
+from app.services.chunk_text_store import ChunkTextStore
+from app.utils.memory import directory_bytes
+from app.utils.timing import RequestTrace
+
+
+def hnsw_metadata(
+    construction_ef: Optional[int] = None,
+    search_ef: Optional[int] = None,
+    m: Optional[int] = None
+) -> Dict[str, Any]:
+    """Chroma collection metadata for cosine HNSW with optional tuning."""
+    metadata: Dict[str, Any] = {"hnsw:space": "cosine"}
+    if construction_ef is not None:
+        metadata["hnsw:construction_ef"] = construction_ef
+    if search_ef is not None:
+        metadata["hnsw:search_ef"] = search_ef
+    if m is not None:
+        metadata["hnsw:M"] = m
+    return metadata
 
 
 class VectorStore:
     """ChromaDB vector store for similarity search."""
 
-    def __init__(self, collection_name: str, persist_directory: str):
+    def __init__(
+        self,
+        collection_name: str,
+        persist_directory: str,
+        hnsw_construction_ef: Optional[int] = None,
+        hnsw_search_ef: Optional[int] = None,
+        hnsw_m: Optional[int] = None,
+        text_store: bool = False
+    ):
+        """
+        Open or create the collection.
+
+        HNSW parameters left as None use Chroma's defaults (construction
+        ef 100, search ef 10, M 16). Chroma reads all of them, search ef
+        included, from the index segment, which keeps the values it was
+        created with; they only apply to an index built from scratch (new
+        collection, reset or compaction). Opening an existing collection
+        with different values warns and marks it for compaction.
+
+        With `text_store`, chunk texts are kept out of the collection in a
+        compressed ChunkTextStore next to it; the collection keeps vectors
+        and the metadata it filters on. Chunks stored before it was
+        enabled are still read from the collection.
+        """
+        self.name = collection_name
+        self.persist_directory = persist_directory
+        self.collection_metadata = hnsw_metadata(hnsw_construction_ef, hnsw_search_ef, hnsw_m)
         self.client = chromadb.PersistentClient(
             path=persist_directory
         )
-        self.collection = self.client.get_or_create_collection(
-            name=collection_name,
-            metadata={"hnsw:space": "cosine"}
+        self._recover_compaction()
+        try:
+            # Opened as is, so its metadata still records the HNSW parameters of its index
+            self.collection = self.client.get_collection(collection_name)
+        except ValueError:
+            self.collection = self.client.get_or_create_collection(
+                name=collection_name,
+                metadata=self.collection_metadata
+            )
+        # Once a collection has a text store it keeps using it, so tools
+        # opening it without the option still see and write its texts
+        text_store_path = os.path.join(persist_directory, CHUNK_TEXT_DIR, f"{collection_name}.sqlite3")
+        self.text_store = (
+            ChunkTextStore(text_store_path) if text_store or os.path.exists(text_store_path) else None
         )
+        # Incremented on every change so caches can detect stale results
+        self.version = 0
+        # Deletions leave tombstones in the HNSW graph until it is rebuilt
+        # (counted since this process opened the store)
+        self.deleted_since_compaction = 0
+        # Writes wait while compaction copies the collection
+        self._write_lock = asyncio.Lock()
+        # Configured HNSW parameters the existing index was built without
+        self.stale_hnsw_params = self._stale_hnsw_params()
+        if self.stale_hnsw_params:
+            warnings.warn(
+                f"Collection {collection_name} index was built with other HNSW "
+                f"parameters than {self.stale_hnsw_params}; they apply after compaction",
+                stacklevel=2
+            )
+
+    @asynccontextmanager
+    async def write_locked(self) -> AsyncIterator[None]:
+        """Hold the write lock, e.g. while a snapshot is exported in a thread."""
+        async with self._write_lock:
+            yield
 
     async def add_chunks(self, chunks: List[Chunk]) -> None:
         """
@@ -30,39 +117,39 @@ class VectorStore:
         Raises:
             VectorStoreError: If storage fails
         """
-        try:
-            if not chunks:
-                return
-
-            # Prepare data for ChromaDB
-            ids = [chunk.chunk_id for chunk in chunks]
-            embeddings = [chunk.embedding for chunk in chunks]
-            documents = [chunk.text for chunk in chunks]
-            metadatas = [
-                {
-                    "document_id": chunk.document_id,
-                    "chunk_index": chunk.chunk_index,
-                    **chunk.metadata
-                }
-                for chunk in chunks
-            ]
-
-            # Add to collection
-            self.collection.add(
-                ids=ids,
-                embeddings=embeddings,
-                documents=documents,
-                metadatas=metadatas
-            )
+        async with self._write_lock:
+            try:
+                self.store_chunks(chunks)
+            except Exception as e:
+                raise VectorStoreError(f"Failed to add chunks: {str(e)}")
 
-        except Exception as e:
-            raise VectorStoreError(f"Failed to add chunks: {str(e)}")
+    def store_chunks(self, chunks: List[Chunk]) -> None:
+        """Store chunks (blocking and unlocked; callers hold the write lock)."""
+        if not chunks:
+            return
+
+        # Prepare data for ChromaDB
+        ids = [chunk.chunk_id for chunk in chunks]
+        embeddings = [chunk.embedding for chunk in chunks]
+        documents = [chunk.text for chunk in chunks]
+        metadatas = [
+            {
+                "document_id": chunk.document_id,
+                "chunk_index": chunk.chunk_index,
+                **chunk.metadata
+            }
+            for chunk in chunks
+        ]
+
+        self.add_records(ids, embeddings, documents, metadatas)
+        self.version += 1
 
     async def search(
         self,
         query_embedding: List[float],
         top_k: int,
-        threshold: float
+        threshold: float,
+        trace: Optional[RequestTrace] = None
     ) -> List[Tuple[Chunk, float]]:
         """
         Search for similar chunks.
@@ -71,6 +158,7 @@ class VectorStore:
             query_embedding: Query embedding vector
             top_k: Number of results to return
             threshold: Minimum similarity score
+            trace: Optional request trace to record search/filter stages
 
         Returns:
             List of (Chunk, similarity_score) tuples
@@ -78,53 +166,402 @@ class VectorStore:
         Raises:
             VectorStoreError: If search fails
         """
+        trace = trace or RequestTrace()
         try:
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=top_k
-            )
+            with trace.stage("search"):
+                candidates = self.query_ids(query_embedding, top_k)
 
-            # Convert results to Chunk objects
-            chunks_with_scores = []
+            # Apply threshold
+            with trace.stage("filter"):
+                kept = [
+                    (chunk_id, similarity) for chunk_id, similarity in candidates
+                    if similarity >= threshold
+                ]
 
-            if not results['ids'] or not results['ids'][0]:
-                return []
+            # Only the final results are fetched, in one lookup
+            with trace.stage("hydrate"):
+                chunks = self.fetch_chunks([chunk_id for chunk_id, _ in kept])
+                chunks_with_scores = [
+                    (chunks[chunk_id], similarity) for chunk_id, similarity in kept
+                    if chunk_id in chunks
+                ]
 
-            for idx in range(len(results['ids'][0])):
-                # ChromaDB returns distances, convert to similarity (1 - distance for cosine)
-                distance = results['distances'][0][idx]
-                similarity = 1 - distance
+            trace.record("candidates_before_threshold", len(candidates))
+            trace.record("candidates_after_threshold", len(chunks_with_scores))
 
-                # Apply threshold
-                if similarity < threshold:
-                    continue
+            return chunks_with_scores
+
+        except Exception as e:
+            raise VectorStoreError(f"Search failed: {str(e)}")
 
-                chunk = Chunk(
-                    chunk_id=results['ids'][0][idx],
-                    text=results['documents'][0][idx],
-                    document_id=results['metadatas'][0][idx]['document_id'],
-                    chunk_index=results['metadatas'][0][idx]['chunk_index'],
-                    metadata=results['metadatas'][0][idx]
-                )
+    async def get_chunks(self, ids: List[str]) -> Dict[str, Chunk]:
+        """
+        Load stored chunks by id in one batched lookup (e.g. a result's neighbors).
 
-                chunks_with_scores.append((chunk, similarity))
+        Args:
+            ids: Chunk ids
 
-            return chunks_with_scores
+        Returns:
+            Chunks by id; unknown ids are left out
 
+        Raises:
+            VectorStoreError: If the lookup fails
+        """
+        try:
+            return self.fetch_chunks(ids)
         except Exception as e:
-            raise VectorStoreError(f"Search failed: {str(e)}")
+            raise VectorStoreError(f"Failed to get chunks: {str(e)}")
+
+    def query_ids(self, query_embedding: List[float], top_k: int) -> List[Tuple[str, float]]:
+        """
+        Ids of the nearest chunks with their similarity, best first, without a threshold.
+
+        Blocking; callers that fan out over several stores run it in threads.
+        """
+        results = self.collection.query(
+            query_embeddings=[query_embedding],
+            n_results=top_k,
+            include=["distances"]
+        )
+        if not results['ids'] or not results['ids'][0]:
+            return []
+
+        # ChromaDB returns distances, convert to similarity (1 - distance for cosine)
+        return [
+            (chunk_id, 1 - distance)
+            for chunk_id, distance in zip(results['ids'][0], results['distances'][0])
+        ]
+
+    def _records(self, ids: List[str], documents: List[Optional[str]], metadatas: List[Dict[str, Any]]):
+        """Texts and metadata of stored rows, from the text store where enabled."""
+        records = self.text_store.get_many(ids) if self.text_store else {}
+        return [
+            records.get(chunk_id, (document, metadata))
+            for chunk_id, document, metadata in zip(ids, documents, metadatas)
+        ]
+
+    def fetch_chunks(self, ids: List[str]) -> Dict[str, Chunk]:
+        """
+        Load stored chunks (without embeddings) by id in one batched lookup.
+
+        Blocking. Unknown ids are left out.
+        """
+        if not ids:
+            return {}
+        if self.text_store:
+            records = self.text_store.get_many(ids)
+            missing = [chunk_id for chunk_id in ids if chunk_id not in records]
+        else:
+            records, missing = {}, ids
+        if missing:
+            # Not in the text store: stored in the collection itself
+            stored = self.collection.get(ids=missing, include=["documents", "metadatas"])
+            records.update(zip(stored["ids"], zip(stored["documents"], stored["metadatas"])))
+
+        return {
+            chunk_id: Chunk(
+                chunk_id=chunk_id,
+                text=text,
+                document_id=metadata['document_id'],
+                chunk_index=metadata['chunk_index'],
+                metadata=metadata
+            )
+            for chunk_id, (text, metadata) in records.items()
+        }
+
+    def add_records(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        collection=None
+    ) -> None:
+        """
+        Store raw rows (as read by get_page), texts in the text store if enabled.
+
+        Blocking and unlocked; used for bulk copies (snapshots, resharding,
+        compaction).
+        """
+        collection = collection or self.collection
+        if self.text_store:
+            self.text_store.put(zip(ids, documents, metadatas))
+            collection.add(ids=ids, embeddings=embeddings, metadatas=metadatas)
+        else:
+            collection.add(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    def get_page(self, limit: int, offset: int) -> Dict[str, List[Any]]:
+        """
+        Read stored rows with embeddings, texts and metadata.
+
+        Returns:
+            Dict of parallel "ids", "embeddings", "documents" and "metadatas" lists
+        """
+        page = self.collection.get(
+            limit=limit,
+            offset=offset,
+            include=["embeddings", "documents", "metadatas"]
+        )
+        records = self._records(page["ids"], page["documents"], page["metadatas"])
+        return {
+            "ids": page["ids"],
+            "embeddings": page["embeddings"],
+            "documents": [text for text, _ in records],
+            "metadatas": [metadata for _, metadata in records],
+        }
+
+    def delete_records(self, ids: List[str]) -> None:
+        """Delete rows by id (blocking and unlocked, like add_records)."""
+        for start in range(0, len(ids), self.client.max_batch_size):
+            self.collection.delete(ids=ids[start:start + self.client.max_batch_size])
+        if self.text_store:
+            self.text_store.delete(ids)
+
+    async def update_metadata(self, chunks: List[Chunk]) -> None:
+        """
+        Merge metadata into stored chunks (keys not given are kept).
+
+        Args:
+            chunks: Chunks identified by chunk_id, with the metadata to set
+
+        Raises:
+            VectorStoreError: If the update fails
+        """
+        async with self._write_lock:
+            try:
+                if not chunks:
+                    return
+                for start in range(0, len(chunks), self.client.max_batch_size):
+                    batch = chunks[start:start + self.client.max_batch_size]
+                    self.collection.update(
+                        ids=[chunk.chunk_id for chunk in batch],
+                        metadatas=[chunk.metadata for chunk in batch]
+                    )
+                if self.text_store:
+                    self.text_store.merge_metadata({chunk.chunk_id: chunk.metadata for chunk in chunks})
+                self.version += 1
+
+            except Exception as e:
+                raise VectorStoreError(f"Failed to update chunk metadata: {str(e)}")
+
+    def matching_ids(
+        self,
+        document_ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[str]:
+        """Ids of the chunks of some documents, or matching a metadata filter (unlocked)."""
+        if document_ids:
+            where = {"document_id": {"$in": list(document_ids)}}
+        if not where:
+            return []
+        return self.collection.get(where=where, include=[])["ids"]
+
+    async def delete(
+        self,
+        document_ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """
+        Delete all chunks of some documents, or all chunks matching a metadata filter.
+
+        A deduplicated chunk is stored once, under the first document it
+        came from. Deleting that document by id hands the chunk over to
+        the next document in its source_document_ids instead of removing
+        the only copy. Filter deletes remove matching chunks outright, and
+        deleting a document whose chunks were all duplicates leaves its id
+        in the sources of the chunks that stand for it.
+
+        Args:
+            document_ids: Documents whose chunks are deleted
+            where: Chroma metadata filter, e.g. {"source_file": "reviews.csv"}
+
+        Returns:
+            Number of chunks deleted or handed over to another document
+
+        Raises:
+            VectorStoreError: If deletion fails
+        """
+        async with self._write_lock:
+            try:
+                ids = self.matching_ids(document_ids, where)
+                if document_ids:
+                    return self.remove_documents(document_ids, ids)
+                return self._delete_ids(ids)
+            except Exception as e:
+                raise VectorStoreError(f"Failed to delete chunks: {str(e)}")
+
+    def remove_documents(self, document_ids: List[str], ids: List[str]) -> int:
+        """
+        Remove documents' chunks, reassigning the ones other documents share (unlocked).
+
+        Returns:
+            Number of chunks deleted or reassigned
+        """
+        if not ids:
+            return 0
+        removed = set(document_ids)
+        stored = self.collection.get(ids=ids, include=["metadatas"])
+        shared: Dict[str, Dict[str, Any]] = {}
+        for chunk_id, metadata in zip(stored["ids"], stored["metadatas"]):
+            sources = [s for s in str(metadata.get(METADATA_SOURCE_DOCUMENT_IDS, "")).split(",") if s]
+            remaining = [s for s in sources if s not in removed]
+            if remaining:
+                count = int(metadata.get(METADATA_DUPLICATE_COUNT, len(sources)))
+                shared[chunk_id] = {
+                    METADATA_DOCUMENT_ID: remaining[0],
+                    METADATA_SOURCE_DOCUMENT_IDS: ",".join(remaining),
+                    METADATA_DUPLICATE_COUNT: max(len(remaining), count - (len(sources) - len(remaining))),
+                }
+
+        if shared:
+            self.collection.update(ids=list(shared), metadatas=list(shared.values()))
+            if self.text_store:
+                self.text_store.merge_metadata(shared)
+            self.version += 1
+        return self._delete_ids([i for i in ids if i not in shared]) + len(shared)
+
+    def _delete_ids(self, ids: List[str]) -> int:
+        """Delete rows by id, counting them toward compaction (unlocked)."""
+        self.delete_records(ids)
+        if ids:
+            self.deleted_since_compaction += len(ids)
+            self.version += 1
+        return len(ids)
+
+    async def replace_document(self, document_id: str, chunks: List[Chunk]) -> int:
+        """
+        Replace all chunks of a document with new ones.
+
+        Args:
+            document_id: Document to replace
+            chunks: New chunks with embeddings (document_id is set on them)
+
+        Returns:
+            Number of old chunks deleted or handed over to another document
+
+        Raises:
+            VectorStoreError: If the update fails
+        """
+        for chunk in chunks:
+            chunk.document_id = document_id
+        new_ids = {chunk.chunk_id for chunk in chunks}
+        async with self._write_lock:
+            try:
+                # The new chunks are stored before the old ones are deleted,
+                # so a search or a failure never leaves the document missing
+                old_ids = [i for i in self.matching_ids([document_id]) if i not in new_ids]
+                self.store_chunks(chunks)
+                return self.remove_documents([document_id], old_ids)
+            except Exception as e:
+                raise VectorStoreError(f"Failed to replace document: {str(e)}")
+
+    def _stale_hnsw_params(self) -> Dict[str, Any]:
+        """Configured HNSW parameters that differ from the ones the collection was created with."""
+        built_with = self.collection.metadata or {}
+        return {
+            key: value for key, value in self.collection_metadata.items()
+            if key != "hnsw:space" and built_with.get(key) != value
+        }
+
+    def needs_compaction(self, deleted_ratio: float) -> bool:
+        """
+        Whether deletions since the last rebuild exceed a fraction of the
+        index, or the index was built with other HNSW parameters.
+        """
+        if self.stale_hnsw_params:
+            return True
+        if not self.deleted_since_compaction:
+            return False
+        total = self.count() + self.deleted_since_compaction
+        return self.deleted_since_compaction / total >= deleted_ratio
+
+    def _compaction_name(self) -> str:
+        return f"{self.name}_compacting"
+
+    def _recover_compaction(self) -> None:
+        """Finish a compaction interrupted after the old collection was dropped."""
+        names = {collection.name for collection in self.client.list_collections()}
+        if self._compaction_name() in names and self.name not in names:
+            self.client.get_collection(self._compaction_name()).modify(name=self.name)
+
+    def _rebuild(self, page_size: int) -> None:
+        """Copy live rows into a fresh collection and swap it in."""
+        try:
+            self.client.delete_collection(self._compaction_name())
+        except ValueError:
+            pass  # no leftover from an earlier attempt
+        rebuilt = self.client.create_collection(
+            name=self._compaction_name(),
+            metadata=self.collection_metadata
+        )
+
+        for offset in range(0, self.collection.count(), page_size):
+            page = self.get_page(page_size, offset)
+            self.add_records(
+                page["ids"], page["embeddings"], page["documents"], page["metadatas"],
+                collection=rebuilt
+            )
+
+        # Searches switch to the rebuilt index before the old one is dropped
+        old_collection, self.collection = self.collection, rebuilt
+        self.client.delete_collection(old_collection.name)
+        rebuilt.modify(name=self.name)
+
+    async def compact(self, page_size: int = 5_000) -> None:
+        """
+        Rebuild the ANN index without deleted entries.
+
+        Chroma's HNSW index only marks deleted vectors, so searches keep
+        traversing them. Compaction copies the live rows into a new
+        collection (built with the current HNSW settings) and swaps it in.
+        Searches continue during the copy; writes wait for it.
+
+        Raises:
+            VectorStoreError: If the rebuild fails
+        """
+        async with self._write_lock:
+            try:
+                await asyncio.to_thread(self._rebuild, page_size)
+            except Exception as e:
+                raise VectorStoreError(f"Failed to compact collection: {str(e)}")
+            self.deleted_since_compaction = 0
+            self.stale_hnsw_params = {}
+            self.version += 1
 
     def count(self) -> int:
         """Get total number of chunks stored."""
         return self.collection.count()
 
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        Approximate size of the index in memory and on disk.
+
+        The in-memory figure estimates the loaded HNSW index: float32
+        vectors plus 2*M links per node on the base layer. The on-disk
+        figure covers the whole persist directory.
+        """
+        count = self.count()
+        sample = self.collection.get(limit=1, include=["embeddings"])["embeddings"] if count else []
+        dimensions = len(sample[0]) if sample else 0
+        m = self.collection_metadata.get("hnsw:M", 16)
+        return {
+            "chunks": count,
+            "index_memory_bytes": count * (dimensions * 4 + 2 * m * 4 + 16),
+            "disk_bytes": directory_bytes(self.persist_directory),
+        }
+
     def reset(self) -> None:
         """Clear all data from collection."""
         try:
             self.client.delete_collection(self.collection.name)
             self.collection = self.client.create_collection(
                 name=self.collection.name,
-                metadata={"hnsw:space": "cosine"}
+                metadata=self.collection_metadata
             )
+            if self.text_store:
+                self.text_store.clear()
+            self.deleted_since_compaction = 0
+            self.stale_hnsw_params = {}
+            self.version += 1
         except Exception as e:
             raise VectorStoreError(f"Failed to reset collection: {str(e)}")
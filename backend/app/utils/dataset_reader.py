@@ -0,0 +1,290 @@
+"""Batched, column-projected readers for CSV, JSON Lines, Parquet and Arrow IPC datasets."""
+
+import gzip
+import json
+import math
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Dict, Any, Iterator, Tuple, Optional
+
+from app.core.exceptions import DatasetError
+from app.models.domain import Document
+
+
+CSV_SUFFIXES = (".csv",)
+JSONL_SUFFIXES = (".jsonl", ".ndjson")
+PARQUET_SUFFIXES = (".parquet", ".pq")
+ARROW_SUFFIXES = (".arrow", ".feather", ".ipc")
+# Set on every chunk by ingestion and chunking; not mappable from dataset columns
+RESERVED_METADATA_COLUMNS = {"source_file", "row_index", "document_id", "chunk_id", "chunk_index"}
+# Row formats may be gzip-compressed; columnar formats compress internally
+GZIP_SUFFIX = ".gz"
+SUPPORTED_SUFFIXES = (
+    CSV_SUFFIXES + JSONL_SUFFIXES + PARQUET_SUFFIXES + ARROW_SUFFIXES
+    + tuple(suffix + GZIP_SUFFIX for suffix in CSV_SUFFIXES + JSONL_SUFFIXES)
+)
+
+
+def require_pyarrow():
+    """Import pyarrow, which is only needed for columnar formats."""
+    try:
+        import pyarrow
+        return pyarrow
+    except ImportError as e:
+        raise ImportError(
+            "pyarrow is required for Parquet/Arrow datasets: pip install pyarrow"
+        ) from e
+
+
+def dataset_suffix(path: str) -> str:
+    """
+    Dataset suffix of a file name, including ".gz" (e.g. ".csv.gz").
+
+    Returns:
+        Lowercase suffix, or "" if the name has none
+    """
+    suffixes = [suffix.lower() for suffix in Path(path).suffixes]
+    if len(suffixes) >= 2 and suffixes[-1] == GZIP_SUFFIX:
+        return "".join(suffixes[-2:])
+    return suffixes[-1] if suffixes else ""
+
+
+def is_supported_dataset(path: str) -> bool:
+    """Whether a file name has a dataset suffix that can be read."""
+    return dataset_suffix(path) in SUPPORTED_SUFFIXES
+
+
+def dataset_format(path: str) -> str:
+    """
+    Detect the dataset format from the file name.
+
+    Returns:
+        "csv", "jsonl", "parquet" or "arrow" (gzip-compressed CSV and JSON
+        Lines report their uncompressed format)
+    """
+    suffix = dataset_suffix(path).removesuffix(GZIP_SUFFIX)
+    if suffix in JSONL_SUFFIXES:
+        return "jsonl"
+    if suffix in PARQUET_SUFFIXES:
+        return "parquet"
+    if suffix in ARROW_SUFFIXES:
+        return "arrow"
+    return "csv"
+
+
+def _csv_batches(
+    path: str,
+    columns: Optional[List[str]],
+    batch_size: int
+) -> Iterator[List[Dict[str, Any]]]:
+    import pandas as pd
+
+    usecols = None
+    if columns is not None:
+        header = pd.read_csv(path, nrows=0).columns
+        usecols = [col for col in columns if col in header]
+
+    for chunk in pd.read_csv(path, usecols=usecols, chunksize=batch_size):
+        # None instead of NaN, matching what the columnar readers return
+        yield chunk.astype(object).where(chunk.notna(), None).to_dict("records")
+
+
+def _jsonl_batches(
+    path: str,
+    columns: Optional[List[str]],
+    batch_size: int
+) -> Iterator[List[Dict[str, Any]]]:
+    opener = gzip.open if path.lower().endswith(GZIP_SUFFIX) else open
+    batch: List[Dict[str, Any]] = []
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                raise DatasetError(f"Line {line_number} is not valid JSON: {e}") from e
+            if not isinstance(record, dict):
+                raise DatasetError(f"Line {line_number} is not a JSON object")
+            if columns is not None:
+                record = {col: record[col] for col in columns if col in record}
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def _parquet_batches(
+    path: str,
+    columns: Optional[List[str]],
+    batch_size: int
+) -> Iterator[List[Dict[str, Any]]]:
+    require_pyarrow()
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    if columns is not None:
+        columns = [col for col in columns if col in parquet_file.schema_arrow.names]
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        yield batch.to_pylist()
+
+
+def _arrow_batches(
+    path: str,
+    columns: Optional[List[str]],
+    batch_size: int
+) -> Iterator[List[Dict[str, Any]]]:
+    pa = require_pyarrow()
+    import pyarrow.ipc as ipc
+
+    with pa.memory_map(path, "r") as source:
+        # Zero-copy: record batches reference the mapped file directly
+        table = ipc.open_file(source).read_all()
+        if columns is not None:
+            table = table.select([col for col in columns if col in table.column_names])
+        for batch in table.to_batches(max_chunksize=batch_size):
+            yield batch.to_pylist()
+
+
+def read_record_batches(
+    path: str,
+    columns: Optional[List[str]] = None,
+    batch_size: int = 10_000
+) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+    """
+    Read a dataset as batches of row dictionaries.
+
+    Only the requested columns are read (columns missing from the file are
+    skipped). Every format is streamed: CSV and JSON Lines (plain or
+    gzip-compressed) are parsed one batch at a time, and Parquet and Arrow
+    files are memory-mapped, so the first batch is available without
+    parsing the whole file.
+
+    Args:
+        path: Dataset file (.csv, .jsonl, optionally .gz; .parquet or .arrow/.feather)
+        columns: Columns to project, or None for all
+        batch_size: Rows per batch
+
+    Yields:
+        (row offset of the batch, list of row dictionaries)
+
+    Raises:
+        DatasetError: If the file cannot be parsed
+    """
+    readers = {
+        "csv": _csv_batches,
+        "jsonl": _jsonl_batches,
+        "parquet": _parquet_batches,
+        "arrow": _arrow_batches,
+    }
+    offset = 0
+    try:
+        for records in readers[dataset_format(path)](str(path), columns, batch_size):
+            yield offset, records
+            offset += len(records)
+    except DatasetError:
+        raise
+    except (ValueError, OSError, EOFError) as e:
+        # Malformed CSV/Parquet, truncated or corrupt gzip, bad encoding
+        raise DatasetError(f"Cannot read {Path(path).name} after row {offset}: {e}") from e
+
+
+def parse_columns(value: Optional[str]) -> List[str]:
+    """Split a comma-separated column list, dropping empty names."""
+    return [col.strip() for col in (value or "").split(",") if col.strip()]
+
+
+def _cell_text(value: Any) -> str:
+    """Convert a cell to text, treating missing values as empty."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    return str(value)
+
+
+@dataclass
+class ColumnMapping:
+    """
+    Which dataset columns become the document text and metadata.
+
+    Text columns are joined with ". " (empty cells are skipped). Without
+    text columns, the "text" column is used if present, else the first
+    column. Metadata values are stored as is if they are strings, numbers
+    or booleans and as text otherwise; missing values are left out.
+    """
+
+    text: List[str] = field(default_factory=list)
+    metadata: List[str] = field(default_factory=list)
+
+    @property
+    def columns(self) -> Optional[List[str]]:
+        """Columns to read, or None (all) if the text column is guessed."""
+        return self.text + [col for col in self.metadata if col not in self.text] if self.text else None
+
+    def validate(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Check the mapping against the first batch of a dataset.
+
+        Raises:
+            DatasetError: If no text column is present or a metadata
+                column would overwrite a reserved key
+        """
+        reserved = RESERVED_METADATA_COLUMNS & set(self.metadata)
+        if reserved:
+            raise DatasetError(f"Reserved metadata columns: {', '.join(sorted(reserved))}")
+        present = set().union(*(record.keys() for record in records)) if records else set()
+        if self.text and not present & set(self.text):
+            raise DatasetError(f"Text columns not found in dataset: {', '.join(self.text)}")
+
+    def to_document(self, record: Dict[str, Any], row_index: int, source_file: str) -> Optional[Document]:
+        """
+        Convert a row to a document.
+
+        Returns:
+            Document, or None if the row has no text
+        """
+        if self.text:
+            content = ". ".join(text for text in (_cell_text(record.get(col)) for col in self.text) if text)
+        else:
+            content = _cell_text(record["text"] if "text" in record else next(iter(record.values()), None))
+        if not content:
+            return None
+
+        metadata: Dict[str, Any] = {"source_file": source_file, "row_index": row_index}
+        for col in self.metadata:
+            value = record.get(col)
+            if value is None or (isinstance(value, float) and math.isnan(value)):
+                continue
+            metadata[col] = value if isinstance(value, (str, int, float, bool)) else str(value)
+        return Document(content=content, metadata=metadata)
+
+
+def write_dataset(df, path: str) -> None:
+    """
+    Write a DataFrame in the format implied by the file name.
+
+    Arrow IPC files are written uncompressed so readers can memory-map them.
+    CSV and JSON Lines files ending in ".gz" are gzip-compressed.
+
+    Args:
+        df: pandas DataFrame
+        path: Output file (.csv, .jsonl, optionally .gz; .parquet or .arrow/.feather)
+    """
+    fmt = dataset_format(path)
+    if fmt == "csv":
+        df.to_csv(path, index=False)
+        return
+    if fmt == "jsonl":
+        df.to_json(path, orient="records", lines=True)
+        return
+
+    pa = require_pyarrow()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(table, path)
+    else:
+        import pyarrow.ipc as ipc
+        with ipc.new_file(path, table.schema) as writer:
+            writer.write_table(table)
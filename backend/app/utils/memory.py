@@ -0,0 +1,178 @@
+"""Approximate memory accounting and allocation tracing."""
+
+import resource
+import sys
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, Optional
+
+from app.models.domain import Chunk, Document
+
+
+# An embedding element is a boxed float plus its slot in the list
+_FLOAT_BYTES = sys.getsizeof(1.0) + 8
+
+# Overlapping trace_allocations blocks share one tracemalloc session,
+# stopped by the last block to exit if a block started it
+_tracing_lock = threading.Lock()
+_tracing_blocks = 0
+_tracing_owned = False
+
+
+def process_memory() -> Dict[str, int]:
+    """Current and peak resident set size of this process in bytes."""
+    try:
+        # VmHWM is per address space; ru_maxrss survives fork+exec on Linux,
+        # so spawned workers would report their parent's peak
+        with open("/proc/self/status") as f:
+            fields = dict(line.split(":", 1) for line in f if line.startswith(("VmRSS", "VmHWM")))
+        return {
+            "rss_bytes": int(fields["VmRSS"].split()[0]) * 1024,
+            "peak_rss_bytes": int(fields["VmHWM"].split()[0]) * 1024,
+        }
+    except (OSError, KeyError, ValueError):
+        pass
+    # No procfs (macOS reports ru_maxrss in bytes): the peak is the best available figure
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak = peak if sys.platform == "darwin" else peak * 1024
+    return {"rss_bytes": peak, "peak_rss_bytes": peak}
+
+
+def directory_bytes(path: str) -> int:
+    """Total size of the files under a directory (0 if it does not exist)."""
+    root = Path(path)
+    if not root.exists():
+        return 0
+    return sum(file.stat().st_size for file in root.rglob("*") if file.is_file())
+
+
+def _metadata_bytes(metadata: Dict[str, Any]) -> int:
+    return sys.getsizeof(metadata) + sum(sys.getsizeof(value) for value in metadata.values())
+
+
+def document_bytes(documents: Iterable[Document]) -> int:
+    """Approximate bytes held by Document objects (text and metadata)."""
+    return sum(
+        sys.getsizeof(document) + sys.getsizeof(document.content) + _metadata_bytes(document.metadata)
+        for document in documents
+    )
+
+
+def chunk_bytes(chunks: Iterable[Chunk]) -> Dict[str, int]:
+    """
+    Approximate bytes held by Chunk objects.
+
+    Returns:
+        "objects" (chunks, texts, ids and metadata) and "embeddings"
+        (Python float lists) separately
+    """
+    objects = embeddings = 0
+    for chunk in chunks:
+        objects += (
+            sys.getsizeof(chunk) + sys.getsizeof(chunk.text) + sys.getsizeof(chunk.chunk_id)
+            + _metadata_bytes(chunk.metadata)
+        )
+        if chunk.embedding is not None:
+            embeddings += sys.getsizeof(chunk.embedding) + len(chunk.embedding) * _FLOAT_BYTES
+    return {"objects": objects, "embeddings": embeddings}
+
+
+class MemoryAccountant:
+    """
+    Current and peak bytes reported by components.
+
+    Components report approximate sizes as they change (e.g. the chunks of
+    the batch being ingested); diagnostics read a snapshot. The latest
+    tracemalloc report is kept alongside. Safe to use from several threads.
+    """
+
+    def __init__(self):
+        self.allocations: Optional[Dict[str, Any]] = None
+        self._current: Dict[str, int] = {}
+        self._peak: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def set(self, component: str, nbytes: int) -> None:
+        """Report the bytes a component currently holds."""
+        with self._lock:
+            self._current[component] = nbytes
+            self._peak[component] = max(self._peak.get(component, 0), nbytes)
+
+    def reset(self, *components: str) -> None:
+        """Forget current and peak bytes of components (e.g. at the start of a run)."""
+        with self._lock:
+            for component in components:
+                self._current.pop(component, None)
+                self._peak.pop(component, None)
+
+    def release(self, *components: str) -> None:
+        """Report that components no longer hold memory (peaks are kept)."""
+        with self._lock:
+            for component in components:
+                if component in self._current:
+                    self._current[component] = 0
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Current and peak bytes per component."""
+        with self._lock:
+            return {
+                component: {"bytes": self._current[component], "peak_bytes": self._peak[component]}
+                for component in sorted(self._current)
+            }
+
+
+@contextmanager
+def trace_allocations(top_n: int = 20) -> Iterator[Dict[str, Any]]:
+    """
+    Trace Python allocations in a block with tracemalloc.
+
+    Yields a dict that is filled on exit with the peak traced memory and
+    the `top_n` source lines holding the most memory at the end of the
+    block. Blocks may overlap (e.g. concurrent ingestions): tracing runs
+    until the last one exits, and the peak is reset only when no other
+    block is tracing, so an overlapping block reports the shared peak
+    since the earliest of them started. Tracing slows allocation-heavy
+    code down noticeably.
+    """
+    global _tracing_blocks, _tracing_owned
+    report: Dict[str, Any] = {}
+    with _tracing_lock:
+        if _tracing_blocks == 0:
+            _tracing_owned = not tracemalloc.is_tracing()
+            if _tracing_owned:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        _tracing_blocks += 1
+    try:
+        yield report
+    finally:
+        # Tracing stays on while this block is counted
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ])
+        report["peak_traced_bytes"] = tracemalloc.get_traced_memory()[1]
+        report["top"] = [
+            {
+                "site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_bytes": stat.size,
+                "count": stat.count,
+            }
+            for stat in snapshot.statistics("lineno")[:top_n]
+        ]
+        with _tracing_lock:
+            _tracing_blocks -= 1
+            if _tracing_blocks == 0 and _tracing_owned:
+                tracemalloc.stop()
+                _tracing_owned = False
+
+
+def format_bytes(nbytes: float) -> str:
+    """Human-readable size, e.g. "12.3 MB"."""
+    for unit in ("B", "KB", "MB"):
+        if abs(nbytes) < 1024:
+            return f"{nbytes:.0f} {unit}" if unit == "B" else f"{nbytes:.1f} {unit}"
+        nbytes /= 1024
+    return f"{nbytes:.1f} GB"
@@ -0,0 +1,33 @@
+"""Bounded random samples of streams."""
+
+import random
+from typing import Iterable, List, TypeVar
+
+T = TypeVar("T")
+
+
+def reservoir_sample(items: Iterable[T], size: int, seed: int = 0) -> List[T]:
+    """
+    Uniform random sample of at most `size` items from a stream of unknown length.
+
+    The stream is read once and only the sample is kept in memory.
+
+    Args:
+        items: Items to sample from
+        size: Maximum sample size
+        seed: Random seed, so the same stream gives the same sample
+
+    Returns:
+        The sampled items (all of them if there are at most `size`)
+    """
+    rng = random.Random(seed)
+    sample: List[T] = []
+    for seen, item in enumerate(items):
+        if seen < size:
+            sample.append(item)
+        else:
+            # Keep the item with probability size / (seen + 1)
+            slot = rng.randrange(seen + 1)
+            if slot < size:
+                sample[slot] = item
+    return sample
@@ -0,0 +1,54 @@
+"""Per-request stage timing and trace collection."""
+
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterator
+
+
+@dataclass
+class RequestTrace:
+    """Collects stage durations and counters for a single request."""
+
+    stages: Dict[str, float] = field(default_factory=dict)
+    counters: Dict[str, Any] = field(default_factory=dict)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Time a block of work and record it under a stage name.
+
+        Repeated stages with the same name are accumulated.
+
+        Args:
+            name: Stage name (e.g. "embed", "search")
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed_ms
+
+    def record(self, key: str, value: Any) -> None:
+        """Record a counter or flag for this request."""
+        self.counters[key] = value
+
+    def server_timing_header(self) -> str:
+        """
+        Format stage durations as a Server-Timing header value.
+
+        Returns:
+            Header value, e.g. "embed;dur=12.3, search;dur=4.1"
+        """
+        return ", ".join(
+            f"{name};dur={duration:.1f}"
+            for name, duration in self.stages.items()
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary."""
+        return {
+            "stages_ms": {name: round(duration, 3) for name, duration in self.stages.items()},
+            **self.counters,
+        }
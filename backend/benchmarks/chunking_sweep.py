@@ -0,0 +1,346 @@
+"""
+Chunking parameter sweep: index cost and retrieval quality per chunk size/overlap.
+
+Re-chunks a sample of the corpus for every (chunk_size, chunk_overlap)
+pair in a grid, embeds the chunks, indexes them in a temporary
+VectorStore and reports:
+
+- chunks per document and total tokens (~4 characters per token)
+- embedding cost for the sample, projected to the full corpus
+- index size (raw vector bytes and Chroma's on-disk size)
+- query latency percentiles
+- retrieval agreement: the mean fraction of the top-k documents found
+  with the reference parameters (CHUNK_SIZE/CHUNK_OVERLAP) that each
+  configuration also finds
+
+Configurations on the cost/agreement Pareto front are flagged. Embeddings
+come from the deterministic fake embedder, or from OpenAI through an
+on-disk cache so repeated chunks (and reruns) are embedded only once.
+
+Usage (from backend/):
+    python -m benchmarks.chunking_sweep --sizes 150,250,400,800 --overlaps 0,50,100
+    python -m benchmarks.chunking_sweep --synthetic 5000          # offline corpus
+    python -m benchmarks.chunking_sweep --embedder openai --sample 2000
+"""
+
+import argparse
+import asyncio
+import hashlib
+import itertools
+import os
+import random
+import re
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from app.core.constants import EMBEDDING_COST_PER_1M_TOKENS, EMBEDDING_MODEL
+from app.models.domain import Chunk, Document
+from app.services.chunking_service import ChunkingService
+from app.services.rate_limiter import estimate_tokens
+from app.services.vector_store import VectorStore
+from benchmarks.common import RESULTS_DIR, generate_reviews, percentiles, write_results
+from benchmarks.fakes import FakeEmbeddingService
+
+
+class CachedEmbedder:
+    """
+    Embed texts through an on-disk cache keyed by model and text.
+
+    Only texts not embedded before are sent to `embed`, in batches.
+    """
+
+    def __init__(self, embed, model: str, path: str, batch_size: int = 512):
+        self.embed = embed
+        self.model = model
+        self.batch_size = batch_size
+        self.calls = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB)")
+
+    def _key(self, text: str) -> bytes:
+        return hashlib.blake2b(f"{self.model}\0{text}".encode("utf-8"), digest_size=16).digest()
+
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, calling the embedder only for cache misses."""
+        keys = [self._key(text) for text in texts]
+        found: Dict[bytes, List[float]] = {}
+        for start in range(0, len(keys), 900):
+            batch = keys[start:start + 900]
+            rows = self._connection.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+            ).fetchall()
+            found.update((key, np.frombuffer(vector, dtype=np.float32).tolist()) for key, vector in rows)
+
+        missing = list({key: text for key, text in zip(keys, texts) if key not in found}.items())
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            vectors = await self.embed([text for _, text in batch])
+            self.calls += 1
+            with self._connection:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(key, np.asarray(vector, dtype=np.float32).tobytes()) for (key, _), vector in zip(batch, vectors)]
+                )
+            found.update((key, vector) for (key, _), vector in zip(batch, vectors))
+        return [found[key] for key in keys]
+
+
+def load_documents(path: str, sample: int, seed: int) -> Tuple[List[Document], int]:
+    """
+    Read a random sample of review documents from the dataset.
+
+    Returns:
+        (sampled documents, number of documents in the dataset)
+    """
+    from ingest_reviews import REVIEW_COLUMNS, record_to_document
+    from app.utils.dataset_reader import read_record_batches
+
+    documents = []
+    for offset, records in read_record_batches(path, columns=REVIEW_COLUMNS):
+        for row, record in enumerate(records):
+            document = record_to_document(record, offset + row, Path(path).name)
+            if document is not None:
+                documents.append(document)
+    total = len(documents)
+    if sample < total:
+        documents = random.Random(seed).sample(documents, sample)
+    return documents, total
+
+
+def synthetic_documents(size: int, seed: int) -> List[Document]:
+    """Synthetic review documents."""
+    reviews = generate_reviews(seed=seed)
+    return [Document(content=next(reviews), metadata={"source_file": "synthetic"}) for _ in range(size)]
+
+
+def sample_queries(documents: List[Document], num_queries: int, seed: int) -> List[str]:
+    """Use the first sentence of randomly chosen documents as queries."""
+    rng = random.Random(seed)
+    chosen = rng.sample(documents, min(num_queries, len(documents)))
+    return [re.split(r"(?<=[.!?])\s+", document.content)[0] for document in chosen]
+
+
+def chunk_corpus(documents: List[Document], chunk_size: int, chunk_overlap: int) -> List[Chunk]:
+    """Chunk all documents with one parameter set."""
+    service = ChunkingService(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    return [chunk for document in documents for chunk in service.process_document(document)]
+
+
+def top_documents(chunks_with_scores: List[Tuple[Chunk, float]], k: int) -> List[str]:
+    """Distinct document ids of ranked chunks, best first, at most k."""
+    documents: List[str] = []
+    for chunk, _ in chunks_with_scores:
+        if chunk.document_id not in documents:
+            documents.append(chunk.document_id)
+            if len(documents) == k:
+                break
+    return documents
+
+
+def agreement(found: List[List[str]], reference: List[List[str]]) -> float:
+    """Mean fraction of each query's reference documents that were also found."""
+    fractions = [
+        len(set(documents) & set(expected)) / len(expected)
+        for documents, expected in zip(found, reference)
+        if expected
+    ]
+    return float(np.mean(fractions)) if fractions else 0.0
+
+
+def pareto_front(results: List[Dict[str, Any]]) -> List[bool]:
+    """Whether each result is not beaten on both projected cost and agreement."""
+    return [
+        not any(
+            other["projected_cost"] <= result["projected_cost"]
+            and other["agreement"] >= result["agreement"]
+            and (other["projected_cost"], other["agreement"]) != (result["projected_cost"], result["agreement"])
+            for other in results
+        )
+        for result in results
+    ]
+
+
+def _directory_bytes(path: str) -> int:
+    return sum(file.stat().st_size for file in Path(path).rglob("*") if file.is_file())
+
+
+async def evaluate_config(
+    documents: List[Document],
+    queries: List[List[float]],
+    embedder,
+    chunk_size: int,
+    chunk_overlap: int,
+    top_k: int,
+    corpus_documents: int,
+    batch_size: int = 5_000
+) -> Dict[str, Any]:
+    """Chunk, embed, index and query the sample with one parameter set."""
+    start = time.perf_counter()
+    chunks = chunk_corpus(documents, chunk_size, chunk_overlap)
+    chunk_seconds = time.perf_counter() - start
+
+    tokens = sum(estimate_tokens(chunk.text) for chunk in chunks)
+    cost = tokens / 1_000_000 * EMBEDDING_COST_PER_1M_TOKENS
+
+    start = time.perf_counter()
+    embeddings = await embedder.embed_batch([chunk.text for chunk in chunks])
+    embed_seconds = time.perf_counter() - start
+    for chunk, embedding in zip(chunks, embeddings):
+        chunk.embedding = embedding
+
+    with tempfile.TemporaryDirectory() as persist_directory:
+        store = VectorStore("chunking_sweep", persist_directory)
+        start = time.perf_counter()
+        for offset in range(0, len(chunks), batch_size):
+            await store.add_chunks(chunks[offset:offset + batch_size])
+        index_seconds = time.perf_counter() - start
+
+        latencies = []
+        found = []
+        for query in queries:
+            start = time.perf_counter()
+            # Several chunks may come from one document; over-fetch to get k documents
+            results = await store.search(query, top_k * 3, threshold=-1.0)
+            latencies.append((time.perf_counter() - start) * 1000)
+            found.append(top_documents(results, top_k))
+        disk_bytes = _directory_bytes(persist_directory)
+
+    return {
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "chunks": len(chunks),
+        "chunks_per_document": len(chunks) / len(documents),
+        "tokens": tokens,
+        "cost": cost,
+        "projected_cost": cost * corpus_documents / len(documents),
+        "vector_bytes": len(chunks) * len(embeddings[0]) * 4 if embeddings else 0,
+        "disk_bytes": disk_bytes,
+        "chunk_seconds": chunk_seconds,
+        "embed_seconds": embed_seconds,
+        "index_seconds": index_seconds,
+        "latency_ms": percentiles(latencies),
+        "found": found,
+    }
+
+
+async def sweep(
+    documents: List[Document],
+    queries: List[str],
+    embedder,
+    grid: List[Tuple[int, int]],
+    reference: Tuple[int, int],
+    top_k: int = 5,
+    corpus_documents: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Evaluate every (chunk_size, chunk_overlap) pair against the reference pair.
+
+    Returns:
+        One result per pair, in grid order, with agreement and Pareto flags
+    """
+    corpus_documents = corpus_documents or len(documents)
+    query_embeddings = await embedder.embed_batch(queries)
+
+    evaluated = {}
+    for chunk_size, chunk_overlap in [reference] + [pair for pair in grid if pair != reference]:
+        evaluated[(chunk_size, chunk_overlap)] = await evaluate_config(
+            documents, query_embeddings, embedder, chunk_size, chunk_overlap, top_k, corpus_documents
+        )
+
+    expected = evaluated[reference]["found"]
+    results = [evaluated[pair] for pair in grid]
+    for result in results:
+        result["agreement"] = agreement(result.pop("found"), expected)
+        result["reference"] = (result["chunk_size"], result["chunk_overlap"]) == reference
+    for result, on_front in zip(results, pareto_front(results)):
+        result["pareto"] = on_front
+    return results
+
+
+def _ints(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part]
+
+
+def main():
+    """Parse arguments, run the sweep and write results."""
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Chunking parameter sweep")
+    parser.add_argument("--dataset", help="Dataset file (default: backend/data/processed_reviews.*)")
+    parser.add_argument("--synthetic", type=int, help="Use N synthetic reviews instead of the dataset")
+    parser.add_argument("--sample", type=int, default=2000, help="Documents sampled from the dataset")
+    parser.add_argument("--corpus-documents", type=int,
+                        help="Corpus size to project cost to (default: dataset size)")
+    parser.add_argument("--sizes", default="150,250,400,800", help="Comma-separated chunk sizes")
+    parser.add_argument("--overlaps", default="0,50,100", help="Comma-separated chunk overlaps")
+    parser.add_argument("--queries", type=int, default=200, help="Queries sampled from the documents")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--embedder", choices=("fake", "openai"), default="fake")
+    parser.add_argument("--dimensions", type=int, default=384, help="Fake embedding dimensions")
+    parser.add_argument("--cache", default=str(RESULTS_DIR / "embedding_cache.sqlite3"),
+                        help="Embedding cache for --embedder openai")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        documents = synthetic_documents(args.synthetic, args.seed)
+        total = len(documents)
+        source = f"synthetic ({args.synthetic:,} reviews)"
+    else:
+        from ingest_reviews import default_dataset_path
+
+        path = args.dataset or str(default_dataset_path())
+        documents, total = load_documents(path, args.sample, args.seed)
+        source = f"{path} ({len(documents):,} of {total:,} documents)"
+
+    if args.embedder == "openai":
+        from app.services.embedding_providers import OpenAIEmbeddingProvider
+
+        provider = OpenAIEmbeddingProvider(api_key=os.getenv("OPENAI_API_KEY"), base_url=os.getenv("OPENAI_BASE_URL"))
+        embedder = CachedEmbedder(provider.embed, EMBEDDING_MODEL, args.cache)
+    else:
+        embedder = FakeEmbeddingService(dimensions=args.dimensions)
+
+    reference = (int(os.getenv("CHUNK_SIZE", "250")), int(os.getenv("CHUNK_OVERLAP", "50")))
+    grid = [
+        (size, overlap)
+        for size, overlap in itertools.product(_ints(args.sizes), _ints(args.overlaps))
+        if overlap < size
+    ]
+    if reference not in grid:
+        grid.append(reference)
+    queries = sample_queries(documents, args.queries, args.seed)
+    print(f"Corpus: {source}, {len(queries)} queries, reference {reference}, embedder {args.embedder}")
+
+    results = asyncio.run(sweep(
+        documents, queries, embedder, grid, reference,
+        top_k=args.top_k, corpus_documents=args.corpus_documents or total
+    ))
+
+    print(f"\n{'size':>5} {'overlap':>7} {'chunks/doc':>10} {'tokens':>10} {'proj. cost $':>12} "
+          f"{'vector MB':>9} {'disk MB':>8} {'p50 ms':>7} {'p95 ms':>7} {'agreement':>9}")
+    for result in results:
+        marks = ("*" if result["pareto"] else " ") + ("R" if result["reference"] else " ")
+        print(f"{result['chunk_size']:>5} {result['chunk_overlap']:>7} {result['chunks_per_document']:>10.2f} "
+              f"{result['tokens']:>10,} {result['projected_cost']:>12.4f} "
+              f"{result['vector_bytes'] / 1e6:>9.2f} {result['disk_bytes'] / 1e6:>8.2f} "
+              f"{result['latency_ms']['p50']:>7.2f} {result['latency_ms']['p95']:>7.2f} "
+              f"{result['agreement']:>9.3f} {marks}")
+    print("\n* = on the cost/agreement Pareto front, R = reference (CHUNK_SIZE/CHUNK_OVERLAP)")
+
+    path = write_results("chunking_sweep", {
+        "config": {**vars(args), "source": source, "reference": list(reference)},
+        "results": results,
+    }, args.output)
+    print(f"\nResults written to {path}")
+
+
+if __name__ == "__main__":
+    main()
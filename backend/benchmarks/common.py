@@ -0,0 +1,117 @@
+"""Shared helpers for benchmark and load-test scripts."""
+
+import json
+import platform
+import random
+import resource
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Iterator
+
+import numpy as np
+
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+_WORDS = (
+    "dress shirt pants jeans sweater skirt top jacket coat blouse fabric "
+    "quality color size fit length material soft stretchy comfortable cute "
+    "flattering tight loose small large petite tall cheap expensive worth "
+    "price love hate return exchange summer winter fall spring occasion "
+    "wedding work casual beautiful gorgeous disappointing poor great perfect "
+    "thin thick sheer lined itchy warm runs true wash shrink faded seams"
+).split()
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """
+    Summarize latencies in milliseconds.
+
+    Args:
+        values: Latency samples in milliseconds
+
+    Returns:
+        Mean and p50/p95/p99 latencies
+    """
+    if not values:
+        return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0}
+    samples = np.asarray(values, dtype=np.float64)
+    return {
+        "mean": float(samples.mean()),
+        "p50": float(np.percentile(samples, 50)),
+        "p95": float(np.percentile(samples, 95)),
+        "p99": float(np.percentile(samples, 99)),
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of the current process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def generate_reviews(seed: int = 42) -> Iterator[str]:
+    """
+    Yield an endless, deterministic stream of synthetic review texts.
+
+    Args:
+        seed: Random seed
+
+    Yields:
+        Review-like text of one to six sentences
+    """
+    rng = random.Random(seed)
+    while True:
+        sentences = []
+        for _ in range(rng.randint(1, 6)):
+            words = rng.choices(_WORDS, k=rng.randint(4, 14))
+            sentences.append(" ".join(words).capitalize() + rng.choice(".!?"))
+        yield " ".join(sentences)
+
+
+def environment_info() -> Dict[str, Any]:
+    """Describe the machine and code revision a run was made on."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+    }
+
+
+def write_results(name: str, payload: Dict[str, Any], output: str | None = None) -> Path:
+    """
+    Write benchmark results as JSON.
+
+    Args:
+        name: Benchmark name, used for the default file name
+        payload: Results to write
+        output: Optional explicit output path
+
+    Returns:
+        Path of the written file
+    """
+    if output:
+        path = Path(output)
+    else:
+        stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+        path = RESULTS_DIR / f"{name}-{stamp}.json"
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"environment": environment_info(), **payload}, f, indent=2)
+    return path
@@ -0,0 +1,114 @@
+"""
+Local stand-in for the OpenAI embeddings endpoint.
+
+Serves POST /v1/embeddings with deterministic hash-based vectors, tunable
+latency and injectable failures, so the API can be load-tested without
+network access.
+
+Usage (from backend/):
+    python -m benchmarks.fake_embeddings_server --port 8001 --latency-ms 80 --failure-rate 0.01
+"""
+
+import argparse
+import asyncio
+import random
+from typing import List, Union
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from benchmarks.fakes import FakeEmbeddingService
+
+
+class EmbeddingsRequest(BaseModel):
+    """Subset of the OpenAI embeddings request body."""
+    input: Union[str, List[str]]
+    model: str = "text-embedding-3-small"
+
+
+def create_app(
+    dimensions: int = 1536,
+    latency_ms: float = 50.0,
+    jitter_ms: float = 0.0,
+    failure_rate: float = 0.0,
+    rate_limit_rate: float = 0.0,
+    seed: int = 42
+) -> FastAPI:
+    """
+    Create the fake embeddings app.
+
+    Args:
+        dimensions: Embedding dimensions
+        latency_ms: Base latency per request
+        jitter_ms: Maximum extra random latency per request
+        failure_rate: Fraction of requests answered with HTTP 500
+        rate_limit_rate: Fraction of requests answered with HTTP 429
+        seed: Random seed for latency jitter and failure injection
+
+    Returns:
+        FastAPI application
+    """
+    app = FastAPI(title="Fake OpenAI Embeddings")
+    embedder = FakeEmbeddingService(dimensions=dimensions)
+    rng = random.Random(seed)
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: EmbeddingsRequest):
+        """Return embeddings in the OpenAI response format."""
+        await asyncio.sleep((latency_ms + rng.uniform(0, jitter_ms)) / 1000)
+
+        roll = rng.random()
+        if roll < failure_rate:
+            return JSONResponse(
+                status_code=500,
+                content={"error": {"message": "Injected failure", "type": "server_error"}}
+            )
+        if roll < failure_rate + rate_limit_rate:
+            return JSONResponse(
+                status_code=429,
+                headers={"retry-after": "1"},
+                content={"error": {"message": "Injected rate limit", "type": "rate_limit_error"}}
+            )
+
+        texts = [request.input] if isinstance(request.input, str) else request.input
+        num_tokens = sum(len(text) for text in texts) // 4
+        return {
+            "object": "list",
+            "data": [
+                {"object": "embedding", "index": idx, "embedding": embedder._embed(text)}
+                for idx, text in enumerate(texts)
+            ],
+            "model": request.model,
+            "usage": {"prompt_tokens": num_tokens, "total_tokens": num_tokens},
+        }
+
+    return app
+
+
+def main():
+    """Run the fake embeddings server."""
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake OpenAI embeddings server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    app = create_app(
+        dimensions=args.dimensions,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate,
+        rate_limit_rate=args.rate_limit_rate
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Deterministic offline stand-ins for external services."""
+
+import asyncio
+import hashlib
+import re
+from typing import List
+
+import numpy as np
+
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+class FakeEmbeddingService:
+    """
+    Hash-based drop-in replacement for EmbeddingService.
+
+    Each token is hashed to a signed bucket, so identical texts always get
+    identical vectors and texts sharing words get similar ones. No network
+    access is needed; an artificial latency can be added per call to
+    simulate the remote API.
+    """
+
+    def __init__(self, dimensions: int = 384, latency_ms: float = 0.0):
+        self.dimensions = dimensions
+        self.latency_ms = latency_ms
+        self.model = "fake-hash-embedding"
+
+    def _embed(self, text: str) -> List[float]:
+        """Compute the hashed bag-of-words vector for one text."""
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        tokens = _TOKEN_PATTERN.findall(text.lower())
+        for token in tokens:
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            index = value % self.dimensions
+            sign = 1.0 if (value >> 63) & 1 else -1.0
+            vector[index] += sign
+
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            vector[0] = 1.0
+        else:
+            vector /= norm
+        return vector.tolist()
+
+    async def _sleep(self) -> None:
+        """Simulate network latency of the remote API."""
+        if self.latency_ms > 0:
+            await asyncio.sleep(self.latency_ms / 1000)
+
+    async def embed_text(self, text: str) -> List[float]:
+        """Generate a deterministic embedding for a single text."""
+        await self._sleep()
+        return self._embed(text)
+
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Generate deterministic embeddings for multiple texts."""
+        await self._sleep()
+        return [self._embed(text) for text in texts]
@@ -0,0 +1,217 @@
+"""
+HNSW recall/latency evaluation against exact brute-force search.
+
+Samples query vectors from the stored corpus (held out from the index),
+computes exact cosine top-k ground truth with NumPy, then builds an HNSW
+index for every (M, construction ef) combination and measures recall@k
+and single-query latency for every search ef.
+
+Indexes are built with hnswlib, the library Chroma uses for its vector
+segment, with the same parameters Chroma passes. Chroma's own per-query
+overhead is constant across parameters and is left out.
+
+Usage (from backend/):
+    python -m benchmarks.hnsw_eval --m 16,32 --construction-ef 100,200 --search-ef 10,50,100
+    python -m benchmarks.hnsw_eval --synthetic 100000     # offline, fake embeddings
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import time
+from typing import List, Dict, Any
+
+import numpy as np
+from dotenv import load_dotenv
+
+from app.services.sharded_vector_store import create_vector_store
+from benchmarks.common import generate_reviews, percentiles, write_results
+from benchmarks.fakes import FakeEmbeddingService
+
+
+def load_corpus(collection_name: str, persist_directory: str, num_shards: int, layout: str,
+                page_size: int = 10_000) -> np.ndarray:
+    """Read all stored embeddings (from every shard) as a float32 matrix."""
+    store = create_vector_store(collection_name, persist_directory, num_shards, layout)
+    shards = getattr(store, "shards", [store])
+    pages = []
+    for shard in shards:
+        for offset in range(0, shard.count(), page_size):
+            page = shard.collection.get(limit=page_size, offset=offset, include=["embeddings"])
+            pages.append(np.asarray(page["embeddings"], dtype=np.float32))
+    if not pages:
+        raise SystemExit(f"Collection {collection_name} in {persist_directory} is empty")
+    return np.concatenate(pages)
+
+
+def synthetic_corpus(size: int, dimensions: int, seed: int) -> np.ndarray:
+    """Embed synthetic reviews with the deterministic fake embedder."""
+    reviews = generate_reviews(seed=seed)
+    texts = [next(reviews) for _ in range(size)]
+    embeddings = asyncio.run(FakeEmbeddingService(dimensions=dimensions).embed_batch(texts))
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows (cosine similarity becomes a dot product)."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int, block_size: int = 256) -> np.ndarray:
+    """
+    Brute-force cosine top-k.
+
+    Args:
+        corpus: Normalized corpus vectors
+        queries: Normalized query vectors
+        k: Neighbors per query
+
+    Returns:
+        (queries, k) array of corpus row ids, best first
+    """
+    result = np.empty((len(queries), k), dtype=np.int64)
+    for start in range(0, len(queries), block_size):
+        scores = queries[start:start + block_size] @ corpus.T
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+        result[start:start + block_size] = np.take_along_axis(top, order, axis=1)
+    return result
+
+
+def recall_at_k(approximate: List[np.ndarray], exact: np.ndarray) -> float:
+    """Mean fraction of the exact top-k found by the approximate search."""
+    k = exact.shape[1]
+    return float(np.mean([
+        len(set(found.tolist()) & set(truth.tolist())) / k
+        for found, truth in zip(approximate, exact)
+    ]))
+
+
+def evaluate(
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    k: int,
+    m_values: List[int],
+    construction_efs: List[int],
+    search_efs: List[int]
+) -> List[Dict[str, Any]]:
+    """
+    Measure recall@k and latency for every parameter combination.
+
+    HNSW searches with at least k candidates, so a search ef below k is
+    raised to k; results record the ef actually used as `effective_search_ef`.
+
+    Returns:
+        One result per (M, construction ef, search ef)
+    """
+    import hnswlib
+
+    corpus = normalize(corpus)
+    queries = normalize(queries)
+    exact = exact_top_k(corpus, queries, k)
+    ids = np.arange(len(corpus))
+
+    results = []
+    for m, construction_ef in itertools.product(m_values, construction_efs):
+        index = hnswlib.Index(space="cosine", dim=corpus.shape[1])
+        index.init_index(max_elements=len(corpus), ef_construction=construction_ef, M=m)
+        start = time.perf_counter()
+        index.add_items(corpus, ids)
+        build_seconds = time.perf_counter() - start
+
+        # One query at a time on one thread, as the API issues them
+        index.set_num_threads(1)
+        for search_ef in search_efs:
+            effective_search_ef = max(search_ef, k)
+            index.set_ef(effective_search_ef)
+            latencies = []
+            found = []
+            for query in queries:
+                start = time.perf_counter()
+                labels, _ = index.knn_query(query, k=k)
+                latencies.append((time.perf_counter() - start) * 1000)
+                found.append(labels[0])
+
+            results.append({
+                "m": m,
+                "construction_ef": construction_ef,
+                "search_ef": search_ef,
+                "effective_search_ef": effective_search_ef,
+                "build_seconds": build_seconds,
+                f"recall_at_{k}": recall_at_k(found, exact),
+                "latency_ms": percentiles(latencies),
+            })
+        index.set_num_threads(-1)
+    return results
+
+
+def _ints(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part]
+
+
+def main():
+    """Parse arguments, run the evaluation and write results."""
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="HNSW recall/latency evaluation")
+    parser.add_argument("--collection", default=os.getenv("CHROMA_COLLECTION_NAME", "rag_documents"))
+    parser.add_argument("--persist-directory", default=os.getenv("CHROMA_PERSIST_DIRECTORY", "./chroma_db"))
+    parser.add_argument("--shards", type=int, default=int(os.getenv("VECTOR_STORE_SHARDS", "1")))
+    parser.add_argument("--shard-layout", default=os.getenv("VECTOR_STORE_SHARD_LAYOUT", "collections"))
+    parser.add_argument("--synthetic", type=int,
+                        help="Use N synthetic fake-embedded reviews instead of the stored corpus")
+    parser.add_argument("--dimensions", type=int, default=384,
+                        help="Fake embedding dimensions (--synthetic only)")
+    parser.add_argument("--queries", type=int, default=500,
+                        help="Query vectors sampled from the corpus and held out of the index")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--m", default="16", help="Comma-separated M values")
+    parser.add_argument("--construction-ef", default="100", help="Comma-separated construction ef values")
+    parser.add_argument("--search-ef", default="10,20,50,100", help="Comma-separated search ef values")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        vectors = synthetic_corpus(args.synthetic, args.dimensions, args.seed)
+        source = f"synthetic ({args.synthetic:,} reviews)"
+    else:
+        vectors = load_corpus(args.collection, args.persist_directory, args.shards, args.shard_layout)
+        source = f"{args.persist_directory}/{args.collection}"
+
+    rng = np.random.default_rng(args.seed)
+    num_queries = min(args.queries, len(vectors) // 2)
+    held_out = rng.choice(len(vectors), size=num_queries, replace=False)
+    mask = np.ones(len(vectors), dtype=bool)
+    mask[held_out] = False
+    corpus, queries = vectors[mask], vectors[held_out]
+    print(f"Corpus: {source}, {len(corpus):,} vectors x {corpus.shape[1]} dims, {num_queries} queries")
+
+    results = evaluate(
+        corpus, queries, args.top_k,
+        _ints(args.m), _ints(args.construction_ef), _ints(args.search_ef)
+    )
+
+    recall_key = f"recall_at_{args.top_k}"
+    print(f"\n{'M':>4} {'c_ef':>6} {'s_ef':>6} {'build s':>8} {recall_key:>12} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for result in results:
+        latency = result["latency_ms"]
+        # Searches below k ran with ef = k
+        raised = "*" if result["effective_search_ef"] != result["search_ef"] else " "
+        print(f"{result['m']:>4} {result['construction_ef']:>6} {result['effective_search_ef']:>5}{raised} "
+              f"{result['build_seconds']:>8.2f} {result[recall_key]:>12.4f} "
+              f"{latency['p50']:>8.3f} {latency['p95']:>8.3f} {latency['p99']:>8.3f}")
+    if any(result["effective_search_ef"] != result["search_ef"] for result in results):
+        print(f"* search ef below top-k ({args.top_k}) raised to {args.top_k}")
+
+    path = write_results("hnsw_eval", {
+        "config": {**vars(args), "source": source, "corpus_size": len(corpus)},
+        "results": results,
+    }, args.output)
+    print(f"\nResults written to {path}")
+
+
+if __name__ == "__main__":
+    main()
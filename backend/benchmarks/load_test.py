@@ -0,0 +1,280 @@
+"""
+Concurrent load-test harness for the HTTP API.
+
+Starts a local fake embeddings server and the API (with N uvicorn
+workers), seeds the index, then drives POST /query and POST /ingest at a
+configurable concurrency and request rate. Two phases are run:
+
+1. query  — queries only
+2. mixed  — queries with a concurrent ingestion stream
+
+Comparing the query tail latency of both phases shows whether ingestion
+degrades query latency. Everything runs locally without network access.
+
+Usage (from backend/):
+    python -m benchmarks.load_test --workers 2 --concurrency 32 --rate 200 --duration 30
+"""
+
+import argparse
+import asyncio
+import io
+import itertools
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+
+import httpx
+
+from benchmarks.common import generate_reviews, percentiles, write_results
+
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+
+@dataclass
+class EndpointStats:
+    """Latency and outcome samples for one endpoint."""
+
+    latencies_ms: List[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        """Summarize throughput, latency percentiles and error rate."""
+        total = sum(self.statuses.values())
+        errors = sum(count for status, count in self.statuses.items()
+                     if status == "error" or int(status) >= 400)
+        return {
+            "requests": total,
+            "throughput_rps": total / elapsed if elapsed else 0.0,
+            "latency_ms": percentiles(self.latencies_ms),
+            "error_rate": errors / total if total else 0.0,
+            "statuses": dict(self.statuses),
+        }
+
+
+def _make_csv(num_rows: int, seed: int) -> bytes:
+    """Build an in-memory CSV upload with a text column."""
+    reviews = generate_reviews(seed=seed)
+    buffer = io.StringIO()
+    buffer.write("text\n")
+    for _ in range(num_rows):
+        buffer.write('"' + next(reviews).replace('"', "'") + '"\n')
+    return buffer.getvalue().encode("utf-8")
+
+
+async def _timed(stats: EndpointStats, send: Callable[[], Awaitable[httpx.Response]]) -> None:
+    """Send one request and record its latency and status."""
+    start = time.perf_counter()
+    try:
+        response = await send()
+        stats.statuses[str(response.status_code)] += 1
+    except httpx.HTTPError:
+        stats.statuses["error"] += 1
+    stats.latencies_ms.append((time.perf_counter() - start) * 1000)
+
+
+async def _drive(
+    send: Callable[[], Awaitable[httpx.Response]],
+    stats: EndpointStats,
+    concurrency: int,
+    rate: Optional[float],
+    duration: float
+) -> None:
+    """
+    Issue requests until the duration elapses.
+
+    With a rate, requests are started on a fixed schedule (open loop) and
+    capped at `concurrency` in flight; without one, `concurrency` workers
+    send back-to-back (closed loop).
+    """
+    deadline = time.perf_counter() + duration
+
+    if rate is None:
+        async def worker():
+            while time.perf_counter() < deadline:
+                await _timed(stats, send)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return
+
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = []
+
+    async def limited():
+        async with semaphore:
+            await _timed(stats, send)
+
+    interval = 1.0 / rate
+    next_start = time.perf_counter()
+    while next_start < deadline:
+        tasks.append(asyncio.create_task(limited()))
+        next_start += interval
+        await asyncio.sleep(max(0.0, next_start - time.perf_counter()))
+    await asyncio.gather(*tasks)
+
+
+async def run_phase(
+    base_url: str,
+    config: Dict[str, Any],
+    with_ingest: bool
+) -> Dict[str, Any]:
+    """Run one load phase and summarize per endpoint."""
+    query_stats = EndpointStats()
+    ingest_stats = EndpointStats()
+    query_source = generate_reviews(seed=config["seed"] + 1)
+    queries = [" ".join(next(query_source).split()[:6]) for _ in range(1000)]
+    query_cycle = itertools.cycle(queries)
+    upload_seeds = itertools.count(config["seed"] + 100)
+
+    limits = httpx.Limits(max_connections=config["concurrency"] + config["ingest_concurrency"])
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0, limits=limits) as client:
+
+        async def send_query():
+            return await client.post("/query", json={"query": next(query_cycle)})
+
+        async def send_ingest():
+            content = _make_csv(config["ingest_rows"], next(upload_seeds))
+            return await client.post(
+                "/ingest",
+                files={"file": ("load.csv", content, "text/csv")}
+            )
+
+        drivers = [_drive(send_query, query_stats, config["concurrency"],
+                          config["rate"], config["duration"])]
+        if with_ingest:
+            drivers.append(_drive(send_ingest, ingest_stats, config["ingest_concurrency"],
+                                  config["ingest_rate"], config["duration"]))
+
+        start = time.perf_counter()
+        await asyncio.gather(*drivers)
+        elapsed = time.perf_counter() - start
+
+    phase = {"elapsed_seconds": elapsed, "query": query_stats.summary(elapsed)}
+    if with_ingest:
+        phase["ingest"] = ingest_stats.summary(elapsed)
+    return phase
+
+
+def _wait_until_up(url: str, timeout: float = 30.0) -> None:
+    """Poll a URL until it answers or the timeout expires."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not start within {timeout:.0f}s")
+
+
+def _start(command: List[str], env: Dict[str, str]) -> subprocess.Popen:
+    """Start a server subprocess from the backend directory."""
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env)
+
+
+def main():
+    """Start local servers, run the load phases and write results."""
+    parser = argparse.ArgumentParser(description="Load test for /query and /ingest")
+    parser.add_argument("--workers", type=int, default=1, help="Uvicorn workers for the API")
+    parser.add_argument("--concurrency", type=int, default=16, help="Max in-flight queries")
+    parser.add_argument("--rate", type=float, help="Query rate (req/s); omit for closed loop")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per phase")
+    parser.add_argument("--ingest-concurrency", type=int, default=1)
+    parser.add_argument("--ingest-rate", type=float, help="Ingest rate (req/s)")
+    parser.add_argument("--ingest-rows", type=int, default=200, help="Rows per ingest upload")
+    parser.add_argument("--seed-rows", type=int, default=2000, help="Rows ingested before the run")
+    parser.add_argument("--embed-latency-ms", type=float, default=50.0)
+    parser.add_argument("--embed-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--embed-failure-rate", type=float, default=0.0)
+    parser.add_argument("--embed-rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--api-port", type=int, default=8100)
+    parser.add_argument("--embed-port", type=int, default=8101)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    config = {
+        "workers": args.workers,
+        "concurrency": args.concurrency,
+        "rate": args.rate,
+        "duration": args.duration,
+        "ingest_concurrency": args.ingest_concurrency,
+        "ingest_rate": args.ingest_rate,
+        "ingest_rows": args.ingest_rows,
+        "embed_latency_ms": args.embed_latency_ms,
+        "embed_jitter_ms": args.embed_jitter_ms,
+        "embed_failure_rate": args.embed_failure_rate,
+        "embed_rate_limit_rate": args.embed_rate_limit_rate,
+        "seed": args.seed,
+    }
+
+    base_url = f"http://127.0.0.1:{args.api_port}"
+    processes = []
+    with tempfile.TemporaryDirectory() as persist_directory:
+        env = {
+            **os.environ,
+            "OPENAI_API_KEY": "sk-load-test",
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{args.embed_port}/v1",
+            "CHROMA_PERSIST_DIRECTORY": persist_directory,
+            "CHROMA_COLLECTION_NAME": "load_test",
+        }
+        try:
+            processes.append(_start([
+                sys.executable, "-m", "benchmarks.fake_embeddings_server",
+                "--port", str(args.embed_port),
+                "--latency-ms", str(args.embed_latency_ms),
+                "--jitter-ms", str(args.embed_jitter_ms),
+                "--failure-rate", str(args.embed_failure_rate),
+                "--rate-limit-rate", str(args.embed_rate_limit_rate),
+            ], env))
+            processes.append(_start([
+                sys.executable, "-m", "uvicorn", "main:app",
+                "--port", str(args.api_port),
+                "--workers", str(args.workers),
+                "--log-level", "warning",
+            ], env))
+            _wait_until_up(f"http://127.0.0.1:{args.embed_port}/docs")
+            _wait_until_up(base_url + "/")
+
+            print(f"Seeding index with {args.seed_rows} rows...")
+            seed_response = httpx.post(
+                base_url + "/ingest",
+                files={"file": ("seed.csv", _make_csv(args.seed_rows, args.seed), "text/csv")},
+                timeout=300.0
+            )
+            seed_response.raise_for_status()
+
+            phases = {}
+            for name, with_ingest in (("query", False), ("mixed", True)):
+                print(f"Running '{name}' phase for {args.duration:.0f}s...")
+                phases[name] = asyncio.run(run_phase(base_url, config, with_ingest))
+                query = phases[name]["query"]
+                print(f"   /query:  {query['throughput_rps']:.1f} req/s, "
+                      f"p50 {query['latency_ms']['p50']:.1f} ms, "
+                      f"p95 {query['latency_ms']['p95']:.1f} ms, "
+                      f"p99 {query['latency_ms']['p99']:.1f} ms, "
+                      f"errors {query['error_rate']:.2%}")
+                if "ingest" in phases[name]:
+                    ingest = phases[name]["ingest"]
+                    print(f"   /ingest: {ingest['throughput_rps']:.2f} req/s, "
+                          f"p50 {ingest['latency_ms']['p50']:.0f} ms, "
+                          f"errors {ingest['error_rate']:.2%}")
+
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.wait()
+
+    path = write_results("load_test", {"config": config, "phases": phases}, args.output)
+    print(f"\nResults written to: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Offline benchmark suite for the ingestion and retrieval pipeline.
+
+Measures, for each index size:
+1. Chunking throughput (documents/s, chunks/s)
+2. Ingestion throughput (chunk → embed → store; docs/s, chunks/s, peak RSS)
+3. Query latency percentiles against VectorStore
+
+Embeddings come from a deterministic hash-based fake with configurable
+artificial latency, so no network access or API key is needed. Each size
+runs in a fresh process so peak RSS is attributable to that size, and
+chunks are generated and ingested one batch at a time, so it measures
+the vector store rather than the benchmark's own lists.
+
+Usage (from backend/):
+    python -m benchmarks.run_benchmarks --sizes 10000,100000,1000000
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterator
+
+from app.models.domain import Chunk, Document
+from app.services.chunking_service import ChunkingService
+from app.services.vector_store import VectorStore
+from benchmarks.common import generate_reviews, peak_rss_mb, percentiles, write_results
+from benchmarks.fakes import FakeEmbeddingService
+
+
+DEFAULT_SIZES = "10000,100000,1000000"
+
+
+def _chunk_batches(
+    num_chunks: int,
+    batch_size: int,
+    chunking_service: ChunkingService,
+    seed: int,
+    stats: Dict[str, Any]
+) -> Iterator[List[Chunk]]:
+    """
+    Chunk generated reviews into batches until `num_chunks` chunks are produced.
+
+    Only the batch being filled is held; documents, chunks and chunking
+    time are counted in `stats`.
+    """
+    reviews = generate_reviews(seed=seed)
+    batch: List[Chunk] = []
+    while stats["chunks"] < num_chunks:
+        doc = Document(content=next(reviews), metadata={"source_file": "benchmark"})
+        start = time.perf_counter()
+        chunks = chunking_service.process_document(doc)
+        stats["chunking_seconds"] += time.perf_counter() - start
+        chunks = chunks[:num_chunks - stats["chunks"]]
+        stats["documents"] += 1
+        stats["chunks"] += len(chunks)
+        batch.extend(chunks)
+        if len(batch) >= batch_size:
+            yield batch[:batch_size]
+            batch = batch[batch_size:]
+    if batch:
+        yield batch
+
+
+async def _benchmark_size(num_chunks: int, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Run all benchmarks for one index size."""
+    chunking_service = ChunkingService(
+        chunk_size=config["chunk_size"],
+        chunk_overlap=config["chunk_overlap"]
+    )
+    embedding_service = FakeEmbeddingService(
+        dimensions=config["dimensions"],
+        latency_ms=config["latency_ms"]
+    )
+    stats = {"documents": 0, "chunks": 0, "chunking_seconds": 0.0}
+
+    with tempfile.TemporaryDirectory() as persist_directory:
+        vector_store = VectorStore(
+            collection_name="benchmark",
+            persist_directory=persist_directory
+        )
+
+        # 1-2. Chunk, embed and store one batch at a time
+        embed_seconds = 0.0
+        store_seconds = 0.0
+        batches = _chunk_batches(num_chunks, config["batch_size"], chunking_service, config["seed"], stats)
+        for batch in batches:
+            start = time.perf_counter()
+            embeddings = await embedding_service.embed_batch([chunk.text for chunk in batch])
+            for chunk, embedding in zip(batch, embeddings):
+                chunk.embedding = embedding
+            embed_seconds += time.perf_counter() - start
+
+            start = time.perf_counter()
+            await vector_store.add_chunks(batch)
+            store_seconds += time.perf_counter() - start
+
+        chunking_seconds = stats["chunking_seconds"]
+        chunking = {
+            "seconds": chunking_seconds,
+            "docs_per_second": stats["documents"] / chunking_seconds,
+            "chunks_per_second": stats["chunks"] / chunking_seconds,
+        }
+        ingestion_seconds = chunking_seconds + embed_seconds + store_seconds
+        ingestion = {
+            "seconds": ingestion_seconds,
+            "embed_seconds": embed_seconds,
+            "store_seconds": store_seconds,
+            "docs_per_second": stats["documents"] / ingestion_seconds,
+            "chunks_per_second": stats["chunks"] / ingestion_seconds,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+        # 3. Query latency: embed + search, sampled from the same distribution
+        rng = random.Random(config["seed"])
+        query_source = generate_reviews(seed=config["seed"] + 1)
+        queries = [" ".join(next(query_source).split()[:rng.randint(2, 8)])
+                   for _ in range(config["num_queries"])]
+
+        embed_latencies: List[float] = []
+        search_latencies: List[float] = []
+        total_latencies: List[float] = []
+        for query in queries:
+            start = time.perf_counter()
+            query_embedding = await embedding_service.embed_text(query)
+            embedded = time.perf_counter()
+            await vector_store.search(
+                query_embedding=query_embedding,
+                top_k=config["top_k"],
+                threshold=config["similarity_threshold"]
+            )
+            end = time.perf_counter()
+            embed_latencies.append((embedded - start) * 1000)
+            search_latencies.append((end - embedded) * 1000)
+            total_latencies.append((end - start) * 1000)
+
+        query = {
+            "num_queries": len(queries),
+            "embed_ms": percentiles(embed_latencies),
+            "search_ms": percentiles(search_latencies),
+            "total_ms": percentiles(total_latencies),
+        }
+
+    return {
+        "num_chunks": stats["chunks"],
+        "num_documents": stats["documents"],
+        "chunking": chunking,
+        "ingestion": ingestion,
+        "query": query,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_size(num_chunks: int, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Process entry point: benchmark a single index size."""
+    return asyncio.run(_benchmark_size(num_chunks, config))
+
+
+def run_benchmarks(sizes: List[int], config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Benchmark each size in its own process.
+
+    Args:
+        sizes: Index sizes in chunks
+        config: Benchmark configuration
+
+    Returns:
+        Per-size results
+    """
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for num_chunks in sizes:
+        print(f"Benchmarking {num_chunks:,} chunks...")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            result = executor.submit(run_size, num_chunks, config).result()
+
+        print(f"   Chunking:  {result['chunking']['chunks_per_second']:,.0f} chunks/s")
+        print(f"   Ingestion: {result['ingestion']['chunks_per_second']:,.0f} chunks/s, "
+              f"peak RSS {result['ingestion']['peak_rss_mb']:.0f} MB")
+        print(f"   Query:     p50 {result['query']['total_ms']['p50']:.2f} ms, "
+              f"p99 {result['query']['total_ms']['p99']:.2f} ms")
+        results.append(result)
+    return results
+
+
+def main():
+    """Parse arguments, run the suite and write results."""
+    parser = argparse.ArgumentParser(description="Offline RAG pipeline benchmarks")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help="Comma-separated index sizes in chunks")
+    parser.add_argument("--dimensions", type=int, default=384,
+                        help="Fake embedding dimensions")
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="Artificial latency per embedding call")
+    parser.add_argument("--batch-size", type=int, default=1000,
+                        help="Chunks per embed/store batch")
+    parser.add_argument("--queries", type=int, default=200,
+                        help="Number of queries for latency measurement")
+    parser.add_argument("--chunk-size", type=int, default=250)
+    parser.add_argument("--chunk-overlap", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--similarity-threshold", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    config = {
+        "dimensions": args.dimensions,
+        "latency_ms": args.latency_ms,
+        "batch_size": args.batch_size,
+        "num_queries": args.queries,
+        "chunk_size": args.chunk_size,
+        "chunk_overlap": args.chunk_overlap,
+        "top_k": args.top_k,
+        "similarity_threshold": args.similarity_threshold,
+        "seed": args.seed,
+    }
+
+    results = run_benchmarks(sizes, config)
+    path = write_results("benchmark", {"config": config, "results": results}, args.output)
+    print(f"\nResults written to: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Startup benchmark: import time and memory of the API per serving mode.
+
+Imports `main` in a fresh interpreter for every run, then opens the
+vector store the first query would open (in an empty temporary
+directory). Reports the import time, the time until the store is ready,
+the whole process time (interpreter included), peak RSS and which heavy
+dependencies were loaded. Read-only (query-only) workers should never
+load chromadb or pandas.
+
+Usage (from backend/):
+    python -m benchmarks.startup --repeats 5
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Dict, Any
+
+from benchmarks.common import percentiles, write_results
+
+
+MODES = ("readwrite", "readonly")
+HEAVY_MODULES = ("chromadb", "pandas", "pyarrow", "openai", "numpy")
+
+_PROBE = """
+import json, sys, time
+from benchmarks.common import peak_rss_mb
+started = time.perf_counter()
+import main
+import_seconds = time.perf_counter() - started
+from app.api.dependencies import get_vector_store
+get_vector_store()
+print(json.dumps({
+    "import_seconds": import_seconds,
+    "ready_seconds": time.perf_counter() - started,
+    "peak_rss_mb": peak_rss_mb(),
+    "modules": len(sys.modules),
+    "loaded": [name for name in %r if name in sys.modules],
+}))
+"""
+
+
+def measure(mode: str) -> Dict[str, Any]:
+    """Start the app once in a new interpreter in a serving mode."""
+    with tempfile.TemporaryDirectory() as persist_directory:
+        env = {**os.environ, "SERVING_MODE": mode, "CHROMA_PERSIST_DIRECTORY": persist_directory}
+        # Settings require a key; nothing is sent at startup
+        env.setdefault("OPENAI_API_KEY", "sk-startup-benchmark")
+        started = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-c", _PROBE % (HEAVY_MODULES,)],
+            cwd=Path(__file__).parent.parent,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True
+        )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["process_seconds"] = time.perf_counter() - started
+    return result
+
+
+def benchmark_mode(mode: str, repeats: int) -> Dict[str, Any]:
+    """Summarize repeated startups of one serving mode."""
+    runs: List[Dict[str, Any]] = [measure(mode) for _ in range(repeats)]
+    return {
+        "mode": mode,
+        "import_ms": percentiles([run["import_seconds"] * 1000 for run in runs]),
+        "ready_ms": percentiles([run["ready_seconds"] * 1000 for run in runs]),
+        "process_ms": percentiles([run["process_seconds"] * 1000 for run in runs]),
+        "peak_rss_mb": max(run["peak_rss_mb"] for run in runs),
+        "modules": runs[-1]["modules"],
+        "loaded": runs[-1]["loaded"],
+    }
+
+
+def main():
+    """Parse arguments, run the startup benchmark and write results."""
+    parser = argparse.ArgumentParser(description="API startup benchmark")
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated serving modes")
+    parser.add_argument("--repeats", type=int, default=5, help="Fresh interpreters per mode")
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    # The first run warms the bytecode cache and is not counted
+    results = []
+    for mode in args.modes.split(","):
+        measure(mode)
+        results.append(benchmark_mode(mode, args.repeats))
+
+    print(f"{'mode':<10} {'import p50 ms':>14} {'ready p50 ms':>13} {'process p50 ms':>15} "
+          f"{'peak RSS MB':>12} {'modules':>8}  loaded")
+    for result in results:
+        print(f"{result['mode']:<10} {result['import_ms']['p50']:>14.1f} {result['ready_ms']['p50']:>13.1f} "
+              f"{result['process_ms']['p50']:>15.1f} {result['peak_rss_mb']:>12.1f} {result['modules']:>8}  "
+              f"{', '.join(result['loaded'])}")
+
+    path = write_results("startup", {"config": vars(args), "results": results}, args.output)
+    print(f"\nResults written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,165 +2,745 @@
 Script to ingest Women's Clothing Reviews dataset and create embeddings.
 
 This script:
-1. Loads the processed_reviews.csv dataset
+1. Loads the processed reviews dataset (CSV, JSON Lines, Parquet or Arrow IPC)
 2. Combines Title and Review Text for each row
 3. Chunks the text using the chunking service
 4. Generates embeddings using OpenAI
 5. Stores embeddings in ChromaDB vector database
+
+Rows are read in batches with only the needed columns projected, and each
+batch is chunked, embedded and stored before the next one is read.
+Parquet and Arrow inputs are memory-mapped, so large datasets start
+ingesting immediately.
+
+With --workers N the rows are split into shards (contiguous row ranges or
+content-hash buckets of --shard-size rows). Each shard is chunked and
+embedded in one of N worker processes, each with its own embedding client
+and connection pool, while the main process is the single writer to the
+vector store.
+
+With --dedup, exact and near-duplicate chunks (MinHash/LSH over character
+shingles) are collapsed before embedding; the stored chunk lists the ids
+of all documents it stands for.
+
+Progress is checkpointed under CHROMA_PERSIST_DIRECTORY: each batch (or
+shard) is saved with its embeddings once embedded and marked done once
+stored. After a failure, --resume skips stored work and stores saved
+embeddings without paying for them again.
+
+A memory report (peak RSS, peak in-flight chunks and embeddings, the
+deduplication index and the vector index size) is printed at the end.
+With --tracemalloc N, the N source lines holding the most memory in the
+main process are listed too (tracing slows ingestion down).
 """
 
+import argparse
 import asyncio
-import pandas as pd
+import functools
+import math
+import zlib
 from pathlib import Path
 import sys
 import os
+from typing import List, Dict, Any, Optional, Iterator, Tuple
 from dotenv import load_dotenv
 
+from app.core.exceptions import EmbeddingError
 from app.services.embedding_service import EmbeddingService
+from app.services.embedding_providers import EmbeddingProvider, create_embedding_provider
+from app.services.rate_limiter import EmbeddingScheduler
 from app.services.chunking_service import ChunkingService
-from app.services.vector_store import VectorStore
-from app.models.domain import Document
+from app.services.deduplication import ChunkDeduplicator
+from app.services.sharded_ingestion import Row, ShardedIngestion, chunk_rows, store_duplicate_sources
+from app.services.sharded_vector_store import create_vector_store
+from app.models.domain import Document, Chunk
+from app.services.ingestion_checkpoint import (
+    IngestionCheckpoint,
+    STATUS_EMBEDDED,
+    STATUS_STORED,
+    file_sha256,
+    run_key,
+)
+from app.core.constants import INGESTION_CHECKPOINT_DIR
+from app.utils.dataset_reader import read_record_batches
+from app.utils.memory import MemoryAccountant, chunk_bytes, format_bytes, process_memory, trace_allocations
+from app.utils.sampling import reservoir_sample
 
 
-async def ingest_dataset():
-    """Main ingestion function."""
+# Only these columns are read from the dataset
+REVIEW_COLUMNS = [
+    "Title",
+    "Review Text",
+    "Age",
+    "Age Category",
+    "Division Name",
+    "Department Name",
+    "Class Name",
+]
+
+SHARDING_MODES = ("range", "hash")
+
+def _as_text(value: Any) -> str:
+    """Convert a cell to text, treating missing values as empty."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    return str(value)
+
+
+def record_to_document(record: Dict[str, Any], row_index: int, source_file: str) -> Optional[Document]:
+    """
+    Convert a dataset row to a document.
+
+    Combines Title and Review Text for better context.
+
+    Returns:
+        Document, or None if the row has no text
+    """
+    title = _as_text(record.get('Title'))
+    review = _as_text(record.get('Review Text'))
+
+    # Create combined text
+    if title and review:
+        content = f"{title}. {review}"
+    elif review:
+        content = review
+    elif title:
+        content = title
+    else:
+        return None  # Skip empty rows
+
+    # Create document with metadata
+    return Document(
+        content=content,
+        metadata={
+            "source_file": source_file,
+            "row_index": row_index,
+            "age": _as_text(record.get('Age')),
+            "age_category": _as_text(record.get('Age Category')),
+            "division": _as_text(record.get('Division Name')),
+            "department": _as_text(record.get('Department Name')),
+            "class": _as_text(record.get('Class Name')),
+        }
+    )
+
+
+def rows_to_chunks(
+    rows: List[Row],
+    source_file: str,
+    chunking_service: ChunkingService
+) -> Tuple[int, List[Chunk]]:
+    """
+    Convert review rows to documents and chunk them.
+
+    Returns:
+        (number of non-empty documents, chunks)
+    """
+    return chunk_rows(rows, source_file, chunking_service, record_to_document)
+
 
-    # Load environment variables directly
+def fit_embedding_model(
+    embedding_service: EmbeddingService,
+    dataset_path: Path,
+    batch_size: int,
+    chunking_service: ChunkingService
+) -> None:
+    """
+    Fit the local provider on a random sample of the dataset's documents.
+
+    No-op for pretrained providers and for an already fitted model. The
+    dataset is streamed once and only the sample is kept in memory.
+    """
+    provider = embedding_service.provider
+    if not provider.needs_fit:
+        return
+
+    def documents() -> Iterator[Document]:
+        for offset, records in read_record_batches(dataset_path, REVIEW_COLUMNS, batch_size):
+            for i, record in enumerate(records):
+                doc = record_to_document(record, offset + i, dataset_path.name)
+                if doc is not None:
+                    yield doc
+
+    sample = reservoir_sample(documents(), provider.fit_sample_size)
+    embedding_service.fit_if_needed(
+        chunk.text for doc in sample for chunk in chunking_service.process_document(doc)
+    )
+
+
+def iter_shards(
+    batches: Iterator[Tuple[int, List[Dict[str, Any]]]],
+    shard_size: int,
+    sharding: str = "range",
+    num_buckets: int = 1
+) -> Iterator[Tuple[int, List[Row]]]:
+    """
+    Group dataset rows into shards.
+
+    "range" shards are consecutive runs of `shard_size` rows. "hash" shards
+    assign each row to one of `num_buckets` buckets by a CRC32 of its text
+    and emit a bucket whenever it reaches `shard_size` rows, so the same
+    review always lands in the same bucket regardless of row order.
+
+    Args:
+        batches: (offset, records) batches from read_record_batches
+        shard_size: Rows per shard
+        sharding: "range" or "hash"
+        num_buckets: Number of hash buckets
+
+    Yields:
+        (shard id, rows)
+    """
+    if sharding not in SHARDING_MODES:
+        raise ValueError(f"Unknown sharding mode: {sharding}")
+
+    shard_id = 0
+    buckets: List[List[Row]] = [[] for _ in range(num_buckets if sharding == "hash" else 1)]
+    for offset, records in batches:
+        for i, record in enumerate(records):
+            bucket = 0
+            if sharding == "hash":
+                key = f"{_as_text(record.get('Title'))}|{_as_text(record.get('Review Text'))}"
+                bucket = zlib.crc32(key.encode("utf-8")) % num_buckets
+            buckets[bucket].append((offset + i, record))
+            if len(buckets[bucket]) >= shard_size:
+                yield shard_id, buckets[bucket]
+                shard_id += 1
+                buckets[bucket] = []
+
+    for rows in buckets:
+        if rows:
+            yield shard_id, rows
+            shard_id += 1
+
+
+def default_dataset_path() -> Path:
+    """Processed dataset in backend/data/, preferring columnar formats."""
+    data_dir = Path(__file__).parent / "data"
+    for name in ("processed_reviews.arrow", "processed_reviews.parquet", "processed_reviews.csv"):
+        if (data_dir / name).exists():
+            return data_dir / name
+    return data_dir / "processed_reviews.csv"
+
+
+def load_config() -> Dict[str, Any]:
+    """Read ingestion settings from the environment (.env)."""
     load_dotenv()
+    embedding_provider = os.getenv("EMBEDDING_PROVIDER", "openai")
+    is_openai = embedding_provider == "openai"
+    return {
+        "openai_api_key": os.getenv("OPENAI_API_KEY"),
+        "openai_base_url": os.getenv("OPENAI_BASE_URL"),
+        "embedding_provider": embedding_provider,
+        "chunk_size": int(os.getenv("CHUNK_SIZE", "250")),
+        "chunk_overlap": int(os.getenv("CHUNK_OVERLAP", "50")),
+        "embedding_model": os.getenv("EMBEDDING_MODEL", "text-embedding-3-small"),
+        "chroma_persist_dir": os.getenv("CHROMA_PERSIST_DIRECTORY", "./chroma_db"),
+        "chroma_collection": os.getenv("CHROMA_COLLECTION_NAME", "rag_documents"),
+        "vector_store_shards": int(os.getenv("VECTOR_STORE_SHARDS", "1")),
+        "vector_store_shard_layout": os.getenv("VECTOR_STORE_SHARD_LAYOUT", "collections"),
+        "hnsw": {
+            f"hnsw_{name}": int(os.environ[f"HNSW_{name.upper()}"])
+            for name in ("construction_ef", "search_ef", "m")
+            if os.getenv(f"HNSW_{name.upper()}")
+        },
+        "text_store": os.getenv("CHUNK_TEXT_STORE_ENABLED", "false").lower() == "true",
+        "local_dimensions": int(os.getenv("LOCAL_EMBEDDING_DIMENSIONS", "256")),
+        "local_num_features": int(os.getenv("LOCAL_EMBEDDING_FEATURES", "2048")),
+        "local_fit_sample": int(os.getenv("LOCAL_EMBEDDING_FIT_SAMPLE", "50000")),
+        "local_min_fit_texts": int(os.getenv("LOCAL_EMBEDDING_MIN_FIT_TEXTS", "1000")),
+        "batch_max_retries": int(os.getenv("EMBEDDING_BATCH_MAX_RETRIES", "6")),
+        "rpm_limit": int(os.getenv("EMBEDDING_RPM_LIMIT", "3000")) if is_openai else None,
+        "tpm_limit": int(os.getenv("EMBEDDING_TPM_LIMIT", "1000000")) if is_openai else None,
+        "batch_size": int(os.getenv("EMBEDDING_BATCH_SIZE", "512")),
+        "batch_max_tokens": int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "100000")),
+        "max_concurrent_batches": int(os.getenv("EMBEDDING_MAX_CONCURRENT_BATCHES", "8")),
+    }
 
-    # Get configuration from environment
-    openai_api_key = os.getenv("OPENAI_API_KEY")
-    chunk_size = int(os.getenv("CHUNK_SIZE", "250"))
-    chunk_overlap = int(os.getenv("CHUNK_OVERLAP", "50"))
-    embedding_model = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
-    chroma_persist_dir = os.getenv("CHROMA_PERSIST_DIRECTORY", "./chroma_db")
-    chroma_collection = os.getenv("CHROMA_COLLECTION_NAME", "rag_documents")
 
-    if not openai_api_key:
-        print("\nError: OPENAI_API_KEY not found in .env file")
-        sys.exit(1)
+def create_provider(config: Dict[str, Any]) -> EmbeddingProvider:
+    """Build the embedding provider named in the settings."""
+    return create_embedding_provider(
+        provider=config["embedding_provider"],
+        api_key=config["openai_api_key"],
+        base_url=config["openai_base_url"],
+        persist_directory=config["chroma_persist_dir"],
+        local_dimensions=config["local_dimensions"],
+        local_num_features=config["local_num_features"],
+        local_fit_sample_size=config["local_fit_sample"],
+        local_min_fit_texts=config["local_min_fit_texts"]
+    )
+
 
+def create_embedding_service(config: Dict[str, Any], num_processes: int = 1) -> EmbeddingService:
+    """
+    Build the embedding service for ingestion.
+
+    Args:
+        config: Settings from load_config()
+        num_processes: Processes sharing the RPM/TPM quota
+    """
+    def share(limit: Optional[int]) -> Optional[int]:
+        return max(1, limit // num_processes) if limit else None
+
+    return EmbeddingService(
+        provider=create_provider(config),
+        batch_max_retries=config["batch_max_retries"],
+        scheduler=EmbeddingScheduler(
+            requests_per_minute=share(config["rpm_limit"]),
+            tokens_per_minute=share(config["tpm_limit"]),
+            max_batch_size=config["batch_size"],
+            max_batch_tokens=config["batch_max_tokens"],
+            max_concurrency=config["max_concurrent_batches"]
+        )
+    )
+
+
+def create_chunking_service(config: Dict[str, Any]) -> ChunkingService:
+    """Build the chunking service for ingestion."""
+    return ChunkingService(
+        chunk_size=config["chunk_size"],
+        chunk_overlap=config["chunk_overlap"]
+    )
+
+
+def print_header(config: Dict[str, Any]) -> None:
+    """Print the ingestion banner."""
     print("=" * 60)
     print("RAG RETRIEVAL SYSTEM - DATASET INGESTION")
     print("=" * 60)
     print(f"\nConfiguration:")
 
 
-    # Initialize services
-    embedding_service = EmbeddingService(
-        api_key=openai_api_key
-    )
-    chunking_service = ChunkingService(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap
+def print_footer(config: Dict[str, Any]) -> None:
+    """Print the completion message."""
+    print("\n" + "=" * 60)
+    print("INGESTION COMPLETED SUCCESSFULLY!")
+    print("=" * 60)
+    print(f"\nEmbeddings are stored in: {config['chroma_persist_dir']}")
+    print("You can now start the API server and query the system.")
+    print("\nNext steps:")
+    print("  1. Start backend: uvicorn main:app --reload")
+    print("  2. Start frontend: cd ../frontend && npm run dev")
+    print("  3. Open browser: http://localhost:5173")
+
+
+def print_sample_chunks(sample_chunks: List[Chunk]) -> None:
+    """Display the first few stored chunks."""
+    print(f"\nSample Chunks:")
+    for i, chunk in enumerate(sample_chunks, 1):
+        print(f"\n   Chunk {i} (ID: {chunk.chunk_id[:8]}...):")
+        print(f"   Text: {chunk.text[:100]}...")
+        print(f"   Metadata: Age={chunk.metadata.get('age_category', 'N/A')}, "
+              f"Dept={chunk.metadata.get('department', 'N/A')}")
+
+
+def print_shard_summary(results: List[Dict[str, Any]], wall_seconds: float) -> None:
+    """Print per-shard throughput of a sharded run."""
+    print(f"\nShard summary:")
+    print(f"   {'shard':>5} {'pid':>7} {'rows':>9} {'chunks':>9} {'embed s':>9} {'store s':>9} {'chunks/s':>10}")
+    for result in sorted(results, key=lambda r: r["shard_id"]):
+        rate = result["num_chunks"] / result["embed_seconds"] if result["embed_seconds"] else 0.0
+        print(f"   {result['shard_id']:>5} {result['pid']:>7} {result['rows']:>9,} "
+              f"{result['num_chunks']:>9,} {result['embed_seconds']:>9.2f} "
+              f"{result['store_seconds']:>9.2f} {rate:>10,.1f}")
+    total_chunks = sum(result["num_chunks"] for result in results)
+    print(f"   Total: {len(results)} shards, {total_chunks:,} chunks in {wall_seconds:.2f}s "
+          f"({total_chunks / wall_seconds if wall_seconds else 0.0:,.1f} chunks/s)")
+
+
+def track_batch(memory: MemoryAccountant, chunks: List[Chunk], deduplicator: Optional[ChunkDeduplicator]) -> None:
+    """Report the batch in flight (and the deduplication index) to the accountant."""
+    sizes = chunk_bytes(chunks)
+    memory.set("ingest_chunks", sizes["objects"])
+    memory.set("embedding_buffers", sizes["embeddings"])
+    if deduplicator:
+        memory.set("deduplication_index", deduplicator.memory_bytes())
+
+
+def print_memory_report(
+    memory: MemoryAccountant,
+    vector_store,
+    worker_peaks: Optional[Dict[int, int]] = None
+) -> None:
+    """Print peak memory per component, the index size and process RSS."""
+    usage = vector_store.memory_usage()
+    process = process_memory()
+    print(f"\nMemory:")
+    for component, sizes in memory.snapshot().items():
+        print(f"   {component + ' (peak)':<28} {format_bytes(sizes['peak_bytes']):>10}")
+    print(f"   {'vector index (memory)':<28} {format_bytes(usage['index_memory_bytes']):>10}")
+    print(f"   {'vector index (disk)':<28} {format_bytes(usage['disk_bytes']):>10}")
+    print(f"   {'process RSS (peak)':<28} {format_bytes(process['peak_rss_bytes']):>10}")
+    for pid, peak in sorted((worker_peaks or {}).items()):
+        print(f"   {f'worker {pid} RSS (peak)':<28} {format_bytes(peak):>10}")
+
+
+def print_allocations(allocations: Dict[str, Any]) -> None:
+    """Print the top allocation sites traced with tracemalloc."""
+    print(f"\nTop allocation sites (peak traced {format_bytes(allocations['peak_traced_bytes'])}):")
+    for site in allocations["top"]:
+        print(f"   {format_bytes(site['size_bytes']):>10} {site['count']:>9,} blocks  {site['site']}")
+
+
+def open_checkpoint(
+    config: Dict[str, Any],
+    dataset_path: Path,
+    resume: bool,
+    **params: Any
+) -> IngestionCheckpoint:
+    """
+    Open the checkpoint for this dataset and run settings.
+
+    Without `resume`, progress left by an earlier run is discarded.
+    """
+    # Embeddings from another model or dimensionality must not be resumed
+    provider = create_provider(config)
+    checkpoint = IngestionCheckpoint(
+        os.path.join(config["chroma_persist_dir"], INGESTION_CHECKPOINT_DIR),
+        run_key(
+            file_sha256(str(dataset_path)),
+            chunk_size=config["chunk_size"],
+            chunk_overlap=config["chunk_overlap"],
+            collection=config["chroma_collection"],
+            provider=config["embedding_provider"],
+            embedding=provider.vector_space,
+            dimensions=provider.dimensions,
+            **params
+        )
     )
-    vector_store = VectorStore(
-        collection_name=chroma_collection,
-        persist_directory=chroma_persist_dir
+    if not resume:
+        checkpoint.reset()
+    elif checkpoint.exists():
+        stored = sum(1 for unit in checkpoint.units if checkpoint.status(unit) == STATUS_STORED)
+        print(f"\nResuming: {stored} units stored, "
+              f"{len(checkpoint.units) - stored} embedded but not yet stored")
+    else:
+        print("\nNo checkpoint found for this dataset and settings, starting fresh")
+    return checkpoint
+
+
+def _add_stats(totals: Dict[str, int], stats: Dict[str, Any]) -> None:
+    for name in ("rows", "documents", "chunks", "chars"):
+        totals[name] += stats[name]
+
+
+def open_deduplicator(checkpoint: IngestionCheckpoint, dedup_threshold: Optional[float]) -> Optional[ChunkDeduplicator]:
+    """Create the run's deduplicator, restoring its index when resuming."""
+    if not dedup_threshold:
+        return None
+    deduplicator = ChunkDeduplicator(threshold=dedup_threshold)
+    checkpoint.load_deduplicator(deduplicator)
+    return deduplicator
+
+
+def print_duplicates(deduplicator: Optional[ChunkDeduplicator]) -> None:
+    """Print how many duplicate chunks were collapsed."""
+    if deduplicator:
+        print(f"   Collapsed {deduplicator.num_duplicates:,} duplicate chunks "
+              f"(threshold {deduplicator.threshold})")
+
+
+async def ingest_dataset(
+    dataset_path: Optional[Path] = None,
+    batch_size: int = 10_000,
+    resume: bool = False,
+    dedup_threshold: Optional[float] = None
+):
+    """Main ingestion function."""
+
+    config = load_config()
+    if config["embedding_provider"] == "openai" and not config["openai_api_key"]:
+        print("\nError: OPENAI_API_KEY not found in .env file")
+        sys.exit(1)
+
+    print_header(config)
+
+    # Initialize services
+    embedding_service = create_embedding_service(config)
+    chunking_service = create_chunking_service(config)
+    vector_store = create_vector_store(
+        collection_name=config["chroma_collection"],
+        persist_directory=config["chroma_persist_dir"],
+        num_shards=config["vector_store_shards"],
+        layout=config["vector_store_shard_layout"],
+        text_store=config["text_store"],
+        **config["hnsw"]
     )
 
     # Load dataset (relative to script location)
-    script_dir = Path(__file__).parent
-    dataset_path = script_dir / "data" / "processed_reviews.csv"
+    dataset_path = Path(dataset_path) if dataset_path else default_dataset_path()
     if not dataset_path.exists():
         print(f"\nError: Dataset not found at {dataset_path}")
         sys.exit(1)
 
-    print(f"\nLoading dataset from: {dataset_path}")
-    df = pd.read_csv(dataset_path)
-    print(f"   Loaded {len(df)} reviews")
-
-    # Convert rows to documents
-    # Combine Title and Review Text for better context
-    documents = []
-    for idx, row in df.iterrows():
-        # Combine title and review text
-        title = str(row.get('Title', ''))
-        review = str(row.get('Review Text', ''))
-
-        # Create combined text
-        if title and review:
-            content = f"{title}. {review}"
-        elif review:
-            content = review
-        elif title:
-            content = title
-        else:
-            continue  # Skip empty rows
-
-        # Create document with metadata
-        doc = Document(
-            content=content,
-            metadata={
-                "source_file": "processed_reviews.csv",
-                "row_index": int(idx),
-                "age": str(row.get('Age', '')),
-                "age_category": str(row.get('Age Category', '')),
-                "division": str(row.get('Division Name', '')),
-                "department": str(row.get('Department Name', '')),
-                "class": str(row.get('Class Name', '')),
-            }
-        )
-        documents.append(doc)
+    provider = config["embedding_provider"]
+    model_name = config["embedding_model"] if provider == "openai" else f"{provider} provider"
+    checkpoint = open_checkpoint(
+        config, dataset_path, resume, batch_size=batch_size, deduplication=dedup_threshold
+    )
+    deduplicator = open_deduplicator(checkpoint, dedup_threshold)
+    print(f"\nStreaming dataset from: {dataset_path} (batches of {batch_size:,} rows)")
+    print(f"Generating embeddings using {model_name}")
+
+    totals = {"rows": 0, "documents": 0, "chunks": 0, "chars": 0}
+    embedding_dimensions = None
+    sample_chunks = []
+    memory = MemoryAccountant()
 
-    print(f"   Created {len(documents)} documents")
+    # The local provider is fitted once, on a sample of the whole dataset
+    try:
+        fit_embedding_model(embedding_service, dataset_path, batch_size, chunking_service)
+    except Exception as e:
+        print(f"\nError fitting the embedding model: {e}")
+        sys.exit(1)
 
-    # Chunk all documents
-    print(f"\nChunking documents...")
-    all_chunks = []
-    for doc in documents:
-        chunks = chunking_service.process_document(doc)
-        all_chunks.extend(chunks)
+    for offset, records in read_record_batches(dataset_path, REVIEW_COLUMNS, batch_size):
+        unit = f"rows-{offset}"
+        status = checkpoint.status(unit)
+        if status == STATUS_STORED:
+            _add_stats(totals, checkpoint.units[unit])
+            continue
 
-    print(f"   Created {len(all_chunks)} chunks")
-    print(f"   Average chunk size: {sum(len(c.text) for c in all_chunks) / len(all_chunks):.1f} characters")
+        try:
+            if status == STATUS_EMBEDDED:
+                # Embedded by the failed run: store without re-embedding
+                all_chunks = checkpoint.load_embedded(unit)
+                stats = checkpoint.units[unit]
+            else:
+                # Convert rows to documents and chunk them
+                rows = [(offset + i, record) for i, record in enumerate(records)]
+                batch_documents, all_chunks = rows_to_chunks(rows, dataset_path.name, chunking_service)
+                if deduplicator:
+                    all_chunks = deduplicator.deduplicate(all_chunks)
 
-    # Generate embeddings
-    print(f"\nGenerating embeddings using {embedding_model}...")
-    chunk_texts = [chunk.text for chunk in all_chunks]
+                # Generate embeddings
+                chunk_texts = [chunk.text for chunk in all_chunks]
+                embeddings = await embedding_service.embed_batch(chunk_texts) if chunk_texts else []
 
-    try:
-        embeddings = await embedding_service.embed_batch(chunk_texts)
-        print(f"   Generated {len(embeddings)} embeddings")
-        print(f"   Embedding dimensions: {len(embeddings[0])}")
+                # Assign embeddings to chunks
+                for chunk, embedding in zip(all_chunks, embeddings):
+                    chunk.embedding = embedding
 
-        # Assign embeddings to chunks
-        for chunk, embedding in zip(all_chunks, embeddings):
-            chunk.embedding = embedding
+                # Persist before storing, so paid-for embeddings survive a failed store
+                stats = {
+                    "rows": len(records),
+                    "documents": batch_documents,
+                    "chunks": len(all_chunks),
+                    "chars": sum(len(text) for text in chunk_texts),
+                }
+                checkpoint.save_embedded(unit, all_chunks, stats)
+                # Saved after the batch, so it never covers chunks a crash could lose
+                if deduplicator:
+                    checkpoint.save_deduplicator(deduplicator)
+            track_batch(memory, all_chunks, deduplicator)
 
-    except Exception as e:
-        print(f"\nError generating embeddings: {e}")
+        except Exception as e:
+            print(f"\nError generating embeddings: {e}")
+            print("Re-run with --resume to continue from the last checkpoint")
+            sys.exit(1)
+
+        # Store in vector database (re-adding an already stored chunk id is a no-op)
+        try:
+            await vector_store.add_chunks(all_chunks)
+            await store_duplicate_sources(vector_store, deduplicator)
+            checkpoint.mark_stored(unit)
+
+        except Exception as e:
+            print(f"\nError storing chunks: {e}")
+            print("Re-run with --resume to continue from the last checkpoint")
+            sys.exit(1)
+
+        _add_stats(totals, stats)
+        if all_chunks:
+            embedding_dimensions = len(all_chunks[0].embedding)
+            sample_chunks = sample_chunks or all_chunks[:3]
+        print(f"   Rows {offset:,}-{offset + len(records) - 1:,}: "
+              f"{stats['documents']} documents, {len(all_chunks)} chunks stored")
+
+    if not totals["chunks"]:
+        print("\nError: No text found in dataset")
         sys.exit(1)
+    checkpoint.complete()
+    print_duplicates(deduplicator)
 
-    # Store in vector database
-    print(f"\nStoring chunks in ChromaDB...")
+    print(f"\n   Loaded {totals['rows']} reviews")
+    print(f"   Created {totals['documents']} documents")
+    print(f"   Created {totals['chunks']} chunks")
+    print(f"   Average chunk size: {totals['chars'] / totals['chunks']:.1f} characters")
+    if embedding_dimensions:
+        print(f"   Embedding dimensions: {embedding_dimensions}")
+    print(f"   Successfully stored {vector_store.count()} chunks")
+
+    print_sample_chunks(sample_chunks)
+    print_memory_report(memory, vector_store)
+    print_footer(config)
+
+
+async def ingest_dataset_sharded(
+    dataset_path: Optional[Path] = None,
+    batch_size: int = 10_000,
+    workers: int = 2,
+    shard_size: int = 5_000,
+    sharding: str = "range",
+    resume: bool = False,
+    dedup_threshold: Optional[float] = None
+):
+    """
+    Sharded ingestion: workers chunk and embed, the main process stores.
+
+    See ShardedIngestion. The RPM/TPM limits are divided evenly between
+    the workers.
+    """
+    config = load_config()
+    if config["embedding_provider"] == "openai" and not config["openai_api_key"]:
+        print("\nError: OPENAI_API_KEY not found in .env file")
+        sys.exit(1)
+
+    print_header(config)
+
+    dataset_path = Path(dataset_path) if dataset_path else default_dataset_path()
+    if not dataset_path.exists():
+        print(f"\nError: Dataset not found at {dataset_path}")
+        sys.exit(1)
+
+    vector_store = create_vector_store(
+        collection_name=config["chroma_collection"],
+        persist_directory=config["chroma_persist_dir"],
+        num_shards=config["vector_store_shards"],
+        layout=config["vector_store_shard_layout"],
+        text_store=config["text_store"],
+        **config["hnsw"]
+    )
+    # Shard contents depend on the shard size, mode and (for hash) bucket count
+    checkpoint = open_checkpoint(
+        config, dataset_path, resume,
+        shard_size=shard_size, sharding=sharding, buckets=workers if sharding == "hash" else 1,
+        deduplication=dedup_threshold
+    )
+    deduplicator = open_deduplicator(checkpoint, dedup_threshold)
+    chunking_service = create_chunking_service(config)
+    print(f"\nStreaming dataset from: {dataset_path} "
+          f"({sharding} shards of {shard_size:,} rows, {workers} workers)")
+
+    # Fit the local provider once, before workers load it from disk
     try:
-        await vector_store.add_chunks(all_chunks)
-        stored_count = vector_store.count()
-        print(f"   Successfully stored {stored_count} chunks")
+        fit_embedding_model(create_embedding_service(config), dataset_path, batch_size, chunking_service)
+    except Exception as e:
+        print(f"\nError fitting the embedding model: {e}")
+        sys.exit(1)
+
+    sample_chunks: List[Chunk] = []
+    memory = MemoryAccountant()
+
+    def on_shard(result: Dict[str, Any], chunks: List[Chunk]) -> None:
+        nonlocal sample_chunks
+        track_batch(memory, chunks, deduplicator)
+        sample_chunks = sample_chunks or chunks[:3]
+        print(f"   Shard {result['shard_id']}: {result['rows']:,} rows, "
+              f"{len(chunks):,} chunks stored")
 
+    ingestion = ShardedIngestion(
+        vector_store,
+        checkpoint,
+        embedding_service_factory=functools.partial(create_embedding_service, config),
+        chunking_service=chunking_service,
+        to_document=record_to_document,
+        source_file=dataset_path.name,
+        workers=workers,
+        deduplicator=deduplicator,
+        on_shard=on_shard
+    )
+    shards = iter_shards(
+        read_record_batches(dataset_path, REVIEW_COLUMNS, batch_size),
+        shard_size=shard_size,
+        sharding=sharding,
+        num_buckets=workers
+    )
+    try:
+        report = await ingestion.run(shards)
+    except EmbeddingError as e:
+        print(f"\nError generating embeddings: {e}")
+        print("Re-run with --resume to continue from the last checkpoint")
+        sys.exit(1)
     except Exception as e:
         print(f"\nError storing chunks: {e}")
+        print("Re-run with --resume to continue from the last checkpoint")
         sys.exit(1)
 
-    # Display sample chunks
-    print(f"\nSample Chunks:")
-    for i, chunk in enumerate(all_chunks[:3], 1):
-        print(f"\n   Chunk {i} (ID: {chunk.chunk_id[:8]}...):")
-        print(f"   Text: {chunk.text[:100]}...")
-        print(f"   Metadata: Age={chunk.metadata.get('age_category', 'N/A')}, "
-              f"Dept={chunk.metadata.get('department', 'N/A')}")
+    results, skipped = report["results"], report["skipped"]
+    num_chunks = sum(result["num_chunks"] for result in results) + skipped["chunks"]
+    if not num_chunks:
+        print("\nError: No text found in dataset")
+        sys.exit(1)
+    checkpoint.complete()
+    print_duplicates(deduplicator)
 
-    print("\n" + "=" * 60)
-    print("INGESTION COMPLETED SUCCESSFULLY!")
-    print("=" * 60)
-    print(f"\nEmbeddings are stored in: {chroma_persist_dir}")
-    print("You can now start the API server and query the system.")
-    print("\nNext steps:")
-    print("  1. Start backend: uvicorn main:app --reload")
-    print("  2. Start frontend: cd ../frontend && npm run dev")
-    print("  3. Open browser: http://localhost:5173")
+    total_chars = sum(result["chars"] for result in results) + skipped["chars"]
+    print(f"\n   Loaded {sum(result['rows'] for result in results) + skipped['rows']} reviews")
+    print(f"   Created {sum(result['documents'] for result in results) + skipped['documents']} documents")
+    print(f"   Created {num_chunks} chunks")
+    print(f"   Average chunk size: {total_chars / num_chunks:.1f} characters")
+    print(f"   Successfully stored {vector_store.count()} chunks")
+    if skipped["rows"]:
+        print(f"   Skipped {skipped['rows']:,} rows stored by the previous run")
+
+    print_shard_summary(results, report["wall_seconds"])
+    print_sample_chunks(sample_chunks)
+    print_memory_report(memory, vector_store, report["worker_peaks"])
+    print_footer(config)
+
+
+def main():
+    """Parse arguments and run ingestion."""
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Ingest the processed reviews dataset")
+    parser.add_argument("--input", type=Path,
+                        help="Dataset file (.csv, .jsonl, optionally .gz; .parquet or .arrow); "
+                             "default: data/processed_reviews.{arrow,parquet,csv}")
+    parser.add_argument("--batch-size", type=int, default=10_000,
+                        help="Rows read, embedded and stored per batch")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes for chunking and embedding (1 = single process)")
+    parser.add_argument("--shard-size", type=int, default=5_000,
+                        help="Rows per shard when --workers > 1")
+    parser.add_argument("--sharding", choices=SHARDING_MODES, default="range",
+                        help="Split rows into contiguous ranges or content-hash buckets")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue a failed run with the same input and settings "
+                             "instead of starting over")
+    parser.add_argument("--dedup", action="store_true",
+                        default=os.getenv("DEDUPLICATION_ENABLED", "false").lower() == "true",
+                        help="Collapse exact and near-duplicate chunks before embedding")
+    parser.add_argument("--dedup-threshold", type=float,
+                        default=float(os.getenv("DEDUPLICATION_THRESHOLD", "0.8")),
+                        help="Minimum estimated Jaccard similarity for a near duplicate")
+    parser.add_argument("--tracemalloc", type=int, default=0, metavar="N",
+                        help="List the N top allocation sites of the main process (slow)")
+    args = parser.parse_args()
+    dedup_threshold = args.dedup_threshold if args.dedup else None
+
+    if args.workers > 1:
+        run = ingest_dataset_sharded(
+            args.input,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            shard_size=args.shard_size,
+            sharding=args.sharding,
+            resume=args.resume,
+            dedup_threshold=dedup_threshold
+        )
+    else:
+        run = ingest_dataset(
+            args.input, args.batch_size, resume=args.resume, dedup_threshold=dedup_threshold
+        )
+
+    if not args.tracemalloc:
+        asyncio.run(run)
+        return
+    with trace_allocations(args.tracemalloc) as allocations:
+        asyncio.run(run)
+    print_allocations(allocations)
 
 
 if __name__ == "__main__":
-    asyncio.run(ingest_dataset())
+    main()
@@ -1,20 +1,41 @@
 """FastAPI application entry point."""
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.core.config import get_settings
 from app.core.constants import API_TITLE, API_VERSION
-from app.api.routes import ingestion, retrieval
+from app.core.exceptions import OverloadedError, RAGException
+from app.api.dependencies import get_query_log, get_retrieval_service
+from app.api.routes import metrics, retrieval
 
 # Initialize settings
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm the cache with the hottest logged queries; flush the query log on shutdown."""
+    if settings.query_log_enabled and settings.semantic_cache_enabled:
+        try:
+            await get_retrieval_service().prewarm(settings.query_prewarm_top_n)
+        except RAGException:
+            pass  # serve with a cold cache rather than not at all
+    yield
+    query_log = get_query_log()
+    if query_log is not None:
+        await query_log.flush()
+
+
 # Create FastAPI app
 app = FastAPI(
     title=API_TITLE,
     version=API_VERSION,
-    description="RAG Retrieval System"
+    description="RAG Retrieval System",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -26,9 +47,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Include routers
-app.include_router(ingestion.router, tags=["ingestion"])
+# Include routers (read-only workers serve queries only and never import
+# the write routes, so chromadb and pandas stay unloaded)
 app.include_router(retrieval.router, tags=["retrieval"])
+app.include_router(metrics.router, tags=["metrics"])
+if settings.serving_mode == "readwrite":
+    from app.api.routes import documents, ingestion, snapshots
+
+    app.include_router(ingestion.router, tags=["ingestion"])
+    app.include_router(documents.router, tags=["documents"])
+    app.include_router(snapshots.router, tags=["snapshots"])
+
+
+@app.exception_handler(OverloadedError)
+async def overloaded_handler(request: Request, exc: OverloadedError) -> JSONResponse:
+    """Shed requests get 503 with a Retry-After hint."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
 
 
 @app.get("/")
@@ -43,9 +81,12 @@ async def root():
 
 if __name__ == "__main__":
     import uvicorn
+    # Chroma has a single writer; only read-only snapshot serving scales out
+    readonly = settings.serving_mode == "readonly"
     uvicorn.run(
         "main:app",
         host=settings.api_host,
         port=settings.api_port,
-        reload=True
+        reload=not readonly,
+        workers=settings.api_workers if readonly else 1
     )
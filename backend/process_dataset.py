@@ -5,11 +5,32 @@ This script:
 1. Removes specified columns (Clothing ID, Recommended IND, Rating)
 2. Filters rows where Review Text > 100 chars and Title is not null
 3. Categorizes age into groups (Youth, Early Adult, Mid Adult, Late Adult, Senior)
+4. Randomly samples rows
+
+With --streaming the raw file is read in chunks, so the full dataset never
+has to be in memory. The default "exact" sampling reproduces the in-memory
+output for the same seed and sample size; "reservoir" sampling needs a
+single pass and O(sample size) memory but selects a different sample.
+
+The output format follows the file extension: .csv, .parquet or .arrow
+(uncompressed Arrow IPC, memory-mappable by ingest_reviews.py).
 """
 
+import argparse
+import numpy as np
 import pandas as pd
 import sys
 from pathlib import Path
+from typing import List, Dict, Iterator, Optional
+
+from app.utils.dataset_reader import write_dataset
+
+
+COLUMNS_TO_REMOVE = ['Clothing ID', 'Recommended IND', 'Rating']
+DEFAULT_SAMPLE_SIZE = 170
+DEFAULT_SEED = 42
+DEFAULT_CHUNKSIZE = 100_000
+OUTPUT_SUFFIXES = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
 
 
 def categorize_age(age):
@@ -30,77 +51,248 @@ def categorize_age(age):
         return None  # Ages outside the defined ranges
 
 
-def process_dataset(input_path, output_path):
+def categorize_ages(ages: pd.Series) -> pd.Series:
+    """Vectorized categorize_age for a whole column."""
+    conditions = [
+        ages < 30,
+        (ages >= 30) & (ages <= 44),
+        (ages >= 45) & (ages <= 59),
+        (ages >= 60) & (ages <= 74),
+        (ages >= 75) & (ages <= 90),
+    ]
+    choices = ["Youth", "Early Adult", "Mid Adult", "Late Adult", "Senior"]
+    return pd.Series(
+        np.select(conditions, choices, default=None),
+        index=ages.index,
+        dtype=object
+    )
+
+
+def transform_reviews(df: pd.DataFrame, verbose: bool = False) -> pd.DataFrame:
+    """Drop unused columns, filter rows and add the age category."""
+    existing_columns_to_remove = [col for col in COLUMNS_TO_REMOVE if col in df.columns]
+
+    if existing_columns_to_remove:
+        df = df.drop(columns=existing_columns_to_remove)
+        if verbose:
+            print(f"\nRemoved columns: {existing_columns_to_remove}")
+    elif verbose:
+        print(f"\nWarning: None of the columns to remove were found in the dataset")
+
+    # Filter for non-null Title and short Review Text
+    mask = df['Title'].notna() & (df['Review Text'].str.len() < 100)
+    df = df[mask].copy()
+
+    df['Age Category'] = categorize_ages(df['Age'])
+    return df
+
+
+def count_characters(df: pd.DataFrame) -> int:
+    """Total characters across all cells, as rendered as strings."""
+    return int(sum(df[col].astype(str).str.len().sum() for col in df.columns))
+
+
+def process_dataset(input_path, output_path, sample_size=DEFAULT_SAMPLE_SIZE, seed=DEFAULT_SEED):
     """Process the dataset according to specifications."""
-    
+
     print(f"Loading dataset from: {input_path}")
     df = pd.read_csv(input_path)
-    
+
     print(f"Original dataset shape: {df.shape}")
     print(f"Columns: {df.columns.tolist()}")
-    
-    # Step 1: Remove specified columns
-    columns_to_remove = ['Clothing ID', 'Recommended IND', 'Rating']
-    existing_columns_to_remove = [col for col in columns_to_remove if col in df.columns]
-    
-    if existing_columns_to_remove:
-        df = df.drop(columns=existing_columns_to_remove)
-        print(f"\nRemoved columns: {existing_columns_to_remove}")
-    else:
-        print(f"\nWarning: None of the columns to remove were found in the dataset")
-    
-    # Step 2: Filter rows
-    # Filter for Review Text > 100 characters and non-null Title
-    
-    df = df[df['Title'].notna()]  # Remove null Review Text first
-    df = df[df['Review Text'].str.len() < 100]
-        
-    df['Age Category'] = df['Age'].apply(categorize_age)
-    
-    # Step 3: Randomly sample 150 rows
-    if len(df) >= 150:
-        df = df.sample(n=170, random_state=42)
-        print(f"\nRandomly sampled 150 rows")
+
+    # Steps 1-3: Remove columns, filter rows, categorize age
+    df = transform_reviews(df, verbose=True)
+
+    # Step 4: Randomly sample rows
+    if len(df) >= sample_size:
+        df = df.sample(n=sample_size, random_state=seed)
+        print(f"\nRandomly sampled {sample_size} rows")
     else:
         print(f"\nWarning: Only {len(df)} rows available, using all")
-    
-    # Calculate total characters
-    total_chars = 0
-    for col in df.columns:
-        total_chars += df[col].astype(str).str.len().sum()
-    
-    print(f"Total characters in dataset: {total_chars:,}")
-    
+
+    print(f"Total characters in dataset: {count_characters(df):,}")
+
     # Save processed dataset
-    df.to_csv(output_path, index=False)
+    write_dataset(df, output_path)
     print(f"\nProcessed dataset saved to: {output_path}")
-    
+
     return df
 
 
-def main():
-    """Main function to run the processing script."""
-    
-    # Allow command-line arguments or use script directory defaults
-    if len(sys.argv) > 1:
-        input_path = sys.argv[1]
+def _read_chunks(input_path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    """Read the raw file in chunks; text columns are always parsed as strings."""
+    return pd.read_csv(
+        input_path,
+        chunksize=chunksize,
+        dtype={'Title': str, 'Review Text': str}
+    )
+
+
+def _common_dtypes(chunk_dtypes: List[pd.Series]) -> Dict[str, np.dtype]:
+    """Dtypes a single full read would have inferred, from per-chunk dtypes."""
+    def common(dtypes: List[np.dtype]) -> np.dtype:
+        if all(dtype == dtypes[0] for dtype in dtypes):
+            return dtypes[0]
+        if all(np.issubdtype(dtype, np.number) for dtype in dtypes):
+            return np.result_type(*dtypes)  # e.g. int64 + float64 (NaNs) -> float64
+        return np.dtype(object)
+
+    return {
+        col: common([dtypes[col] for dtypes in chunk_dtypes])
+        for col in chunk_dtypes[0].index
+    }
+
+
+def _exact_sample(input_path: str, chunksize: int, sample_size: int, seed: int) -> pd.DataFrame:
+    """
+    Two-pass sample identical to DataFrame.sample on the filtered rows.
+
+    DataFrame.sample(n, random_state=seed) takes the first n positions of
+    RandomState(seed).permutation(N). Pass 1 counts the N filtered rows,
+    pass 2 keeps rows at the chosen positions, ordered as in the
+    permutation. Memory is O(N) integers plus O(n) rows.
+    """
+    num_rows = 0
+    chunk_dtypes = []
+    for chunk in _read_chunks(input_path, chunksize):
+        filtered = transform_reviews(chunk)
+        chunk_dtypes.append(filtered.dtypes)
+        num_rows += len(filtered)
+
+    if num_rows >= sample_size:
+        positions = np.random.RandomState(seed).permutation(num_rows)[:sample_size]
+        print(f"\nRandomly sampled {sample_size} rows")
     else:
-        # Default: look in backend/data/ directory
-        script_dir = Path(__file__).parent
-        input_path = str(script_dir / "data" / "Womens Clothing E-Commerce Reviews.csv")
-    
-    if len(sys.argv) > 2:
-        output_path = sys.argv[2]
+        positions = np.arange(num_rows)
+        print(f"\nWarning: Only {num_rows} rows available, using all")
+
+    # rank[position] = output order of that filtered row, or -1 if not sampled
+    rank = np.full(num_rows, -1, dtype=np.int64)
+    rank[positions] = np.arange(len(positions))
+
+    selected = []
+    offset = 0
+    for chunk in _read_chunks(input_path, chunksize):
+        filtered = transform_reviews(chunk)
+        chunk_rank = rank[offset:offset + len(filtered)]
+        keep = chunk_rank >= 0
+        if keep.any():
+            selected.append(filtered[keep].assign(_rank=chunk_rank[keep]))
+        offset += len(filtered)
+
+    if not selected:
+        return pd.DataFrame(columns=chunk_dtypes[0].index) if chunk_dtypes else pd.DataFrame()
+
+    df = pd.concat(selected).sort_values('_rank', kind='stable').drop(columns='_rank')
+    return df.astype(_common_dtypes(chunk_dtypes))
+
+
+def _reservoir_sample(input_path: str, chunksize: int, sample_size: int, seed: int) -> pd.DataFrame:
+    """
+    Single-pass reservoir sample (Algorithm R) of the filtered rows.
+
+    Replacement indices are drawn per chunk in one vectorized call; only
+    the few rows that enter the reservoir are touched individually.
+    """
+    rng = np.random.default_rng(seed)
+    reservoir: List[Optional[pd.DataFrame]] = [None] * sample_size
+    seen = 0
+    chunk_dtypes = []
+
+    for chunk in _read_chunks(input_path, chunksize):
+        filtered = transform_reviews(chunk)
+        chunk_dtypes.append(filtered.dtypes)
+        if filtered.empty:
+            continue
+
+        positions = np.arange(seen, seen + len(filtered))
+        slots = np.where(
+            positions < sample_size,
+            positions,
+            rng.integers(0, positions + 1)
+        )
+        for row, slot in zip(np.flatnonzero(slots < sample_size), slots[slots < sample_size]):
+            reservoir[slot] = filtered.iloc[[row]]
+        seen += len(filtered)
+
+    if seen >= sample_size:
+        print(f"\nReservoir sampled {sample_size} rows")
     else:
-        # Default: save to backend/data/
-        script_dir = Path(__file__).parent
-        output_path = str(script_dir / "data" / "processed_reviews.csv")
-    
+        print(f"\nWarning: Only {seen} rows available, using all")
+
+    rows = [row for row in reservoir if row is not None]
+    if not rows:
+        return pd.DataFrame(columns=chunk_dtypes[0].index) if chunk_dtypes else pd.DataFrame()
+    return pd.concat(rows).astype(_common_dtypes(chunk_dtypes))
+
+
+def process_dataset_streaming(
+    input_path,
+    output_path,
+    sample_size=DEFAULT_SAMPLE_SIZE,
+    seed=DEFAULT_SEED,
+    chunksize=DEFAULT_CHUNKSIZE,
+    sampling="exact"
+):
+    """Process the dataset in chunks without loading it fully into memory."""
+
+    print(f"Streaming dataset from: {input_path} (chunks of {chunksize:,} rows, {sampling} sampling)")
+
+    if sampling == "exact":
+        df = _exact_sample(input_path, chunksize, sample_size, seed)
+    elif sampling == "reservoir":
+        df = _reservoir_sample(input_path, chunksize, sample_size, seed)
+    else:
+        raise ValueError(f"Unknown sampling mode: {sampling}")
+
+    print(f"Total characters in dataset: {count_characters(df):,}")
+
+    write_dataset(df, output_path)
+    print(f"\nProcessed dataset saved to: {output_path}")
+
+    return df
+
+
+def main():
+    """Main function to run the processing script."""
+
+    script_dir = Path(__file__).parent
+    parser = argparse.ArgumentParser(description="Process the clothing reviews dataset")
+    # Default: read from and save to backend/data/
+    parser.add_argument("input_path", nargs="?",
+                        default=str(script_dir / "data" / "Womens Clothing E-Commerce Reviews.csv"))
+    parser.add_argument("output_path", nargs="?",
+                        help="Output file; format follows the extension (default: data/processed_reviews.<format>)")
+    parser.add_argument("--format", choices=sorted(OUTPUT_SUFFIXES), default="csv",
+                        help="Format of the default output file")
+    parser.add_argument("--sample-size", type=int, default=DEFAULT_SAMPLE_SIZE)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--streaming", action="store_true",
+                        help="Read the raw file in chunks instead of all at once")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                        help="Rows per chunk in streaming mode")
+    parser.add_argument("--sampling", choices=["exact", "reservoir"], default="exact",
+                        help="Streaming sampler: exact (matches in-memory output) or reservoir (single pass)")
+    args = parser.parse_args()
+    if args.output_path is None:
+        args.output_path = str(script_dir / "data" / f"processed_reviews{OUTPUT_SUFFIXES[args.format]}")
+
     # Ensure output directory exists
-    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    
+    Path(args.output_path).parent.mkdir(parents=True, exist_ok=True)
+
     try:
-        process_dataset(input_path, output_path)
+        if args.streaming:
+            process_dataset_streaming(
+                args.input_path,
+                args.output_path,
+                sample_size=args.sample_size,
+                seed=args.seed,
+                chunksize=args.chunksize,
+                sampling=args.sampling
+            )
+        else:
+            process_dataset(args.input_path, args.output_path, args.sample_size, args.seed)
         print("\n✓ Processing completed successfully!")
     except Exception as e:
         print(f"\n✗ Error during processing: {e}")
@@ -0,0 +1,70 @@
+"""
+Change the number of vector store shards without re-embedding.
+
+    python reshard.py --shards 8
+
+Chunks whose shard changes are moved with their stored embeddings. Stop
+the API first, then set VECTOR_STORE_SHARDS to the new count in .env.
+"""
+
+import argparse
+import os
+import sys
+import time
+from dotenv import load_dotenv
+
+from app.core.exceptions import VectorStoreError
+from app.services.sharded_vector_store import ShardedVectorStore, create_shards, SHARD_LAYOUTS
+from app.services.vector_store import VectorStore
+
+
+def open_shards(collection_name: str, persist_directory: str, num_shards: int, layout: str):
+    """Shard stores for a shard count; a single shard is the plain collection."""
+    # New shards are built with the configured HNSW parameters
+    store_options = {
+        f"hnsw_{name}": int(os.environ[f"HNSW_{name.upper()}"])
+        for name in ("construction_ef", "search_ef", "m")
+        if os.getenv(f"HNSW_{name.upper()}")
+    }
+    store_options["text_store"] = os.getenv("CHUNK_TEXT_STORE_ENABLED", "false").lower() == "true"
+    if num_shards <= 1:
+        return [VectorStore(collection_name, persist_directory, **store_options)]
+    return create_shards(collection_name, persist_directory, num_shards, layout, **store_options)
+
+
+def main():
+    """Parse arguments and move chunks to the new shards."""
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Reshard the vector store")
+    parser.add_argument("--shards", type=int, required=True, help="New number of shards")
+    parser.add_argument("--from-shards", type=int, default=int(os.getenv("VECTOR_STORE_SHARDS", "1")),
+                        help="Current number of shards (default: VECTOR_STORE_SHARDS)")
+    parser.add_argument("--layout", choices=SHARD_LAYOUTS,
+                        default=os.getenv("VECTOR_STORE_SHARD_LAYOUT", "collections"))
+    args = parser.parse_args()
+
+    collection_name = os.getenv("CHROMA_COLLECTION_NAME", "rag_documents")
+    persist_directory = os.getenv("CHROMA_PERSIST_DIRECTORY", "./chroma_db")
+
+    store = ShardedVectorStore(
+        open_shards(collection_name, persist_directory, args.from_shards, args.layout),
+        name=collection_name
+    )
+    total = store.count()
+    print(f"Resharding {total:,} chunks: {args.from_shards} -> {args.shards} shards ({args.layout})")
+
+    started = time.perf_counter()
+    try:
+        moved = store.rebalance(open_shards(collection_name, persist_directory, args.shards, args.layout))
+    except VectorStoreError as e:
+        print(f"\nError: {e}")
+        sys.exit(1)
+
+    print(f"Moved {moved:,} chunks in {time.perf_counter() - started:.2f}s")
+    for index, shard in enumerate(store.shards):
+        print(f"   shard {index}: {shard.count():,} chunks")
+    print(f"\nSet VECTOR_STORE_SHARDS={args.shards} in .env before restarting the API.")
+
+
+if __name__ == "__main__":
+    main()
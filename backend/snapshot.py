@@ -0,0 +1,101 @@
+"""
+Export or import a binary snapshot of the vector index.
+
+    python snapshot.py export snapshots/reviews-2024-01-01
+    python snapshot.py import snapshots/reviews-2024-01-01 --replace
+    python snapshot.py verify snapshots/reviews-2024-01-01
+    python snapshot.py publish             # for SERVING_MODE=readonly workers
+
+A snapshot is a directory with a float32 embedding matrix, an Arrow file
+of ids, texts and metadata, and a manifest with checksums. Copying it to a
+new replica and importing it avoids re-embedding the dataset.
+
+`publish` exports into the snapshot root (SNAPSHOT_DIRECTORY) and
+atomically makes it the snapshot served by read-only workers.
+"""
+
+import argparse
+import os
+import sys
+import time
+from dotenv import load_dotenv
+
+from app.core.exceptions import SnapshotError
+from app.core.constants import SNAPSHOT_DIR
+from app.services.sharded_vector_store import create_vector_store
+from app.services.snapshot import export_snapshot, import_snapshot, publish_snapshot, verify_snapshot
+from app.services.vector_store import VectorStore
+
+
+def main():
+    """Parse arguments and run the snapshot command."""
+    parser = argparse.ArgumentParser(description="Snapshot the vector index")
+    parser.add_argument("command", choices=["export", "import", "verify", "publish"])
+    parser.add_argument("directory", nargs="?",
+                        help="Snapshot directory (publish: snapshot root, default SNAPSHOT_DIRECTORY)")
+    parser.add_argument("--collection", help="Collection name (default: CHROMA_COLLECTION_NAME)")
+    parser.add_argument("--replace", action="store_true",
+                        help="Import: clear the collection first")
+    parser.add_argument("--no-verify", action="store_true",
+                        help="Import: skip checksum verification")
+    parser.add_argument("--keep", type=int, default=3,
+                        help="Publish: published snapshots to retain")
+    args = parser.parse_args()
+
+    load_dotenv()
+    persist_directory = os.getenv("CHROMA_PERSIST_DIRECTORY", "./chroma_db")
+    text_store = os.getenv("CHUNK_TEXT_STORE_ENABLED", "false").lower() == "true"
+    if args.command != "publish" and not args.directory:
+        parser.error(f"{args.command} requires a snapshot directory")
+
+    started = time.perf_counter()
+    try:
+        if args.command == "publish":
+            # All shards are published as one snapshot
+            manifest = publish_snapshot(
+                create_vector_store(
+                    collection_name=args.collection or os.getenv("CHROMA_COLLECTION_NAME", "rag_documents"),
+                    persist_directory=persist_directory,
+                    num_shards=int(os.getenv("VECTOR_STORE_SHARDS", "1")),
+                    layout=os.getenv("VECTOR_STORE_SHARD_LAYOUT", "collections"),
+                    text_store=text_store
+                ),
+                args.directory or os.getenv("SNAPSHOT_DIRECTORY") or os.path.join(persist_directory, SNAPSHOT_DIR),
+                keep=args.keep
+            )
+            print(f"Published {manifest['count']:,} chunks in {time.perf_counter() - started:.2f}s: "
+                  f"{manifest['path']}")
+            return
+
+        if args.command == "verify":
+            verify_snapshot(args.directory)
+            print(f"Snapshot OK: {args.directory}")
+            return
+
+        vector_store = VectorStore(
+            collection_name=args.collection or os.getenv("CHROMA_COLLECTION_NAME", "rag_documents"),
+            persist_directory=persist_directory,
+            text_store=text_store
+        )
+        if args.command == "export":
+            manifest = export_snapshot(vector_store, args.directory)
+            action = "Exported"
+        else:
+            manifest = import_snapshot(
+                vector_store,
+                args.directory,
+                replace=args.replace,
+                verify=not args.no_verify
+            )
+            action = "Imported"
+
+    except SnapshotError as e:
+        print(f"\nError: {e}")
+        sys.exit(1)
+
+    print(f"{action} {manifest['count']:,} chunks ({manifest['dimensions']} dimensions) "
+          f"in {time.perf_counter() - started:.2f}s: {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,35 @@ backend_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(backend_dir))
 
 
+@pytest.fixture(autouse=True)
+def openai_api_key(monkeypatch):
+    """Set a dummy OpenAI key, so settings validate without the developer's shell."""
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+
+
+@pytest.fixture
+def make_chunks():
+    """Factory for chunks with random embeddings, `chunks_per_document` per document."""
+    import numpy as np
+    from app.models.domain import Chunk
+
+    def make(num_documents=10, dimensions=8, seed=0, chunks_per_document=2, source_file="reviews.csv"):
+        rng = np.random.default_rng(seed)
+        return [
+            Chunk(
+                text=f"Document {i} chunk {j}",
+                document_id=f"doc-{i}",
+                chunk_index=j,
+                embedding=rng.standard_normal(dimensions).tolist(),
+                metadata={"source_file": source_file}
+            )
+            for i in range(num_documents)
+            for j in range(chunks_per_document)
+        ]
+
+    return make
+
+
 @pytest.fixture
 def sample_document():
     """Create a sample document for testing."""
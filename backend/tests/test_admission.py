@@ -0,0 +1,147 @@
+"""Tests for admission control and load shedding."""
+
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.exceptions import OverloadedError
+from app.services.admission import AdmissionController, PRIORITY_INGEST, PRIORITY_QUERY
+
+
+@pytest.mark.asyncio
+async def test_admits_up_to_concurrency_then_queues():
+    """Test requests beyond the concurrency limit wait in the queue."""
+    controller = AdmissionController(max_concurrency=2, max_queue=4, queue_timeout=1.0)
+    await controller.acquire()
+    await controller.acquire()
+
+    waiter = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+    assert controller.stats()["queue_depth"] == 1
+    assert not waiter.done()
+
+    controller.release(seconds=0.1)
+    await waiter
+    assert controller.stats()["in_flight"] == 2
+    assert controller.stats()["classes"]["query"]["admitted"] == 3
+
+
+@pytest.mark.asyncio
+async def test_queries_are_served_before_ingestion():
+    """Test a queued query is admitted before an earlier queued ingest."""
+    controller = AdmissionController(max_concurrency=1, max_queue=4, queue_timeout=1.0)
+    await controller.acquire(PRIORITY_QUERY)
+    order = []
+
+    async def request(request_class, name):
+        async with controller.admit(request_class):
+            order.append(name)
+
+    tasks = [
+        asyncio.create_task(request(PRIORITY_INGEST, "ingest")),
+        asyncio.create_task(request(PRIORITY_QUERY, "query")),
+    ]
+    await asyncio.sleep(0)
+    controller.release(PRIORITY_QUERY)
+    await asyncio.gather(*tasks)
+
+    assert order == ["query", "ingest"]
+
+
+@pytest.mark.asyncio
+async def test_ingestion_slots_are_capped():
+    """Test the ingest class limit leaves slots for queries."""
+    controller = AdmissionController(
+        max_concurrency=4, max_queue=4, queue_timeout=0.05, class_limits={PRIORITY_INGEST: 1}
+    )
+    await controller.acquire(PRIORITY_INGEST)
+
+    with pytest.raises(OverloadedError):
+        await controller.acquire(PRIORITY_INGEST)
+    # Queries still get the remaining slots
+    await controller.acquire(PRIORITY_QUERY)
+    assert controller.stats()["classes"]["ingest"]["shed_timeout"] == 1
+
+
+@pytest.mark.asyncio
+async def test_full_queue_sheds_immediately_with_retry_after():
+    """Test a full queue rejects at once with a Retry-After estimate."""
+    controller = AdmissionController(max_concurrency=1, max_queue=0, queue_timeout=10.0)
+    await controller.acquire()
+    controller.service_time[PRIORITY_QUERY] = 2.5
+
+    with pytest.raises(OverloadedError) as error:
+        await controller.acquire()
+
+    assert error.value.retry_after == 3
+    assert controller.stats()["classes"]["query"]["shed_queue_full"] == 1
+
+
+@pytest.mark.asyncio
+async def test_query_evicts_newest_ingest_from_full_queue():
+    """Test a query arriving at a full queue sheds the newest queued ingest instead."""
+    controller = AdmissionController(max_concurrency=1, max_queue=2, queue_timeout=1.0)
+    await controller.acquire(PRIORITY_QUERY)
+    older = asyncio.create_task(controller.acquire(PRIORITY_INGEST))
+    newer = asyncio.create_task(controller.acquire(PRIORITY_INGEST))
+    await asyncio.sleep(0)
+
+    query = asyncio.create_task(controller.acquire(PRIORITY_QUERY))
+    with pytest.raises(OverloadedError):
+        await newer
+    assert controller.stats()["classes"]["ingest"]["shed_queue_full"] == 1
+
+    # Ingestion never evicts a query
+    with pytest.raises(OverloadedError):
+        await controller.acquire(PRIORITY_INGEST)
+
+    controller.release(PRIORITY_QUERY)
+    await query
+    controller.release(PRIORITY_QUERY)
+    await older
+    assert controller.stats()["classes"]["query"]["shed_queue_full"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_queue():
+    """Test a cancelled waiter is removed without taking a slot."""
+    controller = AdmissionController(max_concurrency=1, max_queue=4, queue_timeout=10.0)
+    await controller.acquire()
+    waiter = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert controller.stats()["queue_depth"] == 0
+
+    controller.release()
+    assert controller.stats()["in_flight"] == 0
+
+
+def test_query_endpoint_sheds_with_503():
+    """Test /query returns 503 with Retry-After when overloaded."""
+    from main import app
+    from app.api.dependencies import get_admission_controller, get_retrieval_service
+
+    controller = AdmissionController(max_concurrency=1, max_queue=0)
+    controller.active[PRIORITY_QUERY] = 1
+    service = Mock()
+    service.retrieve = AsyncMock(return_value=[])
+    app.dependency_overrides[get_admission_controller] = lambda: controller
+    app.dependency_overrides[get_retrieval_service] = lambda: service
+
+    client = TestClient(app)
+    response = client.post("/query", json={"query": "test"})
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    service.retrieve.assert_not_awaited()
+
+    metrics = client.get("/metrics").json()["admission"]
+    assert metrics["in_flight"] == 1
+    assert metrics["classes"]["query"]["shed_queue_full"] == 1
+
+    app.dependency_overrides = {}
@@ -107,3 +107,95 @@ def test_query_endpoint_returns_correct_structure(mock_retrieval_service):
     assert "document_id" in result
     
     app.dependency_overrides = {}
+
+
+def test_query_endpoint_server_timing_header(mock_retrieval_service):
+    """Test query response carries a Server-Timing header."""
+    from main import app
+    from app.api.dependencies import get_retrieval_service
+
+    app.dependency_overrides[get_retrieval_service] = lambda: mock_retrieval_service
+
+    client = TestClient(app)
+    response = client.post("/query", json={"query": "test"})
+
+    assert response.status_code == 200
+    assert "serialize;dur=" in response.headers["server-timing"]
+    assert response.json()["trace"] is None
+
+    app.dependency_overrides = {}
+
+
+def test_query_endpoint_debug_trace(mock_retrieval_service):
+    """Test debug flag returns the per-stage trace in the body."""
+    from main import app
+    from app.api.dependencies import get_retrieval_service
+
+    async def retrieve(query, trace=None, include_neighbors=False):
+        with trace.stage("embed"):
+            pass
+        trace.record("candidates_before_threshold", 3)
+        trace.record("candidates_after_threshold", 1)
+        return []
+
+    mock_retrieval_service.retrieve = retrieve
+    app.dependency_overrides[get_retrieval_service] = lambda: mock_retrieval_service
+
+    client = TestClient(app)
+    response = client.post("/query", json={"query": "test", "debug": True})
+
+    assert response.status_code == 200
+    trace = response.json()["trace"]
+    assert "embed" in trace["stages_ms"]
+    assert "serialize" in trace["stages_ms"]
+    assert response.headers["server-timing"].count("serialize;dur=") == 1
+    assert trace["candidates_before_threshold"] == 3
+    assert trace["candidates_after_threshold"] == 1
+    assert "embed;dur=" in response.headers["server-timing"]
+
+    app.dependency_overrides = {}
+
+
+def test_ingest_endpoint_rejects_unsupported_files(mock_retrieval_service):
+    """Test ingest endpoint rejects files it cannot stream."""
+    from main import app
+    from app.api.dependencies import get_retrieval_service
+
+    app.dependency_overrides[get_retrieval_service] = lambda: mock_retrieval_service
+    client = TestClient(app)
+
+    response = client.post("/ingest", files={"file": ("export.xlsx", b"data")})
+
+    assert response.status_code == 400
+    assert ".jsonl.gz" in response.json()["detail"]
+    app.dependency_overrides = {}
+
+
+def test_ingest_endpoint_passes_column_mapping(mock_retrieval_service):
+    """Test ingest endpoint keeps the compressed suffix and maps columns."""
+    from main import app
+    from app.api.dependencies import get_retrieval_service
+    from app.core.exceptions import DatasetError
+
+    seen = {}
+
+    async def ingest(path, trace=None, column_mapping=None):
+        seen["suffix"] = path.rsplit(".", 2)[-2:]
+        seen["mapping"] = column_mapping
+        raise DatasetError("Text columns not found in dataset: body")
+
+    mock_retrieval_service.ingest_dataset = ingest
+    app.dependency_overrides[get_retrieval_service] = lambda: mock_retrieval_service
+    client = TestClient(app)
+
+    response = client.post(
+        "/ingest?text_columns=title,body&metadata_columns=rating",
+        files={"file": ("export.jsonl.gz", b"\x1f\x8b")}
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Text columns not found in dataset: body"
+    assert seen["suffix"] == ["jsonl", "gz"]
+    assert seen["mapping"].text == ["title", "body"]
+    assert seen["mapping"].metadata == ["rating"]
+    app.dependency_overrides = {}
@@ -0,0 +1,123 @@
+"""Tests for offline benchmark helpers."""
+
+import pytest
+from benchmarks.common import percentiles
+from benchmarks.fakes import FakeEmbeddingService
+
+
+class TestFakeEmbeddingService:
+    """Test the deterministic fake embedder."""
+
+    @pytest.mark.asyncio
+    async def test_embeddings_are_deterministic(self):
+        """Test the same text always yields the same vector."""
+        service = FakeEmbeddingService(dimensions=64)
+
+        first = await service.embed_text("Love this dress")
+        second = await FakeEmbeddingService(dimensions=64).embed_text("Love this dress")
+
+        assert first == second
+        assert len(first) == 64
+
+    @pytest.mark.asyncio
+    async def test_similar_texts_score_higher(self):
+        """Test texts sharing words are closer than unrelated texts."""
+        service = FakeEmbeddingService(dimensions=256)
+
+        query, similar, other = await service.embed_batch([
+            "poor quality pants",
+            "bad quality pants",
+            "gorgeous summer dress",
+        ])
+
+        def dot(a, b):
+            return sum(x * y for x, y in zip(a, b))
+
+        assert dot(query, similar) > dot(query, other)
+
+
+def test_percentiles():
+    """Test latency summary."""
+    summary = percentiles([float(i) for i in range(1, 101)])
+
+    assert summary["p50"] == pytest.approx(50.5)
+    assert summary["p99"] == pytest.approx(99.01)
+    assert percentiles([])["p95"] == 0.0
+
+
+def test_fake_embeddings_server_response_format():
+    """Test the fake server mimics the OpenAI embeddings response."""
+    from fastapi.testclient import TestClient
+    from benchmarks.fake_embeddings_server import create_app
+
+    client = TestClient(create_app(dimensions=8, latency_ms=0))
+    response = client.post("/v1/embeddings", json={"input": ["a b", "c"], "model": "m"})
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert [item["index"] for item in data] == [0, 1]
+    assert len(data[0]["embedding"]) == 8
+
+
+def test_fake_embeddings_server_failure_injection():
+    """Test injected failures are returned as server errors."""
+    from fastapi.testclient import TestClient
+    from benchmarks.fake_embeddings_server import create_app
+
+    client = TestClient(create_app(dimensions=8, latency_ms=0, failure_rate=1.0))
+    response = client.post("/v1/embeddings", json={"input": "text"})
+
+    assert response.status_code == 500
+
+
+def test_hnsw_eval_exact_ground_truth_and_recall():
+    """Test brute-force ground truth and recall on a small corpus."""
+    import numpy as np
+    from benchmarks.hnsw_eval import evaluate, exact_top_k, normalize, recall_at_k
+
+    rng = np.random.default_rng(0)
+    corpus = normalize(rng.standard_normal((500, 16)).astype(np.float32))
+    queries = corpus[:10]
+
+    exact = exact_top_k(corpus, queries, k=3)
+    assert exact[:, 0].tolist() == list(range(10))
+    assert recall_at_k(list(exact), exact) == 1.0
+    assert recall_at_k(list(exact[:, :1]), exact) == pytest.approx(1 / 3)
+
+    results = evaluate(corpus, rng.standard_normal((20, 16)).astype(np.float32),
+                       k=3, m_values=[8], construction_efs=[50], search_efs=[2, 10, 200])
+    assert [result["search_ef"] for result in results] == [2, 10, 200]
+    assert [result["effective_search_ef"] for result in results] == [3, 10, 200]
+    assert results[2]["recall_at_3"] >= results[1]["recall_at_3"]
+    assert results[2]["recall_at_3"] > 0.9
+
+
+def test_chunking_sweep_agreement_and_pareto_front():
+    """Test agreement against the reference and the cost/agreement front."""
+    from benchmarks.chunking_sweep import agreement, pareto_front
+
+    assert agreement([["a", "b"], ["c"]], [["a", "x"], ["c"]]) == pytest.approx(0.75)
+    results = [
+        {"projected_cost": 1.0, "agreement": 1.0},
+        {"projected_cost": 0.5, "agreement": 0.9},
+        {"projected_cost": 0.6, "agreement": 0.8},
+    ]
+    assert pareto_front(results) == [True, True, False]
+
+
+@pytest.mark.asyncio
+async def test_chunking_sweep_on_synthetic_corpus():
+    """Test a small sweep reports cost, size and agreement per configuration."""
+    from benchmarks.chunking_sweep import sample_queries, sweep, synthetic_documents
+
+    documents = synthetic_documents(60, seed=1)
+    results = await sweep(
+        documents, sample_queries(documents, 10, seed=1), FakeEmbeddingService(dimensions=32),
+        grid=[(100, 0), (250, 50)], reference=(250, 50), top_k=3, corpus_documents=600
+    )
+
+    small, reference = results
+    assert reference["reference"] and reference["agreement"] == pytest.approx(1.0)
+    assert small["chunks"] > reference["chunks"]
+    assert small["projected_cost"] == pytest.approx(small["cost"] * 10)
+    assert small["vector_bytes"] == small["chunks"] * 32 * 4
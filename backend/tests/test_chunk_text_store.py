@@ -0,0 +1,112 @@
+"""Tests for the compressed chunk text store and lazy result hydration."""
+
+from unittest.mock import patch
+
+import pytest
+
+from app.services.chunk_text_store import ChunkTextStore
+from app.services.sharded_vector_store import ShardedVectorStore, create_shards
+from app.services.vector_store import VectorStore
+from app.utils.timing import RequestTrace
+
+
+def test_text_store_round_trip(tmp_path):
+    """Test texts and metadata can be stored, merged and deleted."""
+    store = ChunkTextStore(str(tmp_path / "texts.sqlite3"))
+    store.put([("a", "first text", {"document_id": "d1"}), ("b", "second", {"document_id": "d2"})])
+
+    assert store.get_many(["a", "b", "missing"]) == {
+        "a": ("first text", {"document_id": "d1"}),
+        "b": ("second", {"document_id": "d2"}),
+    }
+
+    store.merge_metadata({"a": {"tag": 1}, "missing": {"tag": 2}})
+    assert store.get_many(["a"])["a"][1] == {"document_id": "d1", "tag": 1}
+
+    store.delete(["b"])
+    assert store.count() == 1
+    store.clear()
+    assert store.count() == 0
+
+
+@pytest.mark.asyncio
+async def test_index_holds_no_texts_and_search_hydrates_them(tmp_path, make_chunks):
+    """Test the index stores no texts and search results are hydrated."""
+    chunks = make_chunks()
+    store = VectorStore("text_store", str(tmp_path), text_store=True)
+    await store.add_chunks(chunks)
+
+    stored = store.collection.get(include=["documents", "metadatas"])
+    assert stored["documents"] == [None] * len(chunks)
+    assert stored["metadatas"][0]["document_id"]
+    assert store.text_store.count() == len(chunks)
+
+    trace = RequestTrace()
+    results = await store.search(chunks[3].embedding, top_k=5, threshold=-1.0, trace=trace)
+
+    assert results[0][0].chunk_id == chunks[3].chunk_id
+    assert results[0][0].text == chunks[3].text
+    assert results[0][0].document_id == chunks[3].document_id
+    assert "hydrate" in trace.stages
+
+
+@pytest.mark.asyncio
+async def test_only_results_above_threshold_are_hydrated(tmp_path, make_chunks):
+    """Test texts are fetched only for results above the threshold."""
+    chunks = make_chunks()
+    store = VectorStore("lazy_store", str(tmp_path), text_store=True)
+    await store.add_chunks(chunks)
+
+    with patch.object(store.text_store, "get_many", wraps=store.text_store.get_many) as get_many:
+        results = await store.search(chunks[0].embedding, top_k=10, threshold=0.99)
+
+    assert [chunk.chunk_id for chunk, _ in results] == [chunks[0].chunk_id]
+    get_many.assert_called_once_with([chunks[0].chunk_id])
+
+
+@pytest.mark.asyncio
+async def test_rows_stored_before_enabling_are_read_from_the_index(tmp_path, make_chunks):
+    """Test rows added before the text store keep their texts in the index."""
+    chunks = make_chunks()
+    await VectorStore("legacy_store", str(tmp_path)).add_chunks(chunks[:10])
+
+    store = VectorStore("legacy_store", str(tmp_path), text_store=True)
+    await store.add_chunks(chunks[10:])
+
+    found = store.fetch_chunks([chunks[0].chunk_id, chunks[15].chunk_id])
+    assert found[chunks[0].chunk_id].text == chunks[0].text
+    assert found[chunks[15].chunk_id].text == chunks[15].text
+
+    # Reopened without the option, the collection keeps its text store
+    assert VectorStore("legacy_store", str(tmp_path)).text_store is not None
+
+
+@pytest.mark.asyncio
+async def test_delete_and_compaction_keep_text_store_in_sync(tmp_path, make_chunks):
+    """Test deletes and compaction are applied to the text store too."""
+    chunks = make_chunks()
+    store = VectorStore("sync_store", str(tmp_path), text_store=True)
+    await store.add_chunks(chunks)
+
+    assert await store.delete(document_ids=["doc-1"]) == 2
+    assert store.text_store.count() == len(chunks) - 2
+    await store.compact()
+
+    results = await store.search(chunks[6].embedding, top_k=1, threshold=-1.0)
+    assert results[0][0].text == chunks[6].text
+    assert store.collection.get(include=["documents"])["documents"][0] is None
+
+
+@pytest.mark.asyncio
+async def test_sharded_search_hydrates_from_each_shard(tmp_path, make_chunks):
+    """Test sharded search hydrates results from every shard's text store."""
+    chunks = make_chunks()
+    store = ShardedVectorStore(create_shards("sharded_text", str(tmp_path), 3, text_store=True))
+    await store.add_chunks(chunks)
+
+    results = await store.search(chunks[7].embedding, top_k=20, threshold=-1.0)
+
+    assert len(results) == len(chunks)
+    assert results[0][0].chunk_id == chunks[7].chunk_id
+    texts = {chunk.chunk_id: chunk.text for chunk in chunks}
+    assert all(chunk.text == texts[chunk.chunk_id] for chunk, _ in results)
@@ -47,6 +47,15 @@ class TestChunkingService:
         # Should have multiple chunks with overlap
         assert len(chunks) >= 2
 
+    def test_zero_overlap_starts_fresh_chunks(self):
+        """Test that without overlap no text is repeated across chunks."""
+        service = ChunkingService(chunk_size=30, chunk_overlap=0)
+        text = "This is a sentence. Another sentence here. And one more."
+
+        chunks = service.chunk_text(text)
+
+        assert chunks == ["This is a sentence.", "Another sentence here.", "And one more."]
+
     def test_process_document(self):
         """Test processing a full document into chunks."""
         service = ChunkingService(chunk_size=100, chunk_overlap=20)
@@ -76,6 +85,7 @@ class TestChunkingService:
         chunk = chunks[0]
         assert chunk.metadata["source_file"] == "test.csv"
         assert chunk.metadata["chunk_size"] == len("Test content here.")
+        assert chunk.metadata["row_index"] == 5
         assert chunk.chunk_index == 0
 
     def test_sentence_boundary_splitting(self):
@@ -0,0 +1,109 @@
+"""Tests for the batched dataset readers."""
+
+import gzip
+import math
+
+import pandas as pd
+import pytest
+
+from app.core.exceptions import DatasetError
+from app.utils.dataset_reader import (
+    ColumnMapping,
+    dataset_format,
+    is_supported_dataset,
+    read_record_batches,
+    write_dataset,
+)
+
+
+@pytest.fixture
+def reviews():
+    return pd.DataFrame({
+        "Title": ["Great", None, "Nice", "Ok", "Bad"],
+        "Review Text": ["Fits well", "Too small", None, "Fine", "Tore"],
+        "Age": [25, 40, 61, 33, 78],
+        "Unused": [1, 2, 3, 4, 5],
+    })
+
+
+def test_dataset_format():
+    """Test formats are detected from file extensions, including gzip."""
+    assert dataset_format("data/reviews.csv") == "csv"
+    assert dataset_format("data/reviews.parquet") == "parquet"
+    assert dataset_format("data/reviews.ARROW") == "arrow"
+    assert dataset_format("data/reviews.feather") == "arrow"
+    assert dataset_format("data/reviews.v2.jsonl") == "jsonl"
+    assert dataset_format("data/reviews.csv.gz") == "csv"
+    assert dataset_format("data/reviews.ndjson.GZ") == "jsonl"
+    assert is_supported_dataset("export.jsonl.gz")
+    assert not is_supported_dataset("export.parquet.gz")
+    assert not is_supported_dataset("export.xlsx")
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".csv.gz", ".jsonl", ".jsonl.gz", ".parquet", ".arrow"])
+def test_round_trip_projects_columns(tmp_path, reviews, suffix):
+    """Test every format reads back in batches with only the requested columns."""
+    if suffix != ".csv":
+        pytest.importorskip("pyarrow")
+    path = tmp_path / f"reviews{suffix}"
+    write_dataset(reviews, str(path))
+
+    batches = list(read_record_batches(path, ["Title", "Review Text", "Age", "Missing"], batch_size=2))
+
+    assert [offset for offset, _ in batches] == [0, 2, 4]
+    records = [record for _, batch in batches for record in batch]
+    assert len(records) == 5
+    assert set(records[0]) == {"Title", "Review Text", "Age"}
+    assert records[1]["Title"] is None
+    assert records[2]["Review Text"] is None
+    assert [record["Age"] for record in records] == [25, 40, 61, 33, 78]
+
+
+def test_malformed_jsonl_reports_line(tmp_path):
+    """Test a malformed JSON line is reported with its line number."""
+    path = tmp_path / "reviews.jsonl.gz"
+    with gzip.open(path, "wt") as f:
+        f.write('{"text": "Fits well"}\n\n{"text": "Too small"\n')
+
+    with pytest.raises(DatasetError, match="Line 3"):
+        list(read_record_batches(path))
+
+
+def test_corrupt_gzip_is_a_dataset_error(tmp_path):
+    """Test an invalid gzip file raises DatasetError."""
+    path = tmp_path / "reviews.csv.gz"
+    path.write_bytes(b"text\nnot gzip")
+
+    with pytest.raises(DatasetError):
+        list(read_record_batches(path))
+
+
+def test_column_mapping_joins_text_and_keeps_metadata():
+    """Test text columns are joined and scalar metadata columns kept."""
+    mapping = ColumnMapping(text=["Title", "Review Text"], metadata=["Age", "Tags", "Rating"])
+    record = {"Title": "Great", "Review Text": "Fits well", "Age": 25, "Tags": ["a", "b"], "Rating": math.nan}
+
+    document = mapping.to_document(record, 7, "reviews.jsonl")
+
+    assert mapping.columns == ["Title", "Review Text", "Age", "Tags", "Rating"]
+    assert document.content == "Great. Fits well"
+    assert document.metadata == {"source_file": "reviews.jsonl", "row_index": 7, "Age": 25, "Tags": "['a', 'b']"}
+    assert mapping.to_document({"Title": None, "Review Text": ""}, 8, "reviews.jsonl") is None
+
+
+def test_default_mapping_uses_text_column_or_first_column():
+    """Test the default mapping falls back to the first column."""
+    mapping = ColumnMapping()
+
+    assert mapping.columns is None
+    assert mapping.to_document({"id": 1, "text": "Fits well"}, 0, "a.csv").content == "Fits well"
+    assert mapping.to_document({"review": "Too small", "id": 2}, 1, "a.csv").content == "Too small"
+
+
+def test_column_mapping_validation():
+    """Test missing text columns and reserved metadata columns are rejected."""
+    with pytest.raises(DatasetError, match="Text columns not found"):
+        ColumnMapping(text=["body"]).validate([{"text": "Fits well"}])
+    with pytest.raises(DatasetError, match="Reserved metadata columns: row_index"):
+        ColumnMapping(text=["text"], metadata=["row_index"]).validate([{"text": "Fits well"}])
+    ColumnMapping(text=["title", "body"]).validate([{"body": "Fits well"}])
@@ -0,0 +1,188 @@
+"""Tests for near-duplicate chunk deduplication."""
+
+import io
+from unittest.mock import AsyncMock, Mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.models.domain import Chunk
+from app.services.chunking_service import ChunkingService
+from app.services.deduplication import ChunkDeduplicator, normalize_text, shingle_hashes
+from app.services.retrieval_service import RetrievalService
+from app.services.vector_store import VectorStore
+
+
+def _chunk(text, document_id):
+    return Chunk(text=text, document_id=document_id, metadata={"source_file": "reviews.csv"})
+
+
+def test_normalize_and_shingles_are_stable():
+    """Test normalization and shingle hashes are deterministic."""
+    assert normalize_text("Love this dress!!  Runs TRUE to size.") == "love this dress runs true to size"
+    assert np.array_equal(shingle_hashes("love this dress"), shingle_hashes("love this dress"))
+    assert len(shingle_hashes("ab")) == 1
+
+
+def test_exact_and_near_duplicates_are_collapsed():
+    """Test duplicates are merged into the first chunk's metadata."""
+    deduplicator = ChunkDeduplicator(threshold=0.8)
+    chunks = [
+        _chunk("Love this dress! Runs true to size.", "doc-1"),
+        _chunk("love this dress - runs true to size", "doc-2"),
+        _chunk("Love this dress! Runs true to size, really.", "doc-3"),
+        _chunk("The zipper broke after one wash and the seams unraveled.", "doc-4"),
+        _chunk("Love this dress! Runs true to size.", "doc-1"),
+    ]
+
+    kept = deduplicator.deduplicate(chunks)
+
+    assert [chunk.document_id for chunk in kept] == ["doc-1", "doc-4"]
+    assert kept[0].metadata["source_document_ids"] == "doc-1,doc-2,doc-3"
+    assert kept[0].metadata["duplicate_count"] == 4
+    assert kept[1].metadata["source_document_ids"] == "doc-4"
+    assert deduplicator.num_duplicates == 3
+    assert deduplicator.pending_updates() == []
+
+
+def test_threshold_controls_near_duplicates():
+    """Test the similarity threshold decides what counts as a duplicate."""
+    texts = ["Great top, fits well and the color is lovely.", "Great top, fits well and the colour is lovely!"]
+    strict = ChunkDeduplicator(threshold=0.99)
+    loose = ChunkDeduplicator(threshold=0.6)
+
+    assert len(strict.deduplicate([_chunk(text, str(i)) for i, text in enumerate(texts)])) == 2
+    assert len(loose.deduplicate([_chunk(text, str(i)) for i, text in enumerate(texts)])) == 1
+
+
+def test_duplicates_of_earlier_batches_become_updates():
+    """Test duplicates of stored chunks produce metadata updates."""
+    deduplicator = ChunkDeduplicator()
+    first = deduplicator.deduplicate([_chunk("Runs small, size up.", "doc-1")])
+    assert deduplicator.deduplicate([_chunk("Runs small - size up!", "doc-2")]) == []
+
+    updates = deduplicator.pending_updates()
+    assert len(updates) == 1
+    assert updates[0].chunk_id == first[0].chunk_id
+    assert updates[0].document_id == "doc-1"
+    assert updates[0].metadata == {"source_document_ids": "doc-1,doc-2", "duplicate_count": 2}
+    assert deduplicator.pending_updates() == []
+
+
+def test_updates_for_unstored_chunks_stay_pending():
+    """Test skipped chunks keep their updates until they are stored."""
+    deduplicator = ChunkDeduplicator()
+    first = deduplicator.deduplicate([_chunk("Runs small, size up.", "doc-1")])
+    deduplicator.deduplicate([_chunk("Runs small - size up!", "doc-2")])
+
+    assert deduplicator.pending_updates(skip={first[0].chunk_id}) == []
+    assert [update.chunk_id for update in deduplicator.pending_updates()] == [first[0].chunk_id]
+
+
+def test_saved_index_keeps_deduplicating():
+    """Test a reloaded index collapses duplicates of chunks seen before saving."""
+    deduplicator = ChunkDeduplicator()
+    first = deduplicator.deduplicate([_chunk("Runs small, size up.", "doc-1"), _chunk("Runs small, size up.", "doc-2")])
+    saved = io.BytesIO()
+    deduplicator.save(saved)
+    saved.seek(0)
+
+    reloaded = ChunkDeduplicator()
+    reloaded.load(saved)
+
+    assert reloaded.deduplicate([_chunk("runs small - size up", "doc-3")]) == []
+    updates = reloaded.pending_updates()
+    assert updates[0].chunk_id == first[0].chunk_id
+    assert updates[0].metadata == {"source_document_ids": "doc-1,doc-2,doc-3", "duplicate_count": 3}
+    assert reloaded.num_duplicates == 2
+
+    saved.seek(0)
+    with pytest.raises(ValueError):
+        ChunkDeduplicator(seed=7).load(saved)
+
+
+def test_invalid_band_configuration():
+    """Test bands must divide the number of permutations."""
+    with pytest.raises(ValueError):
+        ChunkDeduplicator(num_perm=10, band_rows=4)
+
+
+@pytest.mark.asyncio
+async def test_update_metadata_merges_into_stored_chunks(tmp_path):
+    """Test metadata updates are merged into stored chunks."""
+    store = VectorStore("dedup_store", str(tmp_path))
+    deduplicator = ChunkDeduplicator()
+    chunks = deduplicator.deduplicate([_chunk("Runs small, size up.", "doc-1")])
+    for chunk in chunks:
+        chunk.embedding = [0.1, 0.2, 0.3]
+    await store.add_chunks(chunks)
+
+    deduplicator.deduplicate([_chunk("runs small. size up", "doc-2")])
+    await store.update_metadata(deduplicator.pending_updates())
+
+    metadata = store.collection.get(ids=[chunks[0].chunk_id])["metadatas"][0]
+    assert metadata["source_document_ids"] == "doc-1,doc-2"
+    assert metadata["duplicate_count"] == 2
+    assert metadata["source_file"] == "reviews.csv"
+
+
+@pytest.mark.asyncio
+async def test_deleting_canonical_document_keeps_shared_chunk(tmp_path):
+    """Test deleting the document a shared chunk is stored under hands it to the next source."""
+    store = VectorStore("dedup_delete", str(tmp_path), text_store=True)
+    deduplicator = ChunkDeduplicator()
+    chunks = deduplicator.deduplicate([
+        _chunk("Runs small, size up.", "doc-1"),
+        _chunk("Runs small, size up.", "doc-2"),
+        _chunk("Runs small, size up.", "doc-3"),
+        _chunk("The zipper broke after one wash.", "doc-1"),
+    ])
+    for chunk in chunks:
+        chunk.embedding = [0.1, 0.2, 0.3]
+    await store.add_chunks(chunks)
+
+    assert await store.delete(document_ids=["doc-1"]) == 2
+    assert store.count() == 1
+    shared = (await store.get_chunks([chunks[0].chunk_id]))[chunks[0].chunk_id]
+    assert shared.document_id == "doc-2"
+    assert shared.metadata["source_document_ids"] == "doc-2,doc-3"
+    assert shared.metadata["duplicate_count"] == 2
+
+    assert await store.delete(document_ids=["doc-2", "doc-3"]) == 1
+    assert store.count() == 0
+
+
+@pytest.mark.asyncio
+async def test_ingest_embeds_each_duplicate_once(tmp_path):
+    """Test ingestion embeds duplicate chunks only once."""
+    csv_path = tmp_path / "data.csv"
+    texts = ["Love this dress! Runs true to size."] * 3 + ["Too short for me.", "love this dress, runs true to size"]
+    pd.DataFrame({"text": texts}).to_csv(csv_path, index=False)
+
+    embedding_service = Mock()
+    embedding_service.embed_batch = AsyncMock(side_effect=lambda texts: [[0.1, 0.2]] * len(texts))
+    vector_store = Mock()
+    vector_store.name = "test_collection"
+    vector_store.add_chunks = AsyncMock()
+    vector_store.update_metadata = AsyncMock()
+
+    service = RetrievalService(
+        embedding_service=embedding_service,
+        chunking_service=ChunkingService(chunk_size=250, chunk_overlap=50),
+        vector_store=vector_store,
+        ingestion_batch_size=4,
+        deduplication_threshold=0.8
+    )
+    result = await service.ingest_dataset(str(csv_path))
+
+    embedded = [text for call in embedding_service.embed_batch.await_args_list for text in call.args[0]]
+    assert embedded == ["Love this dress! Runs true to size.", "Too short for me."]
+    assert result["num_documents"] == 5
+    assert result["num_chunks"] == 2
+    assert result["duplicate_chunks"] == 3
+    # The last row duplicates a chunk stored with the first batch
+    updates = vector_store.update_metadata.await_args.args[0]
+    assert updates[0].metadata["duplicate_count"] == 4
+    # Updates are written after each stored batch, not only at the end
+    assert vector_store.update_metadata.await_count == 2
@@ -0,0 +1,214 @@
+"""Tests for targeted delete/update and index compaction."""
+
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.exceptions import ModelNotFittedError, VectorStoreError
+from app.services.sharded_vector_store import ShardedVectorStore, create_shards
+from app.services.vector_store import VectorStore
+
+
+@pytest.mark.asyncio
+async def test_delete_by_document_id_and_where(tmp_path, make_chunks):
+    """Test deleting by document id and by metadata filter."""
+    store = VectorStore("delete_store", str(tmp_path))
+    await store.add_chunks(make_chunks())
+    version = store.version
+
+    assert await store.delete(document_ids=["doc-1", "doc-2"]) == 4
+    assert store.count() == 16
+    assert store.version == version + 1
+    assert not store.collection.get(where={"document_id": "doc-1"})["ids"]
+
+    assert await store.delete(where={"document_id": "missing"}) == 0
+    assert store.version == version + 1
+    assert await store.delete() == 0
+
+    assert await store.delete(where={"source_file": "reviews.csv"}) == 16
+    assert store.count() == 0
+    assert store.deleted_since_compaction == 20
+
+
+@pytest.mark.asyncio
+async def test_replace_document(tmp_path, make_chunks):
+    """Test replacing a document swaps its chunks."""
+    store = VectorStore("replace_store", str(tmp_path))
+    await store.add_chunks(make_chunks())
+
+    replacement = make_chunks(num_documents=1, seed=2)[:1]
+    replacement[0].text = "Fixed review"
+    assert await store.replace_document("doc-3", replacement) == 2
+
+    stored = store.collection.get(where={"document_id": "doc-3"})
+    assert stored["documents"] == ["Fixed review"]
+    assert store.count() == 19
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sharded", [False, True])
+async def test_failed_replace_keeps_old_chunks(tmp_path, sharded, make_chunks):
+    """Test old chunks are deleted only after the new ones are stored."""
+    store = (
+        ShardedVectorStore(create_shards("failed_replace", str(tmp_path), 3)) if sharded
+        else VectorStore("failed_replace", str(tmp_path))
+    )
+    chunks = make_chunks()
+    await store.add_chunks(chunks)
+    stores = store.shards if sharded else [store]
+
+    replacement = make_chunks(num_documents=1, seed=2)
+    with patch.object(VectorStore, "add_records", side_effect=RuntimeError("disk full")):
+        with pytest.raises(VectorStoreError):
+            await store.replace_document("doc-3", replacement)
+
+    assert store.count() == len(chunks)
+    assert sum(len(s.collection.get(where={"document_id": "doc-3"})["ids"]) for s in stores) == 2
+
+    # Replacing with chunks that are already stored keeps them
+    assert await store.replace_document("doc-3", replacement) == 2
+    assert await store.replace_document("doc-3", replacement) == 0
+    assert store.count() == len(chunks)
+
+
+@pytest.mark.asyncio
+async def test_compaction_keeps_live_rows(tmp_path, make_chunks):
+    """Test compaction rebuilds the collection with only live rows."""
+    store = VectorStore("compact_store", str(tmp_path), hnsw_search_ef=50)
+    chunks = make_chunks()
+    await store.add_chunks(chunks)
+    await store.delete(document_ids=[f"doc-{i}" for i in range(5)])
+
+    assert store.needs_compaction(0.2)
+    assert not store.needs_compaction(0.6)
+    version = store.version
+
+    await store.compact()
+
+    assert store.count() == 10
+    assert store.deleted_since_compaction == 0
+    assert not store.needs_compaction(0.2)
+    assert store.version == version + 1
+    assert store.collection.name == "compact_store"
+    assert store.collection.metadata["hnsw:search_ef"] == 50
+    results = await store.search(chunks[15].embedding, top_k=1, threshold=0.0)
+    assert results[0][0].chunk_id == chunks[15].chunk_id
+
+    # The compacted collection is what a new process opens
+    reopened = VectorStore("compact_store", str(tmp_path))
+    assert reopened.count() == 10
+    await reopened.add_chunks(make_chunks(num_documents=1, seed=3))
+    assert reopened.count() == 12
+
+
+def test_recover_interrupted_compaction(tmp_path):
+    """Test a compaction interrupted before the rename is recovered on open."""
+    store = VectorStore("recover_store", str(tmp_path))
+    # Crash after the old collection was dropped, before the rename
+    store.client.create_collection("recover_store_compacting")
+    store.client.delete_collection("recover_store")
+
+    reopened = VectorStore("recover_store", str(tmp_path))
+    names = {collection.name for collection in reopened.client.list_collections()}
+    assert names == {"recover_store"}
+
+
+@pytest.mark.asyncio
+async def test_sharded_delete_and_compact(tmp_path, make_chunks):
+    """Test deletes, replaces and compaction across shards."""
+    store = ShardedVectorStore(create_shards("sharded_delete", str(tmp_path), 3))
+    await store.add_chunks(make_chunks())
+
+    assert await store.delete(where={"chunk_index": 0}) == 10
+    assert store.count() == 10
+    assert store.needs_compaction(0.2)
+
+    replacement = make_chunks(num_documents=1, seed=4)
+    assert await store.replace_document("doc-7", replacement) == 1
+    assert store.count() == 11
+
+    await store.compact()
+    assert store.count() == 11
+    assert not store.needs_compaction(0.01)
+
+
+@pytest.fixture
+def mock_document_service():
+    service = Mock()
+    service.delete_documents = AsyncMock(return_value=3)
+    service.replace_document = AsyncMock(return_value={
+        "document_id": "doc-1", "num_chunks": 2, "deleted": 1, "cost": 0.0001
+    })
+    service.vector_store = Mock()
+    service.vector_store.needs_compaction = Mock(return_value=True)
+    service.vector_store.compact = AsyncMock()
+    return service
+
+
+@pytest.fixture
+def client(mock_document_service):
+    from main import app
+    from app.api.dependencies import get_retrieval_service
+
+    app.dependency_overrides[get_retrieval_service] = lambda: mock_document_service
+    yield TestClient(app)
+    app.dependency_overrides = {}
+
+
+def test_delete_document_endpoint_schedules_compaction(client, mock_document_service):
+    """Test deleting a document schedules compaction when needed."""
+    response = client.delete("/documents/doc-1")
+
+    assert response.status_code == 200
+    assert response.json() == {"deleted": 3, "compaction_scheduled": True}
+    mock_document_service.delete_documents.assert_awaited_once_with(document_ids=["doc-1"])
+    # Background task runs after the response
+    mock_document_service.vector_store.compact.assert_awaited_once()
+
+
+def test_delete_document_endpoint_not_found(client, mock_document_service):
+    """Test deleting an unknown document returns 404."""
+    mock_document_service.delete_documents.return_value = 0
+
+    assert client.delete("/documents/missing").status_code == 404
+
+
+def test_delete_by_filter_endpoint(client, mock_document_service):
+    """Test deleting by metadata filter."""
+    mock_document_service.vector_store.needs_compaction.return_value = False
+
+    response = client.post("/documents/delete", json={"where": {"source_file": "bad.csv"}})
+
+    assert response.status_code == 200
+    assert response.json() == {"deleted": 3, "compaction_scheduled": False}
+    mock_document_service.delete_documents.assert_awaited_once_with(where={"source_file": "bad.csv"})
+    mock_document_service.vector_store.compact.assert_not_awaited()
+
+
+def test_delete_by_filter_requires_predicate(client):
+    """Test an empty filter is rejected."""
+    assert client.post("/documents/delete", json={"where": {}}).status_code == 422
+
+
+def test_replace_document_endpoint(client, mock_document_service):
+    """Test replacing a document through the API."""
+    response = client.put("/documents/doc-1", json={"text": "Fixed review", "metadata": {"rating": 5}})
+
+    assert response.status_code == 200
+    assert response.json()["num_chunks"] == 2
+    mock_document_service.replace_document.assert_awaited_once_with("doc-1", "Fixed review", {"rating": 5})
+
+
+def test_replace_document_before_fitting_is_a_conflict(client, mock_document_service):
+    """Test replacing a document before the local model is fitted returns 409."""
+    mock_document_service.replace_document.side_effect = ModelNotFittedError("not fitted")
+
+    assert client.put("/documents/doc-1", json={"text": "Fixed review"}).status_code == 409
+
+
+def test_replace_document_rejects_reserved_metadata(client):
+    """Test reserved metadata keys cannot be set on replace."""
+    response = client.put("/documents/doc-1", json={"text": "x", "metadata": {"document_id": "other"}})
+
+    assert response.status_code == 400
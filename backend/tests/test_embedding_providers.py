@@ -0,0 +1,160 @@
+"""Tests for embedding providers."""
+
+import threading
+
+import pytest
+import numpy as np
+from unittest.mock import AsyncMock, patch
+from app.services.embedding_providers import LocalEmbeddingProvider, EmbeddingProvider
+from app.services.embedding_service import EmbeddingService
+from app.core.exceptions import EmbeddingError, ModelNotFittedError
+from app.utils.sampling import reservoir_sample
+
+
+CORPUS = [
+    "Poor quality pants, the seams ripped after one wash.",
+    "Bad quality fabric, very thin and see-through.",
+    "Gorgeous summer dress, perfect for a wedding.",
+    "Love this dress! Runs true to size.",
+    "Comfortable and stretchy shirt, great for work.",
+    "Cute and trendy top, soft material.",
+    "Disappointing purchase, returned it right away.",
+    "Worth the price, warm sweater for winter.",
+]
+
+
+class TestLocalEmbeddingProvider:
+    """Test the local CPU embedding provider."""
+
+    @pytest.fixture
+    def provider(self, tmp_path):
+        """Create a provider fitted on a small corpus."""
+        provider = LocalEmbeddingProvider(
+            model_path=str(tmp_path / "model.npz"),
+            dimensions=4,
+            num_features=256,
+            min_fit_texts=len(CORPUS)
+        )
+        provider.fit_if_needed(CORPUS)
+        return provider
+
+    @pytest.mark.asyncio
+    async def test_embeddings_are_normalized(self, provider):
+        """Test embeddings have the configured dimensions and unit length."""
+        embeddings = await provider.embed(["soft dress", "ripped pants"])
+
+        assert len(embeddings) == 2
+        assert len(embeddings[0]) == 4
+        assert np.linalg.norm(embeddings[0]) == pytest.approx(1.0, abs=1e-5)
+
+    @pytest.mark.asyncio
+    async def test_batches_are_embedded_off_the_event_loop(self, provider):
+        """Test batches are embedded in a worker thread and single queries inline."""
+        threads = []
+        embed_sync = provider.embed_sync
+
+        def record(texts):
+            threads.append(threading.get_ident())
+            return embed_sync(texts)
+
+        with patch.object(provider, "embed_sync", side_effect=record):
+            await provider.embed(["soft dress", "ripped pants"])
+            await provider.embed(["soft dress"])
+
+        assert threads[0] != threading.get_ident()
+        assert threads[1] == threading.get_ident()
+
+    @pytest.mark.asyncio
+    async def test_model_is_persisted(self, provider, tmp_path):
+        """Test a new provider loads the fitted model from disk."""
+        reloaded = LocalEmbeddingProvider(model_path=str(tmp_path / "model.npz"))
+
+        assert reloaded.is_fitted
+        assert reloaded.dimensions == 4
+        assert await reloaded.embed(["soft dress"]) == await provider.embed(["soft dress"])
+
+    def test_existing_model_is_not_refit(self, provider):
+        """Test fit_if_needed keeps an existing model."""
+        components = provider.components.copy()
+
+        provider.fit_if_needed(["Completely different corpus text."])
+
+        assert np.array_equal(provider.components, components)
+
+    def test_small_corpus_is_not_fitted(self, tmp_path):
+        """Test a corpus below the minimum size is refused instead of fixing the model."""
+        provider = LocalEmbeddingProvider(model_path=str(tmp_path / "model.npz"), dimensions=4, num_features=256)
+
+        with pytest.raises(ModelNotFittedError):
+            provider.fit_if_needed(iter(CORPUS))
+
+        assert provider.needs_fit
+        assert not (tmp_path / "model.npz").exists()
+
+    def test_fit_keeps_a_bounded_sample_of_a_stream(self, tmp_path):
+        """Test fitting reads a stream once and keeps at most the sample size."""
+        provider = LocalEmbeddingProvider(
+            model_path=str(tmp_path / "model.npz"), dimensions=4, num_features=256,
+            fit_sample_size=5, min_fit_texts=5
+        )
+
+        with patch.object(provider, "fit", wraps=provider.fit) as fit:
+            provider.fit_if_needed(text for _ in range(50) for text in CORPUS)
+
+        assert len(fit.call_args.args[0]) == 5
+        assert not provider.needs_fit
+
+    def test_reservoir_sample(self):
+        """Test reservoir samples are bounded, distinct and reproducible."""
+        sample = reservoir_sample(range(10_000), 100)
+
+        assert len(set(sample)) == 100
+        assert max(sample) > 5_000
+        assert sample == reservoir_sample(range(10_000), 100)
+        assert reservoir_sample(range(3), 100) == [0, 1, 2]
+
+    def test_fit_matches_exact_principal_components(self, provider):
+        """Test the randomized fit captures the variance of the exact top components."""
+        weighted = provider._features(CORPUS) * provider.idf
+        centered = weighted - weighted.mean(axis=0)
+        covariance = centered.T @ centered / len(CORPUS)
+        exact = np.sort(np.linalg.eigvalsh(covariance))[::-1][:4]
+
+        captured = np.diag(provider.components.T @ covariance @ provider.components)
+
+        assert np.allclose(provider.mean, weighted.mean(axis=0), atol=1e-5)
+        assert captured.sum() == pytest.approx(exact.sum(), rel=1e-3)
+
+    @pytest.mark.asyncio
+    async def test_unfitted_provider_raises(self, tmp_path):
+        """Test embedding before fitting raises EmbeddingError."""
+        provider = LocalEmbeddingProvider(model_path=str(tmp_path / "missing.npz"))
+
+        with pytest.raises(EmbeddingError):
+            await provider.embed(["text"])
+
+
+class TestEmbeddingService:
+    """Test EmbeddingService delegation to providers."""
+
+    @pytest.mark.asyncio
+    async def test_embed_text_uses_provider(self):
+        """Test single-text embedding delegates to the provider."""
+        provider = EmbeddingProvider()
+        provider.embed = AsyncMock(return_value=[[0.5, 0.5]])
+        service = EmbeddingService(provider=provider)
+
+        result = await service.embed_text("query")
+
+        assert result == [0.5, 0.5]
+        provider.embed.assert_called_once_with(["query"])
+
+    @pytest.mark.asyncio
+    async def test_provider_errors_are_wrapped(self):
+        """Test provider failures surface as EmbeddingError."""
+        provider = EmbeddingProvider()
+        provider.embed = AsyncMock(side_effect=RuntimeError("boom"))
+        service = EmbeddingService(provider=provider)
+
+        with pytest.raises(EmbeddingError):
+            await service.embed_batch(["a", "b"])
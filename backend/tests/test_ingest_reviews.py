@@ -0,0 +1,60 @@
+"""Tests for the ingestion script helpers."""
+
+import pytest
+
+from app.services.chunking_service import ChunkingService
+from ingest_reviews import iter_shards, record_to_document, rows_to_chunks
+
+
+def _batches(num_rows, batch_size):
+    records = [{"Title": f"Title {i}", "Review Text": f"Review {i % 7}"} for i in range(num_rows)]
+    for offset in range(0, num_rows, batch_size):
+        yield offset, records[offset:offset + batch_size]
+
+
+def test_record_to_document_skips_empty_rows():
+    """Test rows without text are skipped and metadata is filled in."""
+    assert record_to_document({"Title": None, "Review Text": float("nan")}, 0, "f.csv") is None
+
+    doc = record_to_document({"Title": "Nice", "Review Text": "Fits", "Age": 33}, 4, "f.csv")
+    assert doc.content == "Nice. Fits"
+    assert doc.metadata["row_index"] == 4
+    assert doc.metadata["age"] == "33"
+    assert doc.metadata["department"] == ""
+
+
+def test_range_shards_are_contiguous():
+    """Test range sharding splits rows into contiguous shards."""
+    shards = list(iter_shards(_batches(25, batch_size=7), shard_size=10))
+
+    assert [shard_id for shard_id, _ in shards] == [0, 1, 2]
+    assert [[row for row, _ in rows] for _, rows in shards] == [
+        list(range(0, 10)), list(range(10, 20)), list(range(20, 25))
+    ]
+
+
+def test_hash_shards_cover_all_rows_deterministically():
+    """Test hash sharding covers every row regardless of batch size."""
+    first = list(iter_shards(_batches(100, batch_size=30), shard_size=20, sharding="hash", num_buckets=3))
+    second = list(iter_shards(_batches(100, batch_size=50), shard_size=20, sharding="hash", num_buckets=3))
+
+    rows = sorted(row for _, shard in first for row, _ in shard)
+    assert rows == list(range(100))
+    assert all(len(shard) <= 20 for _, shard in first)
+    assert [[row for row, _ in shard] for _, shard in first] == \
+        [[row for row, _ in shard] for _, shard in second]
+
+
+def test_unknown_sharding_mode():
+    """Test an unknown sharding mode raises ValueError."""
+    with pytest.raises(ValueError):
+        list(iter_shards(_batches(5, 5), shard_size=2, sharding="random"))
+
+
+def test_rows_to_chunks_counts_documents():
+    """Test only non-empty rows are counted as documents."""
+    rows = [(0, {"Title": "A", "Review Text": "B"}), (1, {"Title": None, "Review Text": None})]
+    num_documents, chunks = rows_to_chunks(rows, "f.csv", ChunkingService(chunk_size=250, chunk_overlap=50))
+
+    assert num_documents == 1
+    assert [chunk.text for chunk in chunks] == ["A. B"]
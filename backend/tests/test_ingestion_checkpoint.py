@@ -0,0 +1,163 @@
+"""Tests for resumable ingestion checkpoints."""
+
+from unittest.mock import Mock, AsyncMock
+
+import pandas as pd
+import pytest
+
+from app.core.exceptions import VectorStoreError
+from app.services.chunking_service import ChunkingService
+from app.services.ingestion_checkpoint import (
+    IngestionCheckpoint,
+    STATUS_EMBEDDED,
+    STATUS_STORED,
+    file_sha256,
+    run_key,
+)
+from app.services.embedding_providers import EmbeddingProvider, LocalEmbeddingProvider
+from app.services.retrieval_service import RetrievalService
+
+
+def test_run_key_depends_on_file_and_params():
+    """Test the run key changes with the file or ingestion parameters."""
+    assert run_key("abc", chunk_size=250) == run_key("abc", chunk_size=250)
+    assert run_key("abc", chunk_size=250) != run_key("abc", chunk_size=500)
+    assert run_key("abc", chunk_size=250) != run_key("abd", chunk_size=250)
+
+
+def test_embedded_unit_survives_reopen(tmp_path, sample_chunks):
+    """Test embedded chunks are reloaded after reopening the checkpoint."""
+    for i, chunk in enumerate(sample_chunks):
+        chunk.embedding = [float(i), 0.5, -1.0]
+
+    checkpoint = IngestionCheckpoint(str(tmp_path), "run")
+    checkpoint.save_embedded("rows-0", sample_chunks, {"documents": 1, "chunks": 2})
+
+    reopened = IngestionCheckpoint(str(tmp_path), "run")
+    assert reopened.status("rows-0") == STATUS_EMBEDDED
+    loaded = reopened.load_embedded("rows-0")
+    assert [chunk.chunk_id for chunk in loaded] == [chunk.chunk_id for chunk in sample_chunks]
+    assert loaded[1].embedding == [1.0, 0.5, -1.0]
+    assert loaded[0].metadata == {"source": "test"}
+
+    reopened.mark_stored("rows-0")
+    assert IngestionCheckpoint(str(tmp_path), "run").status("rows-0") == STATUS_STORED
+    assert not (tmp_path / "run" / "rows-0.embeddings.npy").exists()
+    assert reopened.totals() == {"documents": 1, "chunks": 2}
+
+    reopened.complete()
+    assert not IngestionCheckpoint(str(tmp_path), "run").exists()
+
+
+@pytest.mark.asyncio
+async def test_ingest_resumes_without_reembedding(tmp_path):
+    """Test a failed ingestion resumes without re-embedding stored batches."""
+    csv_path = tmp_path / "data.csv"
+    pd.DataFrame({"text": [f"Review number {i}." for i in range(5)]}).to_csv(csv_path, index=False)
+
+    embedding_service = Mock()
+    embedding_service.provider = EmbeddingProvider()
+    embedding_service.embed_batch = AsyncMock(side_effect=lambda texts: [[0.1, 0.2]] * len(texts))
+    vector_store = Mock()
+    vector_store.name = "test_collection"
+    stored = []
+
+    async def add_chunks(chunks):
+        if len(stored) == 1 and not add_chunks.recovered:
+            raise VectorStoreError("network blip")
+        stored.append([chunk.chunk_id for chunk in chunks])
+    add_chunks.recovered = False
+    vector_store.add_chunks = add_chunks
+
+    service = RetrievalService(
+        embedding_service=embedding_service,
+        chunking_service=ChunkingService(chunk_size=250, chunk_overlap=50),
+        vector_store=vector_store,
+        ingestion_batch_size=2,
+        checkpoint_directory=str(tmp_path / "checkpoints")
+    )
+
+    with pytest.raises(VectorStoreError):
+        await service.ingest_dataset(str(csv_path))
+    assert embedding_service.embed_batch.await_count == 2
+
+    add_chunks.recovered = True
+    result = await service.ingest_dataset(str(csv_path))
+
+    # Only the last batch is embedded again; the failed one is stored from disk
+    assert embedding_service.embed_batch.await_count == 3
+    assert result["num_documents"] == 5
+    assert result["num_chunks"] == 5
+    assert result["resumed_batches"] == 2
+    assert [len(ids) for ids in stored] == [2, 2, 1]
+    assert not (tmp_path / "checkpoints" / run_key(
+        file_sha256(str(csv_path)),
+        batch_size=2, chunk_size=250, chunk_overlap=50, collection="test_collection",
+        deduplication=None
+    )).exists()
+
+
+@pytest.mark.asyncio
+async def test_changed_embedding_model_does_not_resume(tmp_path):
+    """Test a checkpoint is not reused after the embedding model changes."""
+    csv_path = tmp_path / "data.csv"
+    pd.DataFrame({"text": [f"Review number {i}." for i in range(4)]}).to_csv(csv_path, index=False)
+
+    embedding_service = Mock()
+    embedding_service.provider = LocalEmbeddingProvider(str(tmp_path / "model.npz"), dimensions=2)
+    embedding_service.embed_batch = AsyncMock(side_effect=lambda texts: [[0.1, 0.2]] * len(texts))
+    vector_store = Mock()
+    vector_store.name = "test_collection"
+    vector_store.add_chunks = AsyncMock(side_effect=[None, VectorStoreError("network blip")])
+    service = RetrievalService(
+        embedding_service=embedding_service,
+        chunking_service=ChunkingService(chunk_size=250, chunk_overlap=50),
+        vector_store=vector_store,
+        ingestion_batch_size=2,
+        checkpoint_directory=str(tmp_path / "checkpoints")
+    )
+    with pytest.raises(VectorStoreError):
+        await service.ingest_dataset(str(csv_path))
+
+    embedding_service.provider = LocalEmbeddingProvider(str(tmp_path / "model.npz"), dimensions=3)
+    embedding_service.embed_batch = AsyncMock(side_effect=lambda texts: [[0.1, 0.2, 0.3]] * len(texts))
+    vector_store.add_chunks = AsyncMock()
+    result = await service.ingest_dataset(str(csv_path))
+
+    assert embedding_service.embed_batch.await_count == 2
+    assert result["resumed_batches"] == 0
+
+
+@pytest.mark.asyncio
+async def test_resumed_ingest_keeps_deduplicating(tmp_path):
+    """Test a resumed ingestion collapses duplicates of batches stored before the failure."""
+    csv_path = tmp_path / "data.csv"
+    texts = ["Love this dress! Runs true to size.", "Too short for me.", "Zipper broke.", "Lovely color."]
+    pd.DataFrame({"text": texts + ["love this dress, runs true to size"]}).to_csv(csv_path, index=False)
+
+    embedding_service = Mock()
+    embedding_service.provider = EmbeddingProvider()
+    embedding_service.embed_batch = AsyncMock(side_effect=lambda texts: [[0.1, 0.2]] * len(texts))
+    vector_store = Mock()
+    vector_store.name = "test_collection"
+    vector_store.add_chunks = AsyncMock(side_effect=[None, VectorStoreError("network blip"), None, None])
+    vector_store.update_metadata = AsyncMock()
+    service = RetrievalService(
+        embedding_service=embedding_service,
+        chunking_service=ChunkingService(chunk_size=250, chunk_overlap=50),
+        vector_store=vector_store,
+        ingestion_batch_size=2,
+        deduplication_threshold=0.8,
+        checkpoint_directory=str(tmp_path / "checkpoints")
+    )
+    with pytest.raises(VectorStoreError):
+        await service.ingest_dataset(str(csv_path))
+
+    result = await service.ingest_dataset(str(csv_path))
+
+    # The last row duplicates a chunk stored before the failure
+    embedded = [text for call in embedding_service.embed_batch.await_args_list for text in call.args[0]]
+    assert embedded == texts
+    assert result["duplicate_chunks"] == 1
+    updates = vector_store.update_metadata.await_args.args[0]
+    assert updates[0].metadata["duplicate_count"] == 2
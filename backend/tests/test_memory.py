@@ -0,0 +1,145 @@
+"""Tests for memory accounting and the memory diagnostics endpoint."""
+
+import tracemalloc
+from unittest.mock import AsyncMock, Mock
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from app.models.domain import Chunk
+from app.services.chunking_service import ChunkingService
+from app.services.retrieval_service import RetrievalService
+from app.services.semantic_cache import SemanticCache
+from app.services.vector_store import VectorStore
+from app.utils.memory import MemoryAccountant, chunk_bytes, format_bytes, trace_allocations
+from app.utils.timing import RequestTrace
+
+
+def test_accountant_keeps_peaks_after_release():
+    """Test released components keep their peak size."""
+    memory = MemoryAccountant()
+    memory.set("ingest_chunks", 300)
+    memory.set("ingest_chunks", 100)
+    memory.release("ingest_chunks", "deduplication_index")
+
+    assert memory.snapshot() == {"ingest_chunks": {"bytes": 0, "peak_bytes": 300}}
+
+    memory.reset("ingest_chunks")
+    assert memory.snapshot() == {}
+
+
+def test_chunk_bytes_separates_embeddings():
+    """Test chunk sizes report embeddings separately."""
+    chunks = [Chunk(text="x" * 1000, document_id="doc-1"), Chunk(text="y", document_id="doc-2", embedding=[0.5] * 64)]
+
+    sizes = chunk_bytes(chunks)
+
+    assert sizes["objects"] > 1000
+    assert sizes["embeddings"] >= 64 * 8
+    assert chunk_bytes(chunks[:1])["embeddings"] == 0
+
+
+def test_trace_allocations_reports_top_sites():
+    """Test allocation tracing reports the largest allocation sites."""
+    with trace_allocations(top_n=3) as report:
+        held = [bytearray(100_000) for _ in range(10)]
+
+    assert report["peak_traced_bytes"] >= 1_000_000
+    assert len(report["top"]) <= 3
+    assert report["top"][0]["site"].startswith(__file__)
+    assert report["top"][0]["size_bytes"] >= 1_000_000
+    del held
+
+
+def test_overlapping_traces_keep_tracing_and_peaks():
+    """Test overlapping traced blocks neither stop tracing nor reset each other's peak."""
+    first = trace_allocations()
+    first_report = first.__enter__()
+    transient = bytearray(5_000_000)
+    del transient
+
+    second = trace_allocations()
+    second_report = second.__enter__()
+    # The first block exits before the second one
+    first.__exit__(None, None, None)
+    assert tracemalloc.is_tracing()
+    held = bytearray(2_000_000)
+    second.__exit__(None, None, None)
+
+    assert not tracemalloc.is_tracing()
+    assert first_report["peak_traced_bytes"] >= 5_000_000
+    assert second_report["peak_traced_bytes"] >= 2_000_000
+    assert second_report["top"][0]["size_bytes"] >= 2_000_000
+    del held
+
+
+def test_format_bytes():
+    """Test byte counts are formatted with binary units."""
+    assert format_bytes(512) == "512 B"
+    assert format_bytes(1536) == "1.5 KB"
+    assert format_bytes(3 * 1024 ** 3) == "3.0 GB"
+
+
+@pytest.mark.asyncio
+async def test_ingest_records_component_peaks_and_allocations(tmp_path):
+    """Test ingestion records component peaks and allocation sites."""
+    csv_path = tmp_path / "data.csv"
+    pd.DataFrame({"text": [f"Review number {i}, fits well." for i in range(10)] * 2}).to_csv(csv_path, index=False)
+
+    embedding_service = Mock()
+    embedding_service.embed_batch = AsyncMock(side_effect=lambda texts: [[0.1] * 32] * len(texts))
+    vector_store = Mock()
+    vector_store.name = "test_collection"
+    vector_store.add_chunks = AsyncMock()
+    vector_store.update_metadata = AsyncMock()
+    memory = MemoryAccountant()
+
+    service = RetrievalService(
+        embedding_service=embedding_service,
+        chunking_service=ChunkingService(chunk_size=250, chunk_overlap=50),
+        vector_store=vector_store,
+        ingestion_batch_size=5,
+        deduplication_threshold=0.8,
+        memory=memory,
+        tracemalloc_top_n=5
+    )
+    trace = RequestTrace()
+    await service.ingest_dataset(str(csv_path), trace=trace)
+
+    peaks = trace.counters["memory_peak_bytes"]
+    assert set(peaks) == {"ingest_documents", "ingest_chunks", "embedding_buffers", "deduplication_index"}
+    assert all(peak > 0 for peak in peaks.values())
+    # Nothing stays in flight after the run
+    assert all(sizes["bytes"] == 0 for sizes in memory.snapshot().values())
+    assert memory.allocations is trace.counters["allocations"]
+    assert 0 < len(memory.allocations["top"]) <= 5
+
+
+@pytest.mark.asyncio
+async def test_memory_endpoint_reports_components(tmp_path):
+    """Test /metrics/memory reports process, ingestion and index memory."""
+    from main import app
+    from app.api.dependencies import get_memory_accountant, get_semantic_cache, get_vector_store
+
+    store = VectorStore("memory_store", str(tmp_path))
+    await store.add_chunks([
+        Chunk(text=f"Chunk {i}", document_id=f"doc-{i}", embedding=[float(i), 1.0, 0.0, 0.5])
+        for i in range(4)
+    ])
+    memory = MemoryAccountant()
+    memory.set("ingest_chunks", 2048)
+    app.dependency_overrides[get_memory_accountant] = lambda: memory
+    app.dependency_overrides[get_semantic_cache] = lambda: SemanticCache()
+    app.dependency_overrides[get_vector_store] = lambda: store
+
+    report = TestClient(app).get("/metrics/memory").json()
+    app.dependency_overrides = {}
+
+    assert report["process"]["rss_bytes"] > 0
+    assert report["ingestion"]["ingest_chunks"] == {"bytes": 2048, "peak_bytes": 2048}
+    assert report["semantic_cache_bytes"] >= 0
+    assert report["vector_store"]["chunks"] == 4
+    assert report["vector_store"]["index_memory_bytes"] > 4 * 4 * 4
+    assert report["vector_store"]["disk_bytes"] > 0
+    assert report["allocations"] is None
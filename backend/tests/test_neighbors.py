@@ -0,0 +1,125 @@
+"""Tests for neighbor-chunk context expansion."""
+
+from unittest.mock import AsyncMock, Mock, patch
+
+import numpy as np
+import pytest
+
+from app.core.constants import METADATA_NEXT_CHUNK_ID, METADATA_PREV_CHUNK_ID
+from app.models.domain import Document
+from app.services.chunking_service import ChunkingService
+from app.services.retrieval_service import RetrievalService
+from app.services.semantic_cache import SemanticCache
+from app.services.sharded_vector_store import ShardedVectorStore, create_shards
+from app.services.vector_store import VectorStore
+
+
+SENTENCES = [f"Sentence number {i} describes how the dress fits and feels." for i in range(12)]
+
+
+def _document_chunks(document_id="doc-1", seed=0):
+    chunks = ChunkingService(chunk_size=120, chunk_overlap=0).process_document(
+        Document(content=" ".join(SENTENCES), document_id=document_id, metadata={"source_file": "reviews.csv"})
+    )
+    rng = np.random.default_rng(seed)
+    for chunk in chunks:
+        chunk.embedding = rng.standard_normal(8).tolist()
+    return chunks
+
+
+def _service(store, semantic_cache=None):
+    embedding_service = Mock()
+    embedding_service.embed_text = AsyncMock()
+    return RetrievalService(
+        embedding_service=embedding_service,
+        chunking_service=ChunkingService(),
+        vector_store=store,
+        top_k=1,
+        similarity_threshold=0.99,
+        semantic_cache=semantic_cache
+    )
+
+
+def test_chunks_link_to_their_neighbors():
+    """Test chunks store the ids of their previous and next chunks."""
+    chunks = _document_chunks()
+
+    assert len(chunks) > 3
+    assert METADATA_PREV_CHUNK_ID not in chunks[0].metadata
+    assert METADATA_NEXT_CHUNK_ID not in chunks[-1].metadata
+    for previous, following in zip(chunks, chunks[1:]):
+        assert previous.metadata[METADATA_NEXT_CHUNK_ID] == following.chunk_id
+        assert following.metadata[METADATA_PREV_CHUNK_ID] == previous.chunk_id
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("text_store", [False, True])
+async def test_results_include_neighbors_in_one_lookup(tmp_path, text_store):
+    """Test neighbors of all results are fetched in one lookup."""
+    chunks = _document_chunks() + _document_chunks("doc-2", seed=1)
+    store = VectorStore("neighbor_store", str(tmp_path), text_store=text_store)
+    await store.add_chunks(chunks)
+    service = _service(store)
+    service.embedding_service.embed_text.return_value = chunks[2].embedding
+
+    with patch.object(store, "get_chunks", wraps=store.get_chunks) as get_chunks:
+        results = await service.retrieve("fit", include_neighbors=True)
+
+    assert results[0].chunk_id == chunks[2].chunk_id
+    assert results[0].previous_chunk.chunk_id == chunks[1].chunk_id
+    assert results[0].previous_chunk.text == chunks[1].text
+    assert results[0].next_chunk.chunk_index == 3
+    get_chunks.assert_awaited_once_with([chunks[1].chunk_id, chunks[3].chunk_id])
+
+
+@pytest.mark.asyncio
+async def test_first_chunk_has_no_previous_neighbor(tmp_path):
+    """Test the first chunk of a document has no previous neighbor."""
+    chunks = _document_chunks()
+    store = ShardedVectorStore(create_shards("neighbor_shards", str(tmp_path), 3))
+    await store.add_chunks(chunks)
+    service = _service(store)
+    service.embedding_service.embed_text.return_value = chunks[0].embedding
+
+    results = await service.retrieve("fit", include_neighbors=True)
+
+    assert results[0].previous_chunk is None
+    assert results[0].next_chunk.chunk_id == chunks[1].chunk_id
+
+
+@pytest.mark.asyncio
+async def test_cached_results_are_not_expanded_in_place(tmp_path):
+    """Test expanding neighbors does not change cached results."""
+    chunks = _document_chunks()
+    store = VectorStore("cached_neighbors", str(tmp_path))
+    await store.add_chunks(chunks)
+    service = _service(store, SemanticCache())
+    service.embedding_service.embed_text.return_value = chunks[3].embedding
+
+    expanded = await service.retrieve("fit", include_neighbors=True)
+    plain = await service.retrieve("fit")
+
+    assert expanded[0].next_chunk.chunk_id == chunks[4].chunk_id
+    assert plain[0].next_chunk_id == chunks[4].chunk_id
+    assert plain[0].next_chunk is None
+
+
+@pytest.mark.asyncio
+async def test_snapshot_store_gets_chunks_by_id(tmp_path):
+    """Test the snapshot store serves neighbor chunks by id."""
+    pytest.importorskip("pyarrow")
+    from app.services.snapshot import publish_snapshot
+    from app.services.snapshot_vector_store import SnapshotVectorStore
+
+    chunks = _document_chunks()
+    store = VectorStore("snapshot_neighbors", str(tmp_path / "chroma"))
+    await store.add_chunks(chunks)
+    root = str(tmp_path / "snapshots")
+    publish_snapshot(store, root)
+    service = _service(SnapshotVectorStore(root, poll_interval=0.0))
+    service.embedding_service.embed_text.return_value = chunks[3].embedding
+
+    results = await service.retrieve("fit", include_neighbors=True)
+
+    assert results[0].previous_chunk.text == chunks[2].text
+    assert results[0].next_chunk.text == chunks[4].text
@@ -0,0 +1,72 @@
+"""Tests for dataset preprocessing."""
+
+import random
+import pandas as pd
+import pytest
+from process_dataset import (
+    categorize_age,
+    categorize_ages,
+    process_dataset,
+    process_dataset_streaming,
+)
+
+
+@pytest.fixture
+def raw_csv(tmp_path):
+    """Write a synthetic raw reviews file with nulls and mixed ages."""
+    rng = random.Random(0)
+    words = "good bad dress fit size love poor quality".split()
+    rows = []
+    for i in range(3000):
+        # NaN ages only appear late, so early chunks infer an int column
+        age = 33 if i < 1500 else rng.choice([None, 18, 29, 30, 44, 44.5, 45, 60, 75, 90, 95])
+        rows.append({
+            "Clothing ID": i,
+            "Age": age,
+            "Title": None if rng.random() < 0.1 else " ".join(rng.choices(words, k=2)),
+            "Review Text": None if rng.random() < 0.05 else " ".join(rng.choices(words, k=rng.randint(3, 30))),
+            "Rating": rng.randint(1, 5),
+            "Recommended IND": 1,
+            "Division Name": "General",
+        })
+    path = tmp_path / "raw.csv"
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return path
+
+
+def test_vectorized_age_categories_match_scalar():
+    """Test vectorized bucketing matches categorize_age, including edges."""
+    ages = pd.Series([None, 18, 29.9, 30, 44, 44.5, 45, 59, 60, 74, 75, 90, 91])
+
+    expected = ages.apply(categorize_age).tolist()
+
+    assert categorize_ages(ages).tolist() == expected
+
+
+def test_streaming_matches_in_memory(raw_csv, tmp_path):
+    """Test exact streaming output is identical to the in-memory output."""
+    in_memory = tmp_path / "in_memory.csv"
+    streamed = tmp_path / "streamed.csv"
+
+    process_dataset(raw_csv, in_memory, sample_size=170, seed=42)
+    process_dataset_streaming(raw_csv, streamed, sample_size=170, seed=42, chunksize=400)
+
+    assert streamed.read_text() == in_memory.read_text()
+
+
+def test_reservoir_sampling(raw_csv, tmp_path):
+    """Test reservoir sampling returns the requested number of filtered rows."""
+    output = tmp_path / "reservoir.csv"
+
+    df = process_dataset_streaming(raw_csv, output, sample_size=50, chunksize=400, sampling="reservoir")
+
+    assert len(df) == 50
+    assert df["Title"].notna().all()
+    assert (df["Review Text"].str.len() < 100).all()
+
+
+def test_small_dataset_uses_all_rows(raw_csv, tmp_path):
+    """Test sampling falls back to all rows when there are too few."""
+    df = process_dataset_streaming(raw_csv, tmp_path / "all.csv", sample_size=10_000, chunksize=400)
+
+    assert len(df) == len(process_dataset(raw_csv, tmp_path / "all_mem.csv", sample_size=10_000))
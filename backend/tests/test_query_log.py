@@ -0,0 +1,130 @@
+"""Tests for the query log and hot-query prewarming."""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, AsyncMock
+
+import pytest
+
+from app.models.domain import Chunk
+from app.services.query_log import QueryLog, normalize_query
+from app.services.retrieval_service import RetrievalService
+from app.services.semantic_cache import SemanticCache
+
+
+def test_normalize_query():
+    """Test queries are lowercased and whitespace collapsed."""
+    assert normalize_query("  Runs \t SMALL ") == "runs small"
+
+
+@pytest.mark.asyncio
+async def test_entries_are_written_asynchronously(tmp_path):
+    """Test entries are written by the background writer."""
+    log = QueryLog(str(tmp_path / "queries.jsonl"))
+    log.record("runs small", 12.5, ["c1", "c2"])
+    log.record("soft fabric", 3.0, [])
+    await log.flush()
+
+    lines = [json.loads(line) for line in open(log.path)]
+    assert [line["query"] for line in lines] == ["runs small", "soft fabric"]
+    assert lines[0]["latency_ms"] == 12.5
+    assert lines[0]["result_ids"] == ["c1", "c2"]
+    assert log.stats() == {"queued": 0, "written": 2, "dropped": 0}
+
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_entries(tmp_path):
+    """Test entries are dropped instead of blocking when the queue is full."""
+    log = QueryLog(str(tmp_path / "queries.jsonl"), max_queue=1)
+    log.record("a", 1.0, [])
+    log.record("b", 1.0, [])
+    await log.flush()
+
+    assert log.dropped == 1
+    assert log.written == 1
+
+
+@pytest.mark.asyncio
+async def test_top_queries_span_rotated_file(tmp_path):
+    """Test query counts include the rotated log file."""
+    log = QueryLog(str(tmp_path / "queries.jsonl"), max_bytes=3000)
+    for query in ["runs small"] * 30 + ["soft fabric"] * 20 + ["itchy"] * 5:
+        log.record(query, 1.0, [])
+        await log.flush()
+
+    assert (tmp_path / "queries.jsonl.1").exists()
+    assert log.top_queries(2) == ["runs small", "soft fabric"]
+
+
+def test_workers_sharing_a_file_rotate_once(tmp_path):
+    """Test concurrent writers sharing one file rotate it without losing entries."""
+    path = str(tmp_path / "queries.jsonl")
+    # One log per worker process, all appending to the same file
+    logs = [QueryLog(path, max_bytes=20_000) for _ in range(8)]
+    entry = {"ts": 0.0, "query": "runs small", "latency_ms": 1.0, "result_ids": ["chunk-1", "chunk-2"]}
+
+    def write(log):
+        for _ in range(50):
+            log._append([entry])
+
+    with ThreadPoolExecutor(max_workers=len(logs)) as pool:
+        list(pool.map(write, logs))
+
+    lines = [
+        line
+        for name in ("queries.jsonl.1", "queries.jsonl")
+        for line in (tmp_path / name).read_text().splitlines()
+    ]
+    assert len(lines) == 8 * 50
+    assert all(json.loads(line) == entry for line in lines)
+
+
+def _service(log):
+    embedding_service = Mock()
+    embedding_service.embed_text = AsyncMock(return_value=[0.1, 0.2, 0.3])
+    embedding_service.embed_batch = AsyncMock(side_effect=lambda texts: [[0.1, 0.2, 0.3]] * len(texts))
+    vector_store = Mock()
+    vector_store.version = 0
+    vector_store.search = AsyncMock(return_value=[
+        (Chunk(chunk_id="chunk1", text="Result", document_id="doc1", chunk_index=0), 0.8)
+    ])
+    return RetrievalService(
+        embedding_service=embedding_service,
+        chunking_service=Mock(),
+        vector_store=vector_store,
+        semantic_cache=SemanticCache(),
+        query_log=log
+    )
+
+
+@pytest.mark.asyncio
+async def test_retrieve_logs_normalized_query(tmp_path):
+    """Test retrieval logs the normalized query and result ids."""
+    log = QueryLog(str(tmp_path / "queries.jsonl"))
+    service = _service(log)
+
+    await service.retrieve("Runs  Small")
+    await log.flush()
+
+    entry = json.loads(open(log.path).readline())
+    assert entry["query"] == "runs small"
+    assert entry["result_ids"] == ["chunk1"]
+
+
+@pytest.mark.asyncio
+async def test_prewarmed_queries_skip_embedding(tmp_path):
+    """Test prewarmed queries are served without embedding or search."""
+    log = QueryLog(str(tmp_path / "queries.jsonl"))
+    for query in ["runs small", "runs small", "soft fabric"]:
+        log.record(query, 1.0, [])
+    await log.flush()
+    service = _service(log)
+
+    assert await service.prewarm(top_n=1) == 1
+    service.embedding_service.embed_batch.assert_awaited_once_with(["runs small"])
+
+    results = await service.retrieve("Runs small")
+
+    assert results[0].chunk_id == "chunk1"
+    service.embedding_service.embed_text.assert_not_called()
+    service.vector_store.search.assert_awaited_once()
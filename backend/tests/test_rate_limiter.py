@@ -0,0 +1,144 @@
+"""Tests for rate-limit-aware embedding scheduling."""
+
+import asyncio
+import time
+import pytest
+from app.services.embedding_providers import EmbeddingProvider
+from app.services.embedding_service import EmbeddingService
+from app.services.resilience import CircuitBreaker
+from app.services.rate_limiter import (
+    EmbeddingScheduler,
+    RateLimitInfo,
+    TokenBucket,
+    parse_duration,
+)
+
+
+class RateLimited(Exception):
+    """Stand-in for a 429 response."""
+
+
+class RateLimitedProvider(EmbeddingProvider):
+    """Provider that rejects the first N calls with a rate limit."""
+
+    def __init__(self, rejections: int, retry_after: float = 0.05):
+        self.rejections = rejections
+        self.retry_after = retry_after
+        self.batch_sizes = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def embed(self, texts):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if self.rejections > 0:
+                self.rejections -= 1
+                raise RateLimited()
+            self.batch_sizes.append(len(texts))
+            return [[float(len(text))] for text in texts]
+        finally:
+            self.in_flight -= 1
+
+    def is_transient(self, error):
+        return isinstance(error, RateLimited)
+
+    def rate_limit_info(self, error):
+        if isinstance(error, RateLimited):
+            return RateLimitInfo(retry_after=self.retry_after)
+        return None
+
+
+def test_parse_duration():
+    """Test OpenAI reset duration formats."""
+    assert parse_duration("1s") == 1.0
+    assert parse_duration("6m0s") == 360.0
+    assert parse_duration("20ms") == pytest.approx(0.02)
+    assert parse_duration("2") == 2.0
+    assert parse_duration(None) is None
+
+
+def test_rate_limit_info_from_headers():
+    """Test parsing x-ratelimit-* headers."""
+    info = RateLimitInfo.from_headers({
+        "x-ratelimit-remaining-requests": "59",
+        "x-ratelimit-remaining-tokens": "149000",
+        "x-ratelimit-reset-tokens": "400ms",
+    })
+
+    assert info.remaining_requests == 59
+    assert info.remaining_tokens == 149000
+    assert info.reset_tokens == pytest.approx(0.4)
+    assert info.retry_after is None
+
+
+def test_plan_respects_size_and_token_limits():
+    """Test batches are bounded by count and estimated tokens."""
+    scheduler = EmbeddingScheduler(max_batch_size=3, max_batch_tokens=1000)
+
+    batches = scheduler.plan(["a"] * 7)
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+
+    scheduler = EmbeddingScheduler(max_batch_size=100, max_batch_tokens=1000)
+    batches = scheduler.plan(["x" * 2000] * 3)
+    assert [len(batch) for batch in batches] == [1, 1, 1]
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_after_burst():
+    """Test the bucket blocks once its capacity is used up."""
+    bucket = TokenBucket(per_minute=600)  # 10 per second
+    await bucket.acquire(600)
+
+    start = time.monotonic()
+    await bucket.acquire(2)
+
+    assert time.monotonic() - start >= 0.15
+
+
+@pytest.mark.asyncio
+async def test_embed_batch_recovers_from_rate_limits():
+    """Test 429s are retried after the retry-after pause, preserving order."""
+    provider = RateLimitedProvider(rejections=2)
+    service = EmbeddingService(
+        provider=provider,
+        retry_base_delay=0.0,
+        scheduler=EmbeddingScheduler(max_batch_size=2, max_concurrency=4)
+    )
+    texts = ["a", "bb", "ccc", "dddd", "eeeee"]
+
+    embeddings = await service.embed_batch(texts)
+
+    assert embeddings == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+    assert sorted(provider.batch_sizes) == [1, 2, 2]
+    assert service.circuit_breaker.consecutive_failures == 0
+
+
+@pytest.mark.asyncio
+async def test_embed_batch_limits_concurrency():
+    """Test no more batches are in flight than allowed."""
+    provider = RateLimitedProvider(rejections=0)
+    service = EmbeddingService(
+        provider=provider,
+        scheduler=EmbeddingScheduler(max_batch_size=1, max_concurrency=3)
+    )
+
+    await service.embed_batch(["t"] * 10)
+
+    assert provider.max_in_flight == 3
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_trial_releases_half_open_breaker():
+    """Test a 429 on the half-open trial lets the retry through."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    service = EmbeddingService(
+        provider=RateLimitedProvider(rejections=1, retry_after=0.0),
+        retry_base_delay=0.0,
+        circuit_breaker=breaker
+    )
+
+    assert await service.embed_batch(["abc"]) == [[3.0]]
+    assert breaker.state == CircuitBreaker.CLOSED
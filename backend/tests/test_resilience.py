@@ -0,0 +1,223 @@
+"""Tests for embedding resilience: hedging, retries and circuit breaking."""
+
+import asyncio
+import pytest
+from app.core.exceptions import EmbeddingError, CircuitOpenError
+from app.services.embedding_providers import EmbeddingProvider
+from app.services.embedding_service import EmbeddingService
+from app.services.resilience import CircuitBreaker, HedgeBudget, LatencyTracker
+
+
+class TransientError(Exception):
+    """Stand-in for a retryable provider failure."""
+
+
+class ScriptedProvider(EmbeddingProvider):
+    """Provider whose calls follow a script of delays and failures."""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = 0
+
+    async def embed(self, texts):
+        step = self.script[min(self.calls, len(self.script) - 1)]
+        self.calls += 1
+        delay, fail = step
+        await asyncio.sleep(delay)
+        if fail:
+            raise TransientError("provider failure")
+        return [[float(self.calls)] for _ in texts]
+
+    def is_transient(self, error):
+        return isinstance(error, TransientError)
+
+
+class TestCircuitBreaker:
+    """Test circuit breaker state transitions."""
+
+    def test_opens_after_threshold(self):
+        """Test consecutive failures open the circuit."""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+
+        breaker.record_failure()
+        assert breaker.allow_request()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow_request()
+
+    def test_half_open_allows_single_trial(self):
+        """Test a single trial request after the reset timeout."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_hedge_budget_limits_hedges():
+    """Test hedges are capped to a fraction of requests."""
+    budget = HedgeBudget(ratio=0.5)
+
+    budget.earn()
+    assert not budget.try_spend()
+    budget.earn()
+    assert budget.try_spend()
+    assert not budget.try_spend()
+
+
+def test_latency_tracker_needs_min_samples():
+    """Test percentile is unavailable until enough samples exist."""
+    tracker = LatencyTracker(min_samples=3)
+    tracker.record(0.1)
+
+    assert tracker.percentile(0.95) is None
+    tracker.record(0.2)
+    tracker.record(0.3)
+    assert tracker.percentile(0.5) == pytest.approx(0.2)
+
+
+class TestEmbeddingServiceResilience:
+    """Test EmbeddingService hedging, retries and fallback."""
+
+    @pytest.mark.asyncio
+    async def test_slow_request_is_hedged(self):
+        """Test a hedged request wins when the primary is slow."""
+        provider = ScriptedProvider([(1.0, False), (0.0, False)])
+        service = EmbeddingService(provider=provider, hedge_percentile=0.5, hedge_budget_ratio=1.0)
+        for _ in range(20):
+            service.latency.record(0.01)
+
+        result = await asyncio.wait_for(service.embed_text("query"), timeout=0.5)
+
+        assert result == [2.0]
+        assert provider.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_transient_failures_are_retried(self):
+        """Test transient failures are retried before succeeding."""
+        provider = ScriptedProvider([(0.0, True), (0.0, False)])
+        service = EmbeddingService(provider=provider, max_retries=2, retry_base_delay=0.0)
+
+        result = await service.embed_batch(["a"])
+
+        assert result == [[2.0]]
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_fails_fast(self):
+        """Test an open circuit rejects calls without reaching the provider."""
+        provider = ScriptedProvider([(0.0, True)])
+        service = EmbeddingService(
+            provider=provider,
+            max_retries=0,
+            circuit_breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        )
+
+        with pytest.raises(EmbeddingError):
+            await service.embed_text("query")
+        with pytest.raises(CircuitOpenError):
+            await service.embed_text("query")
+        assert provider.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_uses_fallback(self):
+        """Test the fallback provider serves requests while the circuit is open."""
+        fallback = ScriptedProvider([(0.0, False)])
+        service = EmbeddingService(
+            provider=ScriptedProvider([(0.0, True)]),
+            fallback_provider=fallback,
+            max_retries=0,
+            circuit_breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        )
+
+        with pytest.raises(EmbeddingError):
+            await service.embed_text("query")
+        result = await service.embed_text("query")
+
+        assert result == [1.0]
+        assert fallback.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_trial_releases_half_open_slot(self):
+        """Test a cancelled half-open trial lets the next call be the trial."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        service = EmbeddingService(
+            provider=ScriptedProvider([(10.0, False), (0.0, False)]),
+            hedge_percentile=0,
+            circuit_breaker=breaker
+        )
+
+        trial = asyncio.ensure_future(service.embed_text("query"))
+        await asyncio.sleep(0.01)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+
+        assert await service.embed_text("query") == [2.0]
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    @pytest.mark.asyncio
+    async def test_half_open_trial_is_not_hedged(self):
+        """Test a slow half-open trial is not hedged with a second call."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        provider = ScriptedProvider([(0.1, False)])
+        service = EmbeddingService(
+            provider=provider, hedge_percentile=0.5, hedge_budget_ratio=1.0, circuit_breaker=breaker
+        )
+        for _ in range(20):
+            service.latency.record(0.01)
+
+        assert await service.embed_text("query") == [1.0]
+        assert provider.calls == 1
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    @pytest.mark.asyncio
+    async def test_cancelled_call_keeps_another_calls_trial(self):
+        """Test cancelling a call started while closed does not free a later trial slot."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        service = EmbeddingService(
+            provider=ScriptedProvider([(10.0, False)]),
+            hedge_percentile=0,
+            circuit_breaker=breaker
+        )
+
+        call = asyncio.ensure_future(service.embed_text("query"))
+        await asyncio.sleep(0.01)
+        # Meanwhile the breaker trips and another request takes the trial
+        breaker.record_failure()
+        assert breaker.allow_request()
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+
+        assert not breaker.allow_request()
+
+    def test_incompatible_fallback_is_refused(self, tmp_path):
+        """Test a fallback embedding into another vector space is rejected."""
+        from app.services.embedding_providers import LocalEmbeddingProvider, OpenAIEmbeddingProvider
+
+        with pytest.raises(EmbeddingError):
+            EmbeddingService(
+                provider=OpenAIEmbeddingProvider(api_key="sk-test"),
+                fallback_provider=LocalEmbeddingProvider(str(tmp_path / "model.npz"))
+            )
+        service = EmbeddingService(
+            provider=OpenAIEmbeddingProvider(api_key="sk-test"),
+            fallback_provider=OpenAIEmbeddingProvider(api_key="sk-test", base_url="http://fallback.local/v1")
+        )
+        assert service.fallback_provider is not None
+
+
+def test_settings_reject_fallback_from_another_provider():
+    """Test the fallback provider must match the primary embedding provider."""
+    from pydantic import ValidationError
+    from app.core.config import Settings
+
+    with pytest.raises(ValidationError):
+        Settings(openai_api_key="sk-test", embedding_provider="openai", embedding_fallback_provider="local")
+    settings = Settings(openai_api_key="sk-test", embedding_fallback_provider="openai")
+    assert settings.embedding_fallback_provider == "openai"
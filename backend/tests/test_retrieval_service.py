@@ -1,8 +1,15 @@
 """Tests for RetrievalService."""
 
+import gzip
+import json
+
 import pytest
-from unittest.mock import Mock, AsyncMock
+from unittest.mock import Mock, AsyncMock, patch
+from app.core.exceptions import ModelNotFittedError
+from app.services.chunking_service import ChunkingService
+from app.services.embedding_providers import EmbeddingProvider, LocalEmbeddingProvider
 from app.services.retrieval_service import RetrievalService
+from app.utils.dataset_reader import ColumnMapping
 from app.models.domain import Document, Chunk
 from app.models.schemas import RetrievalResult
 
@@ -14,6 +21,7 @@ class TestRetrievalService:
     def mock_services(self):
         """Create mock services for testing."""
         embedding_service = Mock()
+        embedding_service.provider = EmbeddingProvider()
         embedding_service.embed_text = AsyncMock(return_value=[0.1] * 1536)
         embedding_service.embed_batch = AsyncMock(return_value=[[0.1] * 1536, [0.2] * 1536])
         
@@ -112,3 +120,116 @@ class TestRetrievalService:
         results = await service.retrieve("")
         
         assert isinstance(results, list)
+
+    @pytest.mark.asyncio
+    async def test_retrieve_records_trace(self, mock_services):
+        """Test retrieve records stage timings in the request trace."""
+        from app.utils.timing import RequestTrace
+
+        service = RetrievalService(
+            embedding_service=mock_services["embedding"],
+            chunking_service=mock_services["chunking"],
+            vector_store=mock_services["vector_store"],
+        )
+        trace = RequestTrace()
+
+        await service.retrieve("test query", trace=trace)
+
+        assert "embed" in trace.stages
+        # Serialization is timed once, by the route
+        assert "serialize" not in trace.stages
+        assert trace.counters["cache"] == "disabled"
+        assert mock_services["vector_store"].search.call_args.kwargs["trace"] is trace
+
+    @pytest.mark.asyncio
+    async def test_replace_document_embeds_only_that_document(self, mock_services):
+        """Test replace_document re-embeds one document and swaps its chunks."""
+        mock_services["vector_store"].replace_document = AsyncMock(return_value=3)
+
+        service = RetrievalService(
+            embedding_service=mock_services["embedding"],
+            chunking_service=mock_services["chunking"],
+            vector_store=mock_services["vector_store"],
+        )
+
+        result = await service.replace_document("doc1", "New text", {"rating": 5})
+
+        assert result["num_chunks"] == 2
+        assert result["deleted"] == 3
+        document = mock_services["chunking"].process_document.call_args.args[0]
+        assert document.document_id == "doc1"
+        document_id, chunks = mock_services["vector_store"].replace_document.call_args.args
+        assert document_id == "doc1"
+        assert chunks[1].embedding == [0.2] * 1536
+        assert chunks[0].metadata["rating"] == 5
+
+    @pytest.mark.asyncio
+    async def test_replace_document_does_not_fit_the_provider(self, mock_services, tmp_path):
+        """Test replace_document refuses to fit an unfitted provider on one document."""
+        mock_services["embedding"].provider = LocalEmbeddingProvider(str(tmp_path / "model.npz"))
+        service = RetrievalService(
+            embedding_service=mock_services["embedding"],
+            chunking_service=mock_services["chunking"],
+            vector_store=mock_services["vector_store"],
+        )
+
+        with pytest.raises(ModelNotFittedError):
+            await service.replace_document("doc1", "New text")
+        mock_services["embedding"].embed_batch.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_provider_is_fitted_on_a_sample_of_the_whole_dataset(self, tmp_path):
+        """Test the local provider is fitted once, on rows from all batches, before embedding."""
+        from app.services.embedding_service import EmbeddingService
+
+        path = tmp_path / "reviews.jsonl"
+        path.write_text("".join(json.dumps({"text": f"Review {i} about fit and fabric."}) + "\n" for i in range(40)))
+        provider = LocalEmbeddingProvider(
+            str(tmp_path / "model.npz"), dimensions=4, num_features=256, fit_sample_size=30, min_fit_texts=20
+        )
+        vector_store = Mock()
+        vector_store.name = "test_collection"
+        vector_store.add_chunks = AsyncMock()
+        service = RetrievalService(
+            embedding_service=EmbeddingService(provider=provider),
+            chunking_service=ChunkingService(),
+            vector_store=vector_store,
+            ingestion_batch_size=10,
+        )
+
+        with patch.object(provider, "fit", wraps=provider.fit) as fit:
+            result = await service.ingest_dataset(str(path))
+
+        fit.assert_called_once()
+        sample = fit.call_args.args[0]
+        assert len(sample) == 30
+        assert any(int(text.split()[1]) >= 30 for text in sample)
+        assert result["num_chunks"] == 40
+
+    @pytest.mark.asyncio
+    async def test_ingest_streams_jsonl_with_column_mapping(self, mock_services, tmp_path):
+        """Test ingest_dataset reads gzip JSON Lines in batches using the column mapping."""
+        path = tmp_path / "export.jsonl.gz"
+        with gzip.open(path, "wt") as f:
+            for i in range(5):
+                f.write(json.dumps({"id": i, "title": f"Title {i}", "body": "Fits well" if i != 2 else None,
+                                    "rating": i % 5}) + "\n")
+            f.write(json.dumps({"id": 5, "title": None, "body": None, "rating": 1}) + "\n")
+        mock_services["embedding"].embed_batch = AsyncMock(side_effect=lambda texts: [[0.1] * 4] * len(texts))
+
+        service = RetrievalService(
+            embedding_service=mock_services["embedding"],
+            chunking_service=ChunkingService(chunk_size=250, chunk_overlap=50),
+            vector_store=mock_services["vector_store"],
+            ingestion_batch_size=2,
+            column_mapping=ColumnMapping(text=["title", "body"], metadata=["rating"])
+        )
+
+        result = await service.ingest_dataset(str(path))
+
+        assert result["num_documents"] == 5
+        assert mock_services["vector_store"].add_chunks.await_count == 3
+        chunks = [chunk for call in mock_services["vector_store"].add_chunks.await_args_list for chunk in call.args[0]]
+        assert [chunk.text for chunk in chunks[:3]] == ["Title 0. Fits well", "Title 1. Fits well", "Title 2"]
+        assert chunks[3].metadata["rating"] == 3
+        assert chunks[3].metadata["row_index"] == 3
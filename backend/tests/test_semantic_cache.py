@@ -0,0 +1,133 @@
+"""Tests for SemanticCache."""
+
+import pytest
+from unittest.mock import Mock, AsyncMock
+from app.models.domain import Chunk
+from app.models.schemas import RetrievalResult
+from app.services.retrieval_service import RetrievalService
+from app.services.semantic_cache import SemanticCache
+
+
+def make_result(chunk_id: str) -> RetrievalResult:
+    """Create a retrieval result for caching."""
+    return RetrievalResult(
+        chunk_id=chunk_id,
+        text="Cached text",
+        similarity_score=0.9,
+        chunk_index=0,
+        document_id="doc1"
+    )
+
+
+class TestSemanticCache:
+    """Test cache lookup, eviction and invalidation."""
+
+    def test_near_duplicate_hits(self):
+        """Test a query within the distance threshold hits."""
+        cache = SemanticCache(max_entries=4, max_distance=0.05)
+        cache.put([1.0, 0.0, 0.0], [make_result("a")], version=1)
+
+        results = cache.get([0.99, 0.05, 0.0], version=1)
+
+        assert [r.chunk_id for r in results] == ["a"]
+        assert cache.hits == 1
+
+    def test_distant_query_misses(self):
+        """Test a dissimilar query misses."""
+        cache = SemanticCache(max_entries=4, max_distance=0.05)
+        cache.put([1.0, 0.0, 0.0], [make_result("a")], version=1)
+
+        assert cache.get([0.0, 1.0, 0.0], version=1) is None
+        assert cache.misses == 1
+
+    def test_least_recently_used_is_evicted(self):
+        """Test eviction keeps the cache bounded and drops the LRU entry."""
+        cache = SemanticCache(max_entries=2, max_distance=0.01)
+        cache.put([1.0, 0.0, 0.0], [make_result("a")], version=1)
+        cache.put([0.0, 1.0, 0.0], [make_result("b")], version=1)
+        cache.get([1.0, 0.0, 0.0], version=1)  # "a" is now most recent
+
+        cache.put([0.0, 0.0, 1.0], [make_result("c")], version=1)
+
+        assert len(cache) == 2
+        assert cache.get([0.0, 1.0, 0.0], version=1) is None
+        assert cache.get([1.0, 0.0, 0.0], version=1) is not None
+
+    def test_collection_change_invalidates(self):
+        """Test entries are dropped when the store version changes."""
+        cache = SemanticCache(max_entries=4)
+        cache.put([1.0, 0.0], [make_result("a")], version=1)
+
+        assert cache.get([1.0, 0.0], version=2) is None
+        assert len(cache) == 0
+
+    def test_results_from_older_version_are_not_cached(self):
+        """Test a put computed before the latest seen version is dropped."""
+        cache = SemanticCache(max_entries=4)
+        cache.get([1.0, 0.0], version=2)
+
+        cache.put([1.0, 0.0], [make_result("a")], version=1)
+
+        assert len(cache) == 0
+        assert cache.version == 2
+
+    def test_exact_text_lookup_follows_eviction(self):
+        """Test entries cached with text are found by text until evicted."""
+        cache = SemanticCache(max_entries=1)
+        cache.put([1.0, 0.0], [make_result("a")], version=1, text="soft fabric")
+
+        assert cache.get_text("soft fabric", version=1)[0].chunk_id == "a"
+        assert cache.get_text("other", version=1) is None
+
+        cache.put([0.0, 1.0], [make_result("b")], version=1)
+        assert cache.get_text("soft fabric", version=1) is None
+
+
+@pytest.mark.asyncio
+async def test_retrieve_serves_repeat_query_from_cache():
+    """Test a repeated query skips the vector search."""
+    embedding_service = Mock()
+    embedding_service.embed_text = AsyncMock(return_value=[0.1, 0.2, 0.3])
+    vector_store = Mock()
+    vector_store.version = 0
+    vector_store.search = AsyncMock(return_value=[
+        (Chunk(chunk_id="chunk1", text="Result", document_id="doc1", chunk_index=0), 0.8)
+    ])
+    service = RetrievalService(
+        embedding_service=embedding_service,
+        chunking_service=Mock(),
+        vector_store=vector_store,
+        semantic_cache=SemanticCache()
+    )
+
+    first = await service.retrieve("poor quality pants")
+    second = await service.retrieve("bad quality pants")
+
+    assert first == second
+    vector_store.search.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_write_during_search_is_not_cached_as_current():
+    """Test results are cached under the version read before the search."""
+    embedding_service = Mock()
+    embedding_service.embed_text = AsyncMock(return_value=[0.1, 0.2, 0.3])
+    vector_store = Mock()
+    vector_store.version = 0
+
+    async def search(**kwargs):
+        vector_store.version += 1  # a write lands while the search runs
+        return [(Chunk(chunk_id="chunk1", text="Result", document_id="doc1", chunk_index=0), 0.8)]
+
+    vector_store.search = AsyncMock(side_effect=search)
+    service = RetrievalService(
+        embedding_service=embedding_service,
+        chunking_service=Mock(),
+        vector_store=vector_store,
+        semantic_cache=SemanticCache()
+    )
+
+    await service.retrieve("poor quality pants")
+    await service.retrieve("poor quality pants")
+
+    assert vector_store.search.await_count == 2
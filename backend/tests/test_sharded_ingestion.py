@@ -0,0 +1,114 @@
+"""Tests for sharded ingestion with worker processes."""
+
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from app.core.exceptions import EmbeddingError
+from app.models.domain import Document
+from app.services.chunking_service import ChunkingService
+from app.services.embedding_providers import EmbeddingProvider
+from app.services.embedding_service import EmbeddingService
+from app.services.ingestion_checkpoint import IngestionCheckpoint, STATUS_STORED
+from app.services.sharded_ingestion import ShardedIngestion, chunk_rows
+
+
+class LengthEmbeddingProvider(EmbeddingProvider):
+    """Embeds a text as its length, so workers need no model or network."""
+
+    name = "length"
+
+    async def embed(self, texts):
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+class FailingEmbeddingProvider(EmbeddingProvider):
+    """Fails every embedding call."""
+
+    name = "failing"
+
+    async def embed(self, texts):
+        raise EmbeddingError("provider down")
+
+
+def length_embedding_service(num_processes):
+    return EmbeddingService(provider=LengthEmbeddingProvider())
+
+
+def failing_embedding_service(num_processes):
+    return EmbeddingService(provider=FailingEmbeddingProvider(), batch_max_retries=0, max_retries=0)
+
+
+def text_to_document(record, row_index, source_file):
+    if not record["text"]:
+        return None
+    return Document(content=record["text"], metadata={"row_index": row_index, "source_file": source_file})
+
+
+def _shards(num_rows, shard_size):
+    rows = [(i, {"text": f"Review {i}" if i % 5 else ""}) for i in range(num_rows)]
+    for shard_id, start in enumerate(range(0, num_rows, shard_size)):
+        yield shard_id, rows[start:start + shard_size]
+
+
+def _ingestion(tmp_path, factory=length_embedding_service, **kwargs):
+    vector_store = Mock()
+    vector_store.add_chunks = AsyncMock()
+    return ShardedIngestion(
+        vector_store,
+        IngestionCheckpoint(str(tmp_path), "run"),
+        embedding_service_factory=factory,
+        chunking_service=ChunkingService(),
+        to_document=text_to_document,
+        source_file="reviews.jsonl",
+        workers=2,
+        **kwargs
+    )
+
+
+def test_chunk_rows_skips_rows_without_documents():
+    """Test only rows converted to documents are chunked and counted."""
+    rows = [(0, {"text": "Soft fabric"}), (1, {"text": ""})]
+    num_documents, chunks = chunk_rows(rows, "f.jsonl", ChunkingService(), text_to_document)
+
+    assert num_documents == 1
+    assert [chunk.metadata["row_index"] for chunk in chunks] == [0]
+
+
+@pytest.mark.asyncio
+async def test_shards_are_embedded_by_workers_and_stored_by_the_caller(tmp_path):
+    """Test every shard is embedded in a worker, stored once and checkpointed."""
+    stored = []
+    ingestion = _ingestion(tmp_path, on_shard=lambda result, chunks: stored.append(result["shard_id"]))
+
+    report = await ingestion.run(_shards(30, shard_size=10))
+
+    chunks = [chunk for call in ingestion.vector_store.add_chunks.await_args_list for chunk in call.args[0]]
+    assert sorted(stored) == [0, 1, 2]
+    assert len(chunks) == 24
+    assert all(chunk.embedding == [float(len(chunk.text)), 1.0] for chunk in chunks)
+    assert sum(result["documents"] for result in report["results"]) == 24
+    assert all(ingestion.checkpoint.status(f"shard-{i}") == STATUS_STORED for i in range(3))
+
+
+@pytest.mark.asyncio
+async def test_stored_shards_are_skipped_on_resume(tmp_path):
+    """Test shards stored by an earlier run are counted but not embedded again."""
+    await _ingestion(tmp_path).run(_shards(30, shard_size=10))
+
+    resumed = _ingestion(tmp_path)
+    report = await resumed.run(_shards(30, shard_size=10))
+
+    resumed.vector_store.add_chunks.assert_not_awaited()
+    assert report["results"] == []
+    assert report["skipped"]["rows"] == 30
+
+
+@pytest.mark.asyncio
+async def test_worker_failure_raises_embedding_error(tmp_path):
+    """Test a shard that fails to embed raises EmbeddingError and is not stored."""
+    ingestion = _ingestion(tmp_path, factory=failing_embedding_service)
+
+    with pytest.raises(EmbeddingError):
+        await ingestion.run(_shards(10, shard_size=10))
+    assert ingestion.checkpoint.status("shard-0") is None
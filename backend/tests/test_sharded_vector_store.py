@@ -0,0 +1,117 @@
+"""Tests for the sharded vector store."""
+
+import warnings
+
+import pytest
+
+from app.services.sharded_vector_store import (
+    ShardedVectorStore,
+    create_shards,
+    create_vector_store,
+    shard_for,
+)
+from app.services.vector_store import VectorStore
+from app.utils.timing import RequestTrace
+
+
+def test_shard_for_is_stable():
+    """Test documents map to the same shard and all shards are used."""
+    assert shard_for("doc-1", 4) == shard_for("doc-1", 4)
+    assert {shard_for(f"doc-{i}", 4) for i in range(100)} == {0, 1, 2, 3}
+
+
+def test_create_vector_store_single_shard(tmp_path):
+    """Test a single shard creates a plain VectorStore."""
+    assert isinstance(create_vector_store("plain_store", str(tmp_path)), VectorStore)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("layout", ["collections", "directories"])
+async def test_search_matches_single_collection(tmp_path, layout, make_chunks):
+    """Test sharded search returns the same results as one collection."""
+    chunks = make_chunks(num_documents=20)
+    single = VectorStore("single_store", str(tmp_path / "single"))
+    await single.add_chunks(chunks)
+    sharded = ShardedVectorStore(create_shards("sharded_store", str(tmp_path / "sharded"), 3, layout))
+    await sharded.add_chunks(chunks)
+
+    assert sharded.count() == len(chunks)
+    assert sharded.version == 1
+    # All chunks of a document are in the same shard
+    for shard in sharded.shards:
+        stored = shard.collection.get()
+        for metadata in stored["metadatas"]:
+            assert shard_for(metadata["document_id"], 3) == sharded.shards.index(shard)
+
+    query = chunks[7].embedding
+    trace = RequestTrace()
+    expected = await single.search(query, top_k=5, threshold=0.1)
+    results = await sharded.search(query, top_k=5, threshold=0.1, trace=trace)
+
+    assert [chunk.chunk_id for chunk, _ in results] == [chunk.chunk_id for chunk, _ in expected]
+    assert results[0][0].chunk_id == chunks[7].chunk_id
+    assert trace.counters["shards"] == 3
+    assert trace.counters["candidates_before_threshold"] == 5
+
+
+@pytest.mark.asyncio
+async def test_rebalance_moves_without_reembedding(tmp_path, make_chunks):
+    """Test rebalancing moves stored embeddings to their new shards."""
+    chunks = make_chunks(num_documents=20)
+    store = ShardedVectorStore(create_shards("rebalance_store", str(tmp_path), 2))
+    await store.add_chunks(chunks)
+
+    # Reopen the existing shards as new objects and add two more
+    moved = store.rebalance(create_shards("rebalance_store", str(tmp_path), 4))
+
+    assert 0 < moved < len(chunks)
+    assert store.count() == len(chunks)
+    for index, shard in enumerate(store.shards):
+        for metadata in shard.collection.get()["metadatas"]:
+            assert shard_for(metadata["document_id"], 4) == index
+
+    results = await store.search(chunks[3].embedding, top_k=1, threshold=0.5)
+    assert results[0][0].chunk_id == chunks[3].chunk_id
+
+
+def test_hnsw_parameters_reach_collection(tmp_path):
+    """Test HNSW parameters are set on new and reset collections."""
+    store = VectorStore("tuned_store", str(tmp_path), hnsw_construction_ef=200, hnsw_search_ef=64, hnsw_m=32)
+    assert store.collection.metadata == {
+        "hnsw:space": "cosine",
+        "hnsw:construction_ef": 200,
+        "hnsw:search_ef": 64,
+        "hnsw:M": 32,
+    }
+
+    store.reset()
+    assert store.collection.metadata["hnsw:search_ef"] == 64
+
+    sharded = create_vector_store("tuned_sharded", str(tmp_path), num_shards=2, hnsw_search_ef=32)
+    assert all(shard.collection.metadata["hnsw:search_ef"] == 32 for shard in sharded.shards)
+
+
+@pytest.mark.asyncio
+async def test_reopened_collection_with_new_hnsw_parameters_is_compacted(tmp_path, make_chunks):
+    """Test new HNSW parameters on an existing collection warn until compaction."""
+    chunks = make_chunks(num_documents=20)
+    store = VectorStore("existing_store", str(tmp_path))
+    await store.add_chunks(chunks)
+    assert store.stale_hnsw_params == {}
+
+    with pytest.warns(UserWarning, match="existing_store"):
+        reopened = VectorStore("existing_store", str(tmp_path), hnsw_search_ef=64)
+    assert reopened.stale_hnsw_params == {"hnsw:search_ef": 64}
+    assert reopened.needs_compaction(0.5)
+    # Opening does not rewrite the metadata, so the next process still sees it is stale
+    assert "hnsw:search_ef" not in reopened.collection.metadata
+    with pytest.warns(UserWarning, match="existing_store"):
+        VectorStore("existing_store", str(tmp_path), hnsw_search_ef=64)
+
+    await reopened.compact()
+
+    assert not reopened.needs_compaction(0.5)
+    assert reopened.count() == len(chunks)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert VectorStore("existing_store", str(tmp_path), hnsw_search_ef=64).stale_hnsw_params == {}
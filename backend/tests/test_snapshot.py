@@ -0,0 +1,67 @@
+"""Tests for vector index snapshots."""
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from app.core.exceptions import SnapshotError
+from app.models.domain import Chunk
+from app.services.snapshot import EMBEDDINGS_FILE, export_snapshot, import_snapshot, verify_snapshot
+from app.services.vector_store import VectorStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return VectorStore(collection_name="snapshot_src", persist_directory=str(tmp_path / "src"))
+
+
+@pytest.mark.asyncio
+async def test_round_trip(tmp_path, store):
+    """Test a collection exported to a snapshot imports back unchanged."""
+    chunks = [
+        Chunk(
+            text=f"Chunk {i}",
+            document_id=f"doc{i // 2}",
+            chunk_index=i % 2,
+            embedding=[1.0, float(i), 0.5],
+            metadata={"source_file": "reviews.csv", "row_index": i}
+        )
+        for i in range(5)
+    ]
+    await store.add_chunks(chunks)
+
+    manifest = export_snapshot(store, str(tmp_path / "snap"), page_size=2)
+    assert manifest["count"] == 5
+    assert manifest["dimensions"] == 3
+    verify_snapshot(str(tmp_path / "snap"))
+
+    target = VectorStore(collection_name="snapshot_dst", persist_directory=str(tmp_path / "dst"))
+    import_snapshot(target, str(tmp_path / "snap"))
+
+    assert target.count() == 5
+    assert target.version == 1
+    restored = target.collection.get(ids=[chunks[3].chunk_id], include=["embeddings", "documents", "metadatas"])
+    assert restored["documents"] == ["Chunk 3"]
+    assert restored["embeddings"][0] == [1.0, 3.0, 0.5]
+    assert restored["metadatas"][0]["row_index"] == 3
+    assert restored["metadatas"][0]["document_id"] == "doc1"
+
+    with pytest.raises(SnapshotError):
+        import_snapshot(target, str(tmp_path / "snap"))
+    import_snapshot(target, str(tmp_path / "snap"), replace=True)
+    assert target.count() == 5
+
+
+@pytest.mark.asyncio
+async def test_corrupt_snapshot_is_rejected(tmp_path, store):
+    """Test a corrupted snapshot fails checksum verification."""
+    await store.add_chunks([Chunk(text="a", embedding=[0.1, 0.2])])
+    export_snapshot(store, str(tmp_path / "snap"))
+    with open(tmp_path / "snap" / EMBEDDINGS_FILE, "r+b") as f:
+        f.seek(-1, 2)
+        f.write(b"\xff")
+
+    with pytest.raises(SnapshotError, match="Checksum"):
+        verify_snapshot(str(tmp_path / "snap"))
+    with pytest.raises(SnapshotError):
+        export_snapshot(store, str(tmp_path / "snap"))
@@ -0,0 +1,168 @@
+"""Tests for publishing snapshots and serving them read-only."""
+
+import threading
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from app.services.admission import AdmissionController
+from app.services.retrieval_service import RetrievalService
+from app.services.semantic_cache import SemanticCache
+from app.services.sharded_vector_store import ShardedVectorStore, create_shards
+from app.services.snapshot import current_snapshot, publish_snapshot
+from app.services.snapshot_vector_store import SnapshotVectorStore
+from app.services.vector_store import VectorStore
+
+
+@pytest.mark.asyncio
+async def test_serves_published_snapshot_like_chroma(tmp_path, make_chunks):
+    """Test snapshot search matches the Chroma collection it was published from."""
+    store = VectorStore("writer_store", str(tmp_path / "chroma"))
+    chunks = make_chunks(num_documents=30, chunks_per_document=1)
+    await store.add_chunks(chunks)
+    root = str(tmp_path / "snapshots")
+
+    reader = SnapshotVectorStore(root, poll_interval=0.0)
+    assert reader.count() == 0
+    assert await reader.search(chunks[0].embedding, top_k=3, threshold=0.0) == []
+
+    publish_snapshot(store, root)
+    assert reader.count() == 30
+    assert reader.version == 1
+
+    expected = await store.search(chunks[4].embedding, top_k=5, threshold=-1.0)
+    results = await reader.search(chunks[4].embedding, top_k=5, threshold=-1.0)
+    assert [chunk.chunk_id for chunk, _ in results] == [chunk.chunk_id for chunk, _ in expected]
+    assert [score for _, score in results] == pytest.approx([score for _, score in expected], abs=1e-4)
+    assert results[0][0].text == chunks[4].text
+    assert results[0][0].document_id == chunks[4].document_id
+    assert results[0][0].metadata["source_file"] == "reviews.csv"
+
+
+@pytest.mark.asyncio
+async def test_new_publish_is_picked_up_and_old_ones_pruned(tmp_path, make_chunks):
+    """Test a refresh picks up a new publish and old snapshots are pruned."""
+    store = VectorStore("writer_store", str(tmp_path / "chroma"))
+    await store.add_chunks(make_chunks(seed=0, chunks_per_document=1))
+    root = str(tmp_path / "snapshots")
+    first = publish_snapshot(store, root)
+
+    reader = SnapshotVectorStore(root, poll_interval=3600)
+    assert reader.count() == 10
+
+    await store.add_chunks(make_chunks(seed=1, chunks_per_document=1))
+    publish_snapshot(store, root, keep=1)
+
+    # Not polled yet: still serving the first snapshot (its files stay mapped)
+    assert reader.count() == 10
+    assert reader.refresh()
+    assert reader.count() == 20
+    assert reader.version == 2
+    assert not reader.refresh()
+    assert current_snapshot(root) != first["path"]
+    assert len([p for p in (tmp_path / "snapshots").iterdir() if p.is_dir()]) == 1
+
+
+@pytest.mark.asyncio
+async def test_text_cached_query_sees_a_new_publish(tmp_path, make_chunks):
+    """Test a repeated, text-cached query is answered from a newly published snapshot."""
+    store = VectorStore("writer_store", str(tmp_path / "chroma"))
+    await store.add_chunks(make_chunks(seed=0, chunks_per_document=1))
+    root = str(tmp_path / "snapshots")
+    publish_snapshot(store, root)
+
+    reader = SnapshotVectorStore(root, poll_interval=0.0)
+    new_chunks = make_chunks(seed=1, chunks_per_document=1)
+    embedding_service = Mock()
+    embedding_service.embed_text = AsyncMock(return_value=new_chunks[0].embedding)
+    service = RetrievalService(
+        embedding_service=embedding_service,
+        chunking_service=Mock(),
+        vector_store=reader,
+        similarity_threshold=-1.0,
+        semantic_cache=SemanticCache()
+    )
+    first = await service.retrieve("soft fabric")
+    assert (await service.retrieve("soft fabric")) == first
+
+    await store.add_chunks(new_chunks)
+    publish_snapshot(store, root)
+    results = await service.retrieve("soft fabric")
+
+    assert results[0].chunk_id == new_chunks[0].chunk_id
+    assert reader.version == 2
+
+
+@pytest.mark.asyncio
+async def test_sharded_store_is_published_as_one_snapshot(tmp_path, make_chunks):
+    """Test a sharded store is published as a single snapshot."""
+    store = ShardedVectorStore(create_shards("sharded_writer", str(tmp_path / "chroma"), 3), name="sharded_writer")
+    chunks = make_chunks(num_documents=25, seed=2, chunks_per_document=1)
+    await store.add_chunks(chunks)
+
+    manifest = publish_snapshot(store, str(tmp_path / "snapshots"))
+    assert manifest["count"] == 25
+    assert manifest["collection"] == "sharded_writer"
+
+    reader = SnapshotVectorStore(str(tmp_path / "snapshots"))
+    results = await reader.search(chunks[17].embedding, top_k=1, threshold=0.0)
+    assert results[0][0].chunk_id == chunks[17].chunk_id
+    assert results[0][1] == pytest.approx(1.0, abs=1e-5)
+
+
+@pytest.mark.asyncio
+async def test_search_runs_off_the_event_loop(tmp_path, make_chunks):
+    """Test the snapshot refresh and matrix product run in a worker thread."""
+    store = VectorStore("writer_store", str(tmp_path / "chroma"))
+    chunks = make_chunks(chunks_per_document=1)
+    await store.add_chunks(chunks)
+    root = str(tmp_path / "snapshots")
+    reader = SnapshotVectorStore(root, poll_interval=0.0)
+    publish_snapshot(store, root)
+    threads = []
+
+    def record(method):
+        def wrapper(*args):
+            threads.append(threading.get_ident())
+            return method(*args)
+        return wrapper
+
+    with patch.object(reader, "refresh", record(reader.refresh)), \
+            patch.object(SnapshotVectorStore, "query_rows", Mock(side_effect=record(SnapshotVectorStore.query_rows))):
+        results = await reader.search(chunks[1].embedding, top_k=1, threshold=0.0)
+
+    assert results[0][0].chunk_id == chunks[1].chunk_id
+    assert len(threads) == 2
+    assert threading.get_ident() not in threads
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sharded", [False, True])
+async def test_publish_endpoint_holds_write_locks(tmp_path, sharded, make_chunks):
+    """Test publishing holds every write lock of the store while it exports."""
+    from app.api.routes import snapshots
+
+    if sharded:
+        store = ShardedVectorStore(create_shards("locked_writer", str(tmp_path / "chroma"), 2))
+        locks = [shard._write_lock for shard in store.shards]
+    else:
+        store = VectorStore("locked_writer", str(tmp_path / "chroma"))
+        locks = [store._write_lock]
+    await store.add_chunks(make_chunks(chunks_per_document=1))
+    settings = Mock()
+    settings.get_snapshot_directory.return_value = str(tmp_path / "snapshots")
+    held = []
+
+    def export(vector_store, root):
+        held.extend(lock.locked() for lock in locks)
+        return publish_snapshot(vector_store, root)
+
+    with patch.object(snapshots, "get_vector_store", return_value=store), \
+            patch.object(snapshots, "publish_snapshot", side_effect=export):
+        response = await snapshots.publish(settings=settings, admission=AdmissionController())
+
+    assert response.count == 10
+    assert held == [True] * len(locks)
+    assert not any(lock.locked() for lock in locks)
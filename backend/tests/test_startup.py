@@ -0,0 +1,32 @@
+"""Tests for import-light startup of query-only workers."""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+
+def _loaded_modules(mode):
+    env = {**os.environ, "SERVING_MODE": mode, "OPENAI_API_KEY": "sk-test"}
+    completed = subprocess.run(
+        [sys.executable, "-c", "import json, sys, main; print(json.dumps(sorted(sys.modules)))"],
+        cwd=Path(__file__).parent.parent,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return set(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+
+@pytest.mark.parametrize("mode", ["readonly", "readwrite"])
+def test_startup_does_not_import_ingestion_dependencies(mode):
+    """Test serving starts without importing ingestion dependencies."""
+    loaded = _loaded_modules(mode)
+
+    assert "pandas" not in loaded
+    assert "chromadb" not in loaded
+    assert ("app.api.routes.ingestion" in loaded) == (mode == "readwrite")